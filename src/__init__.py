@@ -26,8 +26,8 @@ parser.add_argument('--log_level', type=str,
                     help=strings.ARG_LOG_LEVEL_HELP,
                     default=strings.ARG_LOG_LEVEL_DEF)
 
-# Parse arguments
-args = parser.parse_args()
+# Parse arguments, the ones of other entry points like the simulation are left to them
+args, _ = parser.parse_known_args()
 
 # Switch to the appropriate LOG LEVEL
 if args.log_level == 'DEBUG':
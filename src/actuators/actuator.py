@@ -1,12 +1,10 @@
 import logging
-import datetime
 
 from pymongo import errors
 
 import src.strings_constants.strings as strings
-from src.database import timezone
-from src.driver import driver
 from src.database.models import ActuatorData
+from src.utils import clock
 
 
 class Actuator:
@@ -36,7 +34,9 @@ class Actuator:
         """
         This method changes the current actuator state
         """
-        # Call the driver to change the state
+        # Call the driver to change the state. It's imported here because the driver imports the models, which
+        # create the actuators, so src.driver may not be initialized yet when this module is imported
+        from src.driver import driver
         driver.set_state(self.actuator_type, state)
 
         # Store the new sensor data and save its previous value
@@ -45,7 +45,7 @@ class Actuator:
 
         # Store the current datetime and its previous value
         self.previous_datetime = self.datetime
-        self.datetime = timezone.localize(datetime.datetime.now())
+        self.datetime = clock.localized()
 
         # Save to database
         self.save_to_db()
@@ -1,4 +1,3 @@
-import datetime
 import logging
 
 import numpy as np
@@ -8,6 +7,7 @@ from pymongo import errors
 
 import src.strings_constants.strings as strings
 from src.database import timezone
+from src.utils import clock
 from src.database.db import db
 from src.database.models import ChemicalsAlgorithmData
 from src.models import Timer, actuators, water
@@ -33,10 +33,11 @@ class Chemicals:
     total_orp_daily_seconds = 0
     total_ph_daily_seconds = 0
     main_timer = None
-    day = datetime.datetime.now().day
+    day = None
 
     def __init__(self):
         logging.log(logging.INFO, strings.LOG_CHEMICALS_INSTANTIATED)
+        self.day = clock.now().day
         self.load_from_db()
 
         # Map poolcfg variables to the update method
@@ -164,9 +165,9 @@ class Chemicals:
                 actuators.setstate(cfg.BLEACH_PUMP, False)
                 actuators.setstate(cfg.ACID_PUMP, False)
 
-        if datetime.datetime.now().day != self.day:
+        if clock.now().day != self.day:
             # Day has changed, reset statistics
-            self.day = datetime.datetime.now().day
+            self.day = clock.now().day
             self.total_ph_daily_seconds = 0
             self.total_orp_daily_seconds = 0
 
@@ -213,7 +214,7 @@ class Chemicals:
             # Create a new object in database and save all the data
             chemicalsdb = ChemicalsAlgorithmData()
 
-            chemicalsdb.datetime = timezone.localize(datetime.datetime.now())
+            chemicalsdb.datetime = clock.localized()
             chemicalsdb.algorithm_cycle_seconds = self.algorithm_cycle_seconds
             chemicalsdb.algorithm_orp_injected_seconds = self.algorithm_orp_injected_seconds
             chemicalsdb.algorithm_ph_injected_seconds = self.algorithm_ph_injected_seconds
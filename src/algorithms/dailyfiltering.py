@@ -1,4 +1,3 @@
-import datetime
 import logging
 
 import numpy as np
@@ -8,6 +7,7 @@ import src.config.configconstants as cfg
 import src.strings_constants.strings as strings
 from src.config.pool import poolcfg
 from src.database import timezone
+from src.utils import clock
 from src.database.db import db
 from src.database.models import FilterAlgorithmData
 from src.models import actuators, water, Timer
@@ -27,11 +27,12 @@ class DailyFiltering:
     allowed_hours = poolcfg.daily_filter_allowed_hours
     total_daily_seconds = 0
     total_daily_seconds_remaining = 0
-    day = datetime.datetime.now().day
+    day = None
     filtering_timer = None
 
     def __init__(self):
         logging.log(logging.DEBUG, strings.LOG_DFILT_INSTANTIATED)
+        self.day = clock.now().day
         self.load_from_db()
         poolcfg.daily_filter_allowed_hours_cb = self._update_config
         water.add_cb(self.__update__)
@@ -91,7 +92,7 @@ class DailyFiltering:
         if self.state == cfg.STATE_WAITING_DAILY_CYCLE:
             # Check if we are on an allowed hours and there are seconds pending
             if self.total_daily_seconds_remaining > 0:
-                if datetime.datetime.now().hour in self.allowed_hours:
+                if clock.now().hour in self.allowed_hours:
                     '''
                         There are remaining daily filter seconds, and we are on an allowed hour
                         check that we aren't on manual or emergency stop mode, and turn on the filter
@@ -109,7 +110,7 @@ class DailyFiltering:
         elif self.state == cfg.STATE_FILTERING:
             # Update statistics
 
-            if self.total_daily_seconds_remaining > 0 and datetime.datetime.now().hour in self.allowed_hours:
+            if self.total_daily_seconds_remaining > 0 and clock.now().hour in self.allowed_hours:
                 if actuators.PUMP_AUTOMATIC_CONTROL:
                     if actuators.FILTER_PUMP_REAL_STATE:
                         self.total_daily_seconds_remaining -= 1
@@ -122,9 +123,9 @@ class DailyFiltering:
                 self.save_to_db()
 
         # Check if this is another day
-        if self.day != datetime.datetime.now().day:
+        if self.day != clock.now().day:
             # Reset counters
-            self.day = datetime.datetime.now().day
+            self.day = clock.now().day
             self.total_daily_seconds_remaining = self.total_daily_seconds
 
     def load_from_db(self):
@@ -169,7 +170,7 @@ class DailyFiltering:
             # Create a new SensorData object in database and save all the data
             filterdb = FilterAlgorithmData()
 
-            filterdb.datetime = timezone.localize(datetime.datetime.now())
+            filterdb.datetime = clock.localized()
             filterdb.total_daily_seconds = self.total_daily_seconds
             filterdb.total_daily_seconds_remaining = self.total_daily_seconds_remaining
 
@@ -1,6 +1,4 @@
-import datetime
 import logging
-import time
 
 import pymongo
 from bson.codec_options import CodecOptions
@@ -8,6 +6,7 @@ from bson.codec_options import CodecOptions
 import src.strings_constants.strings as strings
 from src.config.pool import poolcfg
 from src.database import timezone
+from src.utils import clock
 from src.database.db import db
 from src.database.models import LevelAlgorithmData
 from src.models import Timer, actuators, water
@@ -18,7 +17,11 @@ from pymongo import errors
 
 class Level:
     """
-    This is a class that implements the pool water level control Algorithm
+    This is a class that implements the pool water level control Algorithm.
+
+    It's a state machine run every second that never blocks: after filling a given volume, the fill valve is
+    closed and the algorithm waits until a deadline for the water to settle, checking it on every run, before
+    reading the level sensors again. Every state change is saved, so the algorithm goes on after a restart.
     """
 
     fill_level_timer = None
@@ -27,10 +30,21 @@ class Level:
     daily_filled_volume = 0
     start_volume = 0
 
-    day = datetime.datetime.now().day
+    '''
+    POSIX timestamp when the water will have settled, while waiting for it
+    '''
+    settle_deadline = None
+
+    '''
+    Volume of the flow sensor in the last run, to add only the water filled since then
+    '''
+    last_volume = 0
+
+    day = None
 
     def __init__(self):
         logging.log(logging.INFO, strings.LOG_LEVELS_INSTANTIATED)
+        self.day = clock.now().day
         self.load_from_db()
         self.fill_level_timer = Timer(self._level_control, period=1)
         self.fill_level_timer.start()
@@ -39,6 +53,8 @@ class Level:
         """
         This timer executes every second the fill level control algorithm
         """
+        changed = False
+
         if self.state == cfg.STATE_WAITING_FOR_FILL:
             # Check that we are on automatic fill control
             if actuators.VALVE_AUTOMATIC_CONTROL:
@@ -49,14 +65,10 @@ class Level:
                 # Check if there is no water in the fill start level
                 no_water = not water.levels[poolcfg.pool_fill_start_level]
 
-                # If there is no water, change state
-                if no_water is not None and no_water \
-                        and self.daily_filled_volume < poolcfg.pool_max_daily_water_volume_m3:
-                    # Turn on Fill valve and change state
-                    self.start_volume = flowSensor.daily_volume
-                    self.state = cfg.STATE_FILLING
-                    actuators.setstate(cfg.FILL_VALVE, True)
-                    logging.log(logging.INFO, strings.LOG_LEVELS_STATE, cfg.STATE_FILLING)
+                # If there is no water, start filling
+                if no_water and self.daily_filled_volume < poolcfg.pool_max_daily_water_volume_m3:
+                    self._start_filling()
+                    changed = True
 
         elif self.state == cfg.STATE_FILLING:
             # Check if we are on automatic control
@@ -65,49 +77,82 @@ class Level:
                 if not actuators.FILL_VALVE_STATE:
                     actuators.setstate(cfg.FILL_VALVE, True)
 
-                # Check if we have reached the target volume
-                difference = flowSensor.daily_volume - self.start_volume
-
-                # If there has been a day change, set new start volume
-                if difference < 0:
-                    self.start_volume = flowSensor.daily_volume
-                    difference = 0
-
                 # Update statistics
-                self.daily_filled_volume += difference
+                changed = self._update_filled_volume()
 
                 # Check that we have not reached the max daily filter volume
                 if self.daily_filled_volume <= poolcfg.pool_max_daily_water_volume_m3:
 
-                    if difference >= poolcfg.pool_fill_volume_between_checks:
-                        # Stop fill valve
+                    # Check if we have reached the target volume
+                    if flowSensor.daily_volume - self.start_volume >= poolcfg.pool_fill_volume_between_checks:
+                        # Stop fill valve and wait for the water to settle
                         actuators.setstate(cfg.FILL_VALVE, False)
+                        self.settle_deadline = clock.time() + poolcfg.pool_fill_seconds_wait
+                        self._change_state(cfg.STATE_WAITING_FOR_SETTLE)
+                        changed = True
+                else:
+                    # Stop fill valve and change state
+                    actuators.setstate(cfg.FILL_VALVE, False)
+                    self._change_state(cfg.STATE_WAITING_FOR_FILL)
+                    changed = True
 
-                        # Wait a given amount of time
-                        time.sleep(poolcfg.pool_fill_seconds_wait)
+        elif self.state == cfg.STATE_WAITING_FOR_SETTLE:
+            # Check if we are on automatic control and the water has settled
+            if actuators.VALVE_AUTOMATIC_CONTROL and clock.time() >= self.settle_deadline:
+                self.settle_deadline = None
 
-                        # Check if we have reached the desired water level
-                        reached = water.levels[poolcfg.pool_fill_end_level]
+                # Check if we have reached the desired water level
+                reached = water.levels[poolcfg.pool_fill_end_level]
 
-                        # If yes, change state if no, continue filling
-                        if reached is not None and reached:
-                            self.state = cfg.STATE_WAITING_FOR_FILL
-                            logging.log(logging.INFO, strings.LOG_LEVELS_STATE, cfg.STATE_WAITING_FOR_FILL)
-                        else:
-                            self.start_volume = flowSensor.daily_volume
-                            actuators.setstate(cfg.FILL_VALVE, True)
+                # If yes, change state if no, continue filling
+                if reached is not None and reached:
+                    self._change_state(cfg.STATE_WAITING_FOR_FILL)
                 else:
-                    # Stop fill valve and change state
-                    actuators.setstate(cfg.FILL_VALVE, False)
-                    self.state = cfg.STATE_WAITING_FOR_FILL
-                    logging.log(logging.INFO, strings.LOG_LEVELS_STATE, cfg.STATE_WAITING_FOR_FILL)
+                    self._start_filling()
+                changed = True
 
-        if datetime.datetime.now().day != self.day:
+        if clock.now().day != self.day:
             # Day has changed, reset statistics
-            self.day = datetime.datetime.now().day
+            self.day = clock.now().day
             self.daily_filled_volume = 0
+            changed = True
 
-        self.save_to_db()
+        if changed:
+            self.save_to_db()
+
+    def _start_filling(self):
+        """
+        This method opens the fill valve and changes to the filling state
+        """
+        self.start_volume = self.last_volume = flowSensor.daily_volume
+        actuators.setstate(cfg.FILL_VALVE, True)
+        self._change_state(cfg.STATE_FILLING)
+
+    def _update_filled_volume(self):
+        """
+        This method adds the volume filled since the last run to the daily filled volume
+
+        Returns: True if the volume has changed
+        """
+        volume = flowSensor.daily_volume
+
+        if volume < self.last_volume:
+            # The flow sensor has started a new day, start counting again
+            self.start_volume = self.last_volume = volume
+            return False
+
+        filled = volume - self.last_volume
+        self.last_volume = volume
+        self.daily_filled_volume += filled
+
+        return filled != 0
+
+    def _change_state(self, state):
+        """
+        This method changes the state of the algorithm
+        """
+        self.state = state
+        logging.log(logging.INFO, strings.LOG_LEVELS_STATE, state)
 
     def load_from_db(self):
         """
@@ -130,6 +175,14 @@ class Level:
             else:
                 self.daily_filled_volume = record["daily_filled_volume"]
 
+            # Go on with the fill, if it was stopped in the middle of it
+            self.state = record["state"]
+            self.start_volume = self.last_volume = record["start_volume"]
+            self.settle_deadline = record.get("settle_deadline")
+
+            if self.state == cfg.STATE_WAITING_FOR_SETTLE and self.settle_deadline is None:
+                self.settle_deadline = clock.time()
+
             logging.log(logging.INFO, strings.LOG_LEVELS_LOADED)
 
         except IndexError:
@@ -149,13 +202,14 @@ class Level:
             # Create a new object in database and save all the data
             leveldb = LevelAlgorithmData()
 
-            leveldb.datetime = timezone.localize(datetime.datetime.now())
+            leveldb.datetime = clock.localized()
             leveldb.state = self.state
             leveldb.daily_filled_volume = self.daily_filled_volume
             leveldb.start_volume = self.start_volume
+            leveldb.settle_deadline = self.settle_deadline
 
             # If there is a new day save a new record, if not update last record
-            if self.day != datetime.datetime.now().day:
+            if self.day != clock.now().day:
                 leveldb.save()
             else:
                 col.replace_one({}, leveldb.to_mongo(), upsert=True)
@@ -1,12 +1,10 @@
-import datetime
 import logging
-import socket
-import time
 
 import pymongo
 
 import src.strings_constants.strings as strings
 from src.database import timezone
+from src.utils import clock
 from src.database.db import db
 from src.database.models import LightsAlgorithmData
 from bson.codec_options import CodecOptions
@@ -15,6 +13,7 @@ from src.models import Timer
 from src.sensors import lightSensor
 import src.config.configconstants as cfg
 from src.config.pool import poolcfg
+from src.driver.lumiplus import LumiplusClient, LightDispatcher, LightTask
 
 from pymongo import errors
 
@@ -73,6 +72,10 @@ class Lights:
     _COMMAND_TIMING_6 = b'023103'
     _COMMAND_TIMING_7 = b'023104'
 
+    # Timing commands for each duration in seconds
+    _TIMING_COMMANDS = {5 * 60: 28, 15 * 60: 29, 30 * 60: 30, 60 * 60: 31, 90 * 60: 32, 2 * 60 * 60: 33,
+                        4 * 60 * 60: 34, 8 * 60 * 60: 35}
+
     ''' Algorithm constants '''
     auto_lights_on = poolcfg.pool_auto_lights_on
     auto_lights_on_command_sequence = poolcfg.pool_auto_lights_on_command_sequence["sequence"]
@@ -83,6 +86,9 @@ class Lights:
 
     def __init__(self):
         logging.log(logging.INFO, strings.LOG_LIGHTS_INSTANTIATED)
+        # Commands are sent from the thread of the dispatcher, over a single connection
+        self.client = LumiplusClient(self._HOST, self._PORT)
+        self.dispatcher = LightDispatcher(self._send, self._command_sent)
         self.load_from_db()
         if self.auto_lights_on:
             if lightSensor.value:
@@ -124,8 +130,11 @@ class Lights:
 
     def execute_command_sequence(self, sequence):
         """
-        This method executes a given command sequence
+        This method starts the execution of a given command sequence, cancelling the one being executed, if any.
+        It returns at once, the commands are sent by the dispatcher.
         """
+        tasks = []
+
         # Iterate the sequence list
         for cmd_list in sequence:
             '''
@@ -134,27 +143,22 @@ class Lights:
             second position is the duration of the command in seconds
             '''
             if cmd_list[1] <= 0:
-                self.send_command(cmd_list[0])
+                tasks.append(LightTask(cmd_list[0], 0))
+            elif cmd_list[1] in self._TIMING_COMMANDS:
+                # The controller times the command by itself, once it has been sent
+                tasks.append(LightTask(cmd_list[0], 0))
+                tasks.append(LightTask(self._TIMING_COMMANDS[cmd_list[1]], 0, after_sent=True))
             else:
-                if self.send_command(cmd_list[0]):
-                    if cmd_list[1] == 5 * 60:
-                        self.send_command(28)
-                    elif cmd_list[1] == 15 * 60:
-                        self.send_command(29)
-                    elif cmd_list[1] == 30 * 60:
-                        self.send_command(30)
-                    elif cmd_list[1] == 60 * 60:
-                        self.send_command(31)
-                    elif cmd_list[1] == 90 * 60:
-                        self.send_command(32)
-                    elif cmd_list[1] == 2 * 60 * 60:
-                        self.send_command(33)
-                    elif cmd_list[1] == 4 * 60 * 60:
-                        self.send_command(34)
-                    elif cmd_list[1] == 8 * 60 * 60:
-                        self.send_command(35)
-                    else:
-                        time.sleep(cmd_list[1])
+                tasks.append(LightTask(cmd_list[0], cmd_list[1]))
+
+        self.dispatcher.run(tasks)
+
+    def cancel_command_sequence(self):
+        """
+        This method cancels the command sequence being executed, if any
+        """
+        logging.log(logging.INFO, strings.LOG_LIGHTS_SEQUENCE_CANCELLED)
+        self.dispatcher.cancel()
 
     def set_automatic_light_control(self, state: bool):
         """
@@ -198,7 +202,7 @@ class Lights:
             # Create a new object in database and save all the data
             lightsdb = LightsAlgorithmData()
 
-            lightsdb.datetime = timezone.localize(datetime.datetime.now())
+            lightsdb.datetime = clock.localized()
             lightsdb.lights_are_on = self.lights_are_on
             col.replace_one({}, lightsdb.to_mongo(), upsert=True)
         except errors.PyMongoError:
@@ -206,10 +210,24 @@ class Lights:
 
     def send_command(self, command: int) -> bool:
         """
-        This function sends a light command to the LUMIPLUS controller
+        This function sends a light command to the LUMIPLUS controller, cancelling the command sequence being
+        executed, if any. It returns at once, the command is sent by the dispatcher.
+
+        Returns: True if the command exists
+        """
+        if self._light_command(command) is None:
+            logging.log(logging.ERROR, strings.LOG_LIGHTS_UNKNOWN_COMMAND, command)
+            return False
+
+        self.dispatcher.run([LightTask(command, 0)])
+        return True
+
+    def _light_command(self, command: int):
         """
-        # First, map the command with the corresponding LUMIPLUS command
+        This method maps the command with the corresponding LUMIPLUS command
 
+        Returns: The bytes of the LUMIPLUS command, or None if the command doesn't exist
+        """
         light_command = None
 
         if command == 0:
@@ -285,21 +303,24 @@ class Lights:
         elif command == 35:
             light_command = self._COMMAND_TIMING_7
 
-        data_ok = False
-
-        if light_command is not None:
-            # Create socket and send command
-            try:
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.connect((self._HOST, self._PORT))
-                    s.sendall(light_command)  # Send the command
-                    data = s.recv(1024)
-                    # Check if received data is equal to sent data
-                    if data == light_command:
-                        data_ok = True
-            except socket.error as e:
-                logging.log(logging.ERROR, strings.LOG_LIGHTS_NET_ERROR, str(e))
+        return light_command
+
+    def _send(self, command: int) -> bool:
+        """
+        This method sends a light command to the LUMIPLUS controller. It's called by the dispatcher.
+
+        Returns: True if the controller has answered the command
+        """
+        light_command = self._light_command(command)
+        if light_command is None:
+            return False
 
+        return self.client.send(light_command)
+
+    def _command_sent(self, command: int, data_ok: bool):
+        """
+        This method updates the state of the lights after a command has been sent. It's called by the dispatcher.
+        """
         if 1 <= command <= 20 and data_ok:
             self.lights_are_on = True
             self.save_to_db()
@@ -307,5 +328,3 @@ class Lights:
         if command == 0 and data_ok:
             self.lights_are_on = False
             self.save_to_db()
-
-        return data_ok
@@ -1,67 +1,73 @@
 import logging
 from json import JSONDecodeError
 
-from flask import jsonify, request
-from flask_jwt_extended import get_jwt_identity
-from flask_jwt_extended import jwt_required
+from flask import jsonify, request, g
 from flask_restful import Resource
 from mongoengine import FieldDoesNotExist
 
 import src.config.configconstants as cfg
 from src.api.resources.errors import UnauthorizedError, InternalServerError, SchemaValidationError, BadRequestError
-from src.database.models import User
+from src.api.resources.identity import user_required
 from src.models import actuators
 from src.strings_constants import strings
 
 
+def actuators_summary():
+    """
+    This function returns the current state and statistics of all actuators
+
+    Returns: A dict with the data of every actuator
+    """
+    return {"pump_automatic_control": actuators.PUMP_AUTOMATIC_CONTROL,
+            "valve_automatic_control": actuators.VALVE_AUTOMATIC_CONTROL,
+            "filter_pump_real_state": actuators.FILTER_PUMP_REAL_STATE,
+            "filter_pump_teoric_state": actuators.FILTER_PUMP_TEORIC_STATE,
+            "filter_pump_on_real_seconds": actuators.FILTER_PUMP_ON_REAL_SECONDS,
+            "filter_pump_on_total_seconds": actuators.FILTER_PUMP_ON_TOTAL_SECONDS,
+            "filter_pump_on_auto_seconds": actuators.FILTER_PUMP_ON_AUTO_SECONDS,
+            "filter_pump_on_manual_seconds": actuators.FILTER_PUMP_ON_MANUAL_SECONDS,
+            "filter_pump_seconds_since_last_on": actuators.FILTER_PUMP_SEC_SINCE_LAST_ON,
+            "bleach_pump_teoric_state": actuators.BLEACH_PUMP_STATE,
+            "bleach_pump_on_total_seconds": actuators.BLEACH_PUMP_ON_TOTAL_SECONDS,
+            "bleach_pump_on_auto_seconds": actuators.BLEACH_PUMP_ON_AUTO_SECONDS,
+            "bleach_pump_on_manual_seconds": actuators.BLEACH_PUMP_ON_MANUAL_SECONDS,
+            "bleach_pump_seconds_since_last_on": actuators.BLEACH_PUMP_SEC_SINCE_LAST_ON,
+            "acid_pump_teoric_state": actuators.ACID_PUMP_STATE,
+            "acid_pump_on_total_seconds": actuators.ACID_PUMP_ON_TOTAL_SECONDS,
+            "acid_pump_on_auto_seconds": actuators.ACID_PUMP_ON_AUTO_SECONDS,
+            "acid_pump_on_manual_seconds": actuators.ACID_PUMP_ON_MANUAL_SECONDS,
+            "acid_pump_seconds_since_last_on": actuators.ACID_PUMP_SEC_SINCE_LAST_ON,
+            "fill_valve_teoric_state": actuators.FILL_VALVE_STATE,
+            "fill_valve_on_total_seconds": actuators.FILL_VALVE_ON_TOTAL_SECONDS,
+            "fill_valve_on_auto_seconds": actuators.FILL_VALVE_ON_AUTO_SECONDS,
+            "fill_valve_on_manual_seconds": actuators.FILL_VALVE_ON_MANUAL_SECONDS,
+            "aux_out_teoric_state": actuators.AUX_OUT_STATE,
+            "aux_out_on_total_seconds": actuators.AUX_OUT_ON_TOTAL_SECONDS,
+            "aux_out_on_auto_seconds": actuators.AUX_OUT_ON_AUTO_SECONDS,
+            "aux_out_on_manual_seconds": actuators.AUX_OUT_ON_MANUAL_SECONDS,
+            "aux_out_seconds_since_last_on": actuators.AUX_OUT_SEC_SINCE_LAST_ON,
+            "in_emergency_stop": actuators.IN_EMERGENCY_STOP,
+            "emergency_stop_cause": actuators.EMERGENCY_STOP_CAUSE}
+
+
 class actSummaryApi(Resource):
     """
     Class that implements API method that send a summary of all actuators data
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         try:
             """
             This method send the current state and statistics for all actuators
             """
             # Get the name of the user that has requested data
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_ACTUATOR_ALL, user.user_name)
 
             # Send current data
-            return_data = {"pump_automatic_control": actuators.PUMP_AUTOMATIC_CONTROL,
-                           "valve_automatic_control": actuators.VALVE_AUTOMATIC_CONTROL,
-                           "filter_pump_real_state": actuators.FILTER_PUMP_REAL_STATE,
-                           "filter_pump_teoric_state": actuators.FILTER_PUMP_TEORIC_STATE,
-                           "filter_pump_on_real_seconds": actuators.FILTER_PUMP_ON_REAL_SECONDS,
-                           "filter_pump_on_total_seconds": actuators.FILTER_PUMP_ON_TOTAL_SECONDS,
-                           "filter_pump_on_auto_seconds": actuators.FILTER_PUMP_ON_AUTO_SECONDS,
-                           "filter_pump_on_manual_seconds": actuators.FILTER_PUMP_ON_MANUAL_SECONDS,
-                           "filter_pump_seconds_since_last_on": actuators.FILTER_PUMP_SEC_SINCE_LAST_ON,
-                           "bleach_pump_teoric_state": actuators.BLEACH_PUMP_STATE,
-                           "bleach_pump_on_total_seconds": actuators.BLEACH_PUMP_ON_TOTAL_SECONDS,
-                           "bleach_pump_on_auto_seconds": actuators.BLEACH_PUMP_ON_AUTO_SECONDS,
-                           "bleach_pump_on_manual_seconds": actuators.BLEACH_PUMP_ON_MANUAL_SECONDS,
-                           "bleach_pump_seconds_since_last_on": actuators.BLEACH_PUMP_SEC_SINCE_LAST_ON,
-                           "acid_pump_teoric_state": actuators.ACID_PUMP_STATE,
-                           "acid_pump_on_total_seconds": actuators.ACID_PUMP_ON_TOTAL_SECONDS,
-                           "acid_pump_on_auto_seconds": actuators.ACID_PUMP_ON_AUTO_SECONDS,
-                           "acid_pump_on_manual_seconds": actuators.ACID_PUMP_ON_MANUAL_SECONDS,
-                           "acid_pump_seconds_since_last_on": actuators.ACID_PUMP_SEC_SINCE_LAST_ON,
-                           "fill_valve_teoric_state": actuators.FILL_VALVE_STATE,
-                           "fill_valve_on_total_seconds": actuators.FILL_VALVE_ON_TOTAL_SECONDS,
-                           "fill_valve_on_auto_seconds": actuators.FILL_VALVE_ON_AUTO_SECONDS,
-                           "fill_valve_on_manual_seconds": actuators.FILL_VALVE_ON_MANUAL_SECONDS,
-                           "aux_out_teoric_state": actuators.AUX_OUT_STATE,
-                           "aux_out_on_total_seconds": actuators.AUX_OUT_ON_TOTAL_SECONDS,
-                           "aux_out_on_auto_seconds": actuators.AUX_OUT_ON_AUTO_SECONDS,
-                           "aux_out_on_manual_seconds": actuators.AUX_OUT_ON_MANUAL_SECONDS,
-                           "aux_out_seconds_since_last_on": actuators.AUX_OUT_SEC_SINCE_LAST_ON,
-                           "in_emergency_stop": actuators.IN_EMERGENCY_STOP,
-                           "emergency_stop_cause": actuators.EMERGENCY_STOP_CAUSE}
+            return_data = actuators_summary()
 
             return jsonify(return_data)
         except FieldDoesNotExist:
@@ -82,15 +88,14 @@ class actFilterApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         try:
             """
             This method send the current state and statistics for the actuator
             """
             # Get the name of the user that has requested data
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_ACTUATOR, user.user_name, cfg.FILTER_PUMP)
 
             # Send current data
@@ -118,7 +123,7 @@ class actFilterApi(Resource):
             raise InternalServerError
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def put(self):
         """
         This method set the state of an actuator
@@ -129,8 +134,7 @@ class actFilterApi(Resource):
 
             # Is an admin, so it's OK to change actuator state
 
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_ACTUATOR_SET, user.user_name, cfg.FILTER_PUMP)
 
             # Get JSON and parse it
@@ -164,8 +168,7 @@ class actFilterApi(Resource):
     @staticmethod
     def check_if_is_admin():
         # Check if the current user is an admin
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
 
         if user.is_admin is not True:
             # This user isn't an admin user, raise Exception
@@ -179,15 +182,14 @@ class actBleachApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         try:
             """
             This method send the current state and statistics for the actuator
             """
             # Get the name of the user that has requested data
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_ACTUATOR, user.user_name, cfg.BLEACH_PUMP)
 
             # Send current data
@@ -213,7 +215,7 @@ class actBleachApi(Resource):
             raise InternalServerError
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def put(self):
         """
         This method set the state of an actuator
@@ -223,8 +225,7 @@ class actBleachApi(Resource):
             self.check_if_is_admin()
 
             # Is an admin, so it's OK to change actuator state
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_ACTUATOR_SET, user.user_name, cfg.BLEACH_PUMP)
 
             # Get JSON and parse it
@@ -259,8 +260,7 @@ class actBleachApi(Resource):
     @staticmethod
     def check_if_is_admin():
         # Check if the current user is an admin
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
 
         if user.is_admin is not True:
             # This user isn't an admin user, raise Exception
@@ -274,15 +274,14 @@ class actAcidApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         try:
             """
             This method send the current state and statistics for the actuator
             """
             # Get the name of the user that has requested data
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_ACTUATOR, user.user_name, cfg.ACID_PUMP)
 
             # Send current data
@@ -308,7 +307,7 @@ class actAcidApi(Resource):
             raise InternalServerError
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def put(self):
         """
         This method set the state of an actuator
@@ -318,8 +317,7 @@ class actAcidApi(Resource):
             self.check_if_is_admin()
 
             # Is an admin, so it's OK to change actuator state
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_ACTUATOR_SET, user.user_name, cfg.ACID_PUMP)
 
             # Get JSON and parse it
@@ -353,8 +351,7 @@ class actAcidApi(Resource):
     @staticmethod
     def check_if_is_admin():
         # Check if the current user is an admin
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
 
         if user.is_admin is not True:
             # This user isn't an admin user, raise Exception
@@ -368,15 +365,14 @@ class actFillValveApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         try:
             """
             This method send the current state and statistics for the actuator
             """
             # Get the name of the user that has requested data
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_ACTUATOR, user.user_name, cfg.FILL_VALVE)
 
             # Send current data
@@ -401,7 +397,7 @@ class actFillValveApi(Resource):
             raise InternalServerError
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def put(self):
         """
         This method set the state of an actuator
@@ -411,8 +407,7 @@ class actFillValveApi(Resource):
             self.check_if_is_admin()
 
             # Is an admin, so it's OK to change actuator state
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_ACTUATOR_SET, user.user_name, cfg.FILL_VALVE)
 
             # Get JSON and parse it
@@ -448,8 +443,7 @@ class actFillValveApi(Resource):
     @staticmethod
     def check_if_is_admin():
         # Check if the current user is an admin
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
 
         if user.is_admin is not True:
             # This user isn't an admin user, raise Exception
@@ -463,15 +457,14 @@ class actAuxApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         try:
             """
             This method send the current state and statistics for the actuator
             """
             # Get the name of the user that has requested data
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_ACTUATOR, user.user_name, cfg.AUX_OUT)
 
             # Send current data
@@ -495,7 +488,7 @@ class actAuxApi(Resource):
             raise InternalServerError
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def put(self):
         """
         This method set the state of an actuator
@@ -505,8 +498,7 @@ class actAuxApi(Resource):
             self.check_if_is_admin()
 
             # Is an admin, so it's OK to change actuator state
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_ACTUATOR_SET, user.user_name, cfg.AUX_OUT)
 
             # Get JSON and parse it
@@ -536,8 +528,7 @@ class actAuxApi(Resource):
     @staticmethod
     def check_if_is_admin():
         # Check if the current user is an admin
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
 
         if user.is_admin is not True:
             # This user isn't an admin user, raise Exception
@@ -1,38 +1,44 @@
 import logging
 from json import JSONDecodeError
 
-from flask import jsonify, request
-from flask_jwt_extended import get_jwt_identity
-from flask_jwt_extended import jwt_required
+from flask import jsonify, request, g
 from flask_restful import Resource
 from mongoengine import FieldDoesNotExist
 
 import src.config.configconstants as cfg
 from src.api.resources.errors import UnauthorizedError, InternalServerError, SchemaValidationError, BadRequestError
-from src.database.models import User
+from src.api.resources.identity import user_required
 from src.algorithms import dailyfiltering, chemicals, levelControl, lightControl
 from src.strings_constants import strings
 
 
+def filtering_summary():
+    """
+    This function returns the current state and statistics of the daily filtering algorithm
+
+    Returns: A dict with the data of the algorithm
+    """
+    return {"state": dailyfiltering.state, "total_daily_seconds": dailyfiltering.total_daily_seconds,
+            "total_daily_seconds_remaining": dailyfiltering.total_daily_seconds_remaining}
+
+
 class algFilterApi(Resource):
     """
     Class that implements API method that represents the filter algorithm
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         try:
             """
             This method send the current state and statistics of the algorithm
             """
             # Get the name of the user that has requested data
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_FILTER, user.user_name)
 
-            return_data = {"state": dailyfiltering.state, "total_daily_seconds": dailyfiltering.total_daily_seconds,
-                           "total_daily_seconds_remaining": dailyfiltering.total_daily_seconds_remaining}
+            return_data = filtering_summary()
 
             return jsonify(return_data)
 
@@ -48,29 +54,37 @@ class algFilterApi(Resource):
             raise InternalServerError
 
 
+def chemicals_summary():
+    """
+    This function returns the current statistics of the chemicals algorithm
+
+    Returns: A dict with the data of the algorithm
+    """
+    return {"algorithm_cycle_seconds": chemicals.algorithm_cycle_seconds,
+            "algorithm_orp_injected_seconds": chemicals.algorithm_orp_injected_seconds,
+            "algorithm_ph_injected_seconds": chemicals.algorithm_ph_injected_seconds,
+            "total_orp_daily_seconds": chemicals.total_orp_daily_seconds,
+            "total_ph_daily_seconds": chemicals.total_ph_daily_seconds
+            }
+
+
 class algChemApi(Resource):
     """
     Class that implements API method that represents the chemical algorithm
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         try:
             """
             This method send the current state and statistics of the algorithm
             """
             # Get the name of the user that has requested data
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_CHEMICALS, user.user_name)
 
-            return_data = {"algorithm_cycle_seconds": chemicals.algorithm_cycle_seconds,
-                           "algorithm_orp_injected_seconds": chemicals.algorithm_orp_injected_seconds,
-                           "algorithm_ph_injected_seconds": chemicals.algorithm_ph_injected_seconds,
-                           "total_orp_daily_seconds": chemicals.total_orp_daily_seconds,
-                           "total_ph_daily_seconds": chemicals.total_ph_daily_seconds
-                           }
+            return_data = chemicals_summary()
 
             return jsonify(return_data)
 
@@ -92,15 +106,14 @@ class algFillApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         try:
             """
             This method send the current state and statistics of the algorithm
             """
             # Get the name of the user that has requested data
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_LEVEL, user.user_name)
 
             return_data = {
@@ -129,15 +142,14 @@ class algLightsApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         try:
             """
             This method send the current state and statistics of the algorithm
             """
             # Get the name of the user that has requested data
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_LIGHT, user.user_name)
 
             return_data = {
@@ -159,21 +171,23 @@ class algLightsApi(Resource):
             raise InternalServerError
 
    # Requires Auth
-    @jwt_required()
+    @user_required
     def put(self):
         """
         This method set the lights
         """
         try:
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_LIGHT_SET, user.user_name)
 
             # Get JSON and parse it
             body = request.get_json()
             command = body.get('execute_command')
 
-            if command is None:
+            if body.get('cancel_sequence'):
+                lightControl.cancel_command_sequence()
+
+            elif command is None:
                 sequence = body.get('execute_sequence')
 
                 if sequence is None:
@@ -202,8 +216,7 @@ class algLightsApi(Resource):
     @staticmethod
     def check_if_is_admin():
         # Check if the current user is an admin
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
 
         if user.is_admin is not True:
             # This user isn't an admin user, raise Exception
@@ -1,8 +1,8 @@
 import datetime
 import logging
 
-from flask import request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask import request, jsonify, g
+from flask_jwt_extended import create_access_token
 from flask_restful import Resource
 from mongoengine.errors import FieldDoesNotExist, \
     NotUniqueError, DoesNotExist
@@ -11,6 +11,7 @@ import src.strings_constants.strings as Strings
 from src.database.models import User
 from .errors import SchemaValidationError, InternalServerError, \
     UnauthorizedError, UserNotExistsError, UserNameAlreadyExistsError, EmptyBodyError
+from .identity import user_required, identityCache
 
 import src.config.configconstants as DefaultConfig
 
@@ -21,7 +22,7 @@ class UsersApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         """
         The GET method returns a JSON with all the users that are in the database and their basic
@@ -29,8 +30,7 @@ class UsersApi(Resource):
         """
         try:
             # First, check what user is logged on the system
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
 
             if user.is_admin is not True:
                 # This user isn't an admin user, raise Exception
@@ -66,7 +66,7 @@ class SignupApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def post(self):
         """
         The POST method creates a new user, but only a previous user with admin rights is allowed to add
@@ -97,7 +97,7 @@ class SignupApi(Resource):
             raise InternalServerError
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def put(self):
         """
         The PUT method updates the user data, using full representation. But only a previous user
@@ -125,6 +125,9 @@ class SignupApi(Resource):
             user.save()
             uid = user.id
 
+            # The cached identity of the user is outdated now
+            identityCache.invalidate(uid)
+
             # Return update OK
             return {'id': str(uid)}, 200
         except FieldDoesNotExist:
@@ -141,7 +144,7 @@ class SignupApi(Resource):
             raise InternalServerError
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def patch(self):
         """
         The PATCH method updates the user data, without full representation. Only a previous user
@@ -185,6 +188,9 @@ class SignupApi(Resource):
             user.save()
             uid = user.id
 
+            # The cached identity of the user is outdated now
+            identityCache.invalidate(uid)
+
             # Return update OK
             return {'id': str(uid)}, 200
         except FieldDoesNotExist:
@@ -199,7 +205,7 @@ class SignupApi(Resource):
             raise InternalServerError
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def delete(self):
         """
         The DELETE method deletes a user. Only a previous user with admin rights is allowed to delete users.
@@ -213,8 +219,10 @@ class SignupApi(Resource):
             # Get username
             user_name = request.args.get('user')
 
-            # Delete user
-            User.objects.get(user_name=user_name).delete()
+            # Delete user, and forget its cached identity
+            user = User.objects.get(user_name=user_name)
+            user.delete()
+            identityCache.invalidate(user.id)
 
             # Return OK
             return '', 200
@@ -232,8 +240,7 @@ class SignupApi(Resource):
     @staticmethod
     def check_if_is_admin():
         # Check if the current user is an admin
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
 
         if user.is_admin is not True:
             # This user isn't an admin user, raise Exception
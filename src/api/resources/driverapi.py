@@ -1,11 +1,15 @@
 import logging
 
-from flask import jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Response, jsonify, g, request
 from flask_restful import Resource
-from src.database.models import User
+
+import src.config.configconstants as cfg
+from src.api.resources.errors import BadRequestError, FormatNotAcceptableError
+from src.api.resources.identity import user_required
 from src.driver import driver
+from src.driver.adcframe import AdcFrameDecoder
 from src.strings_constants import strings
+from src.utils import framecodec
 
 
 class driverApi(Resource):
@@ -14,11 +18,10 @@ class driverApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_DRIVER, user.user_name)
 
         driver_data = {"last_ph_voltage": driver.last_ph_voltage,
@@ -29,3 +32,72 @@ class driverApi(Resource):
 
         return jsonify(driver_data)
 
+
+class driverFramesApi(Resource):
+    """
+    Class that implements API method to get the newest ADC frames in volts, as little-endian float32 of shape
+    (frames, channels, samples), without the cost of formatting them as JSON.
+
+    Query arguments:
+        - n: Number of frames, the newest DRIVER_FRAMES_DEFAULT by default, at most DRIVER_FRAME_RING_SIZE
+        - channels: Comma separated list of channels, all of them by default
+        - decimate: Keep a sample for every block of this many samples, 1 by default
+        - decimation: mean of every block (default) or pick its first sample
+        - format: raw (default) or cbor, if it isn't given, cbor is sent when the Accept header prefers it
+    """
+
+    # Requires Auth
+    @user_required
+    def get(self):
+        try:
+            n = request.args.get('n', default=cfg.DRIVER_FRAMES_DEFAULT, type=int)
+            channels = self.parse_channels(request.args.get('channels'))
+            factor = request.args.get('decimate', default=1, type=int)
+        except ValueError:
+            raise BadRequestError
+
+        mode = request.args.get('decimation', default=framecodec.DECIMATION_MEAN)
+        output_format = request.args.get('format', default=self.preferred_format())
+
+        if n < 1 or output_format not in framecodec.MIMETYPES:
+            raise BadRequestError
+
+        # Clients poll this endpoint several times a second, so requests aren't logged as info
+        logging.log(logging.DEBUG, strings.LOG_API_DRIVER_FRAMES, g.user.user_name, n, output_format)
+
+        frames = driver.get_frames(min(n, cfg.DRIVER_FRAME_RING_SIZE))[:, channels]
+
+        try:
+            frames = framecodec.decimate(frames, factor, mode)
+        except ValueError:
+            raise BadRequestError
+
+        try:
+            payload = framecodec.encode(frames, output_format)
+        except ValueError:
+            raise FormatNotAcceptableError
+
+        return Response(payload, mimetype=framecodec.MIMETYPES[output_format], status=200)
+
+    @staticmethod
+    def parse_channels(value):
+        # Parse a comma separated list of channels
+        if value is None:
+            return list(range(AdcFrameDecoder.CHANNELS))
+
+        channels = [int(channel) for channel in value.split(",")]
+        if not channels or any(channel not in range(AdcFrameDecoder.CHANNELS) for channel in channels):
+            raise ValueError
+
+        return channels
+
+    @staticmethod
+    def preferred_format():
+        # Format preferred by the Accept header of the request, raw if it has none
+        mimetype = request.accept_mimetypes.best_match([framecodec.MIMETYPES[framecodec.FORMAT_RAW],
+                                                        framecodec.MIMETYPES[framecodec.FORMAT_CBOR]])
+
+        if mimetype == framecodec.MIMETYPES[framecodec.FORMAT_CBOR]:
+            return framecodec.FORMAT_CBOR
+
+        return framecodec.FORMAT_RAW
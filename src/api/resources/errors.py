@@ -33,6 +33,18 @@ class ExpiredSignatureError(Exception):
 class BadRequestError(Exception):
     pass
 
+
+class SensorNotFoundError(Exception):
+    pass
+
+
+class StreamUnavailableError(Exception):
+    pass
+
+
+class FormatNotAcceptableError(Exception):
+    pass
+
 errors = {
     "InternalServerError": {
         "message": "Something went wrong",
@@ -69,5 +81,17 @@ errors = {
     "BadRequestError": {
         "message": "Bad request",
         "status": 400
+    },
+    "SensorNotFoundError": {
+        "message": "The given sensor doesn't exists",
+        "status": 404
+    },
+    "StreamUnavailableError": {
+        "message": "Too many clients connected to the live stream",
+        "status": 503
+    },
+    "FormatNotAcceptableError": {
+        "message": "The requested format isn't available",
+        "status": 406
     }
 }
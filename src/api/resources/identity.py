@@ -0,0 +1,121 @@
+import collections
+import functools
+import threading
+import time
+
+from flask import g
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from mongoengine import DoesNotExist
+
+import src.config.configconstants as cfg
+from src.api.resources.errors import UserNotExistsError
+from src.database.models import User
+from src.utils import metrics
+
+''' Data of a logged user needed by the API handlers '''
+Identity = collections.namedtuple("Identity", ["id", "user_name", "email", "is_admin"])
+
+
+class IdentityCache:
+    """
+    This class caches the identity of the logged users, so the API handlers don't query the database
+    on every request. It's a LRU cache with a max number of users, whose entries expire after a while.
+    Entries must be invalidated when a user is updated or deleted. Every invalidation changes the generation of
+    the user, and a user read from the database while its generation changed isn't cached, because it may be older
+    than the invalidation.
+    """
+
+    def __init__(self, max_size=cfg.IDENTITY_CACHE_MAX_SIZE, ttl_seconds=cfg.IDENTITY_CACHE_TTL_SECONDS):
+        """
+        Constructor of the class
+
+        Args:
+            max_size: Max number of cached users
+            ttl_seconds: Seconds after which a cached user is read again from the database
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = collections.OrderedDict()
+        self._generation = 0
+        self._generations = {}
+        self._lock = threading.Lock()
+
+        ''' Counters '''
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """
+        This method returns the identity of a user, reading it from the database if it isn't cached.
+        It raises DoesNotExist if the user doesn't exist.
+        """
+        user_id = str(user_id)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+
+            self.misses += 1
+            generation = (self._generation, self._generations.get(user_id, 0))
+
+        user = User.objects.get(id=user_id)
+        identity = Identity(str(user.id), user.user_name, user.email, user.is_admin)
+
+        with self._lock:
+            if generation != (self._generation, self._generations.get(user_id, 0)):
+                # Invalidated while it was read, the user may have been read before the change
+                return identity
+
+            self._entries[user_id] = (identity, now + self.ttl_seconds)
+            self._entries.move_to_end(user_id)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return identity
+
+    def invalidate(self, user_id=None):
+        """
+        This method deletes a user from the cache, or all of them if no user is given
+        """
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                self._generations.clear()
+                self._generation += 1
+            else:
+                user_id = str(user_id)
+                self._entries.pop(user_id, None)
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+
+# Instantiate the identity cache
+identityCache = IdentityCache()
+metrics.gauge("smartpool_identity_cache_hits_total", "Identities read from the identity cache.",
+              lambda: identityCache.hits, type="counter")
+metrics.gauge("smartpool_identity_cache_misses_total", "Identities read from the database.",
+              lambda: identityCache.misses, type="counter")
+
+
+def user_required(fn):
+    """
+    Decorator for API methods that require a logged user. It checks the JWT, like jwt_required, and stores
+    the identity of the user in flask.g.user, read from the identity cache.
+    """
+
+    @functools.wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        try:
+            g.user = identityCache.get(get_jwt_identity())
+        except DoesNotExist:
+            raise UserNotExistsError
+
+        return fn(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,41 @@
+import time
+
+from flask import Response, g, request
+from flask_jwt_extended import jwt_required
+from flask_restful import Resource
+
+from src.utils import metrics
+
+''' Metrics of the API '''
+API_REQUEST_SECONDS = metrics.histogram("smartpool_api_request_seconds", "Execution time of the API requests.",
+                                        labels=("endpoint", "method", "status"))
+
+
+class metricsApi(Resource):
+    """
+    Class that implements API method that returns all the metrics of the application, in the
+    Prometheus text format
+    """
+
+    # Requires Auth
+    @jwt_required()
+    def get(self):
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4", status=200)
+
+
+def initialize_metrics(app):
+    """ This Function records the execution time of every API request """
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('request_start', None)
+
+        if start is not None:
+            API_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=request.endpoint or "unknown",
+                                        method=request.method, status=response.status_code)
+
+        return response
@@ -30,10 +30,9 @@ from datetime import datetime as DateTime
 from math import sin, cos, floor, sqrt, pi, tan, atan  # asin, atan2
 import logging
 
-from flask import jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import jsonify, g
 from flask_restful import Resource
-from src.database.models import User
+from src.api.resources.identity import user_required
 from src.models import water
 from src.strings_constants import strings
 
@@ -53,11 +52,10 @@ class moonApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_MOON, user.user_name)
 
         moon = MoonPhase()
@@ -1,13 +1,12 @@
 import logging
 
-from flask import jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import jsonify, request, g
 from flask_restful import Resource
 from mongoengine import FieldDoesNotExist
 
 from src.api.resources.errors import UnauthorizedError, SchemaValidationError, InternalServerError
+from src.api.resources.identity import user_required
 from src.config.pool import poolcfg
-from src.database.models import User
 from src.strings_constants import strings
 
 
@@ -17,11 +16,10 @@ class poolConfigApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_CONFIG, user.user_name)
 
         config = {"sensor_refresh_minutes": poolcfg.sensor_refresh_minutes,
@@ -41,13 +39,14 @@ class poolConfigApi(Resource):
                   "pool_fill_volume_between_checks": poolcfg.pool_fill_volume_between_checks,
                   "pool_fill_seconds_wait": poolcfg.pool_fill_seconds_wait,
                   "pool_auto_lights_on": poolcfg.pool_auto_lights_on,
-                  "pool_auto_lights_on_command_sequence": poolcfg.pool_auto_lights_on_command_sequence
+                  "pool_auto_lights_on_command_sequence": poolcfg.pool_auto_lights_on_command_sequence,
+                  "pool_water_aggregation": poolcfg.pool_water_aggregation
                   }
 
         return jsonify(config)
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def put(self):
         """
         The PUT method modifies all current poolconfig data.
@@ -83,6 +82,12 @@ class poolConfigApi(Resource):
             pool_fill_seconds_wait = config_data["pool_fill_seconds_wait"]
             pool_auto_lights_on = config_data["pool_auto_lights_on"]
             pool_auto_lights_on_command_sequence = config_data["pool_auto_lights_on_command_sequence"]
+            # Optional, older clients don't know about it
+            pool_water_aggregation = config_data.get("pool_water_aggregation")
+
+            # Check it before setting anything, so an invalid request doesn't change the config
+            if pool_water_aggregation is not None:
+                poolcfg.validate_pool_water_aggregation(pool_water_aggregation)
 
             # Set new data
             poolcfg.set_sensor_refresh_minutes(sensor_refresh_minutes)
@@ -103,13 +108,15 @@ class poolConfigApi(Resource):
             poolcfg.set_pool_fill_seconds_wait(pool_fill_seconds_wait)
             poolcfg.set_pool_auto_lights_on(pool_auto_lights_on)
             poolcfg.set_pool_auto_lights_on_command_sequence(pool_auto_lights_on_command_sequence)
+            if pool_water_aggregation is not None:
+                poolcfg.set_pool_water_aggregation(pool_water_aggregation)
 
             # Return modify OK
             return "", 200
 
         except FieldDoesNotExist:
             raise SchemaValidationError
-        except KeyError:
+        except (KeyError, ValueError):
             raise SchemaValidationError
         except UnauthorizedError:
             raise UnauthorizedError
@@ -118,7 +125,7 @@ class poolConfigApi(Resource):
 
         # Requires Auth
 
-    @jwt_required()
+    @user_required
     def patch(self):
         """
         The PATCH method modifies all certain poolconfig data.
@@ -136,6 +143,10 @@ class poolConfigApi(Resource):
             if config_data is None:
                 raise FieldDoesNotExist
 
+            # Check it before setting anything, so an invalid request doesn't change the config
+            if "pool_water_aggregation" in config_data:
+                poolcfg.validate_pool_water_aggregation(config_data["pool_water_aggregation"])
+
             try:
                 sensor_refresh_minutes = config_data["sensor_refresh_minutes"]
                 poolcfg.set_sensor_refresh_minutes(sensor_refresh_minutes)
@@ -244,10 +255,16 @@ class poolConfigApi(Resource):
             except KeyError:
                 pass
 
+            try:
+                pool_water_aggregation = config_data["pool_water_aggregation"]
+                poolcfg.set_pool_water_aggregation(pool_water_aggregation)
+            except KeyError:
+                pass
+
             # Return modify OK
             return "", 200
 
-        except FieldDoesNotExist:
+        except (FieldDoesNotExist, ValueError):
             raise SchemaValidationError
         except UnauthorizedError:
             raise UnauthorizedError
@@ -257,8 +274,7 @@ class poolConfigApi(Resource):
     @staticmethod
     def check_if_is_admin():
         # Check if the current user is an admin
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
 
         if user.is_admin is not True:
             # This user isn't an admin user, raise Exception
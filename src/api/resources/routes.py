@@ -6,9 +6,12 @@ from .tankapi import tankApi
 from .version import VersionApi
 from .auth import LoginApi, SignupApi, UsersApi
 from .sensors import phApi, orpApi, tdsApi, tempApi, diatApi, sandApi, voltsApi, genApi, filterApi, lightApi, eStopApi, \
-    waterLevelApi, flowApi, summaryApi
+    waterLevelApi, flowApi, summaryApi, sensorHistoryApi
 from .waterapi import waterApi
-from .driverapi import driverApi
+from .driverapi import driverApi, driverFramesApi
+from .metricsapi import metricsApi, initialize_metrics
+from .stateapi import stateApi, initialize_state
+from .streamapi import streamApi
 
 
 def initialize_routes(api):
@@ -16,6 +19,15 @@ def initialize_routes(api):
     # Api version endpoint
     api.add_resource(VersionApi, '/api/version')
 
+    # Metrics endpoint
+    initialize_metrics(api.app)
+    api.add_resource(metricsApi, '/api/metrics')
+
+    # State endpoint
+    initialize_state()
+    api.add_resource(stateApi, '/api/state')
+    api.add_resource(streamApi, '/api/stream')
+
     # Login endpoints
     api.add_resource(SignupApi, '/api/auth/signup')
     api.add_resource(LoginApi, '/api/auth/login')
@@ -37,6 +49,7 @@ def initialize_routes(api):
 
     # Pool driver endpoint
     api.add_resource(driverApi, '/api/pool/driver/voltages')
+    api.add_resource(driverFramesApi, '/api/pool/driver/frames')
 
     # Sensors endpoints
     api.add_resource(summaryApi, '/api/sensors/summary')
@@ -53,6 +66,7 @@ def initialize_routes(api):
     api.add_resource(eStopApi, '/api/sensors/emergency_stop')
     api.add_resource(waterLevelApi, '/api/sensors/water_level')
     api.add_resource(flowApi, '/api/sensors/flow')
+    api.add_resource(sensorHistoryApi, '/api/sensors/<path:sensor>/history')
 
     # Actuators endpoints
     api.add_resource(actSummaryApi, '/api/actuators')
@@ -1,22 +1,84 @@
 import datetime
 import logging
 
-from flask import jsonify
-from flask_jwt_extended import get_jwt_identity
-from flask_jwt_extended import jwt_required
+from flask import jsonify, request, g
 from flask_restful import Resource
 from mongoengine import DoesNotExist
 
 import src.config.configconstants as cfg
-from src.api.resources.errors import UserNotExistsError
+from src.api.resources.errors import UserNotExistsError, BadRequestError, SensorNotFoundError
+from src.api.resources.identity import user_required
 from src.database import timezone
-from src.database.models import User
+from src.database.db import db
+from src.database.sensorhistory import aggregate_history, aggregate_rollups, aggregate_readings, \
+    history_bucket_seconds, rollup_resolution
 from src.models import water
 from src.sensors import phSensor, orpSensor, tdsSensor, temperatureSensor, diatomsPressureSensor, sandPressureSensor, \
     voltageSensor, generalSensor, pumpSensor, lightSensor, emergencyStopSensor, waterLevelSensor_1, \
     waterLevelSensor_2, waterLevelSensor_3, waterLevelSensor_4, waterLevelSensor_5, waterLevelSensor_6
 from src.sensors.subtypes import flowSensor
 from src.strings_constants import strings
+from src.utils import clock
+from src.utils.downsampling import lttb
+
+# Sensor types with numeric history, by the path of their API endpoint. The light sensor isn't one of them: its
+# values are booleans, which the database doesn't aggregate
+HISTORY_SENSORS = {"ph": cfg.PH_SENSOR,
+                   "orp": cfg.ORP_SENSOR,
+                   "tds": cfg.TDS_SENSOR,
+                   "temperature": cfg.TEMP_SENSOR,
+                   "pressure/diatoms": cfg.DIATOMS_PRESSURE_SENSOR,
+                   "pressure/sand": cfg.SAND_PRESSURE_SENSOR,
+                   "voltage": cfg.VOLTAGE_SENSOR,
+                   "pump/general": cfg.GENERAL_SENSOR,
+                   "pump/filter": cfg.PUMP_SENSOR}
+
+# Sensors with history, by their type, to read the readings they keep in memory
+SENSORS_BY_TYPE = {sensor.sensor_type: sensor for sensor in
+                   [phSensor, orpSensor, tdsSensor, temperatureSensor, diatomsPressureSensor, sandPressureSensor,
+                    voltageSensor, generalSensor, pumpSensor]}
+
+
+def sensors_summary(now=None):
+    """
+    This function returns a summary of all sensor data
+
+    Args:
+        now: Datetime of the water levels and the flow, which don't have their own one
+
+    Returns: A dict with the data of every sensor
+    """
+    return {phSensor.sensor_type:
+                {"datetime": phSensor.datetime, "value": phSensor.value, "is_ok": phSensor.is_ok},
+            orpSensor.sensor_type:
+                {"datetime": orpSensor.datetime, "value": orpSensor.value, "is_ok": orpSensor.is_ok},
+            temperatureSensor.sensor_type:
+                {"datetime": temperatureSensor.datetime, "value": temperatureSensor.value,
+                 "is_ok": temperatureSensor.is_ok},
+            tdsSensor.sensor_type:
+                {"datetime": tdsSensor.datetime, "value": tdsSensor.value, "is_ok": tdsSensor.is_ok},
+            diatomsPressureSensor.sensor_type:
+                {"datetime": diatomsPressureSensor.datetime, "value": diatomsPressureSensor.value,
+                 "is_ok": diatomsPressureSensor.is_ok},
+            sandPressureSensor.sensor_type:
+                {"datetime": sandPressureSensor.datetime, "value": sandPressureSensor.value,
+                 "is_ok": sandPressureSensor.is_ok},
+            voltageSensor.sensor_type:
+                {"datetime": voltageSensor.datetime, "value": voltageSensor.value, "is_ok": voltageSensor.is_ok},
+            generalSensor.sensor_type:
+                {"datetime": generalSensor.datetime, "value": generalSensor.value, "is_ok": generalSensor.is_ok},
+            pumpSensor.sensor_type:
+                {"datetime": pumpSensor.datetime, "value": pumpSensor.value, "is_ok": pumpSensor.is_ok},
+            lightSensor.sensor_type:
+                {"datetime": lightSensor.datetime, "value": lightSensor.value, "is_ok": lightSensor.is_ok},
+            emergencyStopSensor.sensor_type:
+                {"datetime": emergencyStopSensor.datetime, "value": emergencyStopSensor.value,
+                 "is_ok": emergencyStopSensor.is_ok},
+            waterLevelSensor_1.sensor_type:
+                {"datetime": now, "levels": list(water.levels)},
+            flowSensor.sensor_type:
+                {"datetime": now, "flow": flowSensor.flow,
+                 "daily_volume": flowSensor.daily_volume}}
 
 
 class summaryApi(Resource):
@@ -25,45 +87,13 @@ class summaryApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         try:
             # Get the name of the user that has requested data
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_SUMMARY, user.user_name)
-            summary = {phSensor.sensor_type:
-                           {"datetime": phSensor.datetime, "value": phSensor.value, "is_ok": phSensor.is_ok},
-                       orpSensor.sensor_type:
-                           {"datetime": orpSensor.datetime, "value": orpSensor.value, "is_ok": orpSensor.is_ok},
-                       temperatureSensor.sensor_type:
-                           {"datetime": temperatureSensor.datetime, "value": temperatureSensor.value,
-                            "is_ok": temperatureSensor.is_ok},
-                       tdsSensor.sensor_type:
-                           {"datetime": tdsSensor.datetime, "value": tdsSensor.value, "is_ok": tdsSensor.is_ok},
-                       diatomsPressureSensor.sensor_type:
-                           {"datetime": diatomsPressureSensor.datetime, "value": diatomsPressureSensor.value,
-                            "is_ok": diatomsPressureSensor.is_ok},
-                       sandPressureSensor.sensor_type:
-                           {"datetime": sandPressureSensor.datetime, "value": sandPressureSensor.value,
-                            "is_ok": sandPressureSensor.is_ok},
-                       voltageSensor.sensor_type:
-                           {"datetime": voltageSensor.datetime, "value": voltageSensor.value, "is_ok": voltageSensor.is_ok},
-                       generalSensor.sensor_type:
-                           {"datetime": generalSensor.datetime, "value": generalSensor.value, "is_ok": generalSensor.is_ok},
-                       pumpSensor.sensor_type:
-                           {"datetime": pumpSensor.datetime, "value": pumpSensor.value, "is_ok": pumpSensor.is_ok},
-                       lightSensor.sensor_type:
-                           {"datetime": lightSensor.datetime, "value": lightSensor.value, "is_ok": lightSensor.is_ok},
-                       emergencyStopSensor.sensor_type:
-                           {"datetime": emergencyStopSensor.datetime, "value": emergencyStopSensor.value,
-                            "is_ok": emergencyStopSensor.is_ok},
-                       waterLevelSensor_1.sensor_type:
-                           {"datetime": timezone.localize(datetime.datetime.now()),
-                            "levels": water.levels},
-                       flowSensor.sensor_type:
-                           {"datetime": timezone.localize(datetime.datetime.now()), "flow": flowSensor.flow,
-                            "daily_volume": flowSensor.daily_volume}}
+            summary = sensors_summary(clock.localized())
 
             return jsonify(summary)
 
@@ -77,11 +107,10 @@ class phApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_SENSOR, user.user_name, cfg.PH_SENSOR)
         return phSensor.to_json()
 
@@ -92,11 +121,10 @@ class orpApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_SENSOR, user.user_name, cfg.ORP_SENSOR)
         return orpSensor.to_json()
 
@@ -107,11 +135,10 @@ class tdsApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_SENSOR, user.user_name, cfg.TDS_SENSOR)
         return tdsSensor.to_json()
 
@@ -122,11 +149,10 @@ class tempApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_SENSOR, user.user_name, cfg.TEMP_SENSOR)
         return temperatureSensor.to_json()
 
@@ -137,11 +163,10 @@ class diatApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_SENSOR, user.user_name, cfg.DIATOMS_PRESSURE_SENSOR)
         return diatomsPressureSensor.to_json()
 
@@ -152,11 +177,10 @@ class sandApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_SENSOR, user.user_name, cfg.SAND_PRESSURE_SENSOR)
         return sandPressureSensor.to_json()
 
@@ -167,11 +191,10 @@ class voltsApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_SENSOR, user.user_name, cfg.VOLTAGE_SENSOR)
         return voltageSensor.to_json()
 
@@ -182,11 +205,10 @@ class genApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_SENSOR, user.user_name, cfg.GENERAL_SENSOR)
         return generalSensor.to_json()
 
@@ -197,11 +219,10 @@ class filterApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_SENSOR, user.user_name, cfg.PUMP_SENSOR)
         return pumpSensor.to_json()
 
@@ -212,11 +233,10 @@ class lightApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_SENSOR, user.user_name, cfg.LIGHT_SENSOR)
         return lightSensor.to_json()
 
@@ -227,11 +247,10 @@ class eStopApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_SENSOR, user.user_name, cfg.EMERGENCY_STOP_SENSOR)
         return emergencyStopSensor.to_json()
 
@@ -242,11 +261,10 @@ class flowApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_SENSOR, user.user_name, cfg.FLOW_SENSOR)
         return flowSensor.to_json()
 
@@ -257,14 +275,84 @@ class waterLevelApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_SENSOR, user.user_name, cfg.WATER_LEVEL_SENSOR)
         # Water level info json
-        water_level = {"datetime": timezone.localize(datetime.datetime.now()),
+        water_level = {"datetime": clock.localized(),
                        "levels": [waterLevelSensor_1.value, waterLevelSensor_2.value, waterLevelSensor_3.value,
                                   waterLevelSensor_4.value, waterLevelSensor_5.value, waterLevelSensor_6.value]}
         return jsonify(water_level)
+
+
+class sensorHistoryApi(Resource):
+    """
+    Class that implements API method to get the history of a sensor.
+
+    Query arguments:
+        - from, to: ISO 8601 dates of the range, the last HISTORY_DEFAULT_HOURS by default
+        - bucket: Length in seconds of every aggregated bucket, widened if the range would have too many
+        - points: Max number of returned buckets, selected with LTTB downsampling over the bucket means
+    """
+
+    # Requires Auth
+    @user_required
+    def get(self, sensor):
+        if sensor not in HISTORY_SENSORS:
+            raise SensorNotFoundError
+        sensor_type = HISTORY_SENSORS[sensor]
+
+        try:
+            end = self.parse_date(request.args.get('to'), clock.localized())
+            start = self.parse_date(request.args.get('from'),
+                                    end - datetime.timedelta(hours=cfg.HISTORY_DEFAULT_HOURS))
+            bucket = request.args.get('bucket', type=float)
+            points = request.args.get('points', default=cfg.HISTORY_DEFAULT_POINTS, type=int)
+        except ValueError:
+            raise BadRequestError
+
+        if start >= end or (bucket is not None and bucket <= 0) or points < 3:
+            raise BadRequestError
+
+        points = min(points, cfg.HISTORY_MAX_POINTS)
+
+        # Get the name of the user that has requested data
+        user = g.user
+        logging.log(logging.INFO, strings.LOG_API_SENSOR_HISTORY, user.user_name, sensor_type, start, end)
+
+        bucket = history_bucket_seconds(start, end, bucket)
+        resolution = rollup_resolution(bucket)
+
+        history = SENSORS_BY_TYPE[sensor_type].history
+        oldest = history.oldest()
+
+        if resolution is None and oldest is not None and oldest <= start.timestamp():
+            # Recent ranges are built from the readings kept in memory by the sensor
+            buckets = aggregate_readings(history.readings(start.timestamp(), end.timestamp()), bucket)
+        elif resolution is None:
+            buckets = aggregate_history(db.get_db(), sensor_type, start, end, bucket)
+        else:
+            # Long buckets are built from the rollups, not from every raw reading
+            buckets = aggregate_rollups(db.get_db(), sensor_type, start, end, bucket, resolution)
+
+        # Downsample the buckets, keeping the shape of the series
+        x = [b["datetime"].timestamp() for b in buckets]
+        y = [b["mean"] for b in buckets]
+        buckets = [buckets[i] for i in lttb(x, y, points)]
+
+        return jsonify({"sensor": sensor_type, "from": start, "to": end, "bucket_seconds": bucket,
+                        "points": buckets})
+
+    @staticmethod
+    def parse_date(value, default):
+        # Parse an ISO 8601 date, in local time if it hasn't timezone
+        if value is None:
+            return default
+
+        date = datetime.datetime.fromisoformat(value)
+        if date.tzinfo is None:
+            date = timezone.localize(date)
+
+        return date
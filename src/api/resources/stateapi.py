@@ -0,0 +1,94 @@
+import functools
+import logging
+
+from flask import Response, g, json, request
+from flask_restful import Resource
+
+from src.api.resources.actuators import actuators_summary
+from src.api.resources.algorithms import filtering_summary, chemicals_summary
+from src.api.resources.errors import BadRequestError
+from src.api.resources.identity import user_required
+from src.api.resources.sensors import sensors_summary
+from src.api.resources.waterapi import water_summary
+from src.models import actuators, water, stateStore
+from src.models.state import thaw
+from src.sensors import phSensor, orpSensor, tdsSensor, temperatureSensor, diatomsPressureSensor, sandPressureSensor, \
+    voltageSensor, generalSensor, pumpSensor, lightSensor, emergencyStopSensor, waterLevelSensor_1, \
+    waterLevelSensor_2, waterLevelSensor_3, waterLevelSensor_4, waterLevelSensor_5, waterLevelSensor_6
+from src.strings_constants import strings
+
+
+class stateApi(Resource):
+    """
+    Class that implements API method that returns a snapshot of the state of the pool, with the data of
+    the sensors, actuators, water and algorithms. A client can ask for some sections only, with
+    ?sections=sensors,water
+
+    Every response has an ETag, so a client that sends it back in If-None-Match gets a 304 without body
+    while the requested sections don't change.
+    """
+
+    ''' Last serialized snapshot of every combination of sections, with its version '''
+    rendered = {}
+
+    # Requires Auth
+    @user_required
+    def get(self):
+        # Get the name of the user that has requested data
+        user = g.user
+
+        sections = request.args.get('sections')
+        if sections is None:
+            names = stateStore.names
+        else:
+            requested = [name.strip() for name in sections.split(',') if name.strip()]
+
+            if not requested or any(name not in stateStore.names for name in requested):
+                raise BadRequestError
+
+            # Same order for the same sections, so they share ETag and serialized body
+            names = [name for name in stateStore.names if name in requested]
+
+        key = ",".join(names)
+        logging.log(logging.INFO, strings.LOG_API_STATE, user.user_name, key)
+
+        snapshot = stateStore.snapshot(names)
+        etag = "%s-%d" % (key, snapshot.version)
+
+        if request.if_none_match.contains(etag):
+            # Nothing has changed since the last request of the client
+            response = Response(status=304)
+        else:
+            rendered = self.rendered.get(key)
+
+            if rendered is None or rendered[0] != snapshot.version:
+                body = json.dumps({"version": snapshot.version,
+                                   "sections": {name: {"version": section.version, "updated": section.updated,
+                                                       "data": thaw(section.data)}
+                                                for name, section in snapshot.sections.items()}})
+                rendered = self.rendered[key] = (snapshot.version, body)
+
+            response = Response(rendered[1], mimetype="application/json", status=200)
+
+        response.set_etag(etag)
+        return response
+
+
+def initialize_state():
+    """ This Function adds the sections of the state, and the callbacks that mark them as changed """
+    stateStore.add_section("sensors", sensors_summary, polled=True)
+    stateStore.add_section("actuators", actuators_summary)
+    stateStore.add_section("water", water_summary)
+    stateStore.add_section("filtering", filtering_summary, polled=True)
+    stateStore.add_section("chemicals", chemicals_summary, polled=True)
+
+    for sensor in [phSensor, orpSensor, tdsSensor, temperatureSensor, diatomsPressureSensor, sandPressureSensor,
+                   voltageSensor, generalSensor, pumpSensor, lightSensor, emergencyStopSensor]:
+        sensor.add_callback(stateStore.invalidate, "sensors")
+
+    for sensor in [waterLevelSensor_1, waterLevelSensor_2, waterLevelSensor_3, waterLevelSensor_4, waterLevelSensor_5,
+                   waterLevelSensor_6]:
+        sensor.add_callback(stateStore.invalidate, "sensors", "water")
+
+    water.add_cb(functools.partial(stateStore.invalidate, "water"))
+    actuators.add_cb(functools.partial(stateStore.invalidate, "actuators"))
@@ -0,0 +1,49 @@
+import logging
+
+from flask import Response, g, json, stream_with_context
+from flask_restful import Resource
+
+from src.api.resources.errors import StreamUnavailableError
+from src.api.resources.identity import user_required
+from src.models import liveFeed
+from src.models.state import thaw
+from src.strings_constants import strings
+
+
+class streamApi(Resource):
+    """
+    Class that implements API method that streams the changes of the state of the pool, as Server-Sent
+    Events. The first event ("state") has all the sections of /api/state, and the next ones ("delta")
+    only the values that have changed since the previous event, so one connection replaces polling every
+    endpoint.
+    """
+
+    # Requires Auth
+    @user_required
+    def get(self):
+        # Get the name of the user that has requested data
+        user = g.user
+
+        client = liveFeed.connect()
+        if client is None:
+            raise StreamUnavailableError
+
+        logging.log(logging.INFO, strings.LOG_API_STREAM, user.user_name)
+
+        def events():
+            try:
+                while True:
+                    message = liveFeed.receive(client)
+
+                    if message is None:
+                        # Nothing has changed, check that the client is still connected
+                        yield ": keepalive\n\n"
+                    else:
+                        event, data = message
+                        yield "event: %s\ndata: %s\n\n" % (event, json.dumps(thaw(data)))
+            finally:
+                liveFeed.disconnect(client)
+                logging.log(logging.INFO, strings.LOG_API_STREAM_CLOSED, user.user_name)
+
+        return Response(stream_with_context(events()), mimetype="text/event-stream", status=200,
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -1,12 +1,11 @@
 import logging
 
-from flask import jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import jsonify, request, g
 from flask_restful import Resource
-from src.database.models import User
 from src.models import bleachTank, acidTank
 from src.strings_constants import strings
 from src.api.resources.errors import UnauthorizedError, InternalServerError, SchemaValidationError, BadRequestError
+from src.api.resources.identity import user_required
 
 class tankApi(Resource):
     """
@@ -14,11 +13,10 @@ class tankApi(Resource):
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_TANK, user.user_name)
 
         tank_data = {"bleach_tank_level": bleachTank.current_liters,
@@ -27,7 +25,7 @@ class tankApi(Resource):
         return jsonify(tank_data)
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def put(self):
         """
         This method set the state of a water tank
@@ -37,8 +35,7 @@ class tankApi(Resource):
             self.check_if_is_admin()
 
             # Is an admin, so it's OK to change actuator state
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_TANK_SET, user.user_name)
 
             # Get JSON and parse it
@@ -70,8 +67,7 @@ class tankApi(Resource):
     @staticmethod
     def check_if_is_admin():
         # Check if the current user is an admin
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
 
         if user.is_admin is not True:
             # This user isn't an admin user, raise Exception
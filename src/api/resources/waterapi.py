@@ -1,40 +1,47 @@
 import logging
 
-from flask import jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import jsonify, request, g
 from flask_restful import Resource
-from src.database.models import User
-from src.models import water
+from src.models import water, stateStore
 from src.strings_constants import strings
 from src.api.resources.errors import UnauthorizedError, InternalServerError, SchemaValidationError, BadRequestError
+from src.api.resources.identity import user_required
 from mongoengine import FieldDoesNotExist
 from json import JSONDecodeError
 
 
+def water_summary():
+    """
+    This function returns all the data of the water
+
+    Returns: A dict with the data of the water
+    """
+    return {"temperature": water.temperature, "orp": water.orp, "ph": water.ph,
+            "tds": water.tds, "valid": water.valid,
+            "levels": [water.levels[0], water.levels[1], water.levels[2],
+                       water.levels[3], water.levels[4], water.levels[5]],
+            "alkalinity": water.alkalinity, "hardness": water.hardness, "LSI": water.LSI,
+            "cya": water.cya}
+
+
 class waterApi(Resource):
     """
     This class represent an API for water class
     """
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def get(self):
         # Get the name of the user that has requested data
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
         logging.log(logging.INFO, strings.LOG_API_WATER, user.user_name)
 
-        water_data = {"temperature": water.temperature, "orp": water.orp, "ph": water.ph,
-                      "tds": water.tds, "valid": water.valid,
-                      "levels": [water.levels[0], water.levels[1], water.levels[2],
-                                 water.levels[3], water.levels[4], water.levels[5]],
-                      "alkalinity": water.alkalinity, "hardness": water.hardness, "LSI": water.LSI,
-                      "cya": water.cya}
+        water_data = water_summary()
 
         return jsonify(water_data)
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def put(self):
         """
         This method sets all the data of water class
@@ -44,8 +51,7 @@ class waterApi(Resource):
             self.check_if_is_admin()
 
             # Is an admin, so it's OK to change actuator state
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_WATER_SET, user.user_name)
 
             # Get JSON and parse it
@@ -65,6 +71,7 @@ class waterApi(Resource):
             water.hardness = hardness
             water.cya = cya
             water.save_to_db()
+            stateStore.invalidate("water")
 
             return "", 200
 
@@ -82,7 +89,7 @@ class waterApi(Resource):
             raise InternalServerError
 
     # Requires Auth
-    @jwt_required()
+    @user_required
     def patch(self):
         """
         This method set some data of water class
@@ -92,8 +99,7 @@ class waterApi(Resource):
             self.check_if_is_admin()
 
             # Is an admin, so it's OK to change actuator state
-            user_id = get_jwt_identity()
-            user = User.objects.get(id=user_id)
+            user = g.user
             logging.log(logging.INFO, strings.LOG_API_WATER_SET, user.user_name)
 
             # Get JSON and parse it
@@ -116,6 +122,7 @@ class waterApi(Resource):
                 water.cya = cya
 
             water.save_to_db()
+            stateStore.invalidate("water")
 
             return "", 200
 
@@ -135,8 +142,7 @@ class waterApi(Resource):
     @staticmethod
     def check_if_is_admin():
         # Check if the current user is an admin
-        user_id = get_jwt_identity()
-        user = User.objects.get(id=user_id)
+        user = g.user
 
         if user.is_admin is not True:
             # This user isn't an admin user, raise Exception
@@ -0,0 +1,52 @@
+import io
+import time
+
+import numpy as np
+
+from src.driver.adcframe import AdcFrameDecoder
+
+""" Benchmark of the ADC frame ingestion paths of the pool driver.
+It decodes the same synthetic frames using the text, binary and checked binary protocols and reports how many
+frames per second each path handles (decoding, conversion to volts and DC removal). """
+
+FRAMES = 500
+VCC = 5.2
+
+
+def _build_frames(frames):
+    """ This function builds random raw ADC frames """
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 1024, size=(frames, AdcFrameDecoder.CHANNELS, AdcFrameDecoder.SAMPLES))
+
+
+def _run(read_frame, stream, frames, decoder):
+    """ This function decodes all the frames from the stream and returns the frames per second """
+    start = time.perf_counter()
+
+    for _ in range(frames):
+        read_frame(stream)
+        decoder.to_volts()
+
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    raw_frames = _build_frames(FRAMES)
+
+    text_stream = io.BytesIO(b''.join(AdcFrameDecoder.encode_text_frame(f) for f in raw_frames))
+    binary_stream = io.BytesIO(b''.join(AdcFrameDecoder.encode_binary_frame(f) for f in raw_frames))
+    checked_stream = io.BytesIO(b''.join(AdcFrameDecoder.encode_checked_frame(f, i) for i, f in enumerate(raw_frames)))
+
+    decoder = AdcFrameDecoder(VCC)
+    text_fps = _run(decoder.read_text_frame, text_stream, FRAMES, decoder)
+    binary_fps = _run(decoder.read_binary_frame, binary_stream, FRAMES, decoder)
+    checked_fps = _run(decoder.read_checked_frame, checked_stream, FRAMES, decoder)
+
+    print("Text protocol:   %10.1f frames/s" % text_fps)
+    print("Binary protocol: %10.1f frames/s" % binary_fps)
+    print("Checked binary:  %10.1f frames/s" % checked_fps)
+    print("Speed-up:        %10.1fx" % (binary_fps / text_fps))
+
+
+if __name__ == '__main__':
+    main()
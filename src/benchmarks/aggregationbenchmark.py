@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+
+import src.config.configconstants as cfg
+from src.utils import aggregation
+
+""" Replay benchmark of the aggregation methods of the water parameters.
+It builds a synthetic day of ORP and pH readings, with slow drifts, probe noise and glitches, aggregates every
+refresh window with every method and feeds the result to the P control of the chemicals algorithm. The dosing
+seconds are compared with the ones of the true value of the water, so the effect of the glitches is measured
+in the decisions that matter, and the time needed to aggregate a window is reported too. """
+
+WINDOWS = 96  # A day of 15 minutes refresh windows
+READINGS = 900  # One reading every second
+GLITCH_PROPORTION = 0.03
+
+
+def orp_seconds(orp, setpoint=cfg.POOL_ORP_MV_SETPOINT):
+    """
+    Copy of the ORP P control of the chemicals algorithm, kept as a reference
+    """
+    if orp >= setpoint:
+        return 0
+
+    error = setpoint - orp
+    if error > 150:
+        return 14 * 60
+    elif 150 >= error >= 25:
+        return int(np.round(5.28 * error - 72))
+    return 60
+
+
+def ph_seconds(ph, setpoint=cfg.POOL_PH_SETPOINT):
+    """
+    Copy of the pH P control of the chemicals algorithm, kept as a reference
+    """
+    if ph <= setpoint:
+        return 0
+
+    error = ph - setpoint
+    if error > 0.4:
+        return 14 * 60
+    return int(np.round(1800 * error))
+
+
+def _build_replay(rng, center, drift, noise, glitch):
+    """ This function builds the true value and the readings of every window of a water parameter """
+    truth = center + drift * np.sin(np.linspace(0, 2 * np.pi, WINDOWS))
+    readings = truth[:, np.newaxis] + rng.normal(0, noise, size=(WINDOWS, READINGS))
+
+    # Glitches of the probe, like the ones when the filter pump starts or bubbles touch it
+    glitches = rng.random((WINDOWS, READINGS)) < GLITCH_PROPORTION
+    readings[glitches] += rng.choice([-1, 1], size=glitches.sum()) * glitch
+
+    return truth, readings
+
+
+def _replay(name, truth, readings, control):
+    """ This function prints the dosing error and the time of every aggregation method for a parameter """
+    expected = np.array([control(value) for value in truth])
+
+    print("%s (mean of |dosing seconds - ideal dosing seconds| per window)" % name)
+    for method in aggregation.METHODS:
+        start = time.perf_counter()
+        values = [aggregation.aggregate(method, window) for window in readings]
+        elapsed = (time.perf_counter() - start) / WINDOWS * 1e6
+
+        dosing = np.array([control(value) for value in values])
+        error = np.mean(np.abs(dosing - expected))
+        changed = np.count_nonzero(dosing != expected)
+        print("  %-13s %8.1f s  %3d/%d windows off  %8.2f us/window" % (method, error, changed, WINDOWS, elapsed))
+
+
+def main():
+    rng = np.random.default_rng(0)
+
+    orp_truth, orp_readings = _build_replay(rng, cfg.POOL_ORP_MV_SETPOINT - 40, 60, 5, 400)
+    ph_truth, ph_readings = _build_replay(rng, cfg.POOL_PH_SETPOINT + 0.15, 0.2, 0.02, 3)
+
+    _replay("ORP", orp_truth, orp_readings, orp_seconds)
+    _replay("pH", ph_truth, ph_readings, ph_seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+import cProfile
+import pstats
+import threading
+import time
+
+from src.driver.adcframe import AdcFrameDecoder
+from src.driver.serialsupervisor import SerialSupervisor
+from src.emulator import ArduinoEmulator, EmulatedGPIO
+
+""" Load test of the real pool driver, off the Raspberry Pi. The driver reads the ADC frames of an Arduino emulator
+through a pseudo-terminal, and a GPIO stand-in drives the flow, level and emergency stop ISRs, while the CPU time
+of the process is measured. The GPIO stand-in is registered as RPi.GPIO before the pool driver is imported, so
+neither RPi.GPIO nor fake_rpigpio is needed. With PROFILE set, the ADC loop is run again in the main thread under
+cProfile, and the functions that take more time are printed. """
+
+SECONDS = 10
+FRAMES_PER_SECOND = 200
+PROTOCOL = AdcFrameDecoder.PROTOCOL_TEXT
+FLOW_PULSES_PER_SECOND = 100
+PROFILE = False
+
+
+def _drive_gpio(gpio, stop):
+    """ This function sends flow pulses, and changes a level sensor and the emergency stop every second """
+    from src.driver.pooldriver import PoolDriver
+
+    period = 1 / FLOW_PULSES_PER_SECOND
+    pulses = 0
+
+    while not stop.wait(period):
+        gpio.pulse(PoolDriver._PIN_FLOW_SENSOR)
+        pulses += 1
+
+        if pulses % FLOW_PULSES_PER_SECOND == 0:
+            gpio.set_input(PoolDriver._PIN_LEVEL_SENSOR_1, not gpio.input(PoolDriver._PIN_LEVEL_SENSOR_1))
+            gpio.set_input(PoolDriver._PIN_EMERGENCY_STOP, not gpio.input(PoolDriver._PIN_EMERGENCY_STOP))
+
+
+def main():
+    gpio = EmulatedGPIO().install()
+    from src.driver.pooldriver import PoolDriver
+
+    emulator = ArduinoEmulator(rate=FRAMES_PER_SECOND).start()
+    PoolDriver._SERIAL_PORT = emulator.port_name
+    PoolDriver._ADC_PROTOCOL = PROTOCOL
+    driver = PoolDriver()
+    supervisor = driver._adc_supervisor
+
+    stop = threading.Event()
+    gpio_thread = threading.Thread(target=_drive_gpio, args=(gpio, stop), daemon=True)
+    gpio_thread.start()
+
+    # Let the link start before measuring
+    time.sleep(1)
+    frames = supervisor.frames_ok
+    events = gpio.events
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    time.sleep(SECONDS)
+
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    frames = supervisor.frames_ok - frames
+    events = gpio.events - events
+
+    supervisor.stop()
+
+    print("Protocol:        %10s" % supervisor.protocol)
+    print("Frames:          %10.1f frames/s (%d sent, %d lost by the emulator)" %
+          (frames / wall, emulator.frames_sent, emulator.frames_lost))
+    print("Dropped frames:  %10d" % supervisor.frames_dropped)
+    print("GPIO events:     %10.1f events/s" % (events / wall))
+    print("CPU:             %10.1f %% of a core" % (100 * cpu / wall))
+    print("CPU per frame:   %10.3f ms" % (1000 * cpu / max(frames, 1)))
+
+    if PROFILE:
+        # cProfile only sees its own thread, so the ADC loop is run in this one
+        profiled = SerialSupervisor(driver._open_arduino, driver._adc_decoder, driver._process_adc_frame,
+                                    PoolDriver._ADC_START_COMMANDS, supervisor.protocol)
+        threading.Timer(SECONDS, profiled.stop).start()
+
+        profile = cProfile.Profile()
+        profile.runcall(profiled.run)
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(20)
+
+    stop.set()
+    emulator.stop()
+
+
+if __name__ == '__main__':
+    main()
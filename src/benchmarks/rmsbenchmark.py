@@ -0,0 +1,71 @@
+import time
+from itertools import accumulate
+
+import numpy as np
+
+from src.utils.rms import RmsEngine
+
+""" Microbenchmark of the RMS computation of the AC channels of the pool driver.
+It compares the legacy implementation with the whole window and the sliding window modes of the RMS engine,
+computing the RMS value of the three AC channels of every frame, as the driver does. """
+
+FRAMES = 5000
+CHANNELS = 3
+SAMPLES = 100
+
+
+def legacy_rms(data_vector, length=None):
+    """
+    Legacy implementation of PoolDriver._get_rms, kept as a reference
+    """
+    result = 0
+
+    if length is None:
+        L = len(data_vector)
+    else:
+        L = length
+
+    if L > 0:
+        a2 = np.power(data_vector, 2) / L
+        v1 = np.array(a2[L - 1:])
+        v2 = np.append([0], a2[0: len(a2) - L])
+        acu = list(accumulate(a2[0: L - 1]))
+        v1[0] = v1[0] + acu[-1]
+        rms_pw2 = list(accumulate(v1 - v2))
+        rms = np.power(rms_pw2, 0.5)
+        result = rms[0]
+
+    return result
+
+
+def _build_frames(frames):
+    """ This function builds frames of noisy 50 Hz sine waves """
+    rng = np.random.default_rng(0)
+    t = np.arange(frames * SAMPLES).reshape(frames, 1, SAMPLES) / 1000
+    return np.sin(2 * np.pi * 50 * t) + rng.normal(0, 0.01, size=(frames, CHANNELS, SAMPLES))
+
+
+def _time(function, frames):
+    """ This function returns the microseconds per frame of the given RMS function """
+    start = time.perf_counter()
+
+    for frame in frames:
+        function(frame)
+
+    return (time.perf_counter() - start) / len(frames) * 1e6
+
+
+def main():
+    frames = _build_frames(FRAMES)
+
+    legacy = _time(lambda frame: [legacy_rms(channel) for channel in frame], frames)
+    whole = _time(RmsEngine(CHANNELS).process, frames)
+    sliding = _time(RmsEngine(CHANNELS, window=4 * SAMPLES).process, frames)
+
+    print("Legacy:                %8.2f us/frame" % legacy)
+    print("Whole window engine:   %8.2f us/frame (%.1fx)" % (whole, legacy / whole))
+    print("Sliding window engine: %8.2f us/frame (%.1fx)" % (sliding, legacy / sliding))
+
+
+if __name__ == '__main__':
+    main()
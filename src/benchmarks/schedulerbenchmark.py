@@ -0,0 +1,95 @@
+import threading
+import time
+
+import numpy as np
+
+from src.models.timer import Timer
+
+""" Benchmark of the periodic timers.
+It runs the same number of 1 second timers as the pool daemon with the legacy implementation, which starts
+a new threading.Timer for every run, and with the shared scheduler. It reports the number of threads that
+were created and the jitter of the runs (delay between the scheduled and the real start of every run). """
+
+TIMERS = 10
+PERIOD = 1
+SECONDS = 10
+
+
+class LegacyTimer(object):
+    """
+    Legacy implementation of src.models.timer.Timer, kept as a reference
+    """
+
+    def __init__(self, callback=None, period=1):
+        self.callback = callback
+        self.period = period
+        self.stop = False
+        self.current_timer = None
+        self.schedule_lock = threading.Lock()
+        self.next_call = time.time()
+
+    def start(self):
+        self.schedule_timer()
+
+    def _run(self):
+        self.callback()
+        with self.schedule_lock:
+            if not self.stop:
+                self.schedule_timer()
+
+    def schedule_timer(self):
+        self.next_call = self.next_call + self.period
+        timer_period = self.next_call - time.time()
+        if timer_period < 0:
+            timer_period = 0
+            self.next_call = time.time()
+        self.current_timer = threading.Timer(timer_period, self._run)
+        self.current_timer.daemon = True
+        self.current_timer.start()
+
+    def cancel(self):
+        with self.schedule_lock:
+            self.stop = True
+            if self.current_timer is not None:
+                self.current_timer.cancel()
+
+
+def _measure(build_timer):
+    """ This function runs the timers and returns the threads used and the jitter of every run, in ms """
+    threads = set()
+    jitter = []
+    timers = []
+
+    def callback(timer_index):
+        timer = timers[timer_index]
+        jitter.append((time.time() - timer.expected) * 1000)
+        timer.expected += PERIOD
+        threads.add(threading.current_thread().name)
+
+    for i in range(TIMERS):
+        timer = build_timer(lambda i=i: callback(i))
+        timer.expected = time.time() + PERIOD
+        timers.append(timer)
+        timer.start()
+
+    time.sleep(SECONDS + PERIOD / 2)
+
+    for timer in timers:
+        timer.cancel()
+
+    return len(threads), np.array(jitter)
+
+
+def main():
+    legacy_threads, legacy_jitter = _measure(lambda callback: LegacyTimer(callback, period=PERIOD))
+    scheduler_threads, scheduler_jitter = _measure(lambda callback: Timer(callback, period=PERIOD))
+
+    print("Legacy:    %4d threads, jitter mean %.3f ms, p99 %.3f ms, max %.3f ms" %
+          (legacy_threads, legacy_jitter.mean(), np.percentile(legacy_jitter, 99), legacy_jitter.max()))
+    print("Scheduler: %4d threads, jitter mean %.3f ms, p99 %.3f ms, max %.3f ms" %
+          (scheduler_threads, scheduler_jitter.mean(), np.percentile(scheduler_jitter, 99),
+           scheduler_jitter.max()))
+
+
+if __name__ == '__main__':
+    main()
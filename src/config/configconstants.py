@@ -6,6 +6,14 @@ Therefore, these configurations constants are 'hardwired' in normal operation of
 TOKEN_EXPIRE_DAYS = 10  # Days that the Token used in user login expires
 TIMEZONE = "Europe/Madrid"
 
+''' Constants related to the API '''
+IDENTITY_CACHE_MAX_SIZE = 64  # Max logged users whose identity is cached
+IDENTITY_CACHE_TTL_SECONDS = 300  # Seconds before a cached identity is read again from the database
+STATE_MAX_AGE_SECONDS = 1  # Seconds before a state section without change callbacks is built again
+STREAM_MAX_CLIENTS = 16  # Max clients connected to the live stream
+STREAM_QUEUE_MAX_SIZE = 500  # Max values waiting to be sent to a stream client, it gets a full snapshot if exceeded
+STREAM_KEEPALIVE_SECONDS = 15  # Seconds without changes before a keepalive is sent to a stream client
+
 ''' Constants related to the driver '''
 # Actuators
 FILTER_PUMP = "filter pump"
@@ -29,8 +37,79 @@ FLOW_SENSOR = "fill water flow sensor"
 WATER_LEVEL_SENSOR = "water level sensor"
 EMERGENCY_STOP_SENSOR = "emergency stop sensor"
 
+# Serial link with the board
+SERIAL_RECONNECT_MIN_SECONDS = 0.5  # Seconds to wait before opening the port again after a failure
+SERIAL_RECONNECT_MAX_SECONDS = 30  # The wait is doubled on every consecutive failure, up to this
+SERIAL_MAX_FRAME_ERRORS = 5  # Consecutive bad ADC frames before the port is opened again
+
+# Capture of raw ADC frames
+ADC_CAPTURE_ENABLED = False  # Capture the frames from the start of the driver
+ADC_CAPTURE_PATH = "adc_capture.bin"
+ADC_CAPTURE_FRAMES = 36000  # Frames kept in the capture file, 1608 bytes each
+ADC_CAPTURE_FLUSH_SECONDS = 30  # Seconds between writes of the capture to the disk
+
+# Recent ADC frames kept in memory, in volts, for the frames endpoint
+DRIVER_FRAME_RING_SIZE = 64
+DRIVER_FRAMES_DEFAULT = 1  # Frames returned by a request without n
+
+# 1-Wire temperature probes
+ONEWIRE_DEVICES_PATH = "/sys/bus/w1/devices"
+ONEWIRE_PROBES = {"water": "28-031683c616ff"}  # Name and 1-Wire id of every DS18B20 probe
+ONEWIRE_WATER_PROBE = "water"  # Probe read by the temperature sensor
+ONEWIRE_SAMPLE_PERIOD_SECONDS = 2  # Seconds between readings of a probe
+ONEWIRE_READ_TIMEOUT_SECONDS = 1.5  # Readings that take longer are discarded
+ONEWIRE_MAX_AGE_SECONDS = 10  # Older readings aren't given to the sensors
+
+''' Constants related to database background writes '''
+DB_WRITE_QUEUE_MAX_SIZE = 20000  # Max documents waiting to be written, older ones are dropped
+DB_WRITE_BATCH_SIZE = 200  # Documents written in a single batch
+DB_WRITE_FLUSH_SECONDS = 5  # Max seconds between batch writes
+
+''' Constants related to the sensor history '''
+SENSOR_HISTORY_COLLECTION = "sensor_history"
+SENSOR_HISTORY_GRANULARITY = "seconds"  # Time series bucket granularity, for readings every few seconds
+SENSOR_DATA_LEGACY_COLLECTION = "sensor_data"
+MIGRATIONS_COLLECTION = "migrations"
+SENSOR_HISTORY_MIGRATION_BATCH = 1000
+HISTORY_DEFAULT_HOURS = 24  # Range of a history request without dates
+HISTORY_MAX_BUCKETS = 2000  # Max aggregated buckets of a history request, its bucket is widened to fit
+HISTORY_DEFAULT_POINTS = 500  # Points returned by a history request after downsampling
+HISTORY_MAX_POINTS = 2000
+SENSOR_HISTORY_RETENTION_DAYS = 90  # Raw readings are deleted after these days, rollups are kept
+SENSOR_RING_DEPTH = 4096  # Last readings kept in memory by every sensor, must cover SENSOR_REFRESH_MAX_MINUTES
+
+''' Constants related to sensor rollups '''
+ROLLUP_COLLECTION = "sensor_rollups"
+ROLLUP_RESOLUTIONS = [60, 60 * 60, 24 * 60 * 60]  # Seconds of the minute, hour and day rollups
+ROLLUP_MINUTE_RETENTION_DAYS = 365  # Minute rollups are deleted after these days, hour and day ones are kept
+ROLLUP_FLUSH_SECONDS = 60  # Seconds between rollup writes
+ROLLUP_BACKFILL_DAYS = 7  # Max days of raw readings rolled up on startup
+
+''' Constants related to the scheduler of periodic timers '''
+SCHEDULER_WORKERS = 4  # Worker threads always running
+SCHEDULER_MAX_WORKERS = 16  # Max worker threads, extra ones are started when a job blocks all the workers
+SCHEDULER_WORKER_IDLE_SECONDS = 60  # Seconds before an idle extra worker finishes
+SCHEDULER_STALL_SECONDS = 0.1  # Seconds that a due job waits for a free worker before starting an extra one
+
+''' Constants related to the clock '''
+CLOCK_RESOLUTION_SECONDS = 0.1  # Max seconds that a date read from the clock is reused between scheduler ticks
+
+''' Constants related to the simulation '''
+SIMULATION_SEED = 0
+SIMULATION_STEP_SECONDS = 1  # Seconds between steps of the simulated pool
+SIMULATION_TRACE_PERIOD_SECONDS = 60  # Simulated seconds between rows of the trace
+SIMULATION_DAYS = 1
+
+''' Constants related to the Arduino emulator '''
+EMULATOR_FRAMES_PER_SECOND = 10  # ADC frames sent every second
+EMULATOR_SAMPLES_PER_SECOND = 1000  # Samples of every channel taken every second
+EMULATOR_MAINS_FREQUENCY = 50
+EMULATOR_NOISE_VOLTS = 0.005  # Standard deviation of the noise added to the synthetic waveforms
+EMULATOR_RESET_SECONDS = 0.1  # Seconds that the emulated board takes to boot after a reset
+
 ''' Constants related to actuators '''
 ESTOP_CAUSE_SENSOR = "emergency stop sensor"
+ACTUATOR_STATS_SAVE_SECONDS = 30  # Min seconds between statistics writes, state changes are written at once
 
 ''' Maximum and minimum value for poolconfig variables '''
 SENSOR_REFRESH_MAX_MINUTES = 20
@@ -56,6 +135,13 @@ POOL_FILL_VOLUME_BETWEEN_CHECKS = 0.5
 POOL_FILL_SECONDS_WAIT = 30
 POOL_AUTO_LIGHTS_ON = True
 POOL_AUTO_LIGHTS_ON_COMMAND_SEQUENCE = [[3, 2 * 60 * 60]]
+POOL_WATER_AGGREGATION = {"temperature": "mean", "orp": "hampel", "ph": "hampel", "tds": "median"}
+
+''' Constants related to the aggregation of the water sensor readings '''
+WATER_PARAMETERS = ["temperature", "orp", "ph", "tds"]
+AGGREGATION_TRIM_PROPORTION = 0.1  # Proportion of values cut from each end by the trimmed mean
+AGGREGATION_HAMPEL_THRESHOLD = 3  # Values farther from the median than these scaled MADs are rejected
+AGGREGATION_EWMA_ALPHA = 0.05  # Weight of the newest value in the EWMA
 
 ''' Constants for filter class '''
 DIATOMS_TYPE = "diatom filter"
@@ -68,8 +154,13 @@ STATE_FILTERING = strings.STR_STATE_FILTERING
 ''' Constants related to automatic water fill '''
 STATE_WAITING_FOR_FILL = strings.STR_STATE_WAITING_FOR_FILL
 STATE_FILLING = strings.STR_STATE_FILLING
+STATE_WAITING_FOR_SETTLE = strings.STR_STATE_WAITING_FOR_SETTLE
 
 ''' Constants related to light control '''
 STATE_WAITING_FOR_NIGHT = strings.STR_STATE_WAITING_FOR_NIGHT
 STATE_WAITING_FOR_DAY = strings.STR_STATE_WAITING_FOR_DAY
+LIGHTS_CONNECT_TIMEOUT_SECONDS = 3  # Max seconds to connect to the LUMIPLUS controller
+LIGHTS_READ_TIMEOUT_SECONDS = 3  # Max seconds to wait for the echo of a command
+LIGHTS_RECONNECT_MIN_SECONDS = 1  # Seconds to wait before reconnecting after a failure, doubled on every failure
+LIGHTS_RECONNECT_MAX_SECONDS = 5 * 60
 
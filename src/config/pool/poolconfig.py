@@ -1,4 +1,3 @@
-import datetime
 import logging
 
 import pymongo
@@ -7,6 +6,8 @@ import src.strings_constants.strings as strings
 from src.database.models import PoolConfigData
 from src.database.db import db
 import src.config.configconstants as cfg
+from src.utils import clock
+from src.utils.aggregation import METHODS as aggregation_methods
 
 from pymongo import errors
 
@@ -57,10 +58,48 @@ class PoolConfig:
     pool_auto_lights_on = cfg.POOL_AUTO_LIGHTS_ON
     pool_auto_lights_on_command_sequence = {"sequence": cfg.POOL_AUTO_LIGHTS_ON_COMMAND_SEQUENCE}
 
+    pool_water_aggregation = dict(cfg.POOL_WATER_AGGREGATION)
+
     def __init__(self):
         logging.log(logging.INFO, strings.LOG_CFG_INSTANTIATED)
         self.load_from_db()
 
+    @staticmethod
+    def validate_pool_water_aggregation(aggregation):
+        """
+        Checks the methods used to aggregate the readings of the water parameters, before setting them
+
+        Args:
+            aggregation: Dict with the name of the method of every parameter
+
+        Raises: ValueError if it isn't a dict, or it has an unknown parameter or method
+
+        """
+        if not isinstance(aggregation, dict):
+            raise ValueError(strings.LOG_CFG_INVALID_AGGREGATION % (None, aggregation))
+
+        for parameter, method in aggregation.items():
+            if parameter not in cfg.WATER_PARAMETERS or not isinstance(method, str) \
+                    or method not in aggregation_methods:
+                raise ValueError(strings.LOG_CFG_INVALID_AGGREGATION % (parameter, method))
+
+    def set_pool_water_aggregation(self, aggregation: dict):
+        """
+        Sets the method used to aggregate the readings of every water parameter, the parameters that aren't
+        in the dict keep their current method
+
+        Args:
+            aggregation: Dict with the name of the method of every parameter, like {"orp": "hampel"}
+
+        Returns:
+
+        """
+        self.validate_pool_water_aggregation(aggregation)
+
+        self.pool_water_aggregation = dict(self.pool_water_aggregation, **aggregation)
+
+        self.save_to_db()
+
     def set_pool_auto_lights_on_command_sequence(self, sequence: list):
         """
         Sets the pool auto lights on command sequence
@@ -356,6 +395,9 @@ class PoolConfig:
             self.pool_fill_seconds_wait = record["pool_fill_seconds_wait"]
             self.pool_auto_lights_on = record["pool_auto_lights_on"]
             self.pool_auto_lights_on_command_sequence = record["pool_auto_lights_on_command_sequence"]
+            # Records saved before the aggregation could be configured don't have it
+            self.pool_water_aggregation = dict(cfg.POOL_WATER_AGGREGATION,
+                                               **record.get("pool_water_aggregation", {}))
             logging.log(logging.INFO, strings.LOG_CFG_LOADED)
 
         except IndexError:
@@ -374,7 +416,7 @@ class PoolConfig:
             # Create a new SensorData object in database and save all the data
             poolconfigdb = PoolConfigData()
 
-            poolconfigdb.datetime = datetime.datetime.utcnow()
+            poolconfigdb.datetime = clock.utcnow()
             poolconfigdb.sensor_refresh_minutes = self.sensor_refresh_minutes
             poolconfigdb.daily_filter_allowed_hours = self.daily_filter_allowed_hours
             poolconfigdb.pool_hydrodynamic_factor = self.pool_hydrodynamic_factor
@@ -393,6 +435,7 @@ class PoolConfig:
             poolconfigdb.pool_fill_seconds_wait = self.pool_fill_seconds_wait
             poolconfigdb.pool_auto_lights_on = self.pool_auto_lights_on
             poolconfigdb.pool_auto_lights_on_command_sequence = self.pool_auto_lights_on_command_sequence
+            poolconfigdb.pool_water_aggregation = self.pool_water_aggregation
 
             col.replace_one({}, poolconfigdb.to_mongo(), upsert=True)
         except errors.PyMongoError:
@@ -4,3 +4,17 @@ import src.database.db
 
 timezone = pytz.timezone(cfg.TIMEZONE)
 
+from src.database.sensorhistory import ensure_sensor_history
+from src.database.writebehind import WriteBehindQueue
+
+# Instantiate the background writer of sensor data
+sensorDataWriter = WriteBehindQueue(cfg.SENSOR_HISTORY_COLLECTION, setup=ensure_sensor_history)
+
+from src.utils import metrics
+
+metrics.gauge("smartpool_db_write_queue_depth", "Documents waiting to be written by the background writer.",
+              sensorDataWriter.queue_depth)
+metrics.gauge("smartpool_db_write_dropped_total", "Documents dropped by the background writer.",
+              lambda: sensorDataWriter.dropped, type="counter")
+metrics.gauge("smartpool_db_write_inserted_total", "Documents written by the background writer.",
+              lambda: sensorDataWriter.inserted, type="counter")
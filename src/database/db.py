@@ -1,6 +1,9 @@
 import logging
 import src.strings_constants.strings as Strings
 from flask_mongoengine import MongoEngine
+from pymongo import monitoring
+
+from src.database.monitoring import CommandMetrics
 
 db = MongoEngine()
 
@@ -8,4 +11,8 @@ db = MongoEngine()
 def initialize_db(app):
     # Initialize mongoDB
     logging.log(logging.DEBUG, Strings.LOG_START_DB)
+
+    # Record the execution time of all the database commands
+    monitoring.register(CommandMetrics())
+
     db.init_app(app)
@@ -31,6 +31,9 @@ class User(db.Document):
 class SensorData(db.Document):
     """
     This database model holds generic data applicable to all sensors.
+
+    It is the legacy layout of the sensor readings. New readings are stored in the sensor history
+    collection, see src.database.sensorhistory.
     """
 
     '''
@@ -58,6 +61,7 @@ class ChemicalTankData(db.Document):
     """
     This database model holds generic data applicable to chemical tanks.
     """
+    meta = {'indexes': ['-datetime']}
 
     '''
     Type of the thank, there are two types:
@@ -79,6 +83,7 @@ class ActuatorData(db.Document):
     """
     This database model holds generic data applicable to all actuators.
     """
+    meta = {'indexes': ['-datetime']}
 
     '''
     Field that stores what type of actuator is
@@ -98,6 +103,7 @@ class ActuatorControlData(db.Document):
     """
     This database model holds statistical data of all the actuators.
     """
+    meta = {'indexes': ['-datetime']}
 
     '''
     Field for saving the date and time of this data
@@ -224,6 +230,7 @@ class PoolConfigData(db.Document):
     """
     This database model holds dynamic config data for the pool.
     """
+    meta = {'indexes': ['-datetime']}
     '''
     Field for saving the date and time of this data
     '''
@@ -319,6 +326,11 @@ class PoolConfigData(db.Document):
     '''
     pool_auto_lights_on_command_sequence = db.DictField(required=True)
 
+    '''
+    Field for saving the method used to aggregate the readings of every water parameter
+    '''
+    pool_water_aggregation = db.DictField()
+
     '''
     Field for saving what volume will fill before check if we are done filling
     '''
@@ -328,6 +340,7 @@ class FilterAlgorithmData(db.Document):
     """
     This database model holds  data for the filter algorithm.
     """
+    meta = {'indexes': ['-datetime']}
     '''
     Field for saving the date and time of this data
     '''
@@ -348,6 +361,7 @@ class FilterData(db.Document):
     """
     This database model holds  data for the filter algorithm.
     """
+    meta = {'indexes': ['-datetime']}
     '''
     Field for saving the date and time of this data
     '''
@@ -368,6 +382,7 @@ class ChemicalsAlgorithmData(db.Document):
     """
     This database model holds  data for the chemicals algorithm.
     """
+    meta = {'indexes': ['-datetime']}
     '''
     Field for saving the date and time of this data
     '''
@@ -403,6 +418,7 @@ class LevelAlgorithmData(db.Document):
     """
     This database model holds  data for the chemicals algorithm.
     """
+    meta = {'indexes': ['-datetime']}
     '''
     Field for saving the date and time of this data
     '''
@@ -423,11 +439,17 @@ class LevelAlgorithmData(db.Document):
     '''
     start_volume = db.FloatField(required=True)
 
+    '''
+    Field for saving the POSIX timestamp when the water will have settled, while waiting for it
+    '''
+    settle_deadline = db.FloatField()
+
 
 class LightsAlgorithmData(db.Document):
     """
     This database model holds  data for the chemicals algorithm.
     """
+    meta = {'indexes': ['-datetime']}
     '''
     Field for saving the date and time of this data
     '''
@@ -443,6 +465,7 @@ class FlowData(db.Document):
     """
     This database model holds data of the fill flow of the pool
     """
+    meta = {'indexes': ['-datetime']}
 
     '''
     Field for saving the date and time of this data
@@ -459,6 +482,7 @@ class WaterData(db.Document):
     """
     This database model holds  data for the chemicals algorithm.
     """
+    meta = {'indexes': ['-datetime']}
     '''
     Field for saving the date and time of this data
     '''
@@ -0,0 +1,45 @@
+import threading
+
+from pymongo import monitoring
+
+from src.utils import metrics
+
+''' Metrics of the database commands '''
+DB_COMMAND_SECONDS = metrics.histogram("smartpool_db_command_seconds", "Execution time of the database commands.",
+                                       labels=("command", "collection"))
+DB_COMMAND_FAILURES = metrics.counter("smartpool_db_command_failures_total", "Failed database commands.",
+                                      labels=("command", "collection"))
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    This class records the execution time of every command sent to MongoDB, by command and collection,
+    no matter which part of the application sends it.
+    """
+
+    ''' Max number of commands waiting for their reply, to never grow if some reply is missed '''
+    MAX_PENDING = 1000
+
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+
+        with self._lock:
+            if len(self._pending) < self.MAX_PENDING:
+                self._pending[event.request_id] = collection if isinstance(collection, str) else ""
+
+    def _collection(self, event):
+        with self._lock:
+            return self._pending.pop(event.request_id, "")
+
+    def succeeded(self, event):
+        DB_COMMAND_SECONDS.observe(event.duration_micros / 1e6, command=event.command_name,
+                                   collection=self._collection(event))
+
+    def failed(self, event):
+        collection = self._collection(event)
+        DB_COMMAND_SECONDS.observe(event.duration_micros / 1e6, command=event.command_name, collection=collection)
+        DB_COMMAND_FAILURES.inc(command=event.command_name, collection=collection)
@@ -0,0 +1,400 @@
+import datetime
+import logging
+import math
+
+import numpy as np
+import pymongo
+from bson.codec_options import CodecOptions
+from pymongo import errors, UpdateOne
+
+import src.config.configconstants as cfg
+import src.strings_constants.strings as strings
+from src.database import timezone
+
+""" Sensor history storage.
+Every sensor reading is stored as its own document in the sensor history collection:
+    {"datetime": <date>, "sensor_type": <sensor type>, "value": <value>, "is_ok": <bool>}
+
+On MongoDB 5.0 or newer, the collection is a time series collection with sensor_type as its meta field,
+so readings are stored in compressed buckets per sensor type. On older servers it is a regular collection.
+In both cases there is a compound index on sensor type and datetime, so history ranges and the latest
+reading of a sensor don't scan the whole collection. Raw readings expire after SENSOR_HISTORY_RETENTION_DAYS.
+
+Sensor rollups are stored in the rollups collection, one document per sensor type, resolution and bucket:
+    {"sensor_type": <sensor type>, "resolution": <seconds>, "datetime": <bucket start>,
+     "count": <n>, "min": <min>, "max": <max>, "mean": <mean>, "std": <std>, "sum": <sum>, "sumsq": <sum of squares>}
+
+Minute and hour buckets are aligned to multiples of their resolution since the epoch, and day buckets start at
+local midnight, so minute and hour rollups fit exactly inside hour and day ones. """
+
+''' Start of the POSIX time, to convert dates to milliseconds in aggregations '''
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+def _supports_timeseries(database):
+    """
+    This function checks if the MongoDB server supports time series collections
+    """
+    version = database.client.server_info().get("versionArray", [0])
+    return version[0] >= 5
+
+
+def ensure_sensor_history(database):
+    """
+    This function creates the sensor history collection, if it doesn't exist, and its indexes.
+    It can be called any number of times.
+
+    Args:
+        database: pymongo database
+
+    Returns: The sensor history collection
+
+    """
+    name = cfg.SENSOR_HISTORY_COLLECTION
+    retention = cfg.SENSOR_HISTORY_RETENTION_DAYS * 24 * 60 * 60
+    timeseries = _supports_timeseries(database)
+
+    if name not in database.list_collection_names(filter={"name": name}):
+        try:
+            if timeseries:
+                database.create_collection(name, timeseries={"timeField": "datetime",
+                                                             "metaField": "sensor_type",
+                                                             "granularity": cfg.SENSOR_HISTORY_GRANULARITY},
+                                           expireAfterSeconds=retention)
+                logging.log(logging.INFO, strings.LOG_DB_HISTORY_CREATED, name, strings.LOG_DB_HISTORY_TIMESERIES)
+            else:
+                database.create_collection(name)
+                logging.log(logging.INFO, strings.LOG_DB_HISTORY_CREATED, name, strings.LOG_DB_HISTORY_REGULAR)
+        except errors.CollectionInvalid:
+            # Created at the same time by someone else
+            pass
+
+    col = database.get_collection(name)
+    col.create_index([("sensor_type", pymongo.ASCENDING), ("datetime", pymongo.DESCENDING)],
+                     name="sensor_type_datetime")
+
+    if timeseries:
+        # Update the retention of an existing collection
+        database.command("collMod", name, expireAfterSeconds=retention)
+    else:
+        col.create_index("datetime", name="datetime_ttl", expireAfterSeconds=retention)
+
+    return col
+
+
+def ensure_rollups(database):
+    """
+    This function creates the indexes of the rollups collection. It can be called any number of times.
+
+    Args:
+        database: pymongo database
+
+    Returns: The rollups collection
+
+    """
+    col = database.get_collection(cfg.ROLLUP_COLLECTION)
+    col.create_index([("sensor_type", pymongo.ASCENDING), ("resolution", pymongo.ASCENDING),
+                      ("datetime", pymongo.DESCENDING)], name="sensor_type_resolution_datetime", unique=True)
+    col.create_index("datetime", name="minute_ttl",
+                     expireAfterSeconds=cfg.ROLLUP_MINUTE_RETENTION_DAYS * 24 * 60 * 60,
+                     partialFilterExpression={"resolution": cfg.ROLLUP_RESOLUTIONS[0]})
+
+    return col
+
+
+def to_history_document(sensor_type, value, is_ok, datetime):
+    """
+    This function builds a sensor history document
+    """
+    return {"datetime": datetime, "sensor_type": sensor_type, "value": value, "is_ok": is_ok}
+
+
+def rollup_bucket_start(timestamp, resolution):
+    """
+    This function returns the POSIX timestamp of the start of the rollup bucket of a reading. Day buckets start at
+    local midnight, so they hold a day of the pool, and shorter ones at multiples of their resolution since the epoch.
+
+    Args:
+        timestamp: POSIX timestamp of the reading
+        resolution: Seconds of the bucket
+
+    Returns: POSIX timestamp of the start of the bucket
+    """
+    if resolution < DAY_SECONDS:
+        return timestamp - timestamp % resolution
+
+    day = datetime.datetime.fromtimestamp(timestamp, timezone).replace(hour=0, minute=0, second=0, microsecond=0,
+                                                                       tzinfo=None)
+    return timezone.localize(day).timestamp()
+
+
+def history_bucket_seconds(start, end, bucket_seconds=None):
+    """
+    This function returns the bucket length for a history range. The requested length is increased if
+    the range would have more than HISTORY_MAX_BUCKETS buckets, so the response size is always bounded.
+    Buckets of a minute or longer are rounded up to a multiple of a rollup resolution, so they can be
+    built from rollups.
+    """
+    span = (end - start).total_seconds()
+    bucket = max(1, int(math.ceil(span / cfg.HISTORY_MAX_BUCKETS)))
+
+    if bucket_seconds is not None and bucket_seconds > bucket:
+        bucket = int(math.ceil(bucket_seconds))
+
+    for resolution in sorted(cfg.ROLLUP_RESOLUTIONS, reverse=True):
+        if bucket >= resolution:
+            return int(math.ceil(bucket / resolution)) * resolution
+
+    return bucket
+
+
+def _bucket_id(bucket_seconds):
+    """
+    This function returns the expression of the start of the bucket of a reading, in milliseconds.
+    Dates are converted with date arithmetic instead of $toLong and $toDate, which need MongoDB 4.0.
+    """
+    millis = {"$subtract": ["$datetime", EPOCH]}
+    return {"$subtract": [millis, {"$mod": [millis, int(bucket_seconds * 1000)]}]}
+
+
+def _aggregate(col, pipeline, limit):
+    """
+    This function runs an aggregation that returns buckets, with local timezone datetimes. The start of every
+    bucket is converted from milliseconds to a date here, like aggregate_readings does.
+    """
+    col = col.with_options(codec_options=CodecOptions(tz_aware=True, tzinfo=timezone))
+    pipeline = pipeline + [{"$sort": {"_id": pymongo.ASCENDING}}]
+
+    if limit is not None:
+        pipeline.append({"$limit": limit})
+
+    buckets = list(col.aggregate(pipeline, allowDiskUse=True))
+    for bucket in buckets:
+        bucket["datetime"] = datetime.datetime.fromtimestamp(bucket.pop("_id") / 1000, timezone)
+
+    return buckets
+
+
+def aggregate_history(database, sensor_type, start, end, bucket_seconds, limit=cfg.HISTORY_MAX_BUCKETS + 1):
+    """
+    This function aggregates the numeric readings of a sensor type between two dates in buckets of the
+    given length. All the work is done by the database, so only one document per bucket is transferred.
+
+    Args:
+        database: pymongo database
+        sensor_type: Type of the sensor
+        start: Start datetime of the range, inclusive
+        end: End datetime of the range, exclusive
+        bucket_seconds: Length of every bucket
+        limit: Max number of returned buckets, None for all of them
+
+    Returns: List of buckets in ascending order, with their start datetime, min, max, mean, count,
+        sum and sum of squares
+
+    """
+    col = database.get_collection(cfg.SENSOR_HISTORY_COLLECTION)
+
+    return _aggregate(col, [
+        {"$match": {"sensor_type": sensor_type,
+                    "datetime": {"$gte": start, "$lt": end},
+                    "value": {"$type": "number"}}},
+        {"$group": {"_id": _bucket_id(bucket_seconds),
+                    "min": {"$min": "$value"},
+                    "max": {"$max": "$value"},
+                    "mean": {"$avg": "$value"},
+                    "count": {"$sum": 1},
+                    "sum": {"$sum": "$value"},
+                    "sumsq": {"$sum": {"$multiply": ["$value", "$value"]}}}}
+    ], limit)
+
+
+def aggregate_readings(readings, bucket_seconds, limit=cfg.HISTORY_MAX_BUCKETS + 1):
+    """
+    This function aggregates the readings that a sensor keeps in memory in the same buckets as
+    aggregate_history, so recent ranges don't need the database.
+
+    Args:
+        readings: Numpy array of src.sensors.readings.READING_DTYPE, already filtered by date
+        bucket_seconds: Length of every bucket
+        limit: Max number of returned buckets, None for all of them
+
+    Returns: List of buckets in ascending order, like aggregate_history
+    """
+    values = readings["value"]
+    numeric = ~np.isnan(values)
+    values = values[numeric]
+
+    if len(values) == 0:
+        return []
+
+    # Start of the bucket of every reading, in milliseconds, like the database does
+    millis = np.floor(readings["timestamp"][numeric] * 1000).astype(np.int64)
+    ids = millis - millis % int(bucket_seconds * 1000)
+
+    order = np.argsort(ids, kind="stable")
+    ids = ids[order]
+    values = values[order]
+
+    starts = np.flatnonzero(np.concatenate(([True], ids[1:] != ids[:-1])))
+    counts = np.diff(np.append(starts, len(ids)))
+    sums = np.add.reduceat(values, starts)
+    sumsq = np.add.reduceat(values * values, starts)
+    mins = np.minimum.reduceat(values, starts)
+    maxs = np.maximum.reduceat(values, starts)
+
+    return [{"min": float(mins[i]), "max": float(maxs[i]), "mean": float(sums[i] / counts[i]),
+             "count": int(counts[i]), "sum": float(sums[i]), "sumsq": float(sumsq[i]),
+             "datetime": datetime.datetime.fromtimestamp(ids[start] / 1000, timezone)}
+            for i, start in enumerate(starts[:limit])]
+
+
+def rollup_resolution(bucket_seconds):
+    """
+    This function returns the largest rollup resolution that can be used to build buckets of the given
+    length, or None if they must be built from raw readings.
+    """
+    for resolution in sorted(cfg.ROLLUP_RESOLUTIONS, reverse=True):
+        if bucket_seconds >= resolution and bucket_seconds % resolution == 0:
+            return resolution
+
+    return None
+
+
+def aggregate_rollups(database, sensor_type, start, end, bucket_seconds, resolution,
+                      limit=cfg.HISTORY_MAX_BUCKETS + 1):
+    """
+    This function aggregates the rollups of a sensor type between two dates in buckets of the given
+    length, which must be a multiple of the rollup resolution. It returns the same buckets as
+    aggregate_history, reading a rollup document instead of every raw reading.
+    """
+    col = database.get_collection(cfg.ROLLUP_COLLECTION)
+    group = {"_id": _bucket_id(bucket_seconds),
+             "min": {"$min": "$min"},
+             "max": {"$max": "$max"},
+             "count": {"$sum": "$count"},
+             "sum": {"$sum": "$sum"},
+             "sumsq": {"$sum": "$sumsq"}}
+
+    if resolution >= DAY_SECONDS:
+        # Day rollups start at local midnight, not at a multiple of a day, so buckets start at their first day
+        group["first"] = {"$min": "$datetime"}
+
+    buckets = _aggregate(col, [
+        {"$match": {"sensor_type": sensor_type,
+                    "resolution": resolution,
+                    "datetime": {"$gte": start, "$lt": end}}},
+        {"$group": group}
+    ], limit)
+
+    for bucket in buckets:
+        bucket["mean"] = bucket["sum"] / bucket["count"] if bucket["count"] else None
+
+        if "first" in bucket:
+            bucket["datetime"] = bucket.pop("first")
+
+    return buckets
+
+
+def latest_rollup(database, sensor_type, resolution):
+    """
+    This function returns the latest stored rollup of a sensor type and resolution, or None if there isn't any
+    """
+    col = database.get_collection(cfg.ROLLUP_COLLECTION).with_options(
+        codec_options=CodecOptions(tz_aware=True, tzinfo=timezone))
+    return col.find_one({"sensor_type": sensor_type, "resolution": resolution},
+                        sort=[("datetime", pymongo.DESCENDING)])
+
+
+def save_rollups(database, rollups):
+    """
+    This function inserts or replaces rollup documents. Every rollup holds the complete stats of its bucket,
+    so saving it again is harmless.
+    """
+    if not rollups:
+        return
+
+    col = database.get_collection(cfg.ROLLUP_COLLECTION)
+    col.bulk_write([UpdateOne({"sensor_type": r["sensor_type"], "resolution": r["resolution"],
+                               "datetime": r["datetime"]}, {"$set": r}, upsert=True) for r in rollups],
+                   ordered=False)
+
+
+def delete_misaligned_rollups(database, resolution):
+    """
+    This function deletes the rollups of a resolution that don't start where rollup_bucket_start says, as the day
+    rollups stored when they started at UTC midnight. There is a document per sensor and day, so they are all read.
+
+    Returns: Number of deleted rollups
+    """
+    col = database.get_collection(cfg.ROLLUP_COLLECTION).with_options(
+        codec_options=CodecOptions(tz_aware=True, tzinfo=timezone))
+    ids = [r["_id"] for r in col.find({"resolution": resolution}, {"datetime": 1})
+           if rollup_bucket_start(r["datetime"].timestamp(), resolution) != r["datetime"].timestamp()]
+
+    if ids:
+        col.delete_many({"_id": {"$in": ids}})
+
+    return len(ids)
+
+
+def migrate_sensor_data(database, batch_size=cfg.SENSOR_HISTORY_MIGRATION_BATCH):
+    """
+    This function copies the legacy sensor_data documents, with the {sensor_type: value} layout,
+    into the sensor history collection.
+
+    The migration can be run any number of times: it reads the legacy documents in _id order and
+    stores the last copied _id in a checkpoint document after every batch, so a new run only copies
+    the documents that haven't been copied yet. If a run is interrupted between a batch insert and its
+    checkpoint, at most that batch is copied twice.
+
+    Args:
+        database: pymongo database
+        batch_size: Number of legacy documents copied in every batch
+
+    Returns: Number of copied legacy documents
+
+    """
+    history = ensure_sensor_history(database)
+    legacy = database.get_collection(cfg.SENSOR_DATA_LEGACY_COLLECTION)
+    migrations = database.get_collection(cfg.MIGRATIONS_COLLECTION)
+
+    checkpoint = migrations.find_one({"_id": cfg.SENSOR_HISTORY_COLLECTION})
+    query = {}
+    if checkpoint is not None:
+        query = {"_id": {"$gt": checkpoint["last_id"]}}
+
+    copied = 0
+    batch = []
+    last_id = None
+
+    for record in legacy.find(query).sort("_id", pymongo.ASCENDING):
+        for sensor_type, value in record.get("id_value", {}).items():
+            batch.append(to_history_document(sensor_type, value, record.get("is_ok"), record["datetime"]))
+
+        last_id = record["_id"]
+        copied += 1
+
+        if copied % batch_size == 0:
+            _store_batch(history, migrations, batch, last_id)
+            batch = []
+            logging.log(logging.INFO, strings.LOG_DB_MIGRATION_PROGRESS, copied)
+
+    if last_id is not None:
+        _store_batch(history, migrations, batch, last_id)
+
+    logging.log(logging.INFO, strings.LOG_DB_MIGRATION_DONE, copied)
+
+    return copied
+
+
+def _store_batch(history, migrations, batch, last_id):
+    """
+    This function inserts a batch of migrated documents and then moves the checkpoint forward
+    """
+    if batch:
+        history.insert_many(batch, ordered=False)
+
+    migrations.replace_one({"_id": cfg.SENSOR_HISTORY_COLLECTION},
+                           {"_id": cfg.SENSOR_HISTORY_COLLECTION, "last_id": last_id}, upsert=True)
@@ -0,0 +1,221 @@
+import atexit
+import collections
+import logging
+import threading
+import time
+
+from pymongo import errors
+
+import src.config.configconstants as cfg
+import src.strings_constants.strings as strings
+from src.database.db import db
+
+
+class WriteBehindQueue:
+    """
+    This class queues documents to be inserted into a collection, and inserts them in batches from
+    a background thread. Adding a document never blocks on database I/O.
+
+    The queue has a bounded size. When the database is slow or down and the queue is full, documents
+    are dropped following the queue policy, and failed batches are queued again to be retried.
+    """
+
+    ''' Queue policies when it is full '''
+    DROP_OLDEST = "drop oldest"
+    DROP_NEWEST = "drop newest"
+
+    ''' Code of the write errors of a duplicate key '''
+    DUPLICATE_KEY_ERROR = 11000
+
+    def __init__(self, collection, max_size=cfg.DB_WRITE_QUEUE_MAX_SIZE, batch_size=cfg.DB_WRITE_BATCH_SIZE,
+                 flush_seconds=cfg.DB_WRITE_FLUSH_SECONDS, policy=DROP_OLDEST, setup=None):
+        """
+        Constructor of the class
+
+        Args:
+            collection: Name of the collection where the documents are inserted
+            max_size: Max number of documents waiting to be inserted
+            batch_size: Number of queued documents that triggers a flush
+            flush_seconds: Max seconds that a document waits before being flushed
+            policy: What to drop when the queue is full
+            setup: Function called with the database before the first insert, to create the collection
+        """
+        self.collection = collection
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.policy = policy
+        self.setup = setup
+        self._ready = setup is None
+
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._dropping = False
+
+        ''' Counters '''
+        self.enqueued = 0
+        self.inserted = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_flush_seconds = 0
+        self.max_flush_seconds = 0
+        self.total_flush_seconds = 0
+
+        self._thread = threading.Thread(target=self._run, name='DB Writer ' + collection)
+        self._thread.daemon = True
+        self._thread.start()
+
+        atexit.register(self.flush)
+
+    def put(self, document):
+        """
+        This method queues a document to be inserted. It returns False if the new document has been dropped.
+        """
+        with self._condition:
+            if len(self._queue) >= self.max_size:
+                self.dropped += 1
+
+                if not self._dropping:
+                    self._dropping = True
+                    logging.log(logging.WARNING, strings.LOG_DB_QUEUE_FULL, self.collection, self.policy)
+
+                if self.policy == self.DROP_NEWEST:
+                    return False
+
+                self._queue.popleft()
+            else:
+                self._dropping = False
+
+            self._queue.append(document)
+            self.enqueued += 1
+
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify()
+
+        return True
+
+    def queue_depth(self):
+        """
+        This method returns the number of documents waiting to be inserted
+        """
+        return len(self._queue)
+
+    def stats(self):
+        """
+        This method returns the counters of the queue
+        """
+        return {"collection": self.collection,
+                "queue_depth": len(self._queue),
+                "enqueued": self.enqueued,
+                "inserted": self.inserted,
+                "dropped": self.dropped,
+                "flushes": self.flushes,
+                "failed_flushes": self.failed_flushes,
+                "last_flush_seconds": self.last_flush_seconds,
+                "max_flush_seconds": self.max_flush_seconds,
+                "mean_flush_seconds": self.total_flush_seconds / self.flushes if self.flushes else 0}
+
+    def _take_batch(self):
+        """
+        This method takes the oldest queued documents, up to the batch size
+        """
+        batch = []
+
+        while self._queue and len(batch) < self.batch_size:
+            batch.append(self._queue.popleft())
+
+        return batch
+
+    def _requeue(self, batch):
+        """
+        This method puts back a failed batch in front of the queue, without exceeding its max size
+        """
+        with self._condition:
+            room = self.max_size - len(self._queue)
+
+            if room < len(batch):
+                # The oldest documents of the batch are dropped
+                self.dropped += len(batch) - max(room, 0)
+                batch = batch[len(batch) - max(room, 0):]
+
+            self._queue.extendleft(reversed(batch))
+
+    def _insert(self, batch):
+        """
+        This method inserts a batch of documents. It returns True if the batch has been inserted.
+
+        Only the documents that failed are queued again. A document that fails with a duplicate key was already
+        inserted by a previous try whose reply was lost, so it's counted as inserted.
+        """
+        start = time.perf_counter()
+
+        try:
+            if not self._ready:
+                self.setup(db.get_db())
+                self._ready = True
+
+            db.get_db().get_collection(self.collection).insert_many(batch, ordered=False)
+            failed = []
+        except errors.BulkWriteError as e:
+            # The insert is unordered, so the documents without a write error have been inserted
+            failed = [batch[error["index"]] for error in e.details.get("writeErrors", [])
+                      if error.get("code") != self.DUPLICATE_KEY_ERROR]
+            if failed:
+                logging.log(logging.ERROR, strings.LOG_DB_FLUSH_FAILED, len(failed), self.collection, str(e))
+        except errors.PyMongoError as e:
+            logging.log(logging.ERROR, strings.LOG_DB_FLUSH_FAILED, len(batch), self.collection, str(e))
+            failed = batch
+        except Exception as e:
+            # Any other error, of the setup too, keeps the batch queued. The setup is tried again with the next one.
+            logging.log(logging.ERROR, strings.LOG_DB_FLUSH_FAILED, len(batch), self.collection, repr(e))
+            failed = batch
+
+        elapsed = time.perf_counter() - start
+        self.flushes += 1
+        self.last_flush_seconds = elapsed
+        self.total_flush_seconds += elapsed
+        if elapsed > self.max_flush_seconds:
+            self.max_flush_seconds = elapsed
+
+        self.inserted += len(batch) - len(failed)
+
+        if failed:
+            self.failed_flushes += 1
+            self._requeue(failed)
+
+        return not failed
+
+    def flush(self):
+        """
+        This method inserts all the queued documents now. It returns False if some batch has failed.
+        """
+        with self._flush_lock:
+            while True:
+                with self._condition:
+                    batch = self._take_batch()
+
+                if not batch:
+                    return True
+
+                if not self._insert(batch):
+                    return False
+
+    def _run(self):
+        """
+        Background thread that inserts the queued documents when there are enough of them, or when
+        the oldest one has waited for flush_seconds.
+        """
+        while True:
+            try:
+                with self._condition:
+                    self._condition.wait_for(lambda: len(self._queue) >= self.batch_size, timeout=self.flush_seconds)
+
+                if not self.flush():
+                    # Database is failing, wait before retrying
+                    time.sleep(self.flush_seconds)
+            except Exception:
+                # The thread must never end, or every document queued after it would be lost
+                logging.exception(strings.LOG_DB_WRITER_FAILED, self.collection)
+                time.sleep(self.flush_seconds)
@@ -0,0 +1,267 @@
+import binascii
+
+import numpy as np
+
+from src.exceptions.adcexception import AdcException
+
+
+class AdcFrameDecoder:
+    """
+    This class decodes the ADC frames sent by the arduino board and converts them to volts.
+
+    Three protocols are supported:
+        - Text protocol: every sample is sent as an ASCII line, between the INICIODEDATOS and
+          FINDEDATOS lines, and every channel starts with a C0..C7 line.
+        - Binary protocol: every frame starts with FRAME_MAGIC followed by all the samples of the
+          frame, as little-endian unsigned 16 bit integers, channel after channel.
+        - Checked binary protocol: every frame starts with FRAME_CHECKED_MAGIC, followed by a little-endian
+          16 bit sequence number, the samples as in the binary protocol, and the little-endian
+          CRC-16/CCITT-FALSE of the sequence number and the samples.
+
+    Frames that can't be decoded raise an AdcException, and the next frame is searched from the next byte
+    or line. Every time that data has to be skipped to find the start of a frame, it's counted as a resync.
+    """
+
+    ''' Protocols '''
+    PROTOCOL_TEXT = "text"
+    PROTOCOL_BINARY = "binary"
+    PROTOCOL_CHECKED = "checked"
+
+    ''' Frame geometry '''
+    CHANNELS = 8
+    SAMPLES = 100
+
+    ''' Channels that hold AC signals (mains voltage, pump and general intensity) '''
+    AC_CHANNELS = slice(2, 5)
+
+    ''' Text protocol tokens '''
+    TEXT_FRAME_START = "INICIODEDATOS"
+    TEXT_FRAME_END = "FINDEDATOS"
+    _TEXT_CHANNELS = {"C" + str(c): c for c in range(CHANNELS)}
+
+    ''' Binary protocol constants '''
+    FRAME_MAGIC = b'\xa5\x5a'
+    FRAME_PAYLOAD_SIZE = CHANNELS * SAMPLES * 2
+    MAX_SYNC_BYTES = 4 * (FRAME_PAYLOAD_SIZE + len(FRAME_MAGIC))
+
+    ''' Checked binary protocol constants '''
+    FRAME_CHECKED_MAGIC = b'\xa5\x5c'
+    SEQUENCE_MODULO = 1 << 16
+    _CRC_INIT = 0xFFFF
+
+    def __init__(self, vcc, adc_max=1023):
+        """
+        Constructor of the class. All the buffers are allocated here and reused for every frame.
+        """
+        self._scale = vcc / adc_max
+
+        # Raw ADC data is a zero-copy view over the binary payload buffer, so a binary frame is
+        # "parsed" as soon as it has been read from the serial port.
+        self._payload = bytearray(self.FRAME_PAYLOAD_SIZE)
+        self._payload_view = memoryview(self._payload)
+        self.raw_data = np.frombuffer(self._payload, dtype='<u2').reshape(self.CHANNELS, self.SAMPLES)
+
+        # Sequence number and CRC of the checked binary frames
+        self._sequence = bytearray(2)
+        self._crc = bytearray(2)
+
+        # Vector that stores the last frame converted to volts
+        self.volts_data = np.zeros((self.CHANNELS, self.SAMPLES))
+
+        # Times that data has been skipped to find the start of a frame
+        self.resyncs = 0
+
+    @staticmethod
+    def _readline(port):
+        """
+        This method reads a text line from the port, without line terminators.
+        It throws an AdcException if the port stops sending data.
+        """
+        line = port.readline()
+
+        if not line:
+            raise AdcException(message="Timeout while receiving a text ADC frame.")
+
+        try:
+            return line.decode().strip()
+        except UnicodeDecodeError:
+            return ""
+
+    def read_frame(self, port, protocol):
+        """
+        This method reads a full frame from the port using the given protocol
+
+        Returns: The sequence number of the frame, or None if the protocol doesn't number the frames
+        """
+        if protocol == self.PROTOCOL_CHECKED:
+            return self.read_checked_frame(port)
+
+        if protocol == self.PROTOCOL_BINARY:
+            self.read_binary_frame(port)
+        else:
+            self.read_text_frame(port)
+
+        return None
+
+    def read_text_frame(self, port):
+        """
+        This method reads a full frame from the port using the text protocol.
+        It throws an AdcException if a line of the frame is lost or corrupted, so a frame is never decoded
+        with the samples out of place.
+        """
+        # Wait for the start of a new frame
+        if self._readline(port) != self.TEXT_FRAME_START:
+            self.resyncs += 1
+
+            while self._readline(port) != self.TEXT_FRAME_START:
+                pass
+
+        raw = self.raw_data
+        channels = self._TEXT_CHANNELS
+        received = [0] * self.CHANNELS
+        c = None
+        i = 0
+
+        while True:
+            response = self._readline(port)
+
+            if response == self.TEXT_FRAME_END:
+                if c is not None:
+                    received[c] = i
+
+                if received != [self.SAMPLES] * self.CHANNELS:
+                    raise AdcException(message="Incomplete text ADC frame.")
+
+                return
+
+            channel = channels.get(response)
+
+            if channel is not None:
+                if c is not None:
+                    received[c] = i
+                c = channel
+                i = 0
+            else:
+                if c is None or i >= self.SAMPLES:
+                    raise AdcException(message="Misplaced sample in a text ADC frame.")
+
+                try:
+                    raw[c, i] = int(response)
+                except (ValueError, OverflowError):
+                    # Not a number, or out of the range of the raw values
+                    raise AdcException(message="Corrupted sample in a text ADC frame.")
+                i += 1
+
+    def read_binary_frame(self, port):
+        """
+        This method reads a full frame from the port using the binary protocol.
+        It throws an AdcException if the frame header cannot be found or if the port stops sending data.
+        """
+        self._sync(port, self.FRAME_MAGIC)
+        self._read_into(port, self._payload_view)
+
+    def read_checked_frame(self, port):
+        """
+        This method reads a full frame from the port using the checked binary protocol.
+        It throws an AdcException if the frame header cannot be found, if the port stops sending data or if the
+        CRC of the frame is wrong.
+
+        Returns: The sequence number of the frame
+        """
+        self._sync(port, self.FRAME_CHECKED_MAGIC)
+        self._read_into(port, memoryview(self._sequence))
+        self._read_into(port, self._payload_view)
+        self._read_into(port, memoryview(self._crc))
+
+        crc = binascii.crc_hqx(self._payload, binascii.crc_hqx(self._sequence, self._CRC_INIT))
+
+        if crc != int.from_bytes(self._crc, 'little'):
+            raise AdcException(message="CRC error in a checked binary ADC frame.")
+
+        return int.from_bytes(self._sequence, 'little')
+
+    @staticmethod
+    def _read_into(port, view):
+        """
+        This method fills a buffer with data from the port.
+        It throws an AdcException if the port stops sending data.
+        """
+        received = 0
+        size = len(view)
+
+        while received < size:
+            n = port.readinto(view[received:])
+
+            if not n:
+                raise AdcException(message="Timeout while receiving a binary ADC frame.")
+
+            received += n
+
+    def _sync(self, port, magic):
+        """
+        This method discards bytes from the port until the binary frame header is found
+        """
+        previous = b''
+        skipped = 0
+
+        while True:
+            byte = port.read(1)
+
+            if not byte:
+                raise AdcException(message="Timeout while searching for a binary ADC frame header.")
+
+            if previous + byte == magic:
+                if skipped > 1:
+                    self.resyncs += 1
+                return
+
+            previous = byte
+            skipped += 1
+
+            if skipped > self.MAX_SYNC_BYTES:
+                raise AdcException(message="Binary ADC frame header not found.")
+
+    def to_volts(self):
+        """
+        This method converts the last raw frame to volts and deletes the DC component of the AC channels.
+        The returned array is reused by the next call.
+        """
+        volts = self.volts_data
+        np.multiply(self.raw_data, self._scale, out=volts)
+
+        ac = volts[self.AC_CHANNELS]
+        ac -= ac.mean(axis=1, keepdims=True)
+
+        return volts
+
+    @classmethod
+    def encode_text_frame(cls, raw):
+        """
+        This method encodes a raw frame as the arduino does using the text protocol
+        """
+        lines = [cls.TEXT_FRAME_START]
+
+        for c in range(cls.CHANNELS):
+            lines.append("C" + str(c))
+            lines.extend(str(int(v)) for v in raw[c])
+
+        lines.append(cls.TEXT_FRAME_END)
+
+        return ("\r\n".join(lines) + "\r\n").encode()
+
+    @classmethod
+    def encode_binary_frame(cls, raw):
+        """
+        This method encodes a raw frame as the arduino does using the binary protocol
+        """
+        return cls.FRAME_MAGIC + np.ascontiguousarray(raw, dtype='<u2').tobytes()
+
+    @classmethod
+    def encode_checked_frame(cls, raw, sequence):
+        """
+        This method encodes a raw frame as the arduino does using the checked binary protocol
+        """
+        data = (sequence % cls.SEQUENCE_MODULO).to_bytes(2, 'little') + \
+            np.ascontiguousarray(raw, dtype='<u2').tobytes()
+
+        return cls.FRAME_CHECKED_MAGIC + data + binascii.crc_hqx(data, cls._CRC_INIT).to_bytes(2, 'little')
@@ -1,11 +1,18 @@
 import logging
 import random
 
+import numpy as np
+
 import src.config.configconstants as cfg
 import src.strings_constants.strings as strings
+from src.driver.adcframe import AdcFrameDecoder
 from src.exceptions.unknownactuatorexception import UnknownActuatorException
 from src.models import Timer
-from src.sensors import temperatureSensor, phSensor, tdsSensor, orpSensor, pumpSensor
+from src.sensors import temperatureSensor, phSensor, tdsSensor, orpSensor, pumpSensor, lightSensor, \
+    waterLevelSensor_1, waterLevelSensor_2, waterLevelSensor_3, waterLevelSensor_4, waterLevelSensor_5, \
+    waterLevelSensor_6
+from src.sensors.subtypes import flowSensor
+from src.utils import clock
 
 
 class FakePoolDriver:
@@ -32,6 +39,13 @@ class FakePoolDriver:
 
     filterpump = False
 
+    '''
+    Simulated pool, if any, that gives the sensor readings instead of random values
+    '''
+    model = None
+    simulation_timer = None
+    _flow_ticks = 0
+
     def __init__(self):
         """
         The constructor of this class initializes the arduino board.
@@ -42,12 +56,58 @@ class FakePoolDriver:
         t.start()
         t2 = Timer(self.__fake2__, period=0.5).start()
 
+    def simulate(self, model):
+        """
+        This method connects the driver to a simulated pool. From then on, the sensor readings come from the
+        model, the actuators act on it, and the model is moved forward every SIMULATION_STEP_SECONDS.
+
+        Args:
+            model: PoolModel of the simulated pool
+        """
+        self.model = model
+        self.model.set_actuator(cfg.FILTER_PUMP, self.filterpump)
+        self.__update_levels__(force=True)
+
+        self.simulation_timer = Timer(self.__simulate__, period=cfg.SIMULATION_STEP_SECONDS)
+        self.simulation_timer.start()
+
+    def __simulate__(self):
+        # Move the model forward and send the ticks of the water filled to the flow sensor
+        now = clock.now()
+        liters = self.model.step(now, cfg.SIMULATION_STEP_SECONDS)
+
+        self._flow_ticks += liters * 60 * flowSensor.k_factor
+        ticks = int(self._flow_ticks)
+        self._flow_ticks -= ticks
+        flowSensor.add_tick(ticks)
+
+        self.__update_levels__()
+
+        daylight = self.model.sun(now) > 0
+        if lightSensor.value != daylight:
+            lightSensor.add_value(daylight)
+
+    def __update_levels__(self, force=False):
+        # Level sensors only send a value when they change, as the interrupts of the real driver
+        for sensor, level in zip([waterLevelSensor_1, waterLevelSensor_2, waterLevelSensor_3, waterLevelSensor_4,
+                                  waterLevelSensor_5, waterLevelSensor_6], self.model.levels()):
+            if force or sensor.value != level:
+                sensor.add_value(level)
+
     def __fake2__(self):
         if self.filterpump:
             if self.callback_list_pump is not None:
                 pumpSensor.add_value(7, save=False)
 
     def __fake__(self):
+        if self.model is not None:
+            readings = self.model.measure()
+            temperatureSensor.add_value(readings["temperature"])
+            phSensor.add_value(readings["ph"])
+            orpSensor.add_value(readings["orp"])
+            tdsSensor.add_value(readings["tds"])
+            return
+
         if self.callback_list_temp is not None:
             # temp = random.randrange(5, 6, 1)
             temp = 15
@@ -69,6 +129,9 @@ class FakePoolDriver:
         """
         This function set the state of a given actuator
         """
+        if self.model is not None and actuator in self.model.actuators:
+            self.model.set_actuator(actuator, state)
+
         if actuator == cfg.FILTER_PUMP:
             self.filterpump = state
             if not state:
@@ -86,6 +149,12 @@ class FakePoolDriver:
         else:
             raise UnknownActuatorException
 
+    def get_frames(self, n=cfg.DRIVER_FRAMES_DEFAULT):
+        """
+        This function gets the newest ADC frames. There isn't any ADC, so there aren't frames
+        """
+        return np.empty((0, AdcFrameDecoder.CHANNELS, AdcFrameDecoder.SAMPLES), dtype=np.float32)
+
     def getstate(self, sensor: str) -> bool:
         """
         This function gets the current state of a given sensor
@@ -0,0 +1,267 @@
+import os
+import time
+
+import numpy as np
+
+import src.config.configconstants as cfg
+import src.strings_constants.strings as strings
+from src.driver.adcframe import AdcFrameDecoder
+
+""" Capture of raw ADC frames to a ring file on disk. The file is preallocated when it's created, and then it's only
+written in place through a memory map, so the SD card sees the same blocks rewritten at the flush period instead of
+a growing file. It's made of a header followed by a record for every frame:
+
+    header: magic, version, channels, samples, capacity, count (frames appended since the file was created)
+    record: timestamp (little-endian float64 POSIX time) + raw ADC values (little-endian uint16, channel after channel)
+
+The record of the frame number n is at n % capacity. The count is updated after the record, so readers never see
+a frame that is being written. Timestamps never go back, so readers find time ranges by bisection: a frame older
+than the last one, after the clock is set back, is stamped with the time of the last one. """
+
+''' Header of the capture files '''
+MAGIC = b'SPADCCAP'
+VERSION = 1
+HEADER_SIZE = 64
+_HEADER_DTYPE = np.dtype([("magic", "S8"), ("version", "<u4"), ("channels", "<u4"), ("samples", "<u4"),
+                          ("reserved", "<u4"), ("capacity", "<u8"), ("count", "<u8")])
+
+
+def _record_dtype(channels, samples):
+    """
+    This function returns the numpy dtype of the records of a capture file
+    """
+    return np.dtype([("timestamp", "<f8"), ("raw", "<u2", (channels, samples))])
+
+
+class FrameCapture:
+    """
+    This class appends raw ADC frames, with their timestamps, to a capture file. If the file already exists with
+    the same geometry, the capture goes on where it was left, and if not, it's created again. Timestamps are kept
+    sorted: a frame older than the last one is stamped with the time of the last one.
+    """
+
+    def __init__(self, path, capacity=cfg.ADC_CAPTURE_FRAMES, channels=AdcFrameDecoder.CHANNELS,
+                 samples=AdcFrameDecoder.SAMPLES, flush_period=cfg.ADC_CAPTURE_FLUSH_SECONDS):
+        """
+        Constructor of the class
+
+        Args:
+            path: Path of the capture file
+            capacity: Frames kept in the file, the oldest ones are overwritten
+            channels: Channels of every frame
+            samples: Samples of every channel
+            flush_period: Seconds between writes of the changed pages to the disk
+        """
+        self.path = path
+        self.capacity = capacity
+        self.flush_period = flush_period
+
+        if not self._compatible(path, capacity, channels, samples):
+            self._create(path, capacity, channels, samples)
+
+        self._header = np.memmap(path, dtype=_HEADER_DTYPE, mode="r+", shape=(1,))
+        self._records = np.memmap(path, dtype=_record_dtype(channels, samples), mode="r+", offset=HEADER_SIZE,
+                                  shape=(capacity,))
+        self._timestamps = self._records["timestamp"]
+        self._raw = self._records["raw"]
+        self._count = int(self._header["count"][0])
+        self._last_timestamp = float(self._timestamps[(self._count - 1) % capacity]) if self._count else None
+        self._last_flush = time.monotonic()
+
+    @staticmethod
+    def _compatible(path, capacity, channels, samples):
+        """
+        This method checks if a capture file exists with the given geometry
+        """
+        try:
+            header = np.fromfile(path, dtype=_HEADER_DTYPE, count=1)
+        except OSError:
+            return False
+
+        if len(header) == 0:
+            return False
+
+        header = header[0]
+        size = HEADER_SIZE + capacity * _record_dtype(channels, samples).itemsize
+
+        return (header["magic"] == MAGIC and header["version"] == VERSION and header["channels"] == channels and
+                header["samples"] == samples and header["capacity"] == capacity and os.path.getsize(path) == size)
+
+    @staticmethod
+    def _create(path, capacity, channels, samples):
+        """
+        This method creates an empty capture file, with all its blocks allocated
+        """
+        header = np.zeros(1, dtype=_HEADER_DTYPE)
+        header["magic"] = MAGIC
+        header["version"] = VERSION
+        header["channels"] = channels
+        header["samples"] = samples
+        header["capacity"] = capacity
+        size = HEADER_SIZE + capacity * _record_dtype(channels, samples).itemsize
+
+        with open(path, "wb") as capture_file:
+            capture_file.write(header.tobytes().ljust(HEADER_SIZE, b'\0'))
+
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(capture_file.fileno(), 0, size)
+            else:
+                capture_file.truncate(size)
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def count(self):
+        """
+        Frames appended since the file was created
+        """
+        return self._count
+
+    def append(self, raw, timestamp=None):
+        """
+        This method appends a frame to the file. A frame older than the last one, because the clock has been set
+        back, gets the timestamp of the last one.
+
+        Args:
+            raw: Raw ADC values of the frame, an array of shape (channels, samples)
+            timestamp: POSIX time of the frame, now by default
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+
+        if self._last_timestamp is not None and timestamp < self._last_timestamp:
+            timestamp = self._last_timestamp
+
+        index = self._count % self.capacity
+
+        self._timestamps[index] = timestamp
+        self._raw[index] = raw
+        self._last_timestamp = timestamp
+
+        self._count += 1
+        self._header["count"] = self._count
+
+        if time.monotonic() - self._last_flush > self.flush_period:
+            self.flush()
+
+    def flush(self):
+        """
+        This method writes the changed pages of the file to the disk
+        """
+        self._records.flush()
+        self._header.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        """
+        This method writes the file to the disk. The memory maps are closed when the capture is deleted, so a frame
+        being appended from another thread is never written to a closed map.
+        """
+        self.flush()
+
+
+class FrameCaptureReader:
+    """
+    This class reads the frames of a capture file, even while it's being written. Frames are given as numpy views
+    over the memory map of the file, so hours of frames are read without copying them.
+    """
+
+    def __init__(self, path):
+        """
+        Constructor of the class
+
+        Args:
+            path: Path of the capture file
+
+        Raises: ValueError if the file isn't a capture file
+        """
+        header = np.memmap(path, dtype=_HEADER_DTYPE, mode="r", shape=(1,))
+
+        if header["magic"][0] != MAGIC or header["version"][0] != VERSION:
+            raise ValueError(strings.ERR_ADC_CAPTURE_FILE % path)
+
+        self.path = path
+        self.channels = int(header["channels"][0])
+        self.samples = int(header["samples"][0])
+        self.capacity = int(header["capacity"][0])
+
+        self._header = header
+        self._records = np.memmap(path, dtype=_record_dtype(self.channels, self.samples), mode="r",
+                                  offset=HEADER_SIZE, shape=(self.capacity,))
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def count(self):
+        """
+        Frames appended since the file was created
+        """
+        return int(self._header["count"][0])
+
+    def segments(self, start=None, end=None):
+        """
+        This method returns the frames with a timestamp in [start, end), as at most two pairs of views, because the
+        frames of a time range may go on from the end of the ring to its start
+
+        Args:
+            start: POSIX time of the first frame, the oldest one by default
+            end: POSIX time after the last frame, the newest one by default
+
+        Returns: List of (timestamps, raw) pairs of views, from the oldest frames to the newest ones
+        """
+        count = self.count
+        if count <= self.capacity:
+            parts = [self._records[:count]]
+        else:
+            index = count % self.capacity
+            parts = [self._records[index:], self._records[:index]]
+
+        segments = []
+        for part in parts:
+            timestamps = part["timestamp"]
+            first = 0 if start is None else np.searchsorted(timestamps, start, side="left")
+            last = len(timestamps) if end is None else np.searchsorted(timestamps, end, side="left")
+
+            if first < last:
+                segments.append((timestamps[first:last], part["raw"][first:last]))
+
+        return segments
+
+    def frames(self, start=None, end=None):
+        """
+        This method returns the frames with a timestamp in [start, end). They are views over the file, unless the
+        time range goes on from the end of the ring to its start, when they are copied.
+
+        Returns: Timestamps and raw frames, arrays of shape (frames,) and (frames, channels, samples)
+        """
+        segments = self.segments(start, end)
+
+        if len(segments) == 0:
+            return (np.empty(0, dtype="<f8"), np.empty((0, self.channels, self.samples), dtype="<u2"))
+        if len(segments) == 1:
+            return segments[0]
+
+        return (np.concatenate([timestamps for timestamps, _ in segments]),
+                np.concatenate([raw for _, raw in segments]))
+
+    def last(self, n=1):
+        """
+        This method returns the newest frames
+
+        Args:
+            n: Number of frames
+
+        Returns: Timestamps and raw frames, as frames() returns them
+        """
+        count = self.count
+        n = min(n, count, self.capacity)
+        first = (count - n) % self.capacity
+        last = first + n
+
+        if last <= self.capacity:
+            records = self._records[first:last]
+            return records["timestamp"], records["raw"]
+
+        records = np.concatenate((self._records[first:], self._records[:last - self.capacity]))
+        return records["timestamp"], records["raw"]
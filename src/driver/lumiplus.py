@@ -0,0 +1,243 @@
+import collections
+import logging
+import socket
+import threading
+import time
+
+import src.config.configconstants as cfg
+import src.strings_constants.strings as strings
+
+''' A light command, the seconds to wait after it before the next one of its sequence, and if it's only sent when
+the previous command of its sequence has been sent '''
+LightTask = collections.namedtuple("LightTask", ["command", "delay", "after_sent"], defaults=[False])
+
+
+class LumiplusClient:
+    """
+    This class sends commands to a LUMIPLUS light controller, which answers every command with an echo of it.
+
+    A single connection is kept open and reused for all the commands. Connecting and reading the echo have
+    timeouts, so a hung controller never blocks the caller for long. When the controller can't be reached,
+    the next connection attempts are delayed with an exponential backoff, and the commands sent meanwhile
+    fail at once.
+    """
+
+    def __init__(self, host, port, connect_timeout=cfg.LIGHTS_CONNECT_TIMEOUT_SECONDS,
+                 read_timeout=cfg.LIGHTS_READ_TIMEOUT_SECONDS, min_backoff=cfg.LIGHTS_RECONNECT_MIN_SECONDS,
+                 max_backoff=cfg.LIGHTS_RECONNECT_MAX_SECONDS, time_function=time.monotonic):
+        """
+        Constructor of the class
+
+        Args:
+            host: Host of the controller
+            port: TCP port of the controller
+            connect_timeout: Max seconds to connect
+            read_timeout: Max seconds to send a command and read its echo
+            min_backoff: Seconds to wait before reconnecting after the first failure
+            max_backoff: Max seconds to wait before reconnecting
+            time_function: Function that returns the current time in seconds
+        """
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.time = time_function
+
+        self._socket = None
+        self._lock = threading.Lock()
+        self._backoff = 0
+        self._retry_at = 0
+
+        ''' Counters '''
+        self.connections = 0
+        self.failures = 0
+
+    def send(self, command):
+        """
+        This method sends a command and waits for its echo
+
+        Args:
+            command: Bytes of the LUMIPLUS command
+
+        Returns: True if the controller has answered the command
+        """
+        with self._lock:
+            # A kept connection may have been closed by the controller, so a failure is retried once
+            for attempt in range(2):
+                reused = self._socket is not None
+
+                if not reused and not self._connect():
+                    break
+
+                try:
+                    self._socket.sendall(command)
+                    if self._receive(len(command)) == command:
+                        return True
+
+                    # Unexpected answer, the connection is out of sync
+                    self._close()
+                    break
+                except OSError as e:
+                    logging.log(logging.ERROR, strings.LOG_LIGHTS_NET_ERROR, str(e))
+                    self._close()
+
+                    if not reused:
+                        self._failed()
+                        break
+
+            self.failures += 1
+            return False
+
+    def close(self):
+        """
+        This method closes the connection
+        """
+        with self._lock:
+            self._close()
+
+    def _connect(self):
+        """
+        This method opens the connection, unless it has to wait for the backoff
+
+        Returns: True if it's connected
+        """
+        if self.time() < self._retry_at:
+            return False
+
+        try:
+            self._socket = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+            self._socket.settimeout(self.read_timeout)
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError as e:
+            logging.log(logging.ERROR, strings.LOG_LIGHTS_NET_ERROR, str(e))
+            self._socket = None
+            self._failed()
+            return False
+
+        self.connections += 1
+        self._backoff = 0
+        return True
+
+    def _receive(self, size):
+        """
+        This method reads the given number of bytes, or less if the controller closes the connection
+        """
+        data = b''
+        while len(data) < size:
+            chunk = self._socket.recv(size - len(data))
+            if not chunk:
+                raise ConnectionResetError(strings.LOG_LIGHTS_CLOSED)
+            data += chunk
+
+        return data
+
+    def _failed(self):
+        """
+        This method delays the next connection attempt, doubling the delay on every consecutive failure
+        """
+        self._backoff = self.min_backoff if self._backoff == 0 else min(self._backoff * 2, self.max_backoff)
+        self._retry_at = self.time() + self._backoff
+
+    def _close(self):
+        """
+        This method closes the connection, if it's open
+        """
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            finally:
+                self._socket = None
+
+
+class LightDispatcher:
+    """
+    This class sends light commands from its own thread, so the callers never wait for the controller.
+
+    Commands are sent in sequences of LightTask: after sending a command, the dispatcher waits its delay before
+    sending the next one, unless the command has failed, and the tasks that need the previous command are skipped
+    if it has failed. Only one sequence runs at a time: starting a new one
+    cancels the current one, and a cancelled sequence stops at once, even in the middle of a delay.
+    """
+
+    def __init__(self, send_function, result_callback=None):
+        """
+        Constructor of the class
+
+        Args:
+            send_function: Function that sends a command and returns True if it has been sent
+            result_callback: Function called with every command and True if it has been sent
+        """
+        self.send = send_function
+        self.result_callback = result_callback
+
+        self._condition = threading.Condition()
+        self._tasks = collections.deque()
+        self._generation = 0
+        self._thread = None
+
+    def run(self, tasks):
+        """
+        This method cancels the current sequence, if any, and starts a new one
+
+        Args:
+            tasks: List of LightTask, or of (command, delay) and (command, delay, after_sent) tuples
+        """
+        with self._condition:
+            self._generation += 1
+            self._tasks.clear()
+            self._tasks.extend(LightTask(*task) for task in tasks)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="Light dispatcher")
+                self._thread.daemon = True
+                self._thread.start()
+
+            self._condition.notify()
+
+    def cancel(self):
+        """
+        This method cancels the current sequence
+        """
+        self.run([])
+
+    @property
+    def pending(self):
+        """
+        Number of tasks waiting to be sent
+        """
+        return len(self._tasks)
+
+    def _run(self):
+        """
+        Dispatcher thread, that sends the commands of the current sequence
+        """
+        previous = (None, False)
+
+        while True:
+            with self._condition:
+                while not self._tasks:
+                    self._condition.wait()
+
+                task = self._tasks.popleft()
+                generation = self._generation
+
+            if task.after_sent and previous != (generation, True):
+                # The previous command of the sequence has failed
+                sent = False
+            else:
+                sent = self.send(task.command)
+
+            previous = (generation, sent)
+
+            if self.result_callback is not None:
+                try:
+                    self.result_callback(task.command, sent)
+                except Exception:
+                    logging.exception(strings.LOG_LIGHTS_CALLBACK_FAILED)
+
+            if sent and task.delay > 0:
+                with self._condition:
+                    # Wait the delay, unless a new sequence is started
+                    self._condition.wait_for(lambda: self._generation != generation, timeout=task.delay)
@@ -0,0 +1,218 @@
+import collections
+import logging
+import os
+import threading
+import time
+
+import src.config.configconstants as cfg
+import src.strings_constants.strings as strings
+
+''' A temperature reading of a probe and the monotonic time when it was read '''
+OneWireReading = collections.namedtuple("OneWireReading", ["value", "monotonic"])
+
+
+def crc8(data):
+    """
+    This function computes the Dallas/Maxim CRC-8 (polynomial x^8 + x^5 + x^4 + 1) used by 1-Wire devices
+
+    Args:
+        data: Bytes to check
+
+    Returns: The CRC of the data
+    """
+    crc = 0
+    for byte in data:
+        for _ in range(8):
+            mix = (crc ^ byte) & 0x01
+            crc >>= 1
+            if mix:
+                crc ^= 0x8C
+            byte >>= 1
+
+    return crc
+
+
+class OneWireProbe:
+    """
+    This class reads a DS18B20 temperature probe from the w1_slave file of the 1-Wire kernel driver, which has
+    the 9 bytes of the scratchpad of the probe, the result of the CRC check and the temperature:
+
+        72 01 4b 46 7f ff 0e 10 57 : crc=57 YES
+        72 01 4b 46 7f ff 0e 10 57 t=23125
+
+    Reading the file starts a conversion, that takes up to 750 ms.
+    """
+
+    ''' Temperature of the probe before its first conversion, given if it's reset while it's read '''
+    POWER_ON_RESET_VALUE = 85.0
+
+    def __init__(self, name, device_id, devices_path=cfg.ONEWIRE_DEVICES_PATH):
+        """
+        Constructor of the class
+
+        Args:
+            name: Name of the probe
+            device_id: 1-Wire id of the probe, e.g. 28-031683c616ff
+            devices_path: Directory of the 1-Wire devices
+        """
+        self.name = name
+        self.path = os.path.join(devices_path, device_id, "w1_slave")
+
+    def read(self):
+        """
+        This method reads the temperature of the probe
+
+        Returns: The temperature, in Celsius
+
+        Raises: OSError if the file can't be read, ValueError if the reading isn't valid
+        """
+        with open(self.path, 'r') as sensor_file:
+            text = sensor_file.read()
+
+        return self.parse(text)
+
+    @classmethod
+    def parse(cls, text):
+        """
+        This method parses the content of a w1_slave file, checking the CRC of the scratchpad
+
+        Returns: The temperature, in Celsius
+
+        Raises: ValueError if the reading isn't valid
+        """
+        lines = text.split("\n")
+        if len(lines) < 2 or not lines[0].strip().endswith("YES"):
+            raise ValueError(strings.ERR_ONEWIRE_CRC)
+
+        scratchpad, _, temp_data = lines[1].partition(" t=")
+        scratchpad = bytes.fromhex(scratchpad)
+        if len(scratchpad) != 9 or crc8(scratchpad[:8]) != scratchpad[8]:
+            raise ValueError(strings.ERR_ONEWIRE_CRC)
+
+        temperature = int(temp_data) / 1000
+        if temperature == cls.POWER_ON_RESET_VALUE:
+            raise ValueError(strings.ERR_ONEWIRE_RESET)
+
+        return temperature
+
+
+class OneWireSampler:
+    """
+    This class reads 1-Wire temperature probes in the background, so the readers never wait for a conversion.
+
+    Every probe is read by its own thread, at its own cadence, so a probe that hangs doesn't stop the others.
+    Readings that fail the CRC check, or take longer than the timeout, are discarded. The last reading of every
+    probe is kept with the time it was read, and it's given without locks: the threads only replace the readings,
+    that are immutable.
+    """
+
+    def __init__(self, probes, devices_path=cfg.ONEWIRE_DEVICES_PATH, period=cfg.ONEWIRE_SAMPLE_PERIOD_SECONDS,
+                 timeout=cfg.ONEWIRE_READ_TIMEOUT_SECONDS, time_function=time.monotonic):
+        """
+        Constructor of the class
+
+        Args:
+            probes: Dict with the name and the 1-Wire id of every probe
+            devices_path: Directory of the 1-Wire devices
+            period: Seconds between readings of a probe
+            timeout: Max seconds to read a probe
+            time_function: Function that returns the seconds of a clock that never goes back
+        """
+        self.probes = [OneWireProbe(name, device_id, devices_path) for name, device_id in probes.items()]
+        self.period = period
+        self.timeout = timeout
+        self.time = time_function
+
+        self._readings = {}
+        self._stop = threading.Event()
+        self._threads = []
+
+        ''' Counters, by probe '''
+        self.errors = collections.Counter()
+        self.timeouts = collections.Counter()
+
+    def start(self):
+        """
+        This method starts reading the probes
+        """
+        self._stop.clear()
+
+        for probe in self.probes:
+            thread = threading.Thread(target=self._run, args=(probe,), name="1-Wire " + probe.name)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """
+        This method stops reading the probes. A thread blocked reading a probe stops when the reading ends.
+        """
+        self._stop.set()
+        self._threads = []
+
+    def sample(self, probe):
+        """
+        This method reads a probe once and keeps the reading, if it's valid
+
+        Returns: The reading, or None if it isn't valid
+        """
+        start = self.time()
+        try:
+            value = probe.read()
+        except (OSError, ValueError) as e:
+            self.errors[probe.name] += 1
+            logging.log(logging.DEBUG, strings.LOG_DRIVER_ONEWIRE_ERROR, probe.name, str(e))
+            return None
+
+        end = self.time()
+        if end - start > self.timeout:
+            self.timeouts[probe.name] += 1
+            logging.log(logging.WARNING, strings.LOG_DRIVER_ONEWIRE_TIMEOUT, probe.name, end - start)
+            return None
+
+        reading = OneWireReading(value, end)
+        self._readings[probe.name] = reading
+        return reading
+
+    def reading(self, name):
+        """
+        This method returns the last reading of a probe
+
+        Returns: OneWireReading, or None if the probe hasn't been read yet
+        """
+        return self._readings.get(name)
+
+    def value(self, name, max_age=cfg.ONEWIRE_MAX_AGE_SECONDS):
+        """
+        This method returns the last temperature read from a probe, if it's recent enough
+
+        Args:
+            name: Name of the probe
+            max_age: Max seconds since the reading
+
+        Returns: The temperature, or None if there isn't a recent reading
+        """
+        reading = self._readings.get(name)
+        if reading is None or self.time() - reading.monotonic > max_age:
+            return None
+
+        return reading.value
+
+    def age(self, name):
+        """
+        This method returns the seconds since the last reading of a probe, or None if it hasn't been read yet
+        """
+        reading = self._readings.get(name)
+        if reading is None:
+            return None
+
+        return self.time() - reading.monotonic
+
+    def _run(self, probe):
+        """
+        Thread that reads a probe every period
+        """
+        while not self._stop.is_set():
+            start = self.time()
+            self.sample(probe)
+            self._stop.wait(max(0, self.period - (self.time() - start)))
@@ -1,11 +1,13 @@
 import logging
-import threading
 import time
-from itertools import accumulate
 import numpy as np
 import serial
 import src.config.configconstants as cfg
 import src.strings_constants.strings as strings
+from src.driver.adcframe import AdcFrameDecoder
+from src.driver.framecapture import FrameCapture
+from src.driver.onewire import OneWireSampler
+from src.driver.serialsupervisor import SerialSupervisor
 from src.exceptions.boardinitexception import BoardInitException
 from src.exceptions.unknownactuatorexception import UnknownActuatorException
 from src.models import Timer
@@ -13,6 +15,9 @@ from src.sensors import temperatureSensor, pumpSensor, generalSensor, voltageSen
     tdsSensor, sandPressureSensor, diatomsPressureSensor, waterLevelSensor_1, waterLevelSensor_2, waterLevelSensor_3, \
     waterLevelSensor_4, waterLevelSensor_5, waterLevelSensor_6, emergencyStopSensor, lightSensor
 from src.sensors.subtypes import flowSensor
+from src.utils import metrics
+from src.utils.ringbuffer import RingBuffer
+from src.utils.rms import RmsEngine
 
 try:
     import RPi.GPIO as GPIO
@@ -32,8 +37,13 @@ class PoolDriver:
     _arduino = None
     _SERIAL_PORT = '/dev/ttyS0'
     _BAUD_RATE = 250000
+    _SERIAL_TIMEOUT = 2
+
+    ''' ADC protocol: checked binary frames are used if the board supports them, if not, binary or text protocol '''
+    _ADC_PROTOCOL = AdcFrameDecoder.PROTOCOL_CHECKED
+    _ADC_START_COMMANDS = {AdcFrameDecoder.PROTOCOL_TEXT: b's', AdcFrameDecoder.PROTOCOL_BINARY: b'b',
+                           AdcFrameDecoder.PROTOCOL_CHECKED: b'c'}
 
-    _TEMP_SENSOR = '/sys/bus/w1/devices/28-031683c616ff/w1_slave'
     _VCC = 5.2
 
     ''' Sensor calibrations '''
@@ -74,18 +84,34 @@ class PoolDriver:
     _PIN_AUX_OUT = 17
     _PIN_FILL_VALVE = 19
 
-    _thread_adc = None
+    _adc_supervisor = None
     _sensors_timer = None
 
+    # Sampler of the 1-Wire temperature probes, that reads them in the background
+    _temperature_sampler = None
+
+    # Decoder of the ADC frames sent by the arduino
+    _adc_decoder = None
+
+    # Capture of the raw ADC frames to disk, if it's enabled
+    _frame_capture = None
+
     # Vector that stores raw ADC channel data
-    _raw_data = np.zeros((8, 100))
-
-    # Vector that stores ADC channel data converted to volts
-    _adc_volts_data_ph = np.array([])
-    _adc_volts_data_orp = np.array([])
-    _adc_volts_data_sfp = np.array([])
-    _adc_volts_data_dfp = np.array([])
-    _adc_volts_data_tds = np.array([])
+    _raw_data = None
+
+    # Ring buffer of the newest ADC frames in volts, for the clients that plot them
+    _adc_frames = None
+
+    # Ring buffers that store ADC channel data converted to volts, for DC sensors
+    _ADC_DC_BUFFER_CAPACITY = 256
+    _adc_volts_data_ph = None
+    _adc_volts_data_orp = None
+    _adc_volts_data_sfp = None
+    _adc_volts_data_dfp = None
+    _adc_volts_data_tds = None
+    # RMS engine of the AC sensors. RMS window is in samples, None computes RMS over every frame
+    _ADC_RMS_WINDOW = None
+    _rms_engine = None
     _adc_volts_last_rms_pump = 0
     _adc_volts_last_rms_general = 0
     _adc_volts_last_rms_voltage = 0
@@ -159,13 +185,35 @@ class PoolDriver:
         GPIO.add_event_detect(self._PIN_LEVEL_SENSOR_6, GPIO.BOTH, callback=self._level_tick_6)
         GPIO.add_event_detect(self._PIN_LIGHT_SENSOR, GPIO.BOTH, callback=self._light_tick)
 
+        # Allocate ADC buffers
+        self._adc_volts_data_ph = RingBuffer(self._ADC_DC_BUFFER_CAPACITY)
+        self._adc_volts_data_orp = RingBuffer(self._ADC_DC_BUFFER_CAPACITY)
+        self._adc_volts_data_sfp = RingBuffer(self._ADC_DC_BUFFER_CAPACITY)
+        self._adc_volts_data_dfp = RingBuffer(self._ADC_DC_BUFFER_CAPACITY)
+        self._adc_volts_data_tds = RingBuffer(self._ADC_DC_BUFFER_CAPACITY)
+
+        self._adc_frames = RingBuffer(cfg.DRIVER_FRAME_RING_SIZE, dtype=np.float32,
+                                      shape=(AdcFrameDecoder.CHANNELS, AdcFrameDecoder.SAMPLES))
+
+        self._rms_engine = RmsEngine(3, window=self._ADC_RMS_WINDOW)
+
+        # Start reading the temperature probes, the first readings are ready before the first sensors update
+        self._temperature_sampler = OneWireSampler(cfg.ONEWIRE_PROBES)
+        self._temperature_sampler.start()
+
         # Start arduino
+        self._adc_decoder = AdcFrameDecoder(self._VCC)
+        self._raw_data = self._adc_decoder.raw_data
         self._init_arduino()
 
-        # Create a thread that samples ADC data from arduino
-        self._thread_adc = threading.Thread(target=self._get_adc, name='ADC Thread')
-        self._thread_adc.daemon = True
-        self._thread_adc.start()
+        if cfg.ADC_CAPTURE_ENABLED:
+            self.start_capture()
+
+        # Start a thread that samples ADC data from arduino, and keeps the serial link
+        self._adc_supervisor = SerialSupervisor(self._open_arduino, self._adc_decoder, self._process_adc_frame,
+                                                self._ADC_START_COMMANDS, self._ADC_PROTOCOL)
+        self._adc_supervisor.start(self._arduino)
+        self._register_metrics()
 
         # Start a timer that gets sensor data
         self._sensors_timer = Timer(self._update_sensors)
@@ -228,14 +276,25 @@ class PoolDriver:
         """
         emergencyStopSensor.add_value(not bool(GPIO.input(self._PIN_EMERGENCY_STOP)))
 
+    @staticmethod
+    def _drain_mean(buffer):
+        """
+        This method gets the mean of all the voltages stored in a buffer since the last call, and resets it
+        """
+        data = buffer.swap()
+
+        if len(data) == 0:
+            return np.nan
+
+        return np.mean(data)
+
     def _update_sensors(self):
         """
         This method is called periodically to convert voltage values of sensors to actual sensor data
         and adds the new data to every sensor object.
         """
         # Get mean of volts of ORP sensor, and get its value
-        voltage_mean = np.mean(self._adc_volts_data_orp)
-        self._adc_volts_data_orp = np.array([])  # Reset vector
+        voltage_mean = self._drain_mean(self._adc_volts_data_orp)
         self.last_orp_voltage = voltage_mean  # Save last voltage reading
         # Sensor calibration constants
         b = self.B_ORP
@@ -245,8 +304,7 @@ class PoolDriver:
         orp_value = y * 1000
 
         # Get mean of volts of PH sensor, and get its value
-        voltage_mean = np.mean(self._adc_volts_data_ph)
-        self._adc_volts_data_ph = np.array([])  # Reset vector
+        voltage_mean = self._drain_mean(self._adc_volts_data_ph)
         self.last_ph_voltage = voltage_mean  # Save last voltage reading
         # Sensor calibration constants
         b = self.B_PH
@@ -258,8 +316,7 @@ class PoolDriver:
         temperature = self.get_temperature()
 
         # Get mean of volts of TDS sensor, and get its value
-        voltage_mean = np.mean(self._adc_volts_data_tds)
-        self._adc_volts_data_tds = np.array([])  # Reset vector
+        voltage_mean = self._drain_mean(self._adc_volts_data_tds)
         self.last_tds_voltage = voltage_mean
 
         if temperature is None:
@@ -286,8 +343,7 @@ class PoolDriver:
         tds_value = (tdsValue / compensation_coefficient) * 0.5
 
         # Get mean of volts of sand pressure sensor, and get its value
-        voltage_mean = np.mean(self._adc_volts_data_sfp)
-        self._adc_volts_data_sfp = np.array([])  # Reset vector
+        voltage_mean = self._drain_mean(self._adc_volts_data_sfp)
         self.last_sand_pressure_voltage = voltage_mean
 
         if voltage_mean < self.OFFSET_SAND_PRESSURE*1.1:
@@ -298,8 +354,7 @@ class PoolDriver:
             offset = self.OFFSET_SAND_PRESSURE
             sand_pressure = (m * voltage_mean + (0.5 - offset)) + b
 
-        voltage_mean = np.mean(self._adc_volts_data_dfp)
-        self._adc_volts_data_dfp = np.array([])  # Reset vector
+        voltage_mean = self._drain_mean(self._adc_volts_data_dfp)
         self.last_diatoms_pressure_voltage = voltage_mean
 
         if voltage_mean < self.OFFSET_DIATOMS_PRESSURE*1.1:
@@ -358,7 +413,7 @@ class PoolDriver:
         """
         try:
             # Start serial port
-            self._arduino = serial.Serial(self._SERIAL_PORT, self._BAUD_RATE)
+            self._arduino = serial.Serial(self._SERIAL_PORT, self._BAUD_RATE, timeout=self._SERIAL_TIMEOUT)
 
             retries = 10
 
@@ -401,130 +456,102 @@ class PoolDriver:
 
             raise BoardInitException(message="Error while initiating board: " + str(e))
 
-    def _get_adc(self):
+    def _open_arduino(self):
         """
-        This method is called within a thread, and it gets the current ADC data from arduino.
+        This method opens the serial port again and restarts the arduino. It's called by the ADC supervisor.
+
+        Returns: The serial port
         """
-        c = 0
-        i = 0
-        self._arduino.write(b's')  # Start ADC
+        self._init_arduino()
+        return self._arduino
 
-        while True:
-            try:
-                # Get current line
-                response = self._arduino.readline().decode().replace('\r', '').replace('\n', '')
-
-                if response == "INICIODEDATOS":
-                    do_loop = True
-                    while do_loop:
-                        response = self._arduino.readline().decode().replace('\r', '').replace('\n', '')
-
-                        if response == "C0":
-                            c = 0
-                            i = 0
-                        elif response == "C1":
-                            c = 1
-                            i = 0
-                        elif response == "C2":
-                            c = 2
-                            i = 0
-                        elif response == "C3":
-                            c = 3
-                            i = 0
-                        elif response == "C4":
-                            c = 4
-                            i = 0
-                        elif response == "C5":
-                            c = 5
-                            i = 0
-                        elif response == "C6":
-                            c = 6
-                            i = 0
-                        elif response == "C7":
-                            c = 7
-                            i = 0
-                        elif response == "FINDEDATOS":
-                            # This ADC data get cycle has reached end
-                            do_loop = False
-
-                            # Process raw ADC data
-                            data = self._raw_data
-
-                            # Convert raw ADC data to analog voltage
-                            for c in range(0, len(data)):
-                                for j in range(0, len(data[c])):
-                                    data[c][j] = data[c][j] * self._VCC / 1023
-
-                            # Delete DC component of AC sensors
-                            for c in range(2, 5):
-
-                                try:
-                                    dc = np.mean(data[c])
-                                except RuntimeWarning:
-                                    dc = 0
-
-                                for j in range(0, len(data[c])):
-                                    data[c][j] -= dc
-
-                            # Append data for DC sensors
-                            self._adc_volts_data_ph = np.append(self._adc_volts_data_ph, data[0][0])
-                            self._adc_volts_data_orp = np.append(self._adc_volts_data_orp, data[1][0])
-                            self._adc_volts_data_sfp = np.append(self._adc_volts_data_sfp, data[5][0])
-                            self._adc_volts_data_dfp = np.append(self._adc_volts_data_dfp, data[6][0])
-                            self._adc_volts_data_tds = np.append(self._adc_volts_data_tds, data[7][0])
-
-                            # For AC sensors, get the current rms value and save it
-                            self._adc_volts_last_rms_voltage = self._get_rms(data[2])
-                            self._adc_volts_last_rms_pump = self._get_rms(data[3])
-                            self._adc_volts_last_rms_general = self._get_rms(data[4])
-
-                        else:
-                            try:
-                                self._raw_data[c][i] = int(response)
-                            except ValueError:
-                                pass
-                            i += 1
+    def _register_metrics(self):
+        """
+        This method publishes the health counters of the serial link
+        """
+        supervisor = self._adc_supervisor
+        metrics.gauge("smartpool_adc_frames_ok_total", "ADC frames received from the board.",
+                      lambda: supervisor.frames_ok, type="counter")
+        metrics.gauge("smartpool_adc_frames_dropped_total", "ADC frames lost or dropped because of errors.",
+                      lambda: supervisor.frames_dropped, type="counter")
+        metrics.gauge("smartpool_adc_resyncs_total", "Times that data was skipped to find an ADC frame.",
+                      lambda: supervisor.resyncs, type="counter")
+        metrics.gauge("smartpool_adc_reconnects_total", "Times that the serial link with the board was opened again.",
+                      lambda: supervisor.reconnects, type="counter")
 
-            except Exception:
-                try:
-                    self._arduino.close()
-                except Exception:
-                    pass
+    def start_capture(self, path=cfg.ADC_CAPTURE_PATH, capacity=cfg.ADC_CAPTURE_FRAMES):
+        """
+        This method starts appending every raw ADC frame to a capture file, read with FrameCaptureReader
 
-                # Try to restart ADC
-                self._init_arduino()
-                self._arduino.write(b's')  # Start ADC
+        Args:
+            path: Path of the capture file
+            capacity: Frames kept in the file, the oldest ones are overwritten
+        """
+        self.stop_capture()
+        self._frame_capture = FrameCapture(path, capacity)
+        logging.log(logging.INFO, strings.LOG_DRIVER_ADC_CAPTURE_STARTED, path)
 
-    @staticmethod
-    def _get_rms(data_vector, length=None):
+    def stop_capture(self):
         """
-        This functions gets the RMS value of a given vector
+        This method stops the capture of raw ADC frames, if it's running
         """
-        result = 0
+        capture = self._frame_capture
 
-        if length is None:
-            L = len(data_vector)
-        else:
-            L = length
+        if capture is not None:
+            self._frame_capture = None
+            capture.close()
+            logging.log(logging.INFO, strings.LOG_DRIVER_ADC_CAPTURE_STOPPED)
+
+    def get_frames(self, n=cfg.DRIVER_FRAMES_DEFAULT):
+        """
+        This method returns a copy of the newest ADC frames, in volts
+
+        Args:
+            n: Number of frames, at most DRIVER_FRAME_RING_SIZE
+
+        Returns: Array of shape (frames, CHANNELS, SAMPLES), from the oldest frame to the newest one
+        """
+        return self._adc_frames.last(n)
 
-        if L > 0:
-            # create array of p, in_ch is samples, tm_w is window length
-            a2 = np.power(data_vector, 2) / L
-            v1 = np.array(a2[L - 1:])  # v1 = [p9, p10, ...]
-            v2 = np.append([0], a2[0: len(a2) - L])  # v2 = [0,   p0, ...]
-            acu = list(accumulate(a2[0: L - 1]))  # get initial accumulation (acu) of the window - 1
-            v1[0] = v1[0] + acu[-1]  # rms element #1 will be at end of window and contains the accumulation
-            rms_pw2 = list(accumulate(v1 - v2))
-            rms = np.power(rms_pw2, 0.5)
-            result = rms[0]
+    def _process_adc_frame(self, data):
+        """
+        This method processes a frame of ADC data, already converted to volts.
+        """
+        # Capture the raw frame, before it's overwritten by the next one
+        capture = self._frame_capture
+        if capture is not None:
+            capture.append(self._raw_data)
+
+        self._adc_frames.append(data)
 
-        return result
+        # Append data for DC sensors
+        self._adc_volts_data_ph.append(data[0][0])
+        self._adc_volts_data_orp.append(data[1][0])
+        self._adc_volts_data_sfp.append(data[5][0])
+        self._adc_volts_data_dfp.append(data[6][0])
+        self._adc_volts_data_tds.append(data[7][0])
+
+        # For AC sensors, get the current rms value and save it
+        rms = self._rms_engine.process(data[AdcFrameDecoder.AC_CHANNELS])
+        self._adc_volts_last_rms_voltage = rms[0]
+        self._adc_volts_last_rms_pump = rms[1]
+        self._adc_volts_last_rms_general = rms[2]
 
     def __del__(self):
         """
         Pool driver class destructor
         """
         # Cleanup
+        try:
+            self._adc_supervisor.stop(timeout=0)
+        except Exception:
+            pass
+
+        try:
+            self._temperature_sampler.stop()
+        except Exception:
+            pass
+
         try:
             self._arduino.close()
         except Exception:
@@ -558,23 +585,13 @@ class PoolDriver:
         else:
             raise UnknownActuatorException
 
-    def get_temperature(self):
-        """ This method return the current temperature sensor information """
-        temperature = None
-        sensor_file = None
-        try:
-            sensor_file = open(self._TEMP_SENSOR, 'r')
-            text = sensor_file.read()
-            sensor_file.close()
-            sensor_file = None
-            second_line = text.split("\n")[1]
-            temp_data = second_line.split(" ")[9]
-            temperature = float(float(temp_data[2:]) / 1000)
-        except Exception:
-            if sensor_file is not None:
-                try:
-                    sensor_file.close()
-                except Exception:
-                    pass
+    def get_temperature(self, probe=cfg.ONEWIRE_WATER_PROBE):
+        """
+        This method returns the last temperature read from a probe, without waiting for the probe
+
+        Args:
+            probe: Name of the probe, the water probe by default
 
-        return temperature
+        Returns: The temperature, or None if the probe hasn't been read recently
+        """
+        return self._temperature_sampler.value(probe)
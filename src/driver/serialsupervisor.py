@@ -0,0 +1,199 @@
+import logging
+import threading
+
+import src.config.configconstants as cfg
+import src.strings_constants.strings as strings
+from src.driver.adcframe import AdcFrameDecoder
+from src.exceptions.adcexception import AdcException
+
+
+class SerialSupervisor:
+    """
+    This class keeps the serial link with the board that sends the ADC frames, from its own thread.
+
+    The port is opened and the board is asked to send frames with the preferred protocol. If the board never
+    sends a valid frame with it, the next protocol is tried: checked binary, binary and text. Once the board has
+    sent a valid frame, the protocol is kept. Frames that can't
+    be decoded are dropped and the decoder resyncs with the next one, and frames lost in the link are detected
+    with the sequence numbers of the checked protocol. After too many consecutive errors, or if the port fails,
+    the port is opened again, waiting an exponential backoff between attempts, so a missing board never keeps
+    the thread spinning.
+    """
+
+    ''' Protocols, in order of preference '''
+    PROTOCOLS = [AdcFrameDecoder.PROTOCOL_CHECKED, AdcFrameDecoder.PROTOCOL_BINARY, AdcFrameDecoder.PROTOCOL_TEXT]
+
+    def __init__(self, open_port, decoder, frame_callback, start_commands, protocol=AdcFrameDecoder.PROTOCOL_CHECKED,
+                 min_backoff=cfg.SERIAL_RECONNECT_MIN_SECONDS, max_backoff=cfg.SERIAL_RECONNECT_MAX_SECONDS,
+                 max_errors=cfg.SERIAL_MAX_FRAME_ERRORS):
+        """
+        Constructor of the class
+
+        Args:
+            open_port: Function that opens the port and initializes the board, and returns the port
+            decoder: AdcFrameDecoder of the frames
+            frame_callback: Function called with every valid frame, converted to volts
+            start_commands: Dict with the command that asks the board to send frames, for every protocol
+            protocol: Preferred protocol
+            min_backoff: Seconds to wait before opening the port again after the first failure
+            max_backoff: Max seconds to wait before opening the port again
+            max_errors: Consecutive frame errors before the port is opened again
+        """
+        self.open_port = open_port
+        self.decoder = decoder
+        self.frame_callback = frame_callback
+        self.start_commands = start_commands
+        self.protocol = protocol
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.max_errors = max_errors
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_sequence = None
+        # True once the board has sent a valid frame with the protocol, it never falls back from then on
+        self._confirmed = False
+
+        ''' Health counters '''
+        self.frames_ok = 0
+        self.frames_dropped = 0
+        self.reconnects = 0
+        self.failures = 0
+
+    @property
+    def resyncs(self):
+        """
+        Times that data has been skipped to find the start of a frame
+        """
+        return self.decoder.resyncs
+
+    def health(self):
+        """
+        This method returns the health counters of the link
+
+        Returns: Dict with the counters
+        """
+        return {"protocol": self.protocol, "frames_ok": self.frames_ok, "frames_dropped": self.frames_dropped,
+                "resyncs": self.resyncs, "reconnects": self.reconnects}
+
+    def start(self, port=None):
+        """
+        This method starts the thread that reads the frames
+
+        Args:
+            port: Port already opened, if any
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, args=(port,), name='ADC Thread')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        This method stops the thread that reads the frames, after the current frame
+        """
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def backoff(self):
+        """
+        This method returns the seconds to wait before opening the port again, after the current failures
+        """
+        return min(self.min_backoff * (2 ** max(self.failures - 1, 0)), self.max_backoff)
+
+    def run(self, port=None):
+        """
+        This method reads frames until the supervisor is stopped, opening the port again when needed
+        """
+        while not self._stop.is_set():
+            if port is None:
+                try:
+                    port = self.open_port()
+                    self.reconnects += 1
+                except Exception as e:
+                    self.failures += 1
+                    logging.log(logging.ERROR, strings.LOG_DRIVER_SERIAL_OPEN_ERROR, str(e), self.backoff())
+                    self._stop.wait(self.backoff())
+                    continue
+
+            try:
+                if self._read_frames(port):
+                    self.failures = 0
+            except Exception as e:
+                logging.log(logging.ERROR, strings.LOG_DRIVER_SERIAL_ERROR, str(e))
+
+            self._close(port)
+            port = None
+
+            if not self._stop.is_set():
+                self.failures += 1
+                logging.log(logging.WARNING, strings.LOG_DRIVER_SERIAL_RECONNECT, self.backoff())
+                self._stop.wait(self.backoff())
+
+    def _read_frames(self, port):
+        """
+        This method asks the board to send frames and reads them, until there are too many consecutive errors
+
+        Returns: True if a valid frame has been read
+        """
+        port.write(self.start_commands[self.protocol])
+        self._last_sequence = None
+        confirmed = False
+        errors = 0
+
+        while not self._stop.is_set():
+            try:
+                sequence = self.decoder.read_frame(port, self.protocol)
+            except AdcException as e:
+                self.frames_dropped += 1
+                errors += 1
+
+                if not self._confirmed and self.protocol != self.PROTOCOLS[-1]:
+                    # The board doesn't support the protocol, fall back to the next one
+                    fallback = self.PROTOCOLS[self.PROTOCOLS.index(self.protocol) + 1]
+                    logging.log(logging.WARNING, strings.LOG_DRIVER_ADC_PROTOCOL_FALLBACK, self.protocol, str(e),
+                                fallback)
+                    self.protocol = fallback
+                    return False
+
+                if errors >= self.max_errors:
+                    return confirmed
+
+                continue
+
+            self._count_lost_frames(sequence, errors)
+            confirmed = True
+            self._confirmed = True
+            errors = 0
+            self.frames_ok += 1
+
+            self.frame_callback(self.decoder.to_volts())
+
+        return confirmed
+
+    def _count_lost_frames(self, sequence, errors):
+        """
+        This method counts the frames lost between the last frame and a new one, from their sequence numbers.
+        The frames dropped because of errors in between have already been counted.
+        """
+        if sequence is None:
+            return
+
+        if self._last_sequence is not None:
+            missing = (sequence - self._last_sequence - 1) % AdcFrameDecoder.SEQUENCE_MODULO
+            self.frames_dropped += max(missing - errors, 0)
+
+        self._last_sequence = sequence
+
+    @staticmethod
+    def _close(port):
+        """
+        This method closes the port, ignoring errors
+        """
+        try:
+            port.close()
+        except Exception:
+            pass
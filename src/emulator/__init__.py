@@ -0,0 +1,3 @@
+from src.emulator.arduino import ArduinoEmulator
+from src.emulator.gpio import EmulatedGPIO
+from src.emulator.waveforms import synthetic_frames, load_recording, save_recording
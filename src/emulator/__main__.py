@@ -0,0 +1,35 @@
+import argparse
+import time
+
+import src.config.configconstants as cfg
+import src.strings_constants.strings as strings
+from src.emulator import ArduinoEmulator, synthetic_frames, load_recording
+
+""" Runs an Arduino emulator until it's interrupted. The pool driver, or any serial tool, can open the printed
+pseudo-terminal as the serial port of the board.
+
+    python -m src.emulator --rate 100 --recording capture.txt """
+
+parser = argparse.ArgumentParser(description=strings.EMULATOR_DESCRIPTION)
+parser.add_argument('--rate', type=float, help=strings.ARG_EMULATOR_RATE_HELP, default=cfg.EMULATOR_FRAMES_PER_SECOND)
+parser.add_argument('--recording', type=str, help=strings.ARG_EMULATOR_RECORDING_HELP)
+parser.add_argument('--seed', type=int, help=strings.ARG_EMULATOR_SEED_HELP, default=cfg.SIMULATION_SEED)
+args = parser.parse_args()
+
+if args.recording is None:
+    frames = synthetic_frames(seed=args.seed)
+else:
+    frames = load_recording(args.recording)
+
+emulator = ArduinoEmulator(frames, rate=args.rate).start()
+print(strings.EMULATOR_LISTENING % emulator.port_name)
+
+try:
+    while True:
+        time.sleep(1)
+except KeyboardInterrupt:
+    pass
+finally:
+    emulator.stop()
+
+print("%d frames sent, %d lost, %d resets" % (emulator.frames_sent, emulator.frames_lost, emulator.resets))
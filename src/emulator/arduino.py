@@ -0,0 +1,205 @@
+import os
+import select
+import threading
+import time
+import tty
+
+import src.config.configconstants as cfg
+from src.driver.adcframe import AdcFrameDecoder
+from src.emulator.waveforms import synthetic_frames
+
+
+class ArduinoEmulator:
+    """
+    This class emulates the Arduino of the pool board behind a pseudo-terminal, so the real pool driver can open
+    it as its serial port on any Linux box.
+
+    It answers the commands of the board: a reset ('r') stops the frames and sends the version banner after the
+    boot time, and the start commands ('s', 'b' and 'c') start sending ADC frames with the text, binary or checked
+    binary protocol at the given rate. The frames are replayed in a loop from an array of raw frames, synthetic
+    or recorded. Frames are never cut, but if the driver doesn't read them in time, the board can't send the next
+    ones, and they are lost.
+    """
+
+    ''' Banner sent after a reset '''
+    BANNER = b'Arduino Piscina Version 1.0\r\n'
+
+    ''' Commands of the board '''
+    COMMAND_RESET = b'r'
+    START_COMMANDS = {b's': AdcFrameDecoder.PROTOCOL_TEXT, b'b': AdcFrameDecoder.PROTOCOL_BINARY,
+                      b'c': AdcFrameDecoder.PROTOCOL_CHECKED}
+
+    def __init__(self, frames=None, rate=cfg.EMULATOR_FRAMES_PER_SECOND,
+                 protocols=(AdcFrameDecoder.PROTOCOL_TEXT, AdcFrameDecoder.PROTOCOL_BINARY,
+                            AdcFrameDecoder.PROTOCOL_CHECKED),
+                 reset_seconds=cfg.EMULATOR_RESET_SECONDS):
+        """
+        Constructor of the class
+
+        Args:
+            frames: Array of raw frames to send, synthetic frames by default
+            rate: Frames sent every second, 0 sends them as fast as possible
+            protocols: Protocols supported by the emulated firmware, the other start commands are ignored
+            reset_seconds: Seconds that the board takes to boot after a reset
+        """
+        self.frames = synthetic_frames() if frames is None else frames
+        self.rate = rate
+        self.protocols = protocols
+        self.reset_seconds = reset_seconds
+
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.port_name = os.ttyname(self.slave)
+
+        self.protocol = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._pending = b''
+        self._index = 0
+        self._next_frame = 0
+
+        ''' Counters '''
+        self.frames_sent = 0
+        self.frames_lost = 0
+        self.resets = 0
+
+    def start(self):
+        """
+        This method starts the emulated board
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="Arduino emulator")
+        self._thread.daemon = True
+        self._thread.start()
+
+        return self
+
+    def stop(self):
+        """
+        This method stops the emulated board and closes the pseudo-terminal
+        """
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        os.close(self.master)
+        os.close(self.slave)
+
+    def encode(self, index):
+        """
+        This method encodes a frame with the current protocol
+
+        Args:
+            index: Number of the frame since the start command
+        """
+        raw = self.frames[index % len(self.frames)]
+
+        if self.protocol == AdcFrameDecoder.PROTOCOL_TEXT:
+            return AdcFrameDecoder.encode_text_frame(raw)
+        if self.protocol == AdcFrameDecoder.PROTOCOL_BINARY:
+            return AdcFrameDecoder.encode_binary_frame(raw)
+
+        return AdcFrameDecoder.encode_checked_frame(raw, index)
+
+    def _command(self, command):
+        """
+        This method runs a command received from the driver
+        """
+        if command == self.COMMAND_RESET:
+            self.resets += 1
+            self.protocol = None
+            self._pending = b''
+
+            if self._stop.wait(self.reset_seconds):
+                return
+            self._write(self.BANNER)
+
+        elif self.START_COMMANDS.get(command) in self.protocols:
+            self.protocol = self.START_COMMANDS[command]
+            self._index = 0
+            self._next_frame = time.monotonic()
+
+    def _write(self, data):
+        """
+        This method writes data to the port without blocking
+
+        Returns: Bytes written
+        """
+        try:
+            return os.write(self.master, data)
+        except BlockingIOError:
+            return 0
+
+    def _run(self):
+        """
+        Thread of the emulated board
+        """
+        while not self._stop.is_set():
+            now = time.monotonic()
+
+            if self.protocol is None:
+                timeout = 0.05
+            elif self.rate > 0:
+                timeout = max(0, self._next_frame - now)
+            else:
+                timeout = 0.05 if self._pending else 0
+
+            if self._pending:
+                # Wait until the port accepts the rest of the frame
+                timeout = min(timeout, 0.05)
+
+            readable, writable, _ = select.select([self.master], [self.master] if self._pending else [], [],
+                                                  timeout)
+
+            if readable:
+                try:
+                    for command in os.read(self.master, 64):
+                        self._command(bytes([command]))
+                except OSError:
+                    pass
+                continue
+
+            if self.protocol is None:
+                continue
+
+            if writable:
+                self._send(self._pending)
+
+            if self._due(time.monotonic()):
+                self._send_frame()
+
+    def _due(self, now):
+        """
+        This method checks if the next frame has to be sent
+        """
+        if self.rate <= 0:
+            return not self._pending
+
+        return now >= self._next_frame
+
+    def _send_frame(self):
+        """
+        This method sends the next frame. If the last one hasn't been sent completely yet, the next one is lost,
+        as the board doesn't sample while it waits for its UART.
+        """
+        self._next_frame = max(self._next_frame + (1 / self.rate if self.rate > 0 else 0), time.monotonic() - 1)
+
+        if self._pending:
+            self.frames_lost += 1
+        else:
+            self._send(self.encode(self._index))
+
+        self._index += 1
+
+    def _send(self, data):
+        """
+        This method writes as much data as the port accepts, and keeps the rest for later
+        """
+        written = self._write(data)
+        self._pending = data[written:]
+
+        if written and not self._pending:
+            self.frames_sent += 1
@@ -0,0 +1,145 @@
+import sys
+import threading
+import types
+
+
+class EmulatedGPIO:
+    """
+    This class is a stand-in for the RPi.GPIO module, with the part of its API used by the pool driver, so the real
+    driver runs off the Raspberry Pi. Instead of the driver module:
+
+        pooldriver.GPIO = EmulatedGPIO()
+
+    or, where RPi.GPIO isn't installed, before the driver module is imported:
+
+        EmulatedGPIO().install()
+
+    Inputs are driven with set_input and pulse, that call the callbacks of the edge events from the calling thread,
+    as RPi.GPIO calls them from its own event thread.
+    """
+
+    ''' Constants of RPi.GPIO '''
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self):
+        self.mode = None
+        self.levels = {}
+        self.directions = {}
+        self._events = {}
+        self._lock = threading.Lock()
+
+        ''' Counters '''
+        self.events = 0
+
+    def install(self):
+        """
+        This method registers the instance as the RPi.GPIO module, so the modules imported after it use it
+
+        Returns: The instance
+        """
+        package = types.ModuleType("RPi")
+        package.GPIO = self
+        sys.modules["RPi"] = package
+        sys.modules["RPi.GPIO"] = self
+
+        return self
+
+    def setmode(self, mode):
+        """
+        This method sets the numbering of the pins
+        """
+        self.mode = mode
+
+    def setwarnings(self, flag):
+        """
+        This method is accepted and ignored
+        """
+        pass
+
+    def setup(self, pin, direction, pull_up_down=PUD_OFF, initial=LOW):
+        """
+        This method configures a pin. Inputs start at the level of their pull resistor.
+        """
+        self.directions[pin] = direction
+
+        if direction == self.OUT:
+            self.levels[pin] = int(bool(initial))
+        else:
+            self.levels[pin] = self.HIGH if pull_up_down == self.PUD_UP else self.LOW
+
+    def input(self, pin):
+        """
+        This method returns the level of a pin
+        """
+        return self.levels[pin]
+
+    def output(self, pin, state):
+        """
+        This method sets the level of an output
+        """
+        self.levels[pin] = int(bool(state))
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        """
+        This method starts detecting the given edges of an input. The bounce time is ignored.
+        """
+        self._events[pin] = (edge, [] if callback is None else [callback])
+
+    def add_event_callback(self, pin, callback):
+        """
+        This method adds a callback to the edges detected on an input
+        """
+        self._events[pin][1].append(callback)
+
+    def remove_event_detect(self, pin):
+        """
+        This method stops detecting the edges of an input
+        """
+        self._events.pop(pin, None)
+
+    def cleanup(self, pin=None):
+        """
+        This method stops detecting the edges of a pin, or of all of them
+        """
+        if pin is None:
+            self._events.clear()
+        else:
+            self._events.pop(pin, None)
+
+    def set_input(self, pin, level):
+        """
+        This method sets the level of an input, and calls the callbacks of the pin if the edge is detected
+        """
+        level = int(bool(level))
+
+        with self._lock:
+            previous = self.levels.get(pin, self.LOW)
+            self.levels[pin] = level
+
+        if level == previous or pin not in self._events:
+            return
+
+        edge, callbacks = self._events[pin]
+        if edge == self.BOTH or edge == (self.RISING if level else self.FALLING):
+            self.events += 1
+            for callback in callbacks:
+                callback(pin)
+
+    def pulse(self, pin, count=1):
+        """
+        This method sends pulses to an input: a rising and a falling edge for every pulse
+        """
+        for _ in range(count):
+            self.set_input(pin, self.HIGH)
+            self.set_input(pin, self.LOW)
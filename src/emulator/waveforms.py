@@ -0,0 +1,100 @@
+import io
+
+import numpy as np
+
+import src.config.configconstants as cfg
+from src.driver.adcframe import AdcFrameDecoder
+from src.driver.framecapture import FrameCaptureReader
+from src.exceptions.adcexception import AdcException
+
+""" Raw ADC frames sent by the Arduino emulator: synthetic waveforms of a running pool, or recordings of a real
+board. Frames are arrays of shape (frames, CHANNELS, SAMPLES) of raw ADC values. """
+
+''' Volts of every channel of the board with the pool running: DC level of the DC sensors, and RMS of the AC ones '''
+CHANNEL_VOLTS = {
+    0: 2.15,  # pH 7.4
+    1: 1.44,  # ORP 650 mV
+    2: 1.36,  # Mains voltage 230 V, RMS
+    3: 0.17,  # Filter pump intensity 5 A, RMS
+    4: 0.27,  # General intensity 8 A, RMS
+    5: 0.95,  # Sand filter pressure
+    6: 0.95,  # Diatoms filter pressure
+    7: 0.55,  # TDS
+}
+
+VCC = 5.2
+ADC_MAX = 1023
+
+
+def synthetic_frames(count=50, seed=cfg.SIMULATION_SEED, vcc=VCC, sample_rate=cfg.EMULATOR_SAMPLES_PER_SECOND,
+                     mains_frequency=cfg.EMULATOR_MAINS_FREQUENCY, noise=cfg.EMULATOR_NOISE_VOLTS):
+    """
+    This function builds raw ADC frames of a running pool, with sines at the mains frequency on the AC channels,
+    biased to half the supply voltage as the board does, and gaussian noise on all the channels
+
+    Args:
+        count: Number of frames
+        seed: Seed of the random generator of the noise
+        vcc: Supply voltage of the ADC
+        sample_rate: Samples of every channel taken every second
+        mains_frequency: Frequency of the AC signals
+        noise: Standard deviation of the noise, in volts
+
+    Returns: Array of raw frames
+    """
+    rng = np.random.default_rng(seed)
+    volts = np.empty((count, AdcFrameDecoder.CHANNELS, AdcFrameDecoder.SAMPLES))
+
+    # Time of every sample, the frames follow each other
+    t = np.arange(count * AdcFrameDecoder.SAMPLES).reshape(count, AdcFrameDecoder.SAMPLES) / sample_rate
+    phase = 2 * np.pi * mains_frequency * t
+
+    for channel, value in CHANNEL_VOLTS.items():
+        if channel in range(AdcFrameDecoder.CHANNELS)[AdcFrameDecoder.AC_CHANNELS]:
+            volts[:, channel] = vcc / 2 + value * np.sqrt(2) * np.sin(phase - channel)
+        else:
+            volts[:, channel] = value
+
+    volts += rng.normal(0, noise, volts.shape)
+
+    return np.clip(np.rint(volts / vcc * ADC_MAX), 0, ADC_MAX).astype(np.uint16)
+
+
+def save_recording(path, frames):
+    """
+    This function saves raw ADC frames to a .npy file
+    """
+    np.save(path, np.asarray(frames, dtype=np.uint16))
+
+
+def load_recording(path):
+    """
+    This function loads raw ADC frames saved with save_recording, captured by the pool driver to a capture file
+    (.bin), or captured from the serial port of a board that sends the text protocol (e.g. with
+    cat /dev/ttyS0 > capture.txt). Incomplete frames of a serial capture are skipped.
+
+    Returns: Array of raw frames
+    """
+    if str(path).endswith(".npy"):
+        return np.load(path)
+
+    if str(path).endswith(".bin"):
+        return np.array(FrameCaptureReader(path).frames()[1])
+
+    with open(path, "rb") as capture:
+        port = io.BytesIO(capture.read())
+
+    decoder = AdcFrameDecoder(VCC)
+    frames = []
+
+    while True:
+        try:
+            decoder.read_text_frame(port)
+        except AdcException:
+            if port.tell() == len(port.getbuffer()):
+                break
+            continue
+
+        frames.append(decoder.raw_data.copy())
+
+    return np.array(frames, dtype=np.uint16).reshape(-1, AdcFrameDecoder.CHANNELS, AdcFrameDecoder.SAMPLES)
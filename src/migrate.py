@@ -0,0 +1,28 @@
+import logging
+
+import src.strings_constants.strings as strings
+from src.database.db import db
+from src.database.models import ChemicalTankData, ActuatorData, ActuatorControlData, PoolConfigData, \
+    FilterAlgorithmData, FilterData, ChemicalsAlgorithmData, LevelAlgorithmData, LightsAlgorithmData, FlowData, \
+    WaterData
+from src.database.sensorhistory import migrate_sensor_data, ensure_rollups
+
+""" Database migration command.
+It creates the indexes of all the collections, and copies the legacy sensor data into the sensor history
+collection. It is safe to run it several times, and while the pool daemon is running. """
+
+# Models whose collections are indexed by datetime
+INDEXED_MODELS = [ChemicalTankData, ActuatorData, ActuatorControlData, PoolConfigData, FilterAlgorithmData,
+                  FilterData, ChemicalsAlgorithmData, LevelAlgorithmData, LightsAlgorithmData, FlowData, WaterData]
+
+# Only execute if this is main
+if __name__ == '__main__':
+    logging.getLogger().setLevel(logging.INFO)
+
+    for model in INDEXED_MODELS:
+        model.ensure_indexes()
+        logging.log(logging.INFO, strings.LOG_DB_INDEXES_CREATED, model._get_collection_name())
+
+    ensure_rollups(db.get_db())
+    copied = migrate_sensor_data(db.get_db())
+    print(strings.LOG_DB_MIGRATION_DONE % copied)
@@ -1,3 +1,14 @@
+from src.models.scheduler import Scheduler
+from src.utils import clock, metrics
+
+# Instantiate the scheduler that runs all the periodic timers, a simulation runs them with its manual clock
+timerScheduler = Scheduler(manual_clock=clock.source if clock.manual else None)
+
+metrics.gauge("smartpool_scheduler_workers", "Worker threads of the scheduler.",
+              lambda: timerScheduler.stats()["workers"])
+metrics.gauge("smartpool_scheduler_busy_workers", "Worker threads of the scheduler running a job.",
+              lambda: timerScheduler.stats()["busy_workers"])
+
 from src.models.chemicaltank import ChemicalTank
 import src.config.configconstants as cfg
 from src.models.timer import Timer
@@ -20,4 +31,23 @@ actuators = ActuatorControl()
 from src.models.water import Water
 
 # Instantiate Water class
-water = Water()
\ No newline at end of file
+water = Water()
+
+from src.models.rollup import Rollups
+from src.sensors import phSensor, orpSensor, tdsSensor, temperatureSensor, diatomsPressureSensor, \
+    sandPressureSensor, voltageSensor, generalSensor, pumpSensor
+
+# Instantiate the rollups of the numeric sensors
+rollups = Rollups([phSensor, orpSensor, tdsSensor, temperatureSensor, diatomsPressureSensor, sandPressureSensor,
+                   voltageSensor, generalSensor, pumpSensor])
+
+from src.models.state import StateStore
+
+# Instantiate the store of the state snapshots served by the API
+stateStore = StateStore()
+
+from src.models.livefeed import LiveFeed
+
+# Instantiate the live feed of state changes, and expose its clients
+liveFeed = LiveFeed(stateStore)
+metrics.gauge("smartpool_stream_clients", "Clients connected to the live stream.", lambda: liveFeed.clients)
@@ -1,5 +1,6 @@
-import datetime
+import atexit
 import logging
+import threading
 
 import pymongo
 
@@ -17,6 +18,7 @@ from src.exceptions.manualmodeexception import ManualModeException
 from src.exceptions.unknownactuatorexception import UnknownActuatorException
 from src.models import Timer, bleachTank, acidTank
 from src.sensors import pumpSensor, emergencyStopSensor
+from src.utils import clock
 
 from pymongo import errors
 
@@ -47,6 +49,11 @@ class ActuatorControl:
     ''' Variable for storing and update the current day '''
     __day__ = None
 
+    ''' Last document written to the database, its write time and the lock for writing it '''
+    __last_saved__ = None
+    __last_save_time__ = None
+    __save_lock__ = None
+
     ''' Statistics variables '''
     FILTER_PUMP_ON_REAL_SECONDS = 0
     FILTER_PUMP_ON_TOTAL_SECONDS = 0
@@ -78,17 +85,24 @@ class ActuatorControl:
     IN_EMERGENCY_STOP = False
     EMERGENCY_STOP_CAUSE = None
 
+    ''' Callbacks executed when any actuator state or statistic changes '''
+    callback_list = []
+
     def __init__(self):
         """
         Constructor of the class
         """
         logging.log(logging.INFO, strings.LOG_ACT_CTR_INSTANTIATED)
+        self.__save_lock__ = threading.Lock()
         pumpSensor.add_callback(self.__update_real_state__)
         self.__statisticsTimer__ = Timer(self.__statistics__)
         self.__statisticsTimer__.start()
-        self.__day__ = datetime.datetime.utcnow().day
+        self.__day__ = clock.utcnow().day
         self.load_from_db()
 
+        # Statistics held back by the coalescing are written when the application exits
+        atexit.register(self.save_to_db, force=True)
+
     def emergency_stop(self, cause, resume=False):
         """
         This method preform an emergency stop in all the pumps.
@@ -122,7 +136,8 @@ class ActuatorControl:
 
             logging.log(logging.WARNING, strings.LOG_ACT_CTR_RESUME)
 
-        self.save_to_db()
+        self.save_to_db(force=True)
+        self.__execute_callbacks__()
 
     def __statistics__(self):
         """
@@ -154,9 +169,9 @@ class ActuatorControl:
             self.ACID_PUMP_SEC_SINCE_LAST_ON = 0
 
         # Check if this is a new day
-        if self.__day__ != datetime.datetime.utcnow().day:
+        if self.__day__ != clock.utcnow().day:
             # It's a new day, clear all the statistics
-            self.__day__ = datetime.datetime.utcnow().day
+            self.__day__ = clock.utcnow().day
 
             self.FILTER_PUMP_ON_REAL_SECONDS = 0
             self.FILTER_PUMP_ON_TOTAL_SECONDS = 0
@@ -180,7 +195,7 @@ class ActuatorControl:
             self.FILL_VALVE_ON_MANUAL_SECONDS = 0
 
             # Save statistics to database
-            self.save_to_db()
+            self.save_to_db(force=True)
 
         else:
             # It isn't a new day, update statistics
@@ -188,16 +203,12 @@ class ActuatorControl:
             if self.FILTER_PUMP_REAL_STATE:
                 self.FILTER_PUMP_ON_REAL_SECONDS += 1
                 self.FILTER_PUMP_SEC_SINCE_LAST_ON += 1
-                # Save statistics to database
-                self.save_to_db()
 
             if self.PUMP_AUTOMATIC_CONTROL:
                 if self.FILTER_PUMP_TEORIC_STATE:
                     self.FILTER_PUMP_ON_AUTO_SECONDS += 1
                     self.FILTER_PUMP_ON_TOTAL_SECONDS = self.FILTER_PUMP_ON_AUTO_SECONDS \
                                                         + self.FILTER_PUMP_ON_MANUAL_SECONDS
-                    # Save statistics to database
-                    self.save_to_db()
 
                 if self.BLEACH_PUMP_STATE:
                     self.BLEACH_PUMP_ON_AUTO_SECONDS += 1
@@ -205,8 +216,6 @@ class ActuatorControl:
                     self.BLEACH_PUMP_ON_TOTAL_SECONDS = self.BLEACH_PUMP_ON_AUTO_SECONDS \
                                                         + self.BLEACH_PUMP_ON_MANUAL_SECONDS
                     bleachTank.decrease_value(cfg.TANK_SEC_DECREASE_VALUE_LITERS)
-                    # Save statistics to database
-                    self.save_to_db()
 
                 if self.ACID_PUMP_STATE:
                     self.ACID_PUMP_ON_AUTO_SECONDS += 1
@@ -214,24 +223,18 @@ class ActuatorControl:
                     self.ACID_PUMP_ON_TOTAL_SECONDS = self.ACID_PUMP_ON_AUTO_SECONDS \
                                                       + self.ACID_PUMP_ON_MANUAL_SECONDS
                     acidTank.decrease_value(cfg.TANK_SEC_DECREASE_VALUE_LITERS)
-                    # Save statistics to database
-                    self.save_to_db()
 
                 if self.AUX_OUT_STATE:
                     self.AUX_OUT_ON_AUTO_SECONDS += 1
                     self.AUX_OUT_SEC_SINCE_LAST_ON += 1
                     self.AUX_OUT_ON_TOTAL_SECONDS = self.AUX_OUT_ON_AUTO_SECONDS \
                                                     + self.AUX_OUT_ON_MANUAL_SECONDS
-                    # Save statistics to database
-                    self.save_to_db()
 
             else:
                 if self.FILTER_PUMP_TEORIC_STATE:
                     self.FILTER_PUMP_ON_MANUAL_SECONDS += 1
                     self.FILTER_PUMP_ON_TOTAL_SECONDS = self.FILTER_PUMP_ON_AUTO_SECONDS \
                                                         + self.FILTER_PUMP_ON_MANUAL_SECONDS
-                    # Save statistics to database
-                    self.save_to_db()
 
                 if self.BLEACH_PUMP_STATE:
                     self.BLEACH_PUMP_ON_MANUAL_SECONDS += 1
@@ -239,8 +242,6 @@ class ActuatorControl:
                     self.BLEACH_PUMP_ON_TOTAL_SECONDS = self.BLEACH_PUMP_ON_AUTO_SECONDS \
                                                         + self.BLEACH_PUMP_ON_MANUAL_SECONDS
                     bleachTank.decrease_value(cfg.TANK_SEC_DECREASE_VALUE_LITERS)
-                    # Save statistics to database
-                    self.save_to_db()
 
                 if self.ACID_PUMP_STATE:
                     self.ACID_PUMP_ON_MANUAL_SECONDS += 1
@@ -248,32 +249,29 @@ class ActuatorControl:
                     self.ACID_PUMP_ON_TOTAL_SECONDS = self.ACID_PUMP_ON_AUTO_SECONDS \
                                                       + self.ACID_PUMP_ON_MANUAL_SECONDS
                     acidTank.decrease_value(cfg.TANK_SEC_DECREASE_VALUE_LITERS)
-                    # Save statistics to database
-                    self.save_to_db()
 
                 if self.AUX_OUT_STATE:
                     self.AUX_OUT_ON_MANUAL_SECONDS += 1
                     self.AUX_OUT_SEC_SINCE_LAST_ON += 1
                     self.AUX_OUT_ON_TOTAL_SECONDS = self.AUX_OUT_ON_AUTO_SECONDS \
                                                     + self.AUX_OUT_ON_MANUAL_SECONDS
-                    # Save statistics to database
-                    self.save_to_db()
 
             if self.VALVE_AUTOMATIC_CONTROL and self.FILL_VALVE_STATE:
                 self.FILL_VALVE_ON_AUTO_SECONDS += 1
                 self.FILL_VALVE_SEC_SINCE_LAST_ON += 1
                 self.FILL_VALVE_ON_TOTAL_SECONDS = self.FILL_VALVE_ON_AUTO_SECONDS \
                                                    + self.FILL_VALVE_ON_MANUAL_SECONDS
-                # Save statistics to database
-                self.save_to_db()
 
             if not self.VALVE_AUTOMATIC_CONTROL and self.FILL_VALVE_STATE:
                 self.FILL_VALVE_ON_MANUAL_SECONDS += 1
                 self.FILL_VALVE_SEC_SINCE_LAST_ON += 1
                 self.FILL_VALVE_ON_TOTAL_SECONDS = self.FILL_VALVE_ON_AUTO_SECONDS \
                                                    + self.FILL_VALVE_ON_MANUAL_SECONDS
-                # Save statistics to database
-                self.save_to_db()
+
+            # Save statistics to database, coalesced with the previous seconds
+            self.save_to_db()
+
+        self.__execute_callbacks__()
 
     def __update_real_state__(self):
         """
@@ -282,14 +280,16 @@ class ActuatorControl:
         Returns:
 
         """
+        previous_state = self.FILTER_PUMP_REAL_STATE
 
         if pumpSensor.value is not None and pumpSensor.value > 0:
             self.FILTER_PUMP_REAL_STATE = True
         else:
             self.FILTER_PUMP_REAL_STATE = False
 
-        # Save statistics to database
-        self.save_to_db()
+        # Save statistics to database, at once only if the pump has started or stopped
+        self.save_to_db(force=previous_state != self.FILTER_PUMP_REAL_STATE)
+        self.__execute_callbacks__()
 
     def setstate(self, actuator: str, state: bool, automatic=True):
         """
@@ -379,7 +379,31 @@ class ActuatorControl:
             logging.log(logging.INFO, strings.LOG_ACT_CTR_STATE_CHANGED, actuator, state, strings.LOG_ACT_CTR_MANUAL)
 
         # Save statistics to database
-        self.save_to_db()
+        self.save_to_db(force=True)
+        self.__execute_callbacks__()
+
+    def add_cb(self, callback):
+        """
+        This functions adds a callback to be executed when any actuator state or statistic changes.
+
+        Args:
+            callback: Function to callback
+
+        Returns: None
+
+        """
+        if callback is not None:
+            self.callback_list.append(callback)
+
+    def __execute_callbacks__(self):
+        """
+        This private function executes the callbacks after a change.
+
+        Returns:
+
+        """
+        for cb in self.callback_list:
+            cb()
 
     def load_from_db(self):
         """
@@ -450,59 +474,119 @@ class ActuatorControl:
         except IndexError:
             logging.log(logging.INFO, strings.LOG_ACT_CTR_LOAD_FAIL)
 
-    def save_to_db(self):
+    def __build_document__(self):
+        """
+        This method returns the current state and statistics as a database document.
+
+        Returns: Dictionary with the fields of an ActuatorControlData document
+
+        """
+        # Create a new ActuatorControlData object with all the data
+        actuatordb = ActuatorControlData()
+
+        actuatordb.datetime = clock.utcnow()
+
+        actuatordb.in_emergency_stop = self.IN_EMERGENCY_STOP
+
+        if self.EMERGENCY_STOP_CAUSE is None:
+            actuatordb.emergency_stop_cause = "None"
+        else:
+            actuatordb.emergency_stop_cause = self.EMERGENCY_STOP_CAUSE
+
+        actuatordb.pump_automatic_control = self.PUMP_AUTOMATIC_CONTROL
+        actuatordb.valve_automatic_control = self.VALVE_AUTOMATIC_CONTROL
+        actuatordb.filter_pump_teoric_state = self.FILTER_PUMP_TEORIC_STATE
+        actuatordb.bleach_pump_state = self.BLEACH_PUMP_STATE
+        actuatordb.acid_pump_state = self.ACID_PUMP_STATE
+        actuatordb.aux_out_state = self.AUX_OUT_STATE
+        actuatordb.fill_valve_state = self.FILL_VALVE_STATE
+
+        actuatordb.filter_pump_on_real_seconds = self.FILTER_PUMP_ON_REAL_SECONDS
+        actuatordb.filter_pump_on_total_seconds = self.FILTER_PUMP_ON_TOTAL_SECONDS
+        actuatordb.filter_pump_on_auto_seconds = self.FILTER_PUMP_ON_AUTO_SECONDS
+        actuatordb.filter_pump_on_manual_seconds = self.FILTER_PUMP_ON_MANUAL_SECONDS
+
+        actuatordb.bleach_pump_on_total_seconds = self.BLEACH_PUMP_ON_TOTAL_SECONDS
+        actuatordb.bleach_pump_on_auto_seconds = self.BLEACH_PUMP_ON_AUTO_SECONDS
+        actuatordb.bleach_pump_on_manual_seconds = self.BLEACH_PUMP_ON_MANUAL_SECONDS
+
+        actuatordb.acid_pump_on_total_seconds = self.ACID_PUMP_ON_TOTAL_SECONDS
+        actuatordb.acid_pump_on_auto_seconds = self.ACID_PUMP_ON_AUTO_SECONDS
+        actuatordb.acid_pump_on_manual_seconds = self.ACID_PUMP_ON_MANUAL_SECONDS
+
+        actuatordb.aux_out_on_total_seconds = self.AUX_OUT_ON_TOTAL_SECONDS
+        actuatordb.aux_out_on_auto_seconds = self.AUX_OUT_ON_AUTO_SECONDS
+        actuatordb.aux_out_on_manual_seconds = self.AUX_OUT_ON_MANUAL_SECONDS
+
+        actuatordb.fill_valve_on_total_seconds = self.FILL_VALVE_ON_TOTAL_SECONDS
+        actuatordb.fill_valve_on_auto_seconds = self.FILL_VALVE_ON_AUTO_SECONDS
+        actuatordb.fill_valve_on_manual_seconds = self.FILL_VALVE_ON_MANUAL_SECONDS
+
+        return actuatordb.to_mongo().to_dict()
+
+    @staticmethod
+    def __build_update__(saved, current):
+        """
+        This method builds an update with only the fields that have changed since the last write.
+        The values in memory are the reference, so counters are written with $set too: a write whose reply is
+        lost can be repeated without counting the same seconds twice.
+
+        Args:
+            saved: Last document written to the database
+            current: Current document
+
+        Returns: The update operators, or None if nothing has changed
+
+        """
+        set_fields = {field: value for field, value in current.items()
+                      if field != "datetime" and saved.get(field) != value}
+
+        if not set_fields:
+            return None
+
+        set_fields["datetime"] = current["datetime"]
+
+        return {"$set": set_fields}
+
+    def save_to_db(self, force=False):
         """
         This method saves or updates the database.
 
+        Changes are coalesced: statistics are kept in memory and written at most once every
+        ACTUATOR_STATS_SAVE_SECONDS, updating only the fields that have changed. State changes
+        and emergency stops must be written at once with force.
+
         Args:
+            force: If it's True, pending changes are written now
 
         Returns:
 
         """
-        try:
-            col = db.get_db().get_collection("actuator_control_data")
+        with self.__save_lock__:
+            now = clock.monotonic()
 
-            # Create a new SensorData object in database and save all the data
-            actuatordb = ActuatorControlData()
+            if not force and self.__last_save_time__ is not None \
+                    and now - self.__last_save_time__ < cfg.ACTUATOR_STATS_SAVE_SECONDS:
+                # Too soon, it will be written in a later call
+                return
 
-            actuatordb.datetime = datetime.datetime.utcnow()
+            document = self.__build_document__()
 
-            actuatordb.in_emergency_stop = self.IN_EMERGENCY_STOP
+            try:
+                col = db.get_db().get_collection("actuator_control_data")
 
-            if self.EMERGENCY_STOP_CAUSE is None:
-                actuatordb.emergency_stop_cause = "None"
-            else:
-                actuatordb.emergency_stop_cause = self.EMERGENCY_STOP_CAUSE
-
-            actuatordb.pump_automatic_control = self.PUMP_AUTOMATIC_CONTROL
-            actuatordb.valve_automatic_control = self.VALVE_AUTOMATIC_CONTROL
-            actuatordb.filter_pump_teoric_state = self.FILTER_PUMP_TEORIC_STATE
-            actuatordb.bleach_pump_state = self.BLEACH_PUMP_STATE
-            actuatordb.acid_pump_state = self.ACID_PUMP_STATE
-            actuatordb.aux_out_state = self.ACID_PUMP_STATE
-            actuatordb.fill_valve_state = self.FILL_VALVE_STATE
-
-            actuatordb.filter_pump_on_real_seconds = self.FILTER_PUMP_ON_REAL_SECONDS
-            actuatordb.filter_pump_on_total_seconds = self.FILTER_PUMP_ON_TOTAL_SECONDS
-            actuatordb.filter_pump_on_auto_seconds = self.FILTER_PUMP_ON_AUTO_SECONDS
-            actuatordb.filter_pump_on_manual_seconds = self.FILTER_PUMP_ON_MANUAL_SECONDS
-
-            actuatordb.bleach_pump_on_total_seconds = self.BLEACH_PUMP_ON_TOTAL_SECONDS
-            actuatordb.bleach_pump_on_auto_seconds = self.BLEACH_PUMP_ON_AUTO_SECONDS
-            actuatordb.bleach_pump_on_manual_seconds = self.BLEACH_PUMP_ON_MANUAL_SECONDS
-
-            actuatordb.acid_pump_on_total_seconds = self.ACID_PUMP_ON_TOTAL_SECONDS
-            actuatordb.acid_pump_on_auto_seconds = self.ACID_PUMP_ON_AUTO_SECONDS
-            actuatordb.acid_pump_on_manual_seconds = self.ACID_PUMP_ON_MANUAL_SECONDS
-
-            actuatordb.aux_out_on_total_seconds = self.AUX_OUT_ON_TOTAL_SECONDS
-            actuatordb.aux_out_on_auto_seconds = self.AUX_OUT_ON_AUTO_SECONDS
-            actuatordb.aux_out_on_manual_seconds = self.AUX_OUT_ON_MANUAL_SECONDS
-
-            actuatordb.fill_valve_on_total_seconds = self.FILL_VALVE_ON_TOTAL_SECONDS
-            actuatordb.fill_valve_on_auto_seconds = self.FILL_VALVE_ON_AUTO_SECONDS
-            actuatordb.fill_valve_on_manual_seconds = self.FILL_VALVE_ON_MANUAL_SECONDS
-
-            col.replace_one({}, actuatordb.to_mongo(), upsert=True)
-        except errors.PyMongoError:
-            pass
\ No newline at end of file
+                if self.__last_saved__ is None:
+                    # First write, store the whole document
+                    col.replace_one({}, document, upsert=True)
+                else:
+                    update = self.__build_update__(self.__last_saved__, document)
+
+                    if update is None:
+                        return
+
+                    col.update_one({}, update, upsert=True)
+
+                self.__last_saved__ = document
+                self.__last_save_time__ = now
+            except errors.PyMongoError:
+                pass
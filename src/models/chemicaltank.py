@@ -3,8 +3,8 @@ import pymongo
 
 from src.database.models import ChemicalTankData
 from src.database.db import db
-import datetime
 import src.strings_constants.strings as strings
+from src.utils import clock
 
 from pymongo import errors
 
@@ -60,7 +60,7 @@ class ChemicalTank:
         """
         try:
             col = db.get_db().get_collection("chemical_tank_data")
-            self.datetime = datetime.datetime.utcnow()
+            self.datetime = clock.utcnow()
             tank_db = ChemicalTankData()
             tank_db.tank_type = self.tank_type
             tank_db.current_liters = self.current_liters
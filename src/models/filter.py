@@ -1,10 +1,10 @@
-import datetime
 import logging
 
 import src.config.configconstants as cfg
 import src.strings_constants.strings as strings
 from src.database.models import FilterData
 from src.sensors import diatomsPressureSensor, sandPressureSensor
+from src.utils import clock
 
 from pymongo import errors
 
@@ -56,7 +56,7 @@ class Filter:
             filterdb = FilterData()
             filterdb.type = self.type
             filterdb.pressure = self.pressure
-            filterdb.datetime = datetime.datetime.utcnow()
+            filterdb.datetime = clock.utcnow()
             filterdb.save()
         except errors.PyMongoError:
             pass
@@ -0,0 +1,250 @@
+import collections
+import logging
+import threading
+
+import src.config.configconstants as cfg
+import src.strings_constants.strings as strings
+
+
+class FeedClient:
+    """
+    This class holds the changes waiting to be sent to a client of the live feed.
+
+    Changes of the same value are coalesced, so a slow client gets the latest value of everything that has
+    changed, instead of every intermediate one, and its queue never has more than max_size values. If it
+    fills up anyway, the pending changes are dropped and the client gets a full snapshot instead.
+    """
+
+    def __init__(self, max_size=cfg.STREAM_QUEUE_MAX_SIZE):
+        """
+        Constructor of the class
+
+        Args:
+            max_size: Max number of values waiting to be sent
+        """
+        self.max_size = max_size
+        self.closed = False
+
+        self._pending = collections.OrderedDict()
+        self._sections = {}
+        self._resync = True
+        self._condition = threading.Condition()
+
+        ''' Counters '''
+        self.coalesced = 0
+        self.resyncs = 0
+
+    def put(self, name, section, changes):
+        """
+        This method adds the changed values of a section
+
+        Args:
+            name: Name of the section
+            section: StateSection with the version of the changes
+            changes: Dict with the changed values
+        """
+        with self._condition:
+            if not self._resync:
+                for key, value in changes.items():
+                    if (name, key) in self._pending:
+                        self.coalesced += 1
+
+                    self._pending[(name, key)] = value
+
+                self._sections[name] = section
+
+                if len(self._pending) > self.max_size:
+                    # Too far behind, send everything again
+                    self._pending.clear()
+                    self._sections.clear()
+                    self._resync = True
+                    self.resyncs += 1
+
+            self._condition.notify()
+
+    def get(self, timeout):
+        """
+        This method waits for changes
+
+        Args:
+            timeout: Max seconds to wait
+
+        Returns: None if there isn't any change, True if the client needs a full snapshot, or a dict
+        from section names to their StateSection and changed values
+        """
+        with self._condition:
+            if not self._pending and not self._resync and not self.closed:
+                self._condition.wait(timeout)
+
+            if self._resync:
+                self._resync = False
+                return True
+
+            if not self._pending:
+                return None
+
+            changes = {}
+            for (name, key), value in self._pending.items():
+                changes.setdefault(name, (self._sections[name], {}))[1][key] = value
+
+            self._pending.clear()
+            self._sections.clear()
+
+            return changes
+
+    def close(self):
+        """
+        This method wakes up a client waiting for changes, after it's been disconnected
+        """
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+
+
+class LiveFeed:
+    """
+    This class pushes the changes of the state of the pool to the connected clients.
+
+    It's woken up every time the state store marks a section as changed, which happens from the sensor,
+    water and actuator callbacks, and every max age of the polled sections while there are clients. Then it
+    takes a snapshot, compares every section whose version has changed with the last published one, and
+    adds only the changed values to the queue of every client.
+    """
+
+    def __init__(self, state_store, max_clients=cfg.STREAM_MAX_CLIENTS, queue_size=cfg.STREAM_QUEUE_MAX_SIZE,
+                 period=cfg.STATE_MAX_AGE_SECONDS):
+        """
+        Constructor of the class
+
+        Args:
+            state_store: StateStore whose changes are published
+            max_clients: Max number of connected clients
+            queue_size: Max number of values waiting to be sent to a client
+            period: Seconds between snapshots while there are clients, for the polled sections
+        """
+        self.state_store = state_store
+        self.max_clients = max_clients
+        self.queue_size = queue_size
+        self.period = period
+
+        self._clients = set()
+        self._published = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+        ''' Counters '''
+        self.published = 0
+
+        state_store.add_listener(self._wakeup.set)
+
+    @property
+    def clients(self):
+        """
+        This method returns the number of connected clients
+        """
+        return len(self._clients)
+
+    def connect(self):
+        """
+        This method connects a new client
+
+        Returns: The FeedClient, or None if there are too many clients
+        """
+        if not self._published:
+            # The first snapshot of the client is the published one
+            self.publish()
+
+        with self._lock:
+            if len(self._clients) >= self.max_clients:
+                return None
+
+            client = FeedClient(self.queue_size)
+            self._clients.add(client)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="LiveFeed", daemon=True)
+                self._thread.start()
+
+        self._wakeup.set()
+        return client
+
+    def disconnect(self, client):
+        """
+        This method disconnects a client
+        """
+        with self._lock:
+            self._clients.discard(client)
+
+        client.close()
+
+    def receive(self, client, timeout=cfg.STREAM_KEEPALIVE_SECONDS):
+        """
+        This method waits for the next message of a client
+
+        Args:
+            client: The FeedClient
+            timeout: Max seconds to wait
+
+        Returns: None if there isn't any change, or a tuple with the event name ("state" for a full snapshot,
+        "delta" for the changed values) and a dict from section names to their version, update datetime and
+        data
+        """
+        changes = client.get(timeout)
+
+        if changes is None:
+            return None
+
+        if changes is True:
+            with self._lock:
+                # Published sections, so later deltas always apply to this snapshot
+                changes = {name: (section, section.data) for name, section in self._published.items()}
+            event = "state"
+        else:
+            event = "delta"
+
+        return event, {"version": max((section.version for section, data in changes.values()), default=0),
+                       "sections": {name: {"version": section.version, "updated": section.updated, "data": data}
+                                    for name, (section, data) in changes.items()}}
+
+    def publish(self):
+        """
+        This method publishes the changed sections to every client
+        """
+        snapshot = self.state_store.snapshot()
+
+        with self._lock:
+            for name, section in snapshot.sections.items():
+                previous = self._published.get(name)
+
+                # Skip unchanged sections, and older snapshots published after a newer one
+                if previous is not None and previous.version >= section.version:
+                    continue
+
+                self._published[name] = section
+
+                if previous is None:
+                    changes = dict(section.data)
+                else:
+                    changes = {key: value for key, value in section.data.items()
+                               if key not in previous.data or previous.data[key] != value}
+
+                self.published += 1
+                for client in self._clients:
+                    client.put(name, section, changes)
+
+    def _run(self):
+        """
+        This method runs in the feed thread
+        """
+        while True:
+            self._wakeup.wait(self.period if self._clients else None)
+            self._wakeup.clear()
+
+            if not self._clients:
+                continue
+
+            try:
+                self.publish()
+            except Exception:
+                logging.exception(strings.LOG_LIVE_FEED_ERROR)
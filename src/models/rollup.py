@@ -0,0 +1,243 @@
+import datetime
+import logging
+import math
+import numbers
+import threading
+
+from pymongo import errors
+
+import src.config.configconstants as cfg
+import src.strings_constants.strings as strings
+from src.database import timezone, sensorDataWriter
+from src.database.db import db
+from src.database.sensorhistory import ensure_rollups, latest_rollup, aggregate_history, aggregate_rollups, \
+    save_rollups, rollup_bucket_start, delete_misaligned_rollups, DAY_SECONDS, EPOCH
+from src.models.timer import Timer
+from src.utils import clock
+
+
+class RollupBucket:
+    """
+    This class holds the running stats of the readings of a sensor in a bucket of time
+    """
+
+    __slots__ = ("start", "count", "min", "max", "sum", "sumsq")
+
+    def __init__(self, start, count=0, minimum=None, maximum=None, total=0.0, sumsq=0.0):
+        self.start = start
+        self.count = count
+        self.min = minimum
+        self.max = maximum
+        self.sum = total
+        self.sumsq = sumsq
+
+    def add(self, value):
+        """
+        This method adds a new reading in O(1)
+        """
+        self.count += 1
+        self.sum += value
+        self.sumsq += value * value
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, count, minimum, maximum, total, sumsq):
+        """
+        This method adds the stats of the readings of a shorter bucket inside this one
+        """
+        self.count += count
+        self.sum += total
+        self.sumsq += sumsq
+
+        if self.min is None or minimum < self.min:
+            self.min = minimum
+        if self.max is None or maximum > self.max:
+            self.max = maximum
+
+    def to_document(self, sensor_type, resolution):
+        """
+        This method returns the rollup document of the bucket
+        """
+        mean = self.sum / self.count
+        variance = max(self.sumsq / self.count - mean * mean, 0)
+
+        return {"sensor_type": sensor_type, "resolution": resolution,
+                "datetime": datetime.datetime.fromtimestamp(self.start, tz=timezone),
+                "count": self.count, "min": self.min, "max": self.max,
+                "mean": mean, "std": math.sqrt(variance), "sum": self.sum, "sumsq": self.sumsq}
+
+
+class Rollups:
+    """
+    This class maintains minute, hour and day rollups (count, min, max, mean and standard deviation)
+    of the readings of several sensors.
+
+    Every reading updates the open bucket of every resolution in O(1). A Timer writes the buckets that
+    have been closed since the last write, and the current state of the open ones, so long range queries
+    read a few rollups instead of every raw reading. On startup, the rollups that were not written because
+    the daemon was stopped are rebuilt from the raw readings.
+    """
+
+    ''' Length of the buckets of raw readings merged to rebuild day rollups '''
+    _DAY_BACKFILL_SECONDS = 15 * 60
+
+    def __init__(self, sensors):
+        """
+        Constructor of the class
+
+        Args:
+            sensors: Sensors to roll up, with numeric values
+        """
+        self.sensors = sensors
+        self.resolutions = sorted(cfg.ROLLUP_RESOLUTIONS)
+        self._open = {}
+        self._closed = []
+        self._lock = threading.Lock()
+
+        self.backfill()
+
+        for sensor in sensors:
+            sensor.subscribe(self.__add_reading__)
+
+        self.flushTimer = Timer(self.flush, period=cfg.ROLLUP_FLUSH_SECONDS, name="Rollups")
+        self.flushTimer.start()
+
+        logging.log(logging.INFO, strings.LOG_ROLLUP_INSTANTIATED, len(sensors))
+
+    def __add_reading__(self, event):
+        """
+        This method is called with the SensorEvent of every new reading of a sensor
+        """
+        if event.datetime is None:
+            return
+
+        self.add(event.sensor_type, event.value, event.datetime.timestamp())
+
+    def add(self, sensor_type, value, timestamp):
+        """
+        This method adds a reading to the open bucket of every resolution. Non numeric values are ignored.
+
+        Args:
+            sensor_type: Type of the sensor
+            value: Value of the reading
+            timestamp: POSIX timestamp of the reading
+        """
+        if not isinstance(value, numbers.Real) or isinstance(value, bool) or math.isnan(value):
+            return
+
+        with self._lock:
+            for resolution in self.resolutions:
+                start = rollup_bucket_start(timestamp, resolution)
+                key = (sensor_type, resolution)
+                bucket = self._open.get(key)
+
+                if bucket is None or start > bucket.start:
+                    if bucket is not None:
+                        # The bucket has ended, it will be written in the next flush
+                        self._closed.append(bucket.to_document(sensor_type, resolution))
+                    bucket = RollupBucket(start)
+                    self._open[key] = bucket
+                elif start < bucket.start:
+                    # Late reading of an already closed bucket
+                    continue
+
+                bucket.add(value)
+
+    def flush(self):
+        """
+        This method writes the closed buckets, and the current state of the open ones.
+        If the database fails, the closed buckets are kept to be written in the next flush.
+        """
+        with self._lock:
+            closed = self._closed
+            self._closed = []
+            current = [bucket.to_document(sensor_type, resolution)
+                       for (sensor_type, resolution), bucket in self._open.items()]
+
+        try:
+            save_rollups(db.get_db(), closed + current)
+        except errors.PyMongoError as e:
+            logging.log(logging.ERROR, strings.LOG_ROLLUP_FLUSH_FAILED, len(closed) + len(current), str(e))
+            with self._lock:
+                self._closed = closed + self._closed
+
+    def realign(self, database, resolution, now):
+        """
+        This method rebuilds the rollups of a resolution from the ones of the previous resolution, after the
+        misaligned ones have been deleted. Hour rollups fit inside local days where the time zone is a whole
+        number of hours away from UTC.
+
+        Returns: Number of stored rollups
+        """
+        shorter = self.resolutions[self.resolutions.index(resolution) - 1]
+        stored = 0
+
+        for sensor in self.sensors:
+            buckets = {}
+
+            for b in aggregate_rollups(database, sensor.sensor_type, EPOCH, now, shorter, shorter, limit=None):
+                bucket_start = rollup_bucket_start(b["datetime"].timestamp(), resolution)
+                bucket = buckets.setdefault(bucket_start, RollupBucket(bucket_start))
+                bucket.merge(b["count"], b["min"], b["max"], b["sum"], b["sumsq"])
+
+            save_rollups(database, [bucket.to_document(sensor.sensor_type, resolution) for bucket in buckets.values()])
+            stored += len(buckets)
+
+        return stored
+
+    def backfill(self):
+        """
+        This method rebuilds, from the raw readings, the rollups since the last stored one of every sensor
+        and resolution, up to ROLLUP_BACKFILL_DAYS ago. The buckets that are still open are loaded, so new
+        readings are added to them.
+        """
+        now = clock.localized()
+        oldest = now - datetime.timedelta(days=cfg.ROLLUP_BACKFILL_DAYS)
+        stored = 0
+
+        try:
+            # Write the queued raw readings first
+            sensorDataWriter.flush()
+            database = db.get_db()
+            ensure_rollups(database)
+
+            # Day rollups used to start at UTC midnight
+            for resolution in self.resolutions[1:]:
+                if resolution >= DAY_SECONDS and delete_misaligned_rollups(database, resolution):
+                    stored += self.realign(database, resolution, now)
+
+            for sensor in self.sensors:
+                for resolution in self.resolutions:
+                    # The last stored rollup may be incomplete, so it is rebuilt too
+                    last = latest_rollup(database, sensor.sensor_type, resolution)
+                    start = oldest if last is None else max(oldest, last["datetime"])
+                    start = datetime.datetime.fromtimestamp(rollup_bucket_start(start.timestamp(), resolution),
+                                                            tz=timezone)
+
+                    # The database groups readings by multiples of a length since the epoch, so day buckets are
+                    # merged from quarters of an hour, as midnight is at a whole quarter in every timezone
+                    length = resolution if resolution < DAY_SECONDS else self._DAY_BACKFILL_SECONDS
+                    buckets = {}
+
+                    for b in aggregate_history(database, sensor.sensor_type, start, now, length, limit=None):
+                        bucket_start = rollup_bucket_start(b["datetime"].timestamp(), resolution)
+                        bucket = buckets.setdefault(bucket_start, RollupBucket(bucket_start))
+                        bucket.merge(b["count"], b["min"], b["max"], b["sum"], b["sumsq"])
+
+                    rollups = [bucket.to_document(sensor.sensor_type, resolution) for bucket in buckets.values()]
+                    open_start = rollup_bucket_start(now.timestamp(), resolution)
+
+                    if open_start in buckets:
+                        # Still open
+                        with self._lock:
+                            self._open[(sensor.sensor_type, resolution)] = buckets[open_start]
+
+                    save_rollups(database, rollups)
+                    stored += len(rollups)
+
+            logging.log(logging.INFO, strings.LOG_ROLLUP_BACKFILLED, stored, oldest)
+        except errors.PyMongoError as e:
+            logging.log(logging.ERROR, strings.LOG_ROLLUP_BACKFILL_FAILED, str(e))
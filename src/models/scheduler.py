@@ -0,0 +1,229 @@
+import heapq
+import itertools
+import logging
+import queue
+import threading
+import time
+import weakref
+
+import src.config.configconstants as cfg
+import src.strings_constants.strings as strings
+from src.utils import clock
+
+
+class Scheduler:
+    """
+    This class runs all the periodic jobs of the application from a single scheduler thread.
+
+    Jobs are kept in a heap ordered by their next run time. When a job is due, the scheduler thread hands it
+    to a pool of worker threads. The pool has a fixed number of core workers; if a dispatched job has waited
+    for a free worker for more than SCHEDULER_STALL_SECONDS (because some jobs block for a long time), an
+    extra worker is started, which finishes after being idle for a while. So a slow job never delays the rest
+    of them, and short bursts of jobs don't start any thread.
+
+    Jobs must have a next_call attribute, a stop attribute and a _run(scheduled) method, which runs the job
+    and adds it again to the scheduler if it has to run again. See src.models.timer.Timer.
+
+    A new tick of the application clock is taken before running every job, so the dates read by a job are the
+    same and are converted to the timezone of the pool once.
+
+    A scheduler created with a manual clock doesn't start any thread: the jobs are run by run_until, in the
+    calling thread, moving the clock to the scheduled time of every job. It's used by the simulation.
+    """
+
+    def __init__(self, workers=cfg.SCHEDULER_WORKERS, max_workers=cfg.SCHEDULER_MAX_WORKERS,
+                 time_function=time.monotonic, manual_clock=None):
+        """
+        Constructor of the class
+
+        Args:
+            workers: Number of core worker threads
+            max_workers: Max number of worker threads, including the extra ones
+            time_function: Function that returns the current time in seconds
+            manual_clock: ManualClock that gives the time, if the jobs are run by run_until
+        """
+        self.workers = workers
+        self.max_workers = max_workers
+        self.time = time_function if manual_clock is None else manual_clock.monotonic
+        self.manual_clock = manual_clock
+
+        self._heap = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._jobs = queue.Queue()
+        self._worker_lock = threading.Lock()
+        self._worker_count = 0
+        self._idle_workers = 0
+        self._worker_names = itertools.count(1)
+        self._thread = None
+        self._known_jobs = weakref.WeakSet()
+        self._stalled = False
+
+        ''' Counters '''
+        self.dispatched = 0
+        self.extra_workers_started = 0
+
+    def add(self, job):
+        """
+        This method adds a job to run at its next_call time
+        """
+        with self._condition:
+            if self._thread is None and self.manual_clock is None:
+                self._start()
+
+            self._known_jobs.add(job)
+            heapq.heappush(self._heap, (job.next_call, next(self._sequence), job))
+            self._condition.notify()
+
+    def run_until(self, deadline):
+        """
+        This method runs all the jobs due until deadline in the calling thread, in order, and then moves the
+        clock to deadline. Before running a job, the clock is moved to its scheduled time, so the job sees the
+        time it would see in real time without waiting for it. Only for a scheduler with a manual clock.
+
+        Args:
+            deadline: Time, as returned by the manual clock, until the jobs are run
+        """
+        while True:
+            with self._condition:
+                if not self._heap or self._heap[0][0] > deadline:
+                    break
+
+                scheduled, _, job = heapq.heappop(self._heap)
+
+            if job.stop:
+                continue
+
+            self.manual_clock.advance_to(scheduled)
+            self.dispatched += 1
+            clock.tick()
+
+            try:
+                job._run(scheduled)
+            except Exception:
+                logging.exception(strings.LOG_SCHEDULER_JOB_FAILED, getattr(job, "name", job))
+
+        self.manual_clock.advance_to(deadline)
+
+    def stats(self):
+        """
+        This method returns the counters of the scheduler
+        """
+        with self._worker_lock:
+            workers = self._worker_count
+            busy = self._worker_count - self._idle_workers
+
+        return {"scheduled_jobs": len(self._heap), "dispatched": self.dispatched, "workers": workers,
+                "busy_workers": busy, "extra_workers_started": self.extra_workers_started}
+
+    def job_stats(self):
+        """
+        This method returns the stats of every job that hasn't been cancelled
+        """
+        return [job.stats() for job in list(self._known_jobs) if not job.stop and hasattr(job, "stats")]
+
+    def _start(self):
+        """
+        This method starts the scheduler thread and the core workers
+        """
+        for _ in range(self.workers):
+            self._start_worker(core=True)
+
+        self._thread = threading.Thread(target=self._run, name="Scheduler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _start_worker(self, core):
+        """
+        This method starts a new worker thread
+        """
+        with self._worker_lock:
+            self._worker_count += 1
+            self._idle_workers += 1
+
+        worker = threading.Thread(target=self._work, args=(core,),
+                                  name="Scheduler worker %d" % next(self._worker_names))
+        worker.daemon = True
+        worker.start()
+
+    def _run(self):
+        """
+        Scheduler thread, that waits for the next due job and dispatches it to the workers
+        """
+        while True:
+            job = None
+
+            with self._condition:
+                now = self.time()
+
+                if self._heap and self._heap[0][0] <= now:
+                    scheduled, _, job = heapq.heappop(self._heap)
+                else:
+                    timeout = self._heap[0][0] - now if self._heap else None
+
+                    if not self._jobs.empty():
+                        # Wake up to check if the dispatched jobs are stalled
+                        timeout = cfg.SCHEDULER_STALL_SECONDS if timeout is None \
+                            else min(timeout, cfg.SCHEDULER_STALL_SECONDS)
+
+                    self._condition.wait(timeout)
+
+            if job is not None and not job.stop:
+                self.dispatched += 1
+                self._jobs.put((job, scheduled, self.time()))
+
+            self._check_stalled()
+
+    def _check_stalled(self):
+        """
+        This method starts an extra worker if the oldest dispatched job has waited too long for a free worker
+        """
+        with self._jobs.mutex:
+            oldest = self._jobs.queue[0] if self._jobs.queue else None
+
+        if oldest is None or self.time() - oldest[2] < cfg.SCHEDULER_STALL_SECONDS:
+            self._stalled = False
+            return
+
+        with self._worker_lock:
+            start_worker = self._worker_count < self.max_workers
+
+        if start_worker:
+            logging.log(logging.WARNING, strings.LOG_SCHEDULER_EXTRA_WORKER, getattr(oldest[0], "name", oldest[0]))
+            self.extra_workers_started += 1
+            self._start_worker(core=False)
+            # Give the new worker a stall period to take the job
+            with self._jobs.mutex:
+                if self._jobs.queue and self._jobs.queue[0] is oldest:
+                    self._jobs.queue[0] = (oldest[0], oldest[1], self.time())
+        elif not self._stalled:
+            self._stalled = True
+            logging.log(logging.WARNING, strings.LOG_SCHEDULER_NO_WORKERS, getattr(oldest[0], "name", oldest[0]))
+
+    def _work(self, core):
+        """
+        Worker thread, that runs the dispatched jobs
+        """
+        while True:
+            try:
+                job, scheduled, _ = self._jobs.get(timeout=None if core else cfg.SCHEDULER_WORKER_IDLE_SECONDS)
+            except queue.Empty:
+                # Extra worker idle for too long
+                with self._worker_lock:
+                    self._worker_count -= 1
+                    self._idle_workers -= 1
+                return
+
+            with self._worker_lock:
+                self._idle_workers -= 1
+
+            # All the dates read by the job are the same
+            clock.tick()
+
+            try:
+                job._run(scheduled)
+            except Exception:
+                logging.exception(strings.LOG_SCHEDULER_JOB_FAILED, getattr(job, "name", job))
+            finally:
+                with self._worker_lock:
+                    self._idle_workers += 1
@@ -0,0 +1,168 @@
+import collections
+import threading
+import types
+
+import src.config.configconstants as cfg
+from src.utils import clock
+
+''' Last built data of a section, and the state version when it last changed '''
+StateSection = collections.namedtuple("StateSection", ["version", "updated", "data"])
+
+''' Immutable view of some sections of the state '''
+StateSnapshot = collections.namedtuple("StateSnapshot", ["version", "sections"])
+
+
+def _freeze(value):
+    """
+    This function returns an immutable copy of a section data
+    """
+    if isinstance(value, dict):
+        return types.MappingProxyType({key: _freeze(item) for key, item in value.items()})
+
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+
+    return value
+
+
+def thaw(value):
+    """
+    This function returns a mutable copy of a section data, that can be serialized
+    """
+    if isinstance(value, (dict, types.MappingProxyType)):
+        return {key: thaw(item) for key, item in value.items()}
+
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+
+    return value
+
+
+class StateStore:
+    """
+    This class keeps immutable snapshots of the state of the pool, split in sections (sensors, actuators,
+    water...). Each section is built by a function, but only when it's requested after a change, so polling
+    clients don't rebuild anything while the pool doesn't change.
+
+    A section is marked as changed by invalidate(), usually from the callbacks of the objects whose data it
+    has. Sections whose data changes without any callback can have a max age instead, after which they are
+    built again. A rebuilt section only gets a new version if its data is really different.
+
+    Versions come from a single counter, so the highest version of some sections changes whenever any of
+    them changes, and it can be used as their ETag.
+    """
+
+    def __init__(self, max_age=cfg.STATE_MAX_AGE_SECONDS, time_function=clock.monotonic):
+        """
+        Constructor of the class
+
+        Args:
+            max_age: Default max age in seconds of the sections without change callbacks
+            time_function: Function that returns the current time in seconds
+        """
+        self.max_age = max_age
+        self.time = time_function
+        self.version = 0
+
+        self._builders = {}
+        self._max_ages = {}
+        self._built_at = {}
+        self._sections = {}
+        self._dirty = set()
+        self._listeners = []
+        self._lock = threading.Lock()
+
+        ''' Counters '''
+        self.builds = 0
+
+    @property
+    def names(self):
+        """
+        This method returns the names of the sections
+        """
+        return list(self._builders)
+
+    def add_section(self, name, builder, polled=False, max_age=None):
+        """
+        This method adds a section to the state
+
+        Args:
+            name: Name of the section
+            builder: Function that returns a dict with the data of the section
+            polled: If it's True, the section is built again after max_age seconds even without invalidate()
+            max_age: Max age in seconds of a polled section, by default the one of the store
+        """
+        with self._lock:
+            self._builders[name] = builder
+            self._dirty.add(name)
+
+            if polled:
+                self._max_ages[name] = self.max_age if max_age is None else max_age
+
+    def invalidate(self, *names):
+        """
+        This method marks some sections as changed, or all of them if none is given. It's cheap, so it
+        can be called from every change callback.
+        """
+        with self._lock:
+            self._dirty.update(names if names else self._builders)
+
+        for listener in self._listeners:
+            listener()
+
+    def add_listener(self, listener):
+        """
+        This method adds a function that is called, without arguments, every time some section is marked as
+        changed. It's called from the thread that has made the change, so it must return quickly.
+        """
+        self._listeners.append(listener)
+
+    def snapshot(self, names=None):
+        """
+        This method returns a snapshot of some sections of the state, building the ones that have changed
+
+        Args:
+            names: Names of the sections, all of them if it's None
+
+        Returns: A StateSnapshot, whose version is the highest version of its sections
+
+        Raises:
+            KeyError: If a section doesn't exist
+        """
+        with self._lock:
+            if names is None:
+                names = list(self._builders)
+
+            now = self.time()
+            sections = {}
+
+            for name in names:
+                builder = self._builders[name]
+
+                max_age = self._max_ages.get(name)
+                if max_age is not None and now - self._built_at.get(name, now) >= max_age:
+                    self._dirty.add(name)
+
+                if name in self._dirty:
+                    self._build(name, builder, now)
+
+                sections[name] = self._sections[name]
+
+        version = max((section.version for section in sections.values()), default=0)
+        return StateSnapshot(version, types.MappingProxyType(sections))
+
+    def _build(self, name, builder, now):
+        """
+        This method builds a section again, and gives it a new version if its data has changed
+        """
+        data = _freeze(builder())
+
+        self._dirty.discard(name)
+        self._built_at[name] = now
+        self.builds += 1
+
+        previous = self._sections.get(name)
+
+        if previous is None or previous.data != data:
+            self.version += 1
+            self._sections[name] = StateSection(self.version, clock.localized(), data)
@@ -1,9 +1,25 @@
 import threading
-import time
+
+from src.models import timerScheduler
+from src.utils import metrics
+
+''' Metrics of all the timers '''
+TIMER_RUN_SECONDS = metrics.histogram("smartpool_timer_run_seconds", "Execution time of the periodic timers.",
+                                      labels=("job",))
+TIMER_DRIFT_SECONDS = metrics.histogram("smartpool_timer_drift_seconds",
+                                        "Delay between the scheduled and the real start of the periodic timers.",
+                                        labels=("job",))
+TIMER_OVERRUNS = metrics.counter("smartpool_timer_overruns_total",
+                                 "Runs of the periodic timers that took longer than their period.", labels=("job",))
+
 
 class Timer(object):
     """
-    Python periodic Thread using Timer with instant cancellation
+    Python periodic Timer with instant cancellation.
+
+    All the timers are run by the shared scheduler, so no thread is created for every run. Execution time,
+    drift (delay between the scheduled and the real start of a run) and overruns (runs that took longer
+    than the period, so the next run was late) are recorded for every timer.
     """
 
     def __init__(self, callback=None, period=1, name=None, *args, **kwargs):
@@ -13,15 +29,29 @@ class Timer(object):
         self.callback = callback
         self.period = period
         self.stop = False
-        self.current_timer = None
         self.schedule_lock = threading.Lock()
-        self.next_call = time.time()
+        self.next_call = timerScheduler.time()
+        self.timedelta = 0
+        self._idle = threading.Event()
+        self._idle.set()
+
+        if self.name is None and callback is not None:
+            self.name = getattr(callback, "__qualname__", repr(callback))
+
+        ''' Stats '''
+        self.runs = 0
+        self.overruns = 0
+        self.total_run_seconds = 0
+        self.max_run_seconds = 0
+        self.last_drift_seconds = 0
+        self.max_drift_seconds = 0
 
     def start(self):
         """
         Mimics Thread standard start method
         """
-        self.schedule_timer()
+        with self.schedule_lock:
+            self.schedule_timer()
 
     def run(self):
         """
@@ -30,33 +60,66 @@ class Timer(object):
         if self.callback is not None:
             self.callback(*self.args, **self.kwargs)
 
-            
-    def _run(self):
+    def _run(self, scheduled):
         """
-        Run desired callback and then reschedule Timer (if thread is not stopped)
+        Run desired callback and then reschedule Timer (if it is not stopped). It's called by the scheduler.
         """
-        starttime = time.time()
-        self.run()
-        with self.schedule_lock:
-            if not self.stop:
-                self.timedelta = time.time() - starttime
-                self.schedule_timer()
+        self._idle.clear()
+        starttime = timerScheduler.time()
+        drift = starttime - scheduled
+
+        try:
+            self.run()
+        finally:
+            with self.schedule_lock:
+                self.timedelta = timerScheduler.time() - starttime
+                self._update_stats(drift)
+
+                if not self.stop:
+                    self.schedule_timer()
 
+            self._idle.set()
+
+    def _update_stats(self, drift):
+        """
+        Update execution time and drift stats after a run
+        """
+        self.runs += 1
+        self.total_run_seconds += self.timedelta
+        self.last_drift_seconds = drift
+        TIMER_RUN_SECONDS.observe(self.timedelta, job=self.name)
+        TIMER_DRIFT_SECONDS.observe(max(drift, 0), job=self.name)
+
+        if self.timedelta > self.max_run_seconds:
+            self.max_run_seconds = self.timedelta
+
+        if drift > self.max_drift_seconds:
+            self.max_drift_seconds = drift
 
     def schedule_timer(self):
         """
         Schedules next Timer run
         """
         self.next_call = self.next_call + self.period
-        timer_period = self.next_call - time.time()
-        if timer_period < 0:
-            timer_period = 0
-            self.next_call = time.time()
-        self.current_timer = threading.Timer(timer_period, self._run, *self.args, **self.kwargs)
-        self.current_timer.daemon = True
-        if self.name:
-            self.current_timer.name = self.name
-        self.current_timer.start()
+        now = timerScheduler.time()
+
+        if self.next_call < now:
+            # The last run took longer than the period, don't try to catch up the missed runs
+            if self.runs > 0:
+                self.overruns += 1
+                TIMER_OVERRUNS.inc(job=self.name)
+            self.next_call = now
+
+        timerScheduler.add(self)
+
+    def stats(self):
+        """
+        Returns the execution stats of the Timer
+        """
+        return {"name": self.name, "period": self.period, "runs": self.runs, "overruns": self.overruns,
+                "last_run_seconds": self.timedelta, "max_run_seconds": self.max_run_seconds,
+                "mean_run_seconds": self.total_run_seconds / self.runs if self.runs else 0,
+                "last_drift_seconds": self.last_drift_seconds, "max_drift_seconds": self.max_drift_seconds}
 
     def cancel(self):
         """
@@ -64,11 +127,9 @@ class Timer(object):
         """
         with self.schedule_lock:
             self.stop = True
-            if self.current_timer is not None:
-                self.current_timer.cancel()
 
     def join(self):
         """
-        Mimics Thread standard join method
+        Mimics Thread standard join method, it waits until the current run, if any, has finished
         """
-        self.current_timer.join()
+        self._idle.wait()
@@ -1,4 +1,3 @@
-import datetime
 import logging
 
 import numpy as np
@@ -12,6 +11,8 @@ from src.models import actuators, Timer
 from src.sensors import temperatureSensor, orpSensor, phSensor, tdsSensor, waterLevelSensor_1, \
     waterLevelSensor_6, waterLevelSensor_5, waterLevelSensor_4, waterLevelSensor_3, waterLevelSensor_2
 from src.database import timezone
+from src.utils import clock
+from src.utils import aggregation
 from bson.codec_options import CodecOptions
 
 from pymongo import errors
@@ -32,12 +33,15 @@ class Water:
     valid = False
 
     '''
-    Vectors for the sensors
+    Timestamp of the last data refresh
     '''
-    temperature_vector = []
-    orp_vector = []
-    ph_vector = []
-    tds_vector = []
+    last_update = None
+
+    '''
+    Timestamp of the first reading not aggregated yet, of every parameter. It's taken from the newest reading
+    aggregated, not from the clock, so a reading added while a refresh runs is aggregated by the next one.
+    '''
+    since = None
 
     '''
     Variables for storing timers
@@ -51,11 +55,9 @@ class Water:
 
     def __init__(self):
         logging.log(logging.INFO, strings.LOG_WATER_INSTANTIATED)
-        # Set sensor callbacks
-        temperatureSensor.add_callback(self.__add_temperature__)
-        orpSensor.add_callback(self.__add_orp__)
-        phSensor.add_callback(self.__add_ph__)
-        tdsSensor.add_callback(self.__add_tds__)
+        # Set sensor callbacks, the readings of the other sensors are kept by the sensors themselves
+        self.last_update = clock.time()
+        self.since = {}
         waterLevelSensor_1.add_callback(self.__add_level_1__)
         waterLevelSensor_2.add_callback(self.__add_level_2__)
         waterLevelSensor_3.add_callback(self.__add_level_3__)
@@ -133,42 +135,6 @@ class Water:
         self.levels[5] = waterLevelSensor_6.value
         self.save_to_db()
 
-    def __add_temperature__(self):
-        """
-        This method adds a new value into the vectors.
-        Returns:
-
-        """
-        if temperatureSensor.is_ok:
-            self.temperature_vector.append(temperatureSensor.value)
-
-    def __add_orp__(self):
-        """
-        This method adds a new value into the vectors.
-        Returns:
-
-        """
-        if orpSensor.is_ok:
-            self.orp_vector.append(orpSensor.value)
-
-    def __add_ph__(self):
-        """
-        This method adds a new value into the vectors.
-        Returns:
-
-        """
-        if phSensor.is_ok:
-            self.ph_vector.append(phSensor.value)
-
-    def __add_tds__(self):
-        """
-        This method adds a new value into the vectors.
-        Returns:
-
-        """
-        if tdsSensor.is_ok:
-            self.tds_vector.append(tdsSensor.value)
-
     def __update_data__(self):
         """
         This is called periodically to update sensor data.
@@ -176,32 +142,14 @@ class Water:
         Returns:
 
         """
-        # Calculate mean of the data
-        if not self.temperature_vector:
-            self.temperature = None
-        else:
-            self.temperature = np.mean(self.temperature_vector)
-
-        if not self.orp_vector:
-            self.orp = None
-        else:
-            self.orp = np.mean(self.orp_vector)
-
-        if not self.ph_vector:
-            self.ph = None
-        else:
-            self.ph = np.mean(self.ph_vector)
-
-        if not self.tds_vector:
-            self.tds = None
-        else:
-            self.tds = np.mean(self.tds_vector)
+        # Aggregate the valid readings since the last refresh, None if there isn't any
+        since = self.last_update
+        self.last_update = clock.time()
 
-        # Reset's vectors
-        self.temperature_vector = []
-        self.orp_vector = []
-        self.ph_vector = []
-        self.tds_vector = []
+        self.temperature = self.__aggregate__("temperature", temperatureSensor, since)
+        self.orp = self.__aggregate__("orp", orpSensor, since)
+        self.ph = self.__aggregate__("ph", phSensor, since)
+        self.tds = self.__aggregate__("tds", tdsSensor, since)
 
         # Check if the data is valid
         self.valid = False
@@ -215,6 +163,29 @@ class Water:
         for cb in self.callback_list:
             cb()
 
+    def __aggregate__(self, parameter, sensor, since):
+        """
+        This method aggregates the valid readings of a sensor with the method set in the config for the parameter
+
+        Args:
+            parameter: Name of the water parameter
+            sensor: Sensor of the parameter
+            since: POSIX timestamp of the first reading, if no reading of the parameter has been aggregated yet
+
+        Returns: The aggregated value, or None if there isn't any reading
+
+        """
+        readings = sensor.history.readings(self.since.get(parameter, since))
+
+        if len(readings):
+            # The next refresh starts right after the newest reading read now
+            self.since[parameter] = float(np.nextafter(readings["timestamp"][-1], np.inf))
+
+        values = readings["value"][readings["is_ok"]]
+        values = values[~np.isnan(values)]
+
+        return aggregation.aggregate(poolcfg.pool_water_aggregation.get(parameter, "mean"), values)
+
     def add_cb(self, callback):
         """
         This functions adds a callback to be executed when any water value changes.
@@ -320,7 +291,7 @@ class Water:
         try:
             # Create a new object in database and save all the data
             waterdb = WaterData()
-            waterdb.datetime = timezone.localize(datetime.datetime.now())
+            waterdb.datetime = clock.localized()
 
             # Update current LSI
             self._update_LSI()
@@ -0,0 +1,119 @@
+import math
+
+import numpy as np
+
+from src.utils.ringbuffer import RingBuffer
+
+''' Memory layout of a reading: POSIX timestamp, value as float (NaN if it isn't numeric) and is_ok '''
+READING_DTYPE = np.dtype([("timestamp", "f8"), ("value", "f8"), ("is_ok", "?")])
+
+
+class Reading:
+    """
+    This class represents a single reading of a sensor
+    """
+
+    __slots__ = ("timestamp", "value", "is_ok")
+
+    def __init__(self, timestamp, value, is_ok):
+        self.timestamp = timestamp
+        self.value = value
+        self.is_ok = is_ok
+
+    def __repr__(self):
+        return "Reading(%r, %r, %r)" % (self.timestamp, self.value, self.is_ok)
+
+
+class ReadingHistory(RingBuffer):
+    """
+    This class keeps the last readings of a sensor in memory, in a ring of READING_DTYPE records. Adding a
+    reading doesn't create any Python object, and the memory used never grows.
+    """
+
+    def __init__(self, capacity):
+        """
+        Constructor of the class
+
+        Args:
+            capacity: Max number of readings kept
+        """
+        super().__init__(capacity, dtype=READING_DTYPE)
+
+    def add(self, timestamp, value, is_ok):
+        """
+        This method adds a reading, overwriting the oldest one if the ring is full
+
+        Args:
+            timestamp: POSIX timestamp of the reading
+            value: Value of the reading, booleans are stored as 0 or 1 and other non numeric values as NaN
+            is_ok: If the value is a valid one
+        """
+        try:
+            value = math.nan if value is None else float(value)
+        except (TypeError, ValueError):
+            value = math.nan
+
+        self.append((timestamp, value, bool(is_ok)))
+
+    def readings(self, since=None, until=None, only_ok=False):
+        """
+        This method returns a copy of the readings, from the oldest to the newest one
+
+        Args:
+            since: POSIX timestamp of the first reading, inclusive
+            until: POSIX timestamp of the last reading, exclusive
+            only_ok: If it's True, only the valid readings are returned
+
+        Returns: Numpy array of READING_DTYPE
+        """
+        data = self.values()
+
+        mask = np.ones(len(data), dtype=bool)
+        if since is not None:
+            mask &= data["timestamp"] >= since
+        if until is not None:
+            mask &= data["timestamp"] < until
+        if only_ok:
+            mask &= data["is_ok"]
+
+        return data[mask]
+
+    def oldest(self):
+        """
+        This method returns the timestamp of the oldest reading, or None if there isn't any
+        """
+        with self._lock:
+            if self._count == 0:
+                return None
+
+            # Once the ring is full, the oldest reading is the next one to be overwritten
+            return float(self._buffer[self._index if self._count == self.capacity else 0]["timestamp"])
+
+    def latest(self):
+        """
+        This method returns the newest Reading, or None if there isn't any
+        """
+        with self._lock:
+            if self._count == 0:
+                return None
+
+            reading = self._buffer[self._index - 1].copy()
+
+        return Reading(float(reading["timestamp"]), float(reading["value"]), bool(reading["is_ok"]))
+
+    def mean_value(self, since=None, until=None, only_ok=True):
+        """
+        This method returns the mean of the numeric values of the readings, or None if there isn't any
+
+        Args:
+            since: POSIX timestamp of the first reading, inclusive
+            until: POSIX timestamp of the last reading, exclusive
+            only_ok: If it's True, only the valid readings are used
+        """
+        values = self.readings(since, until, only_ok)["value"]
+        values = values[~np.isnan(values)]
+
+        if len(values) == 0:
+            return None
+
+        return float(np.mean(values))
@@ -1,12 +1,70 @@
-import datetime
+import collections
+import inspect
 import logging
+import threading
+import weakref
 
+import src.config.configconstants as cfg
 import src.strings_constants.strings as strings
-from src.database import timezone
-from src.database.models import SensorData
+from src.database import sensorDataWriter
+from src.database.sensorhistory import to_history_document
+from src.sensors.readings import ReadingHistory
+from src.utils import clock, metrics
 from flask import jsonify
 
-from pymongo import errors
+
+''' Metrics of the sensor callbacks '''
+CALLBACK_SECONDS = metrics.histogram("smartpool_sensor_callback_seconds",
+                                     "Execution time of the callbacks of new sensor values.",
+                                     labels=("sensor", "callback"))
+
+''' Event received by the subscribers of a sensor when it has a new value '''
+SensorEvent = collections.namedtuple("SensorEvent", ["sensor", "sensor_type", "value", "is_ok", "datetime",
+                                                     "previous_value", "previous_is_ok", "previous_datetime"])
+
+
+class Subscription:
+    """
+    This class represents a subscriber of a sensor. Bound methods are kept with a weak reference, so
+    subscribing doesn't keep their object alive, and they are unsubscribed when it's deleted. Other
+    functions are kept with a normal reference.
+    """
+
+    def __init__(self, sensor, callback, args, kwargs, with_event):
+        """
+        Constructor of the class
+
+        Args:
+            sensor: Sensor of the subscription
+            callback: Function to call
+            args: Positional arguments of the function
+            kwargs: Keyword arguments of the function
+            with_event: If it's True, the function receives a SensorEvent before the rest of the arguments
+        """
+        self.sensor = sensor
+        self.name = getattr(callback, "__qualname__", repr(callback))
+        self.args = args
+        self.kwargs = kwargs
+        self.with_event = with_event
+
+        if inspect.ismethod(callback):
+            self._callback = weakref.WeakMethod(callback)
+        else:
+            self._callback = lambda: callback
+
+    @property
+    def callback(self):
+        """
+        This method returns the function of the subscription, or None if its object has been deleted
+        """
+        return self._callback()
+
+    def unsubscribe(self):
+        """
+        This method removes the subscription from its sensor
+        """
+        self.sensor.unsubscribe(self)
+
 
 class Sensor:
     """
@@ -30,21 +88,28 @@ class Sensor:
     max_value = None
     min_value = None
 
-    '''
-    Callback function to be called when the value changed
-    '''
-    callback_list_owner = []
-    callback_list = []
-    args_list = []
-    kwargs_list = []
-
-    def __init__(self, sensor_type, max_value=None, min_value=None, callback=None):
+    def __init__(self, sensor_type, max_value=None, min_value=None, callback=None, depth=cfg.SENSOR_RING_DEPTH):
         """
         Constructor of the class
+
+        Args:
+            sensor_type: Type of the sensor
+            max_value: Max value to be considered OK
+            min_value: Min value to be considered OK
+            callback: Function to callback when the value changes
+            depth: Number of last readings kept in memory
         """
 
+        '''
+        Subscribers to be called when the value changes. The tuple is replaced, never modified, so it can be
+        iterated without any lock while another thread subscribes.
+        '''
+        self._subscribers = ()
+        self._subscribers_lock = threading.Lock()
+
         # Store what type of sensor is
         self.sensor_type = sensor_type
+        self.history = ReadingHistory(depth)
         self.add_callback(callback)
         self.max_value = max_value
         self.min_value = min_value
@@ -55,16 +120,47 @@ class Sensor:
         This functions adds a callback to be executed when the sensor value changes.
 
         Args:
-            callback: Function to callback
+            callback: Function to callback, called with the given arguments
 
-        Returns: None
+        Returns: The Subscription, or None if there isn't any callback
 
         """
         if callback is not None:
-            self.callback_list_owner.append(self.sensor_type)
-            self.callback_list.append(callback)
-            self.args_list.append(args)
-            self.kwargs_list.append(kwargs)
+            return self.__add_subscription__(Subscription(self, callback, args, kwargs, with_event=False))
+
+    def subscribe(self, callback, *args, **kwargs):
+        """
+        This functions adds a subscriber to be executed when the sensor value changes.
+
+        Args:
+            callback: Function to callback, called with a SensorEvent and the given arguments
+
+        Returns: The Subscription, to unsubscribe
+
+        """
+        return self.__add_subscription__(Subscription(self, callback, args, kwargs, with_event=True))
+
+    def unsubscribe(self, subscription):
+        """
+        This functions removes a subscriber of the sensor.
+
+        Args:
+            subscription: Subscription returned by subscribe or add_callback
+
+        Returns: None
+
+        """
+        with self._subscribers_lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not subscription)
+
+    def __add_subscription__(self, subscription):
+        """
+        This private function adds a subscription, and removes the ones whose object has been deleted
+        """
+        with self._subscribers_lock:
+            self._subscribers = tuple(s for s in self._subscribers if s.callback is not None) + (subscription,)
+
+        return subscription
 
     def check_value(self, value):
         """
@@ -99,29 +195,43 @@ class Sensor:
 
         # Store the current datetime and its previous value
         self.previous_datetime = self.datetime
-        self.datetime = timezone.localize(datetime.datetime.now())
+        now = clock.current()
+        self.datetime = now.localized
+
+        # Keep the reading in memory, for the means and the recent history
+        self.history.add(now.timestamp, value, self.is_ok)
 
         if save:
             # Save to database
             self.save_to_db()
 
-        for i in range(len(self.callback_list)):
-            if self.callback_list_owner[i] == self.sensor_type:
-                self.callback_list[i](*self.args_list[i], **self.kwargs_list[i])
+        # Execute the subscribers of this sensor
+        event = None
+        for subscription in self._subscribers:
+            callback = subscription.callback
+
+            if callback is None:
+                # Its object has been deleted
+                self.unsubscribe(subscription)
+                continue
+
+            with CALLBACK_SECONDS.time(sensor=self.sensor_type, callback=subscription.name):
+                if subscription.with_event:
+                    if event is None:
+                        event = SensorEvent(self, self.sensor_type, self.value, self.is_ok, self.datetime,
+                                            self.previous_value, self.previous_is_ok, self.previous_datetime)
+
+                    callback(event, *subscription.args, **subscription.kwargs)
+                else:
+                    callback(*subscription.args, **subscription.kwargs)
 
     def save_to_db(self):
         """
-        This method saves the current sensor into the database
-        """
-        try:
-            # Create a new SensorData object in database and save all the data
-            sensordb = SensorData()
-            sensordb.id_value = {self.sensor_type: self.value}
-            sensordb.is_ok = self.is_ok
-            sensordb.datetime = self.datetime
-            sensordb.save()
-        except errors.PyMongoError:
-            pass
+        This method queues the current sensor data to be saved into the database by a background
+        writer, so it never blocks on database I/O.
+        """
+        # Create a new sensor history document and queue it
+        sensorDataWriter.put(to_history_document(self.sensor_type, self.value, self.is_ok, self.datetime))
 
     def to_json(self):
         """
@@ -1,4 +1,3 @@
-import datetime
 
 import pymongo
 from bson.codec_options import CodecOptions
@@ -10,6 +9,7 @@ from src.database.db import db
 from src.database.models import FlowData
 from src.models import Timer
 from src.sensors import Sensor
+from src.utils import clock
 
 from pymongo import errors
 
@@ -21,11 +21,11 @@ class FlowSensor(Sensor):
     _counter = 0
     k_factor = poolcfg.pool_flow_k_factor
     _flow_timer = None
-    _start_increment = datetime.datetime.now()
+    _start_increment = None
     _flow_save_timer = None
     flow = 0
     daily_volume = 0
-    day = datetime.datetime.now().day
+    day = None
 
     def __init__(self, sensor_type, max_value=None, min_value=None, callback=None):
         """
@@ -33,6 +33,8 @@ class FlowSensor(Sensor):
         """
 
         super().__init__(sensor_type, max_value, min_value, callback)
+        self._start_increment = clock.monotonic()
+        self.day = clock.now().day
         self.load_from_db()
         poolcfg.pool_flow_k_factor_cb = self._update_config
         _flow_timer = Timer(self._get_flow)
@@ -53,39 +55,39 @@ class FlowSensor(Sensor):
         if self.flow != 0:
             self.save_to_db()
 
-        if self.day != datetime.datetime.now().day:
+        if self.day != clock.now().day:
             # If there is a new day, reset statistics
             self.daily_volume = 0
             self.save_to_db()
-            self.day = datetime.datetime.now().day
+            self.day = clock.now().day
 
     def _get_flow(self):
         """
         This method is called every second to update statistics
         """
         # Get current time and calculate time between calls
-        last_increment = datetime.datetime.now()
+        last_increment = clock.monotonic()
         delta_t = last_increment - self._start_increment
         self._start_increment = last_increment
 
-        if delta_t.total_seconds() <= 0:
-            delta_t = datetime.timedelta(seconds=1)
+        if delta_t <= 0:
+            delta_t = 1
 
         # Check the frequency between calls
 
-        frequency = self._counter / delta_t.total_seconds()
+        frequency = self._counter / delta_t
         # Get flow in liters per minute
-        self.flow = (frequency / self.k_factor) * (1 / (60 * delta_t.total_seconds()))
+        self.flow = (frequency / self.k_factor) * (1 / (60 * delta_t))
 
         self.daily_volume += self.flow / 1000  # Volume in m3
         self._counter = 0
 
-    def add_tick(self):
+    def add_tick(self, count=1):
         """
-        This method adds a tick to the flow counter
+        This method adds ticks to the flow counter
         """
 
-        self._counter += 1
+        self._counter += count
 
     def load_from_db(self):
         """
@@ -120,11 +122,11 @@ class FlowSensor(Sensor):
             col = db.get_db().get_collection("flow_data").with_options(
                 codec_options=CodecOptions(tz_aware=True, tzinfo=timezone))
             flowdb = FlowData()
-            flowdb.datetime = timezone.localize(datetime.datetime.now())
+            flowdb.datetime = clock.localized()
             flowdb.daily_volume = self.daily_volume
 
             # If there is a new day save a new record, if not update last record
-            if self.day != datetime.datetime.now().day:
+            if self.day != clock.now().day:
                 flowdb.save()
             else:
                 col.replace_one({}, flowdb.to_mongo(), upsert=True)
@@ -135,6 +137,6 @@ class FlowSensor(Sensor):
         """
         This method converts all the info contained in the sensor to JSON
         """
-        sensor_data = {"datetime": timezone.localize(datetime.datetime.now()), "flow": self.flow,
+        sensor_data = {"datetime": clock.localized(), "flow": self.flow,
                        "daily_volume": self.daily_volume}
         return jsonify(sensor_data)
@@ -0,0 +1,2 @@
+from src.simulation.poolmodel import PoolModel
+from src.simulation.trace import Trace
@@ -0,0 +1,39 @@
+import argparse
+import datetime
+
+import src.config.configconstants as cfg
+import src.strings_constants.strings as strings
+from src.simulation import PoolModel
+from src.utils import clock
+from src.utils.clock import ManualClock
+
+""" Runs all the algorithms of the application over a simulated pool, faster than real time.
+The application is configured as for a normal run (ENV_FILE_LOCATION and its own arguments), and its database
+must be one only for simulations, because all the algorithms save their data as usual.
+
+    python -m src.simulation --days 90 --seed 1 --trace season.csv """
+
+# Instantiate the parser, the arguments of the application are parsed by it
+parser = argparse.ArgumentParser(description=strings.SIMULATION_DESCRIPTION)
+parser.add_argument('--days', type=float, help=strings.ARG_SIMULATION_DAYS_HELP, default=cfg.SIMULATION_DAYS)
+parser.add_argument('--start', type=datetime.datetime.fromisoformat, help=strings.ARG_SIMULATION_START_HELP)
+parser.add_argument('--seed', type=int, help=strings.ARG_SIMULATION_SEED_HELP, default=cfg.SIMULATION_SEED)
+parser.add_argument('--trace', type=str, help=strings.ARG_SIMULATION_TRACE_HELP)
+parser.add_argument('--trace_period', type=float, help=strings.ARG_SIMULATION_TRACE_PERIOD_HELP,
+                    default=cfg.SIMULATION_TRACE_PERIOD_SECONDS)
+args, _ = parser.parse_known_args()
+
+# The clock must be replaced before the models are instantiated by the engine import
+clock.use(ManualClock(args.start))
+
+from src.simulation.engine import Simulation
+
+simulation = Simulation(PoolModel(seed=args.seed), trace_period=args.trace_period)
+simulation.run(args.days * 24 * 60 * 60)
+
+if args.trace is not None:
+    simulation.trace.save(args.trace)
+
+print("Simulated %.1f days in %.1f s (%.0fx real time), %d timer runs" %
+      (simulation.simulated_seconds / (24 * 60 * 60), simulation.wall_seconds,
+       simulation.simulated_seconds / simulation.wall_seconds, simulation.timer_runs))
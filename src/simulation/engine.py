@@ -0,0 +1,84 @@
+import time
+
+import src.config.configconstants as cfg
+from src.algorithms import dailyfiltering, chemicals, levelControl, lightControl
+from src.driver import driver
+from src.models import timerScheduler, actuators, water
+from src.simulation.trace import Trace
+from src.utils import clock
+
+""" Engine of the simulation. Importing this module instantiates all the models and algorithms of the
+application, so the clock of the application must be a ManualClock before it's imported. """
+
+
+class Simulation:
+    """
+    This class runs all the algorithms of the application over a simulated pool. The simulated time only moves
+    when the simulation runs, and all the periodic timers run in order in the calling thread, so a day is
+    simulated in the time needed to run the timers of a day.
+
+    A trace row is recorded every trace period, with the real state of the simulated water, the values seen by
+    the application, the state of the actuators and algorithms, and the wall time spent.
+    """
+
+    ''' Columns of the trace '''
+    columns = ["datetime", "temperature", "chlorine", "ph", "orp", "tds", "level_mm",
+               "water_temperature", "water_ph", "water_orp", "water_tds", "water_valid",
+               "filter_pump", "bleach_pump", "acid_pump", "fill_valve",
+               "filter_remaining_seconds", "orp_daily_seconds", "ph_daily_seconds", "fill_state", "lights_state",
+               "timer_runs", "wall_seconds"]
+
+    def __init__(self, model, trace_period=cfg.SIMULATION_TRACE_PERIOD_SECONDS):
+        """
+        Constructor of the class
+
+        Args:
+            model: PoolModel of the simulated pool
+            trace_period: Simulated seconds between rows of the trace
+        """
+        self.model = model
+        self.trace_period = trace_period
+        self.trace = Trace(self.columns)
+        self.wall_seconds = 0
+        self.simulated_seconds = 0
+        self.timer_runs = 0
+
+        driver.simulate(model)
+
+    def run(self, seconds):
+        """
+        This method runs the simulation for the given simulated seconds
+        """
+        end = clock.monotonic() + seconds
+        wall_start = time.perf_counter()
+
+        while clock.monotonic() < end:
+            step_start = time.perf_counter()
+            runs = timerScheduler.dispatched
+
+            timerScheduler.run_until(min(clock.monotonic() + self.trace_period, end))
+
+            runs = timerScheduler.dispatched - runs
+            self.timer_runs += runs
+            self._record(runs, time.perf_counter() - step_start)
+
+        self.wall_seconds += time.perf_counter() - wall_start
+        self.simulated_seconds += seconds
+
+    def _record(self, timer_runs, wall_seconds):
+        """
+        This method adds a row to the trace
+        """
+        row = {"datetime": clock.now().isoformat(timespec="seconds"),
+               "water_temperature": water.temperature, "water_ph": water.ph, "water_orp": water.orp,
+               "water_tds": water.tds, "water_valid": water.valid,
+               "filter_pump": actuators.FILTER_PUMP_REAL_STATE, "bleach_pump": actuators.BLEACH_PUMP_STATE,
+               "acid_pump": actuators.ACID_PUMP_STATE, "fill_valve": actuators.FILL_VALVE_STATE,
+               "filter_remaining_seconds": dailyfiltering.total_daily_seconds_remaining,
+               "orp_daily_seconds": chemicals.total_orp_daily_seconds,
+               "ph_daily_seconds": chemicals.total_ph_daily_seconds,
+               "fill_state": levelControl.state, "lights_state": lightControl.state,
+               "timer_runs": timer_runs, "wall_seconds": wall_seconds}
+        row.update(self.model.state())
+
+        self.trace.append(row)
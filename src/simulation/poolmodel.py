@@ -0,0 +1,199 @@
+import math
+
+import numpy as np
+
+import src.config.configconstants as cfg
+
+
+class PoolModel:
+    """
+    This class is a simplified physical model of the pool water, used to simulate the readings of the sensors.
+
+    It models the drift of the water temperature towards the air one, the decay of the free chlorine with the
+    temperature and the sun, the rise of the pH, the evaporation and the water filled through the fill valve,
+    and the effect of the bleach and acid pumps. ORP is derived from the free chlorine and the pH. All the
+    noise comes from a seeded random generator, so a simulation with the same seed always gives the same
+    readings.
+    """
+
+    '''
+    Geometry of the pool and height of the level sensors over the lowest one, in mm
+    '''
+    volume_m3 = 50
+    surface_m2 = 25
+    level_sensor_heights_mm = [0, 10, 20, 30, 40, 50]
+
+    '''
+    Air temperature: mean of the year, seasonal and daily amplitudes, and time constant of the water temperature
+    '''
+    air_mean_temperature = 17
+    air_seasonal_amplitude = 8
+    air_daily_amplitude = 5
+    water_thermal_tau_seconds = 3 * 24 * 60 * 60
+
+    '''
+    Free chlorine decay per hour at 20 ºC without sun, its increase with the temperature, and at noon
+    '''
+    chlorine_decay_per_hour = 0.01
+    chlorine_decay_temperature_factor = 1.07
+    chlorine_decay_sun_factor = 4
+
+    '''
+    Chemicals: active chlorine of the bleach in g/l, pH drop of a liter of acid in a m3, pump flows in l/h
+    '''
+    bleach_chlorine_g_l = 150
+    bleach_ph_rise_per_ppm = 0.02
+    acid_ph_drop_per_liter_m3 = 5
+    bleach_pump_l_h = 1.5
+    acid_pump_l_h = 1.5
+
+    '''
+    pH rise per day, and its increase while the filter pump aerates the water
+    '''
+    ph_rise_per_day = 0.05
+    ph_rise_pump_factor = 3
+
+    '''
+    Evaporation, fill valve flow and TDS of the fill water
+    '''
+    evaporation_mm_day = 4
+    evaporation_mm_day_per_degree = 0.2
+    fill_valve_l_min = 20
+    fill_water_tds = 300
+
+    '''
+    Noise of the sensor readings, as standard deviations
+    '''
+    temperature_noise = 0.05
+    ph_noise = 0.02
+    orp_noise = 5
+    tds_noise = 5
+
+    def __init__(self, seed=cfg.SIMULATION_SEED, temperature=20, chlorine=1, ph=7.4, tds=800, level_mm=35):
+        """
+        Constructor of the class
+
+        Args:
+            seed: Seed of the random generator
+            temperature: Initial water temperature, in ºC
+            chlorine: Initial free chlorine, in ppm
+            ph: Initial pH
+            tds: Initial TDS, in ppm
+            level_mm: Initial water level over the lowest level sensor, in mm
+        """
+        self.rng = np.random.default_rng(seed)
+        self.temperature = temperature
+        self.chlorine = chlorine
+        self.ph = ph
+        self.tds = tds
+        self.level_mm = level_mm
+        self.actuators = {cfg.FILTER_PUMP: False, cfg.BLEACH_PUMP: False, cfg.ACID_PUMP: False,
+                          cfg.AUX_OUT: False, cfg.FILL_VALVE: False}
+
+    @property
+    def orp(self):
+        """
+        ORP in mV, from the free chlorine and the pH
+        """
+        return 680 + 140 * math.log10(max(self.chlorine, 0.01)) - 50 * (self.ph - 7.5)
+
+    def set_actuator(self, actuator, state):
+        """
+        This method sets the state of an actuator
+        """
+        self.actuators[actuator] = bool(state)
+
+    def air_temperature(self, now):
+        """
+        This method returns the air temperature at the given date and time
+        """
+        season = math.sin(2 * math.pi * (now.timetuple().tm_yday - 110) / 365)
+        hour = now.hour + now.minute / 60
+        return self.air_mean_temperature + self.air_seasonal_amplitude * season \
+            + self.air_daily_amplitude * math.sin(2 * math.pi * (hour - 9) / 24)
+
+    @staticmethod
+    def sun(now):
+        """
+        This method returns the intensity of the sun, from 0 at night to 1 at noon
+        """
+        hour = now.hour + now.minute / 60
+        return max(0.0, math.sin(2 * math.pi * (hour - 6) / 24))
+
+    def step(self, now, seconds):
+        """
+        This method moves the model forward
+
+        Args:
+            now: Local date and time at the end of the step
+            seconds: Duration of the step
+
+        Returns: Liters of water filled through the fill valve during the step
+        """
+        # Temperature
+        self.temperature += (self.air_temperature(now) - self.temperature) * seconds / self.water_thermal_tau_seconds
+
+        # Chlorine decay
+        decay = self.chlorine_decay_per_hour / 3600 \
+            * self.chlorine_decay_temperature_factor ** (self.temperature - 20) \
+            * (1 + (self.chlorine_decay_sun_factor - 1) * self.sun(now))
+        self.chlorine *= math.exp(-decay * seconds)
+
+        # pH rise
+        rise = self.ph_rise_per_day / (24 * 60 * 60) * seconds
+        if self.actuators[cfg.FILTER_PUMP]:
+            rise *= self.ph_rise_pump_factor
+        self.ph += rise
+
+        # Chemicals injection
+        if self.actuators[cfg.BLEACH_PUMP]:
+            ppm = self.bleach_pump_l_h / 3600 * seconds * self.bleach_chlorine_g_l / self.volume_m3
+            self.chlorine += ppm
+            self.ph += ppm * self.bleach_ph_rise_per_ppm
+            self.tds += ppm * 1.7
+
+        if self.actuators[cfg.ACID_PUMP]:
+            self.ph -= self.acid_pump_l_h / 3600 * seconds * self.acid_ph_drop_per_liter_m3 / self.volume_m3
+
+        # Evaporation concentrates the dissolved solids
+        volume = self.volume_m3 + self.surface_m2 * self.level_mm / 1000
+        evaporated_mm = max(self.evaporation_mm_day + self.evaporation_mm_day_per_degree * (self.temperature - 15),
+                            0.5) / (24 * 60 * 60) * seconds
+        self.level_mm -= evaporated_mm
+        self.tds *= volume / (volume - self.surface_m2 * evaporated_mm / 1000)
+
+        # Fill water dilutes the chemicals
+        liters = 0
+        if self.actuators[cfg.FILL_VALVE]:
+            liters = self.fill_valve_l_min / 60 * seconds
+            fraction = liters / 1000 / volume
+            self.level_mm += liters / self.surface_m2
+            self.chlorine *= 1 - fraction
+            self.tds += (self.fill_water_tds - self.tds) * fraction
+
+        return liters
+
+    def measure(self):
+        """
+        This method returns noisy readings of the water sensors
+
+        Returns: Dict with the temperature, ph, orp and tds readings
+        """
+        noise = self.rng.normal(0, 1, size=4)
+        return {"temperature": round(self.temperature + noise[0] * self.temperature_noise, 2),
+                "ph": round(self.ph + noise[1] * self.ph_noise, 2),
+                "orp": round(self.orp + noise[2] * self.orp_noise),
+                "tds": round(self.tds + noise[3] * self.tds_noise)}
+
+    def levels(self):
+        """
+        This method returns the state of the level sensors, True if the water reaches them
+        """
+        return [self.level_mm >= height for height in self.level_sensor_heights_mm]
+
+    def state(self):
+        """
+        This method returns the real state of the water, without noise
+        """
+        return {"temperature": self.temperature, "chlorine": self.chlorine, "ph": self.ph, "orp": self.orp,
+                "tds": self.tds, "level_mm": self.level_mm}
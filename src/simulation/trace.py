@@ -0,0 +1,57 @@
+import csv
+
+import src.strings_constants.strings as strings
+
+
+class Trace:
+    """
+    This class records rows of values with the same columns, and saves them into a CSV or a Parquet file.
+    Traces of runs with the same seed can be compared to find regressions, and their timing columns to compare
+    performance.
+    """
+
+    def __init__(self, columns):
+        """
+        Constructor of the class
+
+        Args:
+            columns: Names of the columns, in order
+        """
+        self.columns = list(columns)
+        self.rows = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def append(self, row):
+        """
+        This method adds a row
+
+        Args:
+            row: Dict with the value of every column, missing columns are left empty
+        """
+        self.rows.append([row.get(column) for column in self.columns])
+
+    def save(self, path):
+        """
+        This method saves the trace, as Parquet if the path ends with .parquet, and as CSV otherwise.
+        Parquet needs pyarrow, which isn't a dependency of the application.
+
+        Args:
+            path: Path of the file
+        """
+        if path.endswith(".parquet"):
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ModuleNotFoundError:
+                raise ValueError(strings.ERR_SIMULATION_NO_PARQUET)
+
+            table = pyarrow.table({column: [row[index] for row in self.rows]
+                                   for index, column in enumerate(self.columns)})
+            pyarrow.parquet.write_table(table, path)
+        else:
+            with open(path, "w", newline="") as file:
+                writer = csv.writer(file)
+                writer.writerow(self.columns)
+                writer.writerows(self.rows)
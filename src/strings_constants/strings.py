@@ -5,17 +5,35 @@ ARG_LOG_FILE_HELP = 'Path to the log file'
 ARG_LOG_FILE_DEF = 'SmartPool.log'
 ARG_LOG_LEVEL_HELP = 'Sets the log level (DEBUG, INFO, WARNING, ERROR, CRITICAL)'
 ARG_LOG_LEVEL_DEF = 'INFO'
+SIMULATION_DESCRIPTION = 'Runs the SmartPool algorithms over a simulated pool, faster than real time'
+ARG_SIMULATION_DAYS_HELP = 'Simulated days'
+ARG_SIMULATION_START_HELP = 'Local date and time of the start of the simulation, as YYYY-MM-DDTHH:MM (now by default)'
+ARG_SIMULATION_SEED_HELP = 'Seed of the random generator of the simulated pool'
+ARG_SIMULATION_TRACE_HELP = 'Path of the trace file, Parquet if it ends with .parquet, CSV otherwise'
+ARG_SIMULATION_TRACE_PERIOD_HELP = 'Simulated seconds between rows of the trace'
+EMULATOR_DESCRIPTION = 'Emulates the Arduino of the pool board behind a pseudo-terminal'
+ARG_EMULATOR_RATE_HELP = 'ADC frames sent every second'
+ARG_EMULATOR_RECORDING_HELP = 'Recording of raw ADC frames to replay: a .npy file, a .bin capture file of the ' \
+                              'driver, or a capture of the text protocol'
+ARG_EMULATOR_SEED_HELP = 'Seed of the random generator of the synthetic waveforms'
+EMULATOR_LISTENING = 'Arduino emulator listening on %s'
 
 # Error Strings
 ERR_LOGFILE_NOT_FOUND = 'Incorrect LOG file specified in path, skipping log...'
 ERR_ENVAR_NOT_SET = 'The environment variable ENV_FILE_LOCATION is not set. Exiting...'
 ERR_ENVAR_FILE_NOT_FOUND = 'Could not open the ENV file specified. Exiting...'
+ERR_SIMULATION_NO_PARQUET = 'Parquet traces need pyarrow, save the trace as CSV or install it.'
+ERR_ADC_CAPTURE_FILE = '%s is not an ADC capture file.'
+ERR_FRAMES_NO_CBOR = 'CBOR frames need cbor2, request the raw format or install it.'
+ERR_ONEWIRE_CRC = 'Bad CRC in the scratchpad of the probe.'
+ERR_ONEWIRE_RESET = 'The probe gave its power-on reset value.'
 
 # Algorithm state strings_constants
 STR_STATE_WAITING_DAILY_CYCLE = "waiting for filter"
 STR_STATE_FILTERING = "filtering"
 STR_STATE_WAITING_FOR_FILL = "waiting for sensor to detect no water"
 STR_STATE_FILLING = "filling pool"
+STR_STATE_WAITING_FOR_SETTLE = "waiting for water to settle"
 STR_STATE_WAITING_FOR_NIGHT = "waiting for night"
 STR_STATE_WAITING_FOR_DAY = "waiting for day"
 
@@ -40,10 +58,36 @@ LOG_SENSOR_INSTANTIATED = 'New %s created.'
 LOG_SENSOR_NEW_VALID_VALUE = 'New VALID %s sensor value added.'
 LOG_SENSOR_NEW_INVALID_VALUE = 'New INVALID %s sensor value.'
 
+LOG_DB_QUEUE_FULL = 'Database write queue of %s is full, applying policy: %s.'
+LOG_DB_FLUSH_FAILED = 'Error writing %d documents into %s: %s'
+LOG_DB_WRITER_FAILED = 'Unexpected error in the database writer of %s, retrying.'
+LOG_DB_HISTORY_CREATED = 'Created %s collection (%s).'
+LOG_DB_HISTORY_TIMESERIES = 'time series'
+LOG_DB_HISTORY_REGULAR = 'regular collection, time series need MongoDB 5.0'
+LOG_DB_MIGRATION_PROGRESS = 'Sensor history migration: %d legacy documents copied...'
+LOG_DB_MIGRATION_DONE = 'Sensor history migration finished, %d legacy documents copied.'
+LOG_DB_INDEXES_CREATED = 'Created indexes of %s.'
+LOG_SCHEDULER_EXTRA_WORKER = 'All scheduler workers are busy, starting an extra worker to run %s.'
+LOG_SCHEDULER_NO_WORKERS = 'All scheduler workers are busy, %s will be delayed.'
+LOG_SCHEDULER_JOB_FAILED = 'Error running periodic job %s.'
+LOG_LIVE_FEED_ERROR = 'Error publishing the changes of the state to the live stream.'
+LOG_ROLLUP_INSTANTIATED = 'Sensor rollups initialized for %d sensors.'
+LOG_ROLLUP_BACKFILLED = 'Rolled up %d buckets of raw sensor readings since %s.'
+LOG_ROLLUP_BACKFILL_FAILED = 'Error rolling up raw sensor readings: %s'
+LOG_ROLLUP_FLUSH_FAILED = 'Error writing %d sensor rollups: %s'
+
 LOG_ACTUATOR_INSTANTIATED = 'New %s actuator created.'
 
 LOG_DRIVER_INSTANTIATED = 'Pool board initialized successfully.'
 LOG_DRIVER_ACTUATOR_SET = 'Actuator %s set to a new state: %s'
+LOG_DRIVER_ADC_PROTOCOL_FALLBACK = 'Board does not send %s ADC frames (%s). Falling back to %s protocol.'
+LOG_DRIVER_SERIAL_OPEN_ERROR = 'Error opening the serial link with the board: %s. Retrying in %.1fs.'
+LOG_DRIVER_SERIAL_ERROR = 'Error in the serial link with the board: %s.'
+LOG_DRIVER_SERIAL_RECONNECT = 'Serial link with the board lost. Opening it again in %.1fs.'
+LOG_DRIVER_ADC_CAPTURE_STARTED = 'Capturing raw ADC frames to %s.'
+LOG_DRIVER_ADC_CAPTURE_STOPPED = 'Capture of raw ADC frames stopped.'
+LOG_DRIVER_ONEWIRE_ERROR = 'Error reading 1-Wire probe %s: %s'
+LOG_DRIVER_ONEWIRE_TIMEOUT = '1-Wire probe %s took %.2fs to read. Reading discarded.'
 
 LOG_ACT_CTR_INSTANTIATED = 'Actuator control class initialized.'
 LOG_ACT_CTR_STATE_CHANGED = 'Changed state of the %s to %s. Source: %s'
@@ -60,6 +104,7 @@ LOG_ACT_CTR_RESUME = "EMERGENCY STOP ended, resuming normal operation..."
 LOG_CFG_INSTANTIATED = "Pool dynamic config class initialized."
 LOG_CFG_LOADED = "Loaded previous data for dynamic config."
 LOG_CFG_NOT_LOADED = "Previous data for dynamic config not found in database. Loading defaults."
+LOG_CFG_INVALID_AGGREGATION = "Invalid aggregation method for water parameter %s: %s."
 
 LOG_DFILT_INSTANTIATED = "Daily filtering algorithm class initialized."
 LOG_DFILT_LOADED = "Loaded previous data for daily filtering algorithm."
@@ -90,6 +135,10 @@ LOG_LIGHTS_LOADED = "Loaded previous data for lights algorithm."
 LOG_LIGHTS_NOT_LOADED = "Previous data for lights algorithm not found in database. Loading defaults."
 LOG_LIGHTS_NET_ERROR = "NET ERROR SENDING LIGHT COMMAND: %s."
 LOG_LIGHTS_STATE = "Light control algorithm changed state to %s..."
+LOG_LIGHTS_CLOSED = "Connection closed by the light controller."
+LOG_LIGHTS_CALLBACK_FAILED = "Error processing the result of a light command."
+LOG_LIGHTS_UNKNOWN_COMMAND = "Unknown light command %s."
+LOG_LIGHTS_SEQUENCE_CANCELLED = "Light command sequence cancelled."
 
 LOG_WATER_INSTANTIATED = "Water class initialized."
 LOG_WATER_LOADED = "Loaded previous data of water."
@@ -101,6 +150,7 @@ LOG_API_FILTER = "API: User %s requested info of filter algorithm."
 LOG_API_CHEMICALS = "API: User %s requested info of chemical algorithm."
 LOG_API_TANK = "API: User %s requested info of chemical tanks."
 LOG_API_DRIVER = "API: User %s requested info of driver data."
+LOG_API_DRIVER_FRAMES = "API: User %s requested %d ADC frames as %s."
 LOG_API_TANK_SET = "API: User %s requested set of chemical tanks."
 LOG_API_LEVEL = "API: User %s requested info of level control algorithm."
 LOG_API_LIGHT = "API: User %s requested info of light control algorithm."
@@ -111,5 +161,9 @@ LOG_API_ACTUATOR_SET = "API: User %s sets state of %s."
 LOG_API_CONFIG = "API: User %s requested view pool config."
 LOG_API_WATER = "API: User %s requested view water data."
 LOG_API_SUMMARY = "API: User %s requested a summary for all sensor data."
+LOG_API_SENSOR_HISTORY = "API: User %s requested history of %s from %s to %s."
+LOG_API_STATE = "API: User %s requested the state of %s."
+LOG_API_STREAM = "API: User %s connected to the live stream."
+LOG_API_STREAM_CLOSED = "API: User %s disconnected from the live stream."
 LOG_API_WATER_SET = "API: User %s sets water paremeters."
 
@@ -0,0 +1,133 @@
+import atexit
+import unittest
+
+from pymongo import errors
+
+import src.config.configconstants as cfg
+from src.models import actuatorcontrol
+from src.models.actuatorcontrol import ActuatorControl
+
+
+class FakeCursor:
+    """ Cursor of an empty collection """
+
+    def limit(self, count):
+        return self
+
+    def sort(self, key, direction):
+        return self
+
+    def __getitem__(self, index):
+        raise IndexError
+
+
+class FakeCollection:
+    """ Collection that records the writes """
+
+    def __init__(self):
+        self.writes = []
+        self.lose_reply = False
+
+    def find(self):
+        return FakeCursor()
+
+    def replace_one(self, query, document, upsert=False):
+        self.writes.append(("replace", document))
+
+    def update_one(self, query, update, upsert=False):
+        self.writes.append(("update", update))
+
+        if self.lose_reply:
+            self.lose_reply = False
+            raise errors.AutoReconnect("connection closed")
+
+
+class FakeDatabase:
+
+    def __init__(self):
+        self.collection = FakeCollection()
+
+    def get_db(self):
+        return self
+
+    def get_collection(self, name):
+        return self.collection
+
+
+class ActuatorControlTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = actuatorcontrol.db
+        actuatorcontrol.db = FakeDatabase()
+        self.collection = actuatorcontrol.db.collection
+        self.writes = self.collection.writes
+
+        self.control = ActuatorControl()
+        # Statistics are updated by the test
+        self.control.__statisticsTimer__.cancel()
+
+    def tearDown(self):
+        atexit.unregister(self.control.save_to_db)
+        actuatorcontrol.db = self.db
+
+    def wait_save_period(self):
+        """ Moves the last write back, as if the save period had passed """
+        self.control.__last_save_time__ -= cfg.ACTUATOR_STATS_SAVE_SECONDS
+
+    def test_update_has_only_the_changes(self):
+        saved = {"datetime": 1, "filter_pump_on_auto_seconds": 10, "acid_pump_on_auto_seconds": 5,
+                 "fill_valve_state": False, "pump_automatic_control": True}
+        current = dict(saved, datetime=2, filter_pump_on_auto_seconds=40, acid_pump_on_auto_seconds=0,
+                       fill_valve_state=True)
+
+        self.assertEqual(ActuatorControl.__build_update__(saved, current),
+                         {"$set": {"filter_pump_on_auto_seconds": 40, "acid_pump_on_auto_seconds": 0,
+                                   "fill_valve_state": True, "datetime": 2}})
+        self.assertIsNone(ActuatorControl.__build_update__(saved, dict(saved, datetime=3)))
+
+    def test_statistics_are_coalesced(self):
+        self.control.save_to_db()
+        self.assertEqual(self.writes[-1][0], "replace")
+
+        for _ in range(3):
+            self.control.FILTER_PUMP_ON_REAL_SECONDS += 1
+            self.control.save_to_db()
+        self.assertEqual(len(self.writes), 1)
+
+        self.wait_save_period()
+        self.control.save_to_db()
+        self.assertEqual(self.writes[-1][1]["$set"]["filter_pump_on_real_seconds"], 3)
+
+    def test_forced_saves_are_written_at_once(self):
+        self.control.save_to_db()
+        self.control.FILTER_PUMP_ON_REAL_SECONDS += 1
+        self.control.AUX_OUT_STATE = True
+
+        # As when the application exits
+        self.control.save_to_db(force=True)
+
+        self.assertEqual(len(self.writes), 2)
+        self.assertEqual(self.writes[-1][1]["$set"]["filter_pump_on_real_seconds"], 1)
+        self.assertTrue(self.writes[-1][1]["$set"]["aux_out_state"])
+
+        # Nothing has changed since
+        self.control.save_to_db(force=True)
+        self.assertEqual(len(self.writes), 2)
+
+    def test_write_with_a_lost_reply_is_repeated(self):
+        self.control.save_to_db()
+        self.control.ACID_PUMP_ON_TOTAL_SECONDS += 5
+
+        # The write reaches the database, but its reply is lost
+        self.collection.lose_reply = True
+        self.control.save_to_db(force=True)
+        self.control.save_to_db(force=True)
+
+        lost, repeated = self.writes[-2][1], self.writes[-1][1]
+        self.assertEqual(list(repeated), ["$set"])
+        self.assertEqual(lost["$set"]["acid_pump_on_total_seconds"], 5)
+        self.assertEqual(repeated["$set"]["acid_pump_on_total_seconds"], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
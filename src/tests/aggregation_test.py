@@ -0,0 +1,59 @@
+import unittest
+
+import numpy as np
+
+from src.config.pool.poolconfig import PoolConfig
+from src.utils import aggregation
+
+
+class AggregationTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.values = 650 + rng.normal(0, 2, size=500)
+        # Glitches of the probe
+        self.values[::50] = 0
+
+    def test_empty_values(self):
+        for method in aggregation.METHODS:
+            self.assertIsNone(aggregation.aggregate(method, np.array([])))
+
+    def test_mean(self):
+        self.assertAlmostEqual(aggregation.aggregate("mean", [1, 2, 6]), 3)
+
+    def test_median(self):
+        self.assertAlmostEqual(aggregation.aggregate("median", [1, 2, 600]), 2)
+
+    def test_trimmed_mean(self):
+        values = np.arange(10, dtype=float)
+        values[9] = 1000
+
+        self.assertAlmostEqual(aggregation.trimmed_mean(values, 0.1), 4.5)
+
+    def test_robust_methods_reject_glitches(self):
+        self.assertLess(aggregation.aggregate("mean", self.values), 640)
+
+        for method in ["median", "trimmed_mean", "hampel"]:
+            self.assertAlmostEqual(aggregation.aggregate(method, self.values), 650, delta=1)
+
+    def test_hampel_with_constant_values(self):
+        self.assertEqual(aggregation.aggregate("hampel", [7.2, 7.2, 7.2, 9]), 7.2)
+
+    def test_ewma_matches_recursive_formula(self):
+        alpha = 0.2
+        expected = self.values[0]
+        for value in self.values[1:]:
+            expected = alpha * value + (1 - alpha) * expected
+
+        self.assertAlmostEqual(aggregation.ewma(self.values, alpha), expected)
+
+    def test_invalid_aggregation_config(self):
+        PoolConfig.validate_pool_water_aggregation({"orp": "hampel", "ph": "median"})
+
+        for invalid in [["orp", "hampel"], "hampel", {"orp": "mode"}, {"chlorine": "mean"}, {"orp": ["mean"]}]:
+            with self.assertRaises(ValueError):
+                PoolConfig.validate_pool_water_aggregation(invalid)
+
+
+if __name__ == '__main__':
+    unittest.main()
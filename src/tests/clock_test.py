@@ -0,0 +1,85 @@
+import datetime
+import threading
+import unittest
+
+import pytz
+
+from src.utils.clock import Clock, ManualClock
+
+TIMEZONE = pytz.timezone("Europe/Madrid")
+
+
+class FakeSystemClock:
+    """ Clock that moves by itself, but whose time is set by the test """
+    manual = False
+
+    def __init__(self):
+        self.seconds = 1000.0
+
+    def time(self):
+        return self.seconds
+
+    def monotonic(self):
+        return self.seconds
+
+
+class ClockTest(unittest.TestCase):
+
+    def test_tick_is_reused_within_the_resolution(self):
+        source = FakeSystemClock()
+        clock = Clock(TIMEZONE, source, resolution=0.1)
+        first = clock.localized()
+
+        source.seconds += 0.05
+        self.assertIs(clock.localized(), first)
+
+        source.seconds += 0.1
+        self.assertEqual(clock.time(), source.seconds)
+
+    def test_every_thread_has_its_own_tick(self):
+        source = FakeSystemClock()
+        clock = Clock(TIMEZONE, source, resolution=60)
+        first = clock.tick()
+
+        # A job of another thread takes a later tick
+        source.seconds += 1
+        thread = threading.Thread(target=clock.tick)
+        thread.start()
+        thread.join()
+
+        self.assertIs(clock.current(), first)
+
+        # A new source gives new ticks
+        clock.use(FakeSystemClock())
+        self.assertIsNot(clock.current(), first)
+
+    def test_manual_clock_gives_a_new_tick_when_it_moves(self):
+        source = ManualClock(datetime.datetime(2021, 7, 1, 12))
+        clock = Clock(TIMEZONE, source)
+
+        self.assertEqual(clock.now(), datetime.datetime(2021, 7, 1, 12))
+        source.advance(0.01)
+        self.assertEqual(clock.now(), datetime.datetime(2021, 7, 1, 12, 0, 0, 10000))
+
+    def test_dates_in_the_timezone_of_the_pool(self):
+        source = ManualClock(datetime.datetime(2021, 3, 28, 1, 30))
+        clock = Clock(TIMEZONE, source)
+
+        self.assertEqual(clock.localized().utcoffset(), datetime.timedelta(hours=1))
+        self.assertEqual(clock.utcnow(), datetime.datetime(2021, 3, 28, 0, 30))
+
+        # Daylight saving time starts at 2:00
+        source.advance(60 * 60)
+        self.assertEqual(clock.now(), datetime.datetime(2021, 3, 28, 3, 30))
+        self.assertEqual(clock.localized().utcoffset(), datetime.timedelta(hours=2))
+
+    def test_manual_clock_never_goes_back(self):
+        source = ManualClock()
+        start = source.time()
+        source.advance_to(start - 10)
+
+        self.assertEqual(source.time(), start)
+
+
+if __name__ == '__main__':
+    unittest.main()
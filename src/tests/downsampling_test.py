@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+from src.utils.downsampling import lttb
+
+
+class DownsamplingTest(unittest.TestCase):
+
+    def test_short_series_is_not_downsampled(self):
+        self.assertEqual(list(lttb([0, 1, 2], [5, 6, 7], 10)), [0, 1, 2])
+
+    def test_selected_points(self):
+        x = np.arange(1000)
+        y = np.sin(x / 50)
+        selected = lttb(x, y, 100)
+
+        self.assertEqual(len(selected), 100)
+        self.assertEqual(selected[0], 0)
+        self.assertEqual(selected[-1], 999)
+        self.assertTrue(np.all(np.diff(selected) > 0))
+
+    def test_keeps_peaks(self):
+        x = np.arange(10000)
+        y = np.zeros(10000)
+        y[1234] = 10
+        y[8765] = -10
+        selected = lttb(x, y, 50)
+
+        self.assertIn(1234, selected)
+        self.assertIn(8765, selected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import serial
+
+from src.driver.adcframe import AdcFrameDecoder
+from src.driver.framecapture import FrameCapture
+from src.driver.serialsupervisor import SerialSupervisor
+from src.emulator import ArduinoEmulator, EmulatedGPIO, synthetic_frames, load_recording, save_recording
+from src.emulator.waveforms import VCC
+
+
+class ArduinoEmulatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = synthetic_frames(count=4)
+        self.emulator = ArduinoEmulator(self.frames, rate=100, reset_seconds=0.05).start()
+        self.port = serial.Serial(self.emulator.port_name, timeout=1)
+        self.decoder = AdcFrameDecoder(VCC)
+
+    def tearDown(self):
+        self.port.close()
+        self.emulator.stop()
+
+    def test_reset_sends_the_banner(self):
+        self.port.write(b'r')
+        self.assertEqual(self.port.readline(), ArduinoEmulator.BANNER)
+        self.assertEqual(self.emulator.resets, 1)
+
+    def test_text_frames(self):
+        self.port.write(b's')
+
+        for i in range(5):
+            self.decoder.read_text_frame(self.port)
+            np.testing.assert_array_equal(self.decoder.raw_data, self.frames[i % 4])
+
+    def test_checked_frames_are_numbered(self):
+        self.port.write(b'c')
+
+        self.assertEqual([self.decoder.read_checked_frame(self.port) for _ in range(3)], [0, 1, 2])
+        np.testing.assert_array_equal(self.decoder.raw_data, self.frames[2])
+
+    def test_rate(self):
+        self.port.write(b'b')
+        self.decoder.read_binary_frame(self.port)
+
+        start = time.monotonic()
+        for _ in range(20):
+            self.decoder.read_binary_frame(self.port)
+
+        self.assertAlmostEqual(time.monotonic() - start, 0.2, delta=0.1)
+
+    def test_unsupported_protocol_is_ignored(self):
+        self.emulator.protocols = (AdcFrameDecoder.PROTOCOL_TEXT,)
+        self.port.timeout = 0.2
+        self.port.write(b'c')
+
+        self.assertEqual(self.port.read(1), b'')
+
+    def test_frames_not_read_are_lost(self):
+        self.emulator.rate = 1000
+        self.port.write(b'b')
+        time.sleep(0.3)
+        self.assertGreater(self.emulator.frames_lost, 0)
+
+        # The frames already sent are read whole
+        for _ in range(self.emulator.frames_sent):
+            self.decoder.read_binary_frame(self.port)
+        self.assertEqual(self.decoder.resyncs, 0)
+
+    def test_supervisor_falls_back_to_the_protocol_of_the_board(self):
+        self.emulator.protocols = (AdcFrameDecoder.PROTOCOL_TEXT,)
+        self.port.close()
+        received = []
+
+        def open_port():
+            port = serial.Serial(self.emulator.port_name, timeout=0.2)
+            port.write(b'r')
+            port.readline()
+            return port
+
+        start_commands = {protocol: command for command, protocol in ArduinoEmulator.START_COMMANDS.items()}
+        supervisor = SerialSupervisor(open_port, self.decoder, received.append, start_commands,
+                                      min_backoff=0.01, max_backoff=0.05)
+        supervisor.start()
+        end = time.monotonic() + 5
+        while supervisor.frames_ok < 3 and time.monotonic() < end:
+            time.sleep(0.01)
+        supervisor.stop()
+
+        self.assertEqual(supervisor.protocol, AdcFrameDecoder.PROTOCOL_TEXT)
+        self.assertGreaterEqual(supervisor.frames_ok, 3)
+
+
+class WaveformsTest(unittest.TestCase):
+
+    def test_synthetic_frames(self):
+        frames = synthetic_frames(count=10, noise=0)
+        volts = frames * VCC / 1023
+
+        self.assertEqual(frames.shape, (10, AdcFrameDecoder.CHANNELS, AdcFrameDecoder.SAMPLES))
+        # DC channel and RMS of the mains voltage
+        self.assertAlmostEqual(volts[:, 0].mean(), 2.15, delta=0.01)
+        ac = volts[:, 2] - volts[:, 2].mean()
+        self.assertAlmostEqual(np.sqrt(np.mean(ac ** 2)), 1.36, delta=0.01)
+
+    def test_recordings(self):
+        frames = synthetic_frames(count=3)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "frames.npy")
+            save_recording(path, frames)
+            np.testing.assert_array_equal(load_recording(path), frames)
+
+            path = os.path.join(directory, "capture.bin")
+            capture = FrameCapture(path, capacity=10)
+            for i, f in enumerate(frames):
+                capture.append(f, timestamp=i)
+            capture.close()
+            np.testing.assert_array_equal(load_recording(path), frames)
+
+            # A capture of the text protocol, that starts in the middle of a frame
+            path = os.path.join(directory, "capture.txt")
+            with open(path, "wb") as capture:
+                capture.write(b"12\r\n34\r\nC7\r\n" + b"".join(AdcFrameDecoder.encode_text_frame(f) for f in frames))
+            np.testing.assert_array_equal(load_recording(path), frames)
+
+
+class EmulatedGPIOTest(unittest.TestCase):
+
+    def setUp(self):
+        self.gpio = EmulatedGPIO()
+        self.calls = []
+
+    def test_inputs_start_at_their_pull(self):
+        self.gpio.setup(1, self.gpio.IN, pull_up_down=self.gpio.PUD_UP)
+        self.gpio.setup(2, self.gpio.IN, pull_up_down=self.gpio.PUD_DOWN)
+
+        self.assertEqual((self.gpio.input(1), self.gpio.input(2)), (1, 0))
+
+    def test_edges_call_the_callbacks(self):
+        self.gpio.setup(1, self.gpio.IN)
+        self.gpio.setup(2, self.gpio.IN)
+        self.gpio.add_event_detect(1, self.gpio.RISING, callback=self.calls.append)
+        self.gpio.add_event_detect(2, self.gpio.BOTH, callback=self.calls.append)
+
+        self.gpio.pulse(1, 3)
+        self.gpio.set_input(2, True)
+        self.gpio.set_input(2, True)
+        self.gpio.set_input(2, False)
+
+        self.assertEqual(self.calls, [1, 1, 1, 2, 2])
+        self.assertEqual(self.gpio.events, 5)
+
+    def test_outputs(self):
+        self.gpio.setup(5, self.gpio.OUT)
+        self.gpio.output(5, True)
+
+        self.assertEqual(self.gpio.input(5), 1)
+
+    def test_install(self):
+        modules = {name: sys.modules.get(name) for name in ("RPi", "RPi.GPIO")}
+        try:
+            self.assertIs(self.gpio.install(), self.gpio)
+            import RPi.GPIO as GPIO
+            self.assertIs(GPIO, self.gpio)
+        finally:
+            for name, module in modules.items():
+                if module is None:
+                    sys.modules.pop(name, None)
+                else:
+                    sys.modules[name] = module
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.driver.framecapture import FrameCapture, FrameCaptureReader
+
+CHANNELS = 8
+SAMPLES = 100
+
+
+def frame(value):
+    return np.full((CHANNELS, SAMPLES), value, dtype=np.uint16)
+
+
+class FrameCaptureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "capture.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def capture(self, frames, capacity=10):
+        capture = FrameCapture(self.path, capacity)
+        for i in range(frames):
+            capture.append(frame(i), timestamp=1000 + i)
+        capture.close()
+
+        return capture
+
+    def test_file_is_preallocated(self):
+        self.capture(0, capacity=10)
+
+        self.assertEqual(os.path.getsize(self.path), 64 + 10 * (8 + CHANNELS * SAMPLES * 2))
+        self.assertEqual(len(FrameCaptureReader(self.path)), 0)
+
+    def test_frames_by_time_range_are_views(self):
+        self.capture(6)
+        reader = FrameCaptureReader(self.path)
+
+        timestamps, raw = reader.frames(1002, 1005)
+
+        np.testing.assert_array_equal(timestamps, [1002, 1003, 1004])
+        np.testing.assert_array_equal(raw[:, 0, 0], [2, 3, 4])
+        self.assertIsInstance(raw.base, np.ndarray)
+        self.assertFalse(raw.flags.owndata)
+
+    def test_ring_overwrites_the_oldest_frames(self):
+        self.capture(25)
+        reader = FrameCaptureReader(self.path)
+
+        self.assertEqual(reader.count, 25)
+        timestamps, raw = reader.frames()
+        np.testing.assert_array_equal(timestamps, np.arange(1015, 1025))
+        np.testing.assert_array_equal(raw[:, 7, 99], np.arange(15, 25))
+
+        # The range goes on from the end of the ring to its start
+        segments = reader.segments(1018, 1022)
+        self.assertEqual([len(t) for t, _ in segments], [2, 2])
+        np.testing.assert_array_equal(reader.frames(1018, 1022)[0], [1018, 1019, 1020, 1021])
+
+    def test_last_frames(self):
+        self.capture(12)
+        reader = FrameCaptureReader(self.path)
+
+        np.testing.assert_array_equal(reader.last(3)[0], [1009, 1010, 1011])
+        np.testing.assert_array_equal(reader.last(100)[0], np.arange(1002, 1012))
+
+    def test_capture_goes_on_after_a_restart(self):
+        self.capture(4)
+        capture = FrameCapture(self.path, 10)
+        capture.append(frame(4), timestamp=1004)
+        capture.close()
+
+        np.testing.assert_array_equal(FrameCaptureReader(self.path).frames()[0], np.arange(1000, 1005))
+
+        # A different geometry starts a new capture
+        FrameCapture(self.path, 20).close()
+        self.assertEqual(len(FrameCaptureReader(self.path)), 0)
+
+    def test_timestamps_never_go_back(self):
+        capture = self.capture(12)
+        capture.append(frame(12), timestamp=1010.5)
+        capture.append(frame(13), timestamp=1012)
+        capture.close()
+        reader = FrameCaptureReader(self.path)
+
+        self.assertEqual(reader.count, 14)
+        np.testing.assert_array_equal(reader.frames()[0][-3:], [1011, 1011, 1012])
+        np.testing.assert_array_equal(reader.frames(1011, 1012)[1][:, 0, 0], [11, 12])
+
+    def test_resumed_capture_keeps_its_frames_when_the_clock_is_late(self):
+        self.capture(4)
+        capture = FrameCapture(self.path, 10)
+        capture.append(frame(4), timestamp=900)
+        capture.close()
+
+        np.testing.assert_array_equal(FrameCaptureReader(self.path).frames()[0], [1000, 1001, 1002, 1003, 1003])
+
+    def test_reader_sees_the_frames_being_written(self):
+        capture = FrameCapture(self.path, 10)
+        reader = FrameCaptureReader(self.path)
+
+        capture.append(frame(1), timestamp=1)
+        self.assertEqual(len(reader), 1)
+        capture.append(frame(2), timestamp=2)
+        np.testing.assert_array_equal(reader.last(1)[1], [frame(2)])
+
+    def test_invalid_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"\0" * 128)
+
+        with self.assertRaises(ValueError):
+            FrameCaptureReader(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
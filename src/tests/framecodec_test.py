@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from src.utils import framecodec
+from src.utils.ringbuffer import RingBuffer
+
+CHANNELS = 8
+SAMPLES = 100
+
+
+class FrameCodecTest(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = np.arange(3 * CHANNELS * SAMPLES, dtype=np.float32).reshape(3, CHANNELS, SAMPLES)
+
+    def test_raw_format(self):
+        payload = framecodec.encode(self.frames)
+
+        self.assertEqual(len(payload), 12 + self.frames.size * 4)
+        self.assertEqual(payload[:12], np.array([3, CHANNELS, SAMPLES], dtype="<u4").tobytes())
+        np.testing.assert_array_equal(framecodec.decode(payload), self.frames)
+
+    def test_raw_format_of_a_channel_selection(self):
+        frames = self.frames[:, [2, 3]]
+
+        np.testing.assert_array_equal(framecodec.decode(framecodec.encode(frames)), frames)
+
+    def test_decimation(self):
+        mean = framecodec.decimate(self.frames, 3)
+        pick = framecodec.decimate(self.frames, 3, framecodec.DECIMATION_PICK)
+
+        # The last sample doesn't fill a block
+        self.assertEqual(mean.shape, (3, CHANNELS, 33))
+        np.testing.assert_array_equal(mean[0, 0, :2], [1, 4])
+        np.testing.assert_array_equal(pick[0, 0, :2], [0, 3])
+        self.assertIs(framecodec.decimate(self.frames, 1), self.frames)
+
+    def test_invalid_decimation(self):
+        for factor, mode in [(0, framecodec.DECIMATION_MEAN), (SAMPLES + 1, framecodec.DECIMATION_MEAN),
+                             (2, "median")]:
+            with self.assertRaises(ValueError):
+                framecodec.decimate(self.frames, factor, mode)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            framecodec.encode(self.frames, "json")
+
+
+class RingBufferLastTest(unittest.TestCase):
+
+    def test_last_items(self):
+        ring = RingBuffer(5, shape=(2,))
+        self.assertEqual(ring.last(3).shape, (0, 2))
+
+        for i in range(7):
+            ring.append([i, i])
+
+        np.testing.assert_array_equal(ring.last(3)[:, 0], [4, 5, 6])
+        np.testing.assert_array_equal(ring.last(10)[:, 0], [2, 3, 4, 5, 6])
+        np.testing.assert_array_equal(ring.last(1)[:, 0], [6])
+
+
+if __name__ == '__main__':
+    unittest.main()
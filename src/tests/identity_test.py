@@ -0,0 +1,107 @@
+import json
+
+import src.__main__  # noqa: F401, registers the routes of the API
+from src.api.resources import identity
+from src.api.resources.identity import IdentityCache, identityCache
+from src.database.models import User
+from src.tests.BaseCase import BaseCase
+
+
+class InvalidatingUsers:
+    """ User model whose reads are followed by the invalidation of the user, as a concurrent update would do """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.objects = self
+
+    def get(self, id):
+        user = User.objects.get(id=id)
+        self.cache.invalidate(id)
+
+        return user
+
+
+class IdentityCacheTest(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.root = User.objects.get(user_name="root")
+        self.user = self.create_user("pepe")
+        identityCache.invalidate()
+
+    @staticmethod
+    def create_user(user_name, is_admin=False):
+        user = User(user_name=user_name, email=user_name + "@pool.es", password="password", is_admin=is_admin)
+        user.hash_password()
+        user.save()
+
+        return user
+
+    def login(self, user_name, password):
+        response = self.app.post('/api/auth/login', headers={"Content-Type": "application/json"},
+                                 data=json.dumps({"user_name": user_name, "password": password}))
+
+        return {"Content-Type": "application/json", "Authorization": "Bearer " + response.json["token"]}
+
+    def test_hit(self):
+        cache = IdentityCache()
+
+        self.assertEqual(cache.get(self.root.id).user_name, "root")
+        self.assertEqual(cache.get(self.root.id).user_name, "root")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_entries_expire(self):
+        cache = IdentityCache(ttl_seconds=0)
+
+        cache.get(self.root.id)
+        cache.get(self.root.id)
+
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = IdentityCache(max_size=2)
+        other = self.create_user("juan")
+
+        cache.get(self.root.id)
+        cache.get(self.user.id)
+        cache.get(self.root.id)
+        cache.get(other.id)
+        cache.get(self.root.id)
+        cache.get(self.user.id)
+
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+    def test_invalidated_read_is_not_cached(self):
+        cache = IdentityCache()
+        users, identity.User = identity.User, InvalidatingUsers(cache)
+        try:
+            self.assertEqual(cache.get(self.root.id).user_name, "root")
+        finally:
+            identity.User = users
+
+        cache.get(self.root.id)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_updated_user_is_read_again(self):
+        root = self.login("root", "toor")
+        headers = self.login("pepe", "password")
+        self.assertEqual(self.app.get('/api/auth/users', headers=headers).status_code, 401)
+
+        # PUT gives the admin rights to the user
+        payload = {"modify_user": "pepe", "modify_data": {"user_name": "pepe", "email": "pepe@pool.es",
+                                                          "password": "password", "is_admin": True}}
+        self.assertEqual(self.app.put('/api/auth/signup', headers=root, data=json.dumps(payload)).status_code, 200)
+        self.assertEqual(self.app.get('/api/auth/users', headers=headers).status_code, 200)
+
+        # PATCH takes them away
+        payload = {"modify_user": "pepe", "modify_data": {"is_admin": False}}
+        self.assertEqual(self.app.patch('/api/auth/signup', headers=root, data=json.dumps(payload)).status_code, 200)
+        self.assertEqual(self.app.get('/api/auth/users', headers=headers).status_code, 401)
+
+    def test_deleted_user_is_read_again(self):
+        root = self.login("root", "toor")
+        headers = self.login("pepe", "password")
+        self.assertEqual(self.app.get('/api/auth/users', headers=headers).status_code, 401)
+
+        self.assertEqual(self.app.delete('/api/auth/signup?user=pepe', headers=root).status_code, 200)
+        self.assertEqual(self.app.get('/api/auth/users', headers=headers).status_code, 400)
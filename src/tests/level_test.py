@@ -0,0 +1,84 @@
+import datetime
+import unittest
+
+import src.config.configconstants as cfg
+from src.algorithms.level import Level
+from src.config.pool import poolcfg
+from src.models import actuators, water
+from src.sensors.subtypes import flowSensor
+from src.tests.BaseCase import BaseCase
+from src.utils import clock
+from src.utils.clock import ManualClock
+
+
+class LevelTest(BaseCase):
+
+    def setUp(self):
+        super().setUp()
+        self.source = clock.source
+        self.manual_clock = ManualClock(datetime.datetime(2021, 7, 1, 12))
+        clock.use(self.manual_clock)
+
+        self.level = Level()
+        # The algorithm is run by the test
+        self.level.fill_level_timer.cancel()
+        self.level.state = cfg.STATE_WAITING_FOR_FILL
+        self.level.daily_filled_volume = 0
+        self.level.day = clock.now().day
+
+        actuators.VALVE_AUTOMATIC_CONTROL = True
+        flowSensor.daily_volume = 0
+        water.levels = [True, False, False, False, False, False]
+
+    def tearDown(self):
+        actuators.setstate(cfg.FILL_VALVE, False)
+        clock.use(self.source)
+        super().tearDown()
+
+    def run_seconds(self, seconds, liters_per_second=0):
+        """ Runs the algorithm every simulated second, filling the given flow while the valve is open """
+        for _ in range(seconds):
+            self.manual_clock.advance(1)
+            if actuators.FILL_VALVE_STATE:
+                flowSensor.daily_volume += liters_per_second / 1000
+            self.level._level_control()
+
+    def test_waits_for_the_water_to_settle_without_blocking(self):
+        self.run_seconds(1)
+        self.assertEqual(self.level.state, cfg.STATE_FILLING)
+        self.assertTrue(actuators.FILL_VALVE_STATE)
+
+        # 0.5 m3 at 1 l/s
+        self.run_seconds(500, liters_per_second=1)
+        self.assertEqual(self.level.state, cfg.STATE_WAITING_FOR_SETTLE)
+        self.assertFalse(actuators.FILL_VALVE_STATE)
+        self.assertAlmostEqual(self.level.daily_filled_volume, poolcfg.pool_fill_volume_between_checks)
+
+        # The water reaches the end level while it settles
+        water.levels = [True] * 6
+        self.run_seconds(poolcfg.pool_fill_seconds_wait - 1)
+        self.assertEqual(self.level.state, cfg.STATE_WAITING_FOR_SETTLE)
+
+        self.run_seconds(1)
+        self.assertEqual(self.level.state, cfg.STATE_WAITING_FOR_FILL)
+        self.assertIsNone(self.level.settle_deadline)
+
+    def test_fills_again_if_the_level_is_not_reached(self):
+        self.run_seconds(501, liters_per_second=1)
+        self.run_seconds(poolcfg.pool_fill_seconds_wait)
+
+        self.assertEqual(self.level.state, cfg.STATE_FILLING)
+        self.assertTrue(actuators.FILL_VALVE_STATE)
+
+    def test_stops_at_the_max_daily_volume(self):
+        self.level.daily_filled_volume = poolcfg.pool_max_daily_water_volume_m3 - 0.1
+        water.levels = [False] * 6
+        self.run_seconds(1)
+        self.run_seconds(200, liters_per_second=1)
+
+        self.assertEqual(self.level.state, cfg.STATE_WAITING_FOR_FILL)
+        self.assertFalse(actuators.FILL_VALVE_STATE)
+
+
+if __name__ == '__main__':
+    unittest.main()
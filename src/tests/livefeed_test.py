@@ -0,0 +1,67 @@
+import unittest
+
+from src.models.livefeed import FeedClient, LiveFeed
+from src.models.state import StateStore
+
+
+class LiveFeedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.values = {"ph": 7.2, "orp": 650}
+        self.store = StateStore()
+        self.store.add_section("sensors", lambda: dict(self.values))
+        self.feed = LiveFeed(self.store, max_clients=2, queue_size=10)
+
+    def test_first_message_is_a_full_snapshot(self):
+        client = self.feed.connect()
+        event, data = self.feed.receive(client, timeout=0)
+
+        self.assertEqual(event, "state")
+        self.assertEqual(dict(data["sections"]["sensors"]["data"]), {"ph": 7.2, "orp": 650})
+
+    def test_deltas_have_only_the_changed_values(self):
+        client = self.feed.connect()
+        self.feed.receive(client, timeout=0)
+
+        self.values["ph"] = 7.5
+        self.store.invalidate("sensors")
+        self.feed.publish()
+        event, data = self.feed.receive(client, timeout=0)
+
+        self.assertEqual(event, "delta")
+        self.assertEqual(data["sections"]["sensors"]["data"], {"ph": 7.5})
+        self.assertIsNone(self.feed.receive(client, timeout=0))
+
+    def test_changes_of_a_slow_client_are_coalesced(self):
+        client = self.feed.connect()
+        self.feed.receive(client, timeout=0)
+
+        for ph in (7.3, 7.4, 7.5):
+            self.values["ph"] = ph
+            self.store.invalidate("sensors")
+            self.feed.publish()
+
+        event, data = self.feed.receive(client, timeout=0)
+
+        self.assertEqual(data["sections"]["sensors"]["data"], {"ph": 7.5})
+        self.assertEqual(client.coalesced, 2)
+
+    def test_too_many_clients(self):
+        self.feed.connect()
+        self.feed.connect()
+
+        self.assertIsNone(self.feed.connect())
+
+    def test_full_queue_gets_a_snapshot(self):
+        client = FeedClient(max_size=2)
+        client.get(timeout=0)
+
+        section = self.store.snapshot().sections["sensors"]
+        client.put("sensors", section, {"a": 1, "b": 2, "c": 3})
+
+        self.assertIs(client.get(timeout=0), True)
+        self.assertEqual(client.resyncs, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+import socket
+import threading
+import time
+import unittest
+
+from src.driver.lumiplus import LumiplusClient, LightDispatcher, LightTask
+
+
+class FakeLumiplus:
+    """ LUMIPLUS controller on localhost, that echoes the commands it receives """
+
+    def __init__(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen()
+        self.port = self.server.getsockname()[1]
+
+        self.commands = []
+        self.connections = []
+        self.hang = False
+        self.received = threading.Condition()
+
+        self.thread = threading.Thread(target=self._accept, daemon=True)
+        self.thread.start()
+
+    def _accept(self):
+        while True:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                return
+            self.connections.append(connection)
+            threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+    def _serve(self, connection):
+        while True:
+            try:
+                data = connection.recv(6)
+            except OSError:
+                return
+            if not data:
+                return
+
+            with self.received:
+                self.commands.append(data)
+                self.received.notify_all()
+
+            if not self.hang:
+                connection.sendall(data)
+
+    def wait_commands(self, count, timeout=2):
+        with self.received:
+            return self.received.wait_for(lambda: len(self.commands) >= count, timeout)
+
+    def drop_connections(self):
+        for connection in self.connections:
+            connection.shutdown(socket.SHUT_RDWR)
+            connection.close()
+        self.connections = []
+
+    def close(self):
+        self.drop_connections()
+        self.server.close()
+
+
+class LumiplusClientTest(unittest.TestCase):
+
+    def setUp(self):
+        self.lumiplus = FakeLumiplus()
+        self.client = LumiplusClient("127.0.0.1", self.lumiplus.port, connect_timeout=0.5, read_timeout=0.2,
+                                     min_backoff=0.1, max_backoff=0.4)
+
+    def tearDown(self):
+        self.client.close()
+        self.lumiplus.close()
+
+    def test_commands_share_the_connection(self):
+        for command in [b'023049', b'023051', b'023080']:
+            self.assertTrue(self.client.send(command))
+
+        self.assertEqual(self.lumiplus.commands, [b'023049', b'023051', b'023080'])
+        self.assertEqual(self.client.connections, 1)
+
+    def test_reconnects_when_the_controller_closes_the_connection(self):
+        self.assertTrue(self.client.send(b'023049'))
+        self.lumiplus.drop_connections()
+
+        self.assertTrue(self.client.send(b'023080'))
+        self.assertEqual(self.client.connections, 2)
+
+    def test_a_hung_controller_times_out(self):
+        self.lumiplus.hang = True
+
+        start = time.monotonic()
+        self.assertFalse(self.client.send(b'023049'))
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_backoff_while_the_controller_is_down(self):
+        now = [0]
+        self.client.time = lambda: now[0]
+        self.lumiplus.close()
+
+        self.assertFalse(self.client.send(b'023049'))
+        self.assertFalse(self.client.send(b'023049'))
+        # The second command has failed without trying to connect
+        self.assertEqual(self.client._backoff, 0.1)
+
+        now[0] = 0.1
+        self.assertFalse(self.client.send(b'023049'))
+        now[0] = 0.1 + 0.2
+        self.assertFalse(self.client.send(b'023049'))
+        now[0] = 0.3 + 0.4
+        self.assertFalse(self.client.send(b'023049'))
+        self.assertEqual(self.client._backoff, 0.4)
+
+
+class LightDispatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.lumiplus = FakeLumiplus()
+        self.client = LumiplusClient("127.0.0.1", self.lumiplus.port, connect_timeout=0.5, read_timeout=0.2)
+        self.results = []
+        self.dispatcher = LightDispatcher(self.client.send, lambda command, sent: self.results.append((command, sent)))
+
+    def tearDown(self):
+        self.dispatcher.cancel()
+        self.client.close()
+        self.lumiplus.close()
+
+    def test_run_returns_at_once(self):
+        start = time.monotonic()
+        self.dispatcher.run([LightTask(b'023049', 60), LightTask(b'023080', 0)])
+
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertTrue(self.lumiplus.wait_commands(1))
+        self.assertEqual(self.lumiplus.commands, [b'023049'])
+
+    def test_sequence_waits_the_delays(self):
+        start = time.monotonic()
+        self.dispatcher.run([(b'023049', 0.2), (b'023051', 0), (b'023080', 0)])
+
+        self.assertTrue(self.lumiplus.wait_commands(3))
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertEqual(self.lumiplus.commands, [b'023049', b'023051', b'023080'])
+
+    def test_a_new_sequence_cancels_the_current_one(self):
+        self.dispatcher.run([LightTask(b'023049', 60), LightTask(b'023051', 0)])
+        self.assertTrue(self.lumiplus.wait_commands(1))
+
+        self.dispatcher.run([LightTask(b'023080', 0)])
+        self.assertTrue(self.lumiplus.wait_commands(2))
+        time.sleep(0.1)
+
+        self.assertEqual(self.lumiplus.commands, [b'023049', b'023080'])
+
+    def test_cancel(self):
+        self.dispatcher.run([LightTask(b'023049', 60), LightTask(b'023051', 0)])
+        self.assertTrue(self.lumiplus.wait_commands(1))
+
+        self.dispatcher.cancel()
+        time.sleep(0.1)
+
+        self.assertEqual(self.dispatcher.pending, 0)
+        self.assertEqual(self.lumiplus.commands, [b'023049'])
+
+    def test_results_are_reported(self):
+        self.lumiplus.hang = True
+        self.dispatcher.run([LightTask(b'023049', 60), LightTask(b'023080', 0)])
+        time.sleep(0.5)
+
+        # A failed command doesn't wait its delay, and the next one isn't sent until the backoff ends
+        self.assertEqual(self.results, [(b'023049', False), (b'023080', False)])
+        self.assertEqual(self.lumiplus.commands, [b'023049'])
+
+    def test_timing_command_needs_the_previous_one(self):
+        sent = []
+        self.dispatcher.send = lambda command: sent.append(command) or command != b'023049'
+        self.dispatcher.run([LightTask(b'023049', 0), LightTask(b'023028', 0, after_sent=True),
+                             LightTask(b'023050', 0), LightTask(b'023029', 0, after_sent=True)])
+        time.sleep(0.1)
+
+        self.assertEqual(sent, [b'023049', b'023050', b'023029'])
+        self.assertEqual(self.results, [(b'023049', False), (b'023028', False), (b'023050', True),
+                                        (b'023029', True)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from src.utils.metrics import MetricsRegistry
+
+
+class MetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = MetricsRegistry()
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.metrics.histogram("job_seconds", "Job time.", labels=("job",), buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value, job="filter")
+
+        lines = self.metrics.render().splitlines()
+
+        self.assertIn('job_seconds_bucket{job="filter",le="0.1"} 2', lines)
+        self.assertIn('job_seconds_bucket{job="filter",le="1.0"} 3', lines)
+        self.assertIn('job_seconds_bucket{job="filter",le="+Inf"} 4', lines)
+        self.assertIn('job_seconds_count{job="filter"} 4', lines)
+        self.assertIn('job_seconds_sum{job="filter"} 3.65', lines)
+        self.assertIn('# TYPE job_seconds histogram', lines)
+
+    def test_same_metric_is_returned_for_the_same_name(self):
+        counter = self.metrics.counter("runs_total", "Runs.")
+        self.metrics.counter("runs_total", "Runs.").inc(2)
+
+        self.assertEqual(counter.value(), 2)
+
+    def test_failing_gauge_is_skipped(self):
+        self.metrics.gauge("broken", "Broken gauge.", lambda: 1 / 0)
+        self.metrics.gauge("depth", "Queue depth.", lambda: 7)
+
+        self.assertEqual(self.metrics.render(), "# HELP depth Queue depth.\n# TYPE depth gauge\ndepth 7.0\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
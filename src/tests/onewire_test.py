@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from src.driver.onewire import OneWireProbe, OneWireSampler, crc8
+
+WATER_ID = "28-031683c616ff"
+AIR_ID = "28-0316a279d3ff"
+
+
+def w1_slave(millidegrees, crc_ok=True, kernel_crc_ok=True):
+    """ Content of a w1_slave file with the given temperature """
+    raw = round(millidegrees / 62.5) & 0xFFFF
+    scratchpad = bytes([raw & 0xFF, raw >> 8, 0x4b, 0x46, 0x7f, 0xff, 0x0e, 0x10])
+    crc = crc8(scratchpad) if crc_ok else crc8(scratchpad) ^ 0xFF
+    scratchpad = " ".join("%02x" % b for b in scratchpad + bytes([crc]))
+
+    return "%s : crc=%02x %s\n%s t=%d\n" % (scratchpad, crc, "YES" if kernel_crc_ok else "NO", scratchpad,
+                                           millidegrees)
+
+
+class FakeClock:
+    def __init__(self):
+        self.seconds = 100.0
+
+    def __call__(self):
+        return self.seconds
+
+
+class OneWireTest(unittest.TestCase):
+
+    def setUp(self):
+        self.devices = tempfile.mkdtemp()
+        self.clock = FakeClock()
+        self.sampler = OneWireSampler({"water": WATER_ID, "air": AIR_ID}, self.devices, period=0.01, timeout=0.5,
+                                      time_function=self.clock)
+
+    def tearDown(self):
+        self.sampler.stop()
+        shutil.rmtree(self.devices)
+
+    def write(self, device_id, text):
+        os.makedirs(os.path.join(self.devices, device_id), exist_ok=True)
+        with open(os.path.join(self.devices, device_id, "w1_slave"), "w") as f:
+            f.write(text)
+
+    def test_parse_a_real_reading(self):
+        text = "72 01 4b 46 7f ff 0e 10 57 : crc=57 YES\n72 01 4b 46 7f ff 0e 10 57 t=23125\n"
+        self.assertEqual(OneWireProbe.parse(text), 23.125)
+
+    def test_invalid_readings(self):
+        for text in [w1_slave(23125, crc_ok=False), w1_slave(23125, kernel_crc_ok=False), w1_slave(85000), ""]:
+            with self.assertRaises(ValueError):
+                OneWireProbe.parse(text)
+
+        self.assertEqual(OneWireProbe.parse(w1_slave(-1250)), -1.25)
+
+    def test_every_probe_is_sampled(self):
+        self.write(WATER_ID, w1_slave(24500))
+        self.write(AIR_ID, w1_slave(31000))
+
+        for probe in self.sampler.probes:
+            self.sampler.sample(probe)
+
+        self.assertEqual(self.sampler.value("water"), 24.5)
+        self.assertEqual(self.sampler.value("air"), 31.0)
+
+    def test_invalid_readings_keep_the_last_value(self):
+        self.write(WATER_ID, w1_slave(24500))
+        self.sampler.sample(self.sampler.probes[0])
+
+        self.write(WATER_ID, w1_slave(26000, crc_ok=False))
+        self.assertIsNone(self.sampler.sample(self.sampler.probes[0]))
+        shutil.rmtree(os.path.join(self.devices, WATER_ID))
+        self.assertIsNone(self.sampler.sample(self.sampler.probes[0]))
+
+        self.assertEqual(self.sampler.value("water"), 24.5)
+        self.assertEqual(self.sampler.errors["water"], 2)
+
+    def test_old_readings_are_not_given(self):
+        self.write(WATER_ID, w1_slave(24500))
+        self.sampler.sample(self.sampler.probes[0])
+
+        self.clock.seconds += 5
+        self.assertEqual(self.sampler.age("water"), 5)
+        self.assertEqual(self.sampler.value("water", max_age=10), 24.5)
+        self.assertIsNone(self.sampler.value("water", max_age=4))
+        self.assertIsNone(self.sampler.value("air"))
+
+    def test_slow_readings_are_discarded(self):
+        probe = self.sampler.probes[0]
+        clock = self.clock
+
+        def slow_read():
+            clock.seconds += 0.75
+            return 24.5
+
+        probe.read = slow_read
+
+        self.assertIsNone(self.sampler.sample(probe))
+        self.assertIsNone(self.sampler.reading("water"))
+        self.assertEqual(self.sampler.timeouts["water"], 1)
+
+    def test_probes_are_read_in_the_background(self):
+        sampler = OneWireSampler({"water": WATER_ID, "air": AIR_ID}, self.devices, period=0.01)
+        self.write(WATER_ID, w1_slave(24500))
+        self.write(AIR_ID, w1_slave(31000))
+
+        # A probe that hangs doesn't stop the others
+        sampler.probes[1].read = lambda: time.sleep(60)
+        sampler.start()
+        time.sleep(0.1)
+        sampler.stop()
+
+        self.assertEqual(sampler.value("water"), 24.5)
+        self.assertIsNone(sampler.value("air"))
+
+
+if __name__ == '__main__':
+    unittest.main()
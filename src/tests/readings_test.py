@@ -0,0 +1,94 @@
+import datetime
+import math
+import unittest
+
+import mongomock
+
+import src.config.configconstants as cfg
+from src.database import timezone
+from src.database.sensorhistory import aggregate_history, aggregate_readings, rollup_bucket_start, \
+    to_history_document, DAY_SECONDS
+from src.sensors.readings import ReadingHistory
+
+
+class ReadingHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.history = ReadingHistory(4)
+
+    def test_oldest_readings_are_overwritten(self):
+        for second in range(6):
+            self.history.add(second, second * 10, True)
+
+        self.assertEqual(len(self.history), 4)
+        self.assertEqual(list(self.history.readings()["value"]), [20, 30, 40, 50])
+        self.assertEqual(self.history.oldest(), 2)
+        self.assertEqual(self.history.latest().value, 50)
+
+    def test_mean_of_valid_readings_in_a_range(self):
+        self.history.add(1, 7.0, True)
+        self.history.add(2, 9.0, False)
+        self.history.add(3, None, False)
+        self.history.add(4, 8.0, True)
+
+        self.assertEqual(self.history.mean_value(since=1, until=5), 7.5)
+        self.assertEqual(self.history.mean_value(since=2, until=4), None)
+        self.assertEqual(self.history.mean_value(only_ok=False), 8.0)
+
+    def test_non_numeric_values_are_nan(self):
+        self.history.add(1, True, True)
+        self.history.add(2, "error", False)
+
+        values = self.history.readings()["value"]
+        self.assertEqual(values[0], 1.0)
+        self.assertTrue(math.isnan(values[1]))
+
+    def test_aggregate_readings(self):
+        history = ReadingHistory(10)
+        for second, value in [(0, 1.0), (30, 3.0), (60, 5.0), (90, None), (120, 2.0)]:
+            history.add(second, value, True)
+
+        buckets = aggregate_readings(history.readings(), 60)
+
+        self.assertEqual([(b["count"], b["mean"], b["min"], b["max"]) for b in buckets],
+                         [(2, 2.0, 1.0, 3.0), (1, 5.0, 5.0, 5.0), (1, 2.0, 2.0, 2.0)])
+        self.assertEqual([b["datetime"].timestamp() for b in buckets], [0, 60, 120])
+        self.assertEqual(len(aggregate_readings(history.readings(), 60, limit=2)), 2)
+
+    def test_ring_and_database_give_the_same_buckets(self):
+        history = ReadingHistory(100)
+        database = mongomock.MongoClient(tz_aware=True).db
+        start = timezone.localize(datetime.datetime(2021, 7, 1, 12))
+
+        for second in range(0, 600, 15):
+            date = start + datetime.timedelta(seconds=second)
+            value = None if second == 300 else 7 + second / 1000
+            history.add(date.timestamp(), value, True)
+            database.get_collection(cfg.SENSOR_HISTORY_COLLECTION).insert_one(
+                to_history_document(cfg.PH_SENSOR, value, True, date))
+
+        end = start + datetime.timedelta(minutes=10)
+        from_ring = aggregate_readings(history.readings(start.timestamp(), end.timestamp()), 60)
+        from_database = aggregate_history(database, cfg.PH_SENSOR, start, end, 60)
+
+        self.assertEqual(len(from_ring), 10)
+        self.assertEqual([b["datetime"] for b in from_database], [b["datetime"] for b in from_ring])
+        for ring_bucket, database_bucket in zip(from_ring, from_database):
+            self.assertEqual(database_bucket["count"], ring_bucket["count"])
+            self.assertAlmostEqual(database_bucket["mean"], ring_bucket["mean"])
+            self.assertAlmostEqual(database_bucket["sumsq"], ring_bucket["sumsq"])
+
+    def test_day_rollups_start_at_local_midnight(self):
+        for day, hour in [(datetime.datetime(2021, 7, 1), 23), (datetime.datetime(2021, 3, 28), 0),
+                          (datetime.datetime(2021, 10, 31), 23)]:
+            midnight = timezone.localize(day).timestamp()
+            reading = timezone.localize(day.replace(hour=hour, minute=30)).timestamp()
+
+            self.assertEqual(rollup_bucket_start(reading, DAY_SECONDS), midnight)
+
+        # Hours are still aligned to the epoch
+        self.assertEqual(rollup_bucket_start(7265, 60 * 60), 7200)
+
+
+if __name__ == '__main__':
+    unittest.main()
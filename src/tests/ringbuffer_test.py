@@ -0,0 +1,94 @@
+import threading
+import unittest
+
+import numpy as np
+
+from src.utils.ringbuffer import RingBuffer
+
+
+class RingBufferTest(unittest.TestCase):
+
+    def setUp(self):
+        self.buffer = RingBuffer(4)
+
+    def fill(self, count):
+        for i in range(count):
+            self.buffer.append(i)
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            RingBuffer(0)
+
+    def test_capacity_is_fixed(self):
+        memory = self.buffer._buffer
+        self.fill(1000)
+
+        self.assertEqual(len(self.buffer), 4)
+        self.assertIs(self.buffer._buffer, memory)
+        self.assertEqual(memory.nbytes, 4 * 8)
+
+    def test_wrap_around_keeps_the_newest_items(self):
+        self.fill(3)
+        np.testing.assert_array_equal(self.buffer.values(), [0, 1, 2])
+
+        self.fill(6)
+        np.testing.assert_array_equal(self.buffer.values(), [2, 3, 4, 5])
+        self.assertEqual(self.buffer.mean(), 3.5)
+
+    def test_last(self):
+        self.assertEqual(len(self.buffer.last(2)), 0)
+
+        self.fill(6)
+        np.testing.assert_array_equal(self.buffer.last(3), [3, 4, 5])
+        np.testing.assert_array_equal(self.buffer.last(10), [2, 3, 4, 5])
+
+        # The newest items go on from the end of the array to its start
+        self.buffer.append(6)
+        np.testing.assert_array_equal(self.buffer.last(4), [3, 4, 5, 6])
+
+    def test_clear(self):
+        self.fill(6)
+        self.buffer.clear()
+
+        self.assertEqual(len(self.buffer), 0)
+        self.assertTrue(np.isnan(self.buffer.mean()))
+        self.buffer.append(9)
+        np.testing.assert_array_equal(self.buffer.values(), [9])
+
+    def test_items_with_shape(self):
+        buffer = RingBuffer(3, dtype=np.float32, shape=(2,))
+        for i in range(4):
+            buffer.append((i, -i))
+
+        np.testing.assert_array_equal(buffer.values(), [[1, -1], [2, -2], [3, -3]])
+        np.testing.assert_array_equal(buffer.mean(), [2, -2])
+
+    def test_swap_returns_the_items_and_empties_the_buffer(self):
+        self.fill(3)
+        items = self.buffer.swap()
+
+        np.testing.assert_array_equal(items, [0, 1, 2])
+        self.assertEqual(len(self.buffer), 0)
+
+        # New items go to the other array, the returned view is still valid
+        self.buffer.append(7)
+        np.testing.assert_array_equal(items, [0, 1, 2])
+        np.testing.assert_array_equal(self.buffer.swap(), [7])
+
+    def test_swap_doesnt_lose_items_appended_by_another_thread(self):
+        buffer = RingBuffer(100000)
+        count = 50000
+        total = 0
+
+        writer = threading.Thread(target=lambda: [buffer.append(1) for _ in range(count)])
+        writer.start()
+        while writer.is_alive():
+            total += buffer.swap().sum()
+        writer.join()
+        total += buffer.swap().sum()
+
+        self.assertEqual(total, count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from src.benchmarks.rmsbenchmark import legacy_rms
+from src.utils.rms import RmsEngine, rms
+
+
+class RmsTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.frames = rng.normal(0, 1, size=(20, 3, 100))
+
+    def test_whole_window_matches_legacy(self):
+        engine = RmsEngine(3)
+
+        for frame in self.frames:
+            result = engine.process(frame)
+            for c in range(3):
+                self.assertAlmostEqual(result[c], legacy_rms(frame[c]))
+                self.assertAlmostEqual(rms(frame[c]), legacy_rms(frame[c]))
+
+    def test_sliding_window_matches_brute_force(self):
+        # Window isn't a multiple of the frame length, so it wraps in the middle of the frames
+        window = 250
+        engine = RmsEngine(3, window=window)
+        history = np.zeros((3, 0))
+
+        for frame in self.frames:
+            result = engine.process(frame)
+            history = np.concatenate((history, frame), axis=1)[:, -window:]
+            for c in range(3):
+                self.assertAlmostEqual(result[c], legacy_rms(history[c]))
+
+    def test_sliding_window_shorter_than_frame(self):
+        engine = RmsEngine(3, window=40)
+
+        for frame in self.frames:
+            result = engine.process(frame)
+            for c in range(3):
+                self.assertAlmostEqual(result[c], legacy_rms(frame[c][-40:]))
+
+    def test_empty_vector(self):
+        self.assertEqual(rms([]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
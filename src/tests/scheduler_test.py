@@ -0,0 +1,91 @@
+import threading
+import time
+import unittest
+
+from src.models.scheduler import Scheduler
+from src.utils.clock import ManualClock
+
+
+class FakeJob:
+    """ Job that records its runs and runs again every period """
+
+    def __init__(self, scheduler, period, duration=0):
+        self.scheduler = scheduler
+        self.period = period
+        self.duration = duration
+        self.stop = False
+        self.next_call = scheduler.time() + period
+        self.runs = []
+
+    def _run(self, scheduled):
+        self.runs.append(scheduled)
+        time.sleep(self.duration)
+
+        if not self.stop:
+            self.next_call += self.period
+            self.scheduler.add(self)
+
+
+class SchedulerTest(unittest.TestCase):
+
+    def test_runs_jobs_in_order(self):
+        scheduler = Scheduler(workers=1, max_workers=1)
+        order = []
+        done = threading.Event()
+
+        class OrderJob:
+            stop = False
+
+            def __init__(self, name, delay):
+                self.name = name
+                self.next_call = scheduler.time() + delay
+
+            def _run(self, scheduled):
+                order.append(self.name)
+                if len(order) == 3:
+                    done.set()
+
+        for name, delay in (("c", 0.15), ("a", 0.05), ("b", 0.1)):
+            scheduler.add(OrderJob(name, delay))
+
+        self.assertTrue(done.wait(2))
+        self.assertEqual(order, ["a", "b", "c"])
+
+    def test_cancelled_job_does_not_run(self):
+        scheduler = Scheduler(workers=1, max_workers=1)
+        job = FakeJob(scheduler, 0.05)
+        scheduler.add(job)
+        job.stop = True
+        time.sleep(0.2)
+
+        self.assertEqual(job.runs, [])
+
+    def test_blocking_job_does_not_delay_others(self):
+        scheduler = Scheduler(workers=1, max_workers=2)
+        blocking = FakeJob(scheduler, 0.05, duration=1)
+        periodic = FakeJob(scheduler, 0.05)
+        scheduler.add(blocking)
+        scheduler.add(periodic)
+        time.sleep(0.5)
+        blocking.stop = periodic.stop = True
+
+        self.assertEqual(len(blocking.runs), 1)
+        self.assertGreater(len(periodic.runs), 5)
+        self.assertEqual(scheduler.extra_workers_started, 1)
+
+    def test_manual_clock_runs_jobs_in_simulated_time(self):
+        clock = ManualClock()
+        scheduler = Scheduler(manual_clock=clock)
+        start = clock.time()
+        job = FakeJob(scheduler, 10)
+        scheduler.add(job)
+
+        scheduler.run_until(start + 3600)
+
+        self.assertIsNone(scheduler._thread)
+        self.assertEqual(job.runs, [start + 10 * n for n in range(1, 361)])
+        self.assertEqual(clock.time(), start + 3600)
+
+
+if __name__ == '__main__':
+    unittest.main()
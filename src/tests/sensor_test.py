@@ -0,0 +1,64 @@
+import gc
+import unittest
+
+from src.sensors.sensor import Sensor
+
+
+class Listener:
+    """ Object whose method is subscribed to a sensor """
+
+    def __init__(self):
+        self.events = []
+
+    def on_value(self, event):
+        self.events.append(event)
+
+
+class SensorSubscribersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.level_1 = Sensor("water level sensor")
+        self.level_2 = Sensor("water level sensor")
+
+    def test_only_subscribers_of_the_sensor_are_called(self):
+        calls = []
+        self.level_1.add_callback(calls.append, 1)
+        self.level_2.add_callback(calls.append, 2)
+
+        self.level_1.add_value(True, save=False)
+
+        self.assertEqual(calls, [1])
+
+    def test_subscribers_receive_an_event(self):
+        listener = Listener()
+        self.level_1.subscribe(listener.on_value)
+
+        self.level_1.add_value(True, save=False)
+        self.level_1.add_value(False, save=False)
+
+        event = listener.events[-1]
+        self.assertIs(event.sensor, self.level_1)
+        self.assertEqual((event.value, event.previous_value), (False, True))
+
+    def test_unsubscribe(self):
+        calls = []
+        subscription = self.level_1.add_callback(calls.append, 1)
+        subscription.unsubscribe()
+
+        self.level_1.add_value(True, save=False)
+
+        self.assertEqual(calls, [])
+
+    def test_deleted_objects_are_unsubscribed(self):
+        listener = Listener()
+        self.level_1.subscribe(listener.on_value)
+
+        del listener
+        gc.collect()
+        self.level_1.add_value(True, save=False)
+
+        self.assertEqual(self.level_1._subscribers, ())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import datetime
+import unittest
+
+import mongomock
+
+import src.config.configconstants as cfg
+from src.database import sensorhistory
+from src.database.sensorhistory import migrate_sensor_data
+
+
+class MigrationTest(unittest.TestCase):
+
+    def setUp(self):
+        # mongomock doesn't have time series collections, the migration stores the readings in a regular one
+        self.supports_timeseries = sensorhistory._supports_timeseries
+        sensorhistory._supports_timeseries = lambda database: False
+
+        # Recent readings, older ones would expire
+        self.start = datetime.datetime.utcnow().replace(microsecond=0)
+        self.database = mongomock.MongoClient().db
+        self.legacy = self.database.get_collection(cfg.SENSOR_DATA_LEGACY_COLLECTION)
+        self.history = self.database.get_collection(cfg.SENSOR_HISTORY_COLLECTION)
+        self.add_legacy(0, 5)
+
+    def tearDown(self):
+        sensorhistory._supports_timeseries = self.supports_timeseries
+
+    def add_legacy(self, first, last):
+        for second in range(first, last):
+            self.legacy.insert_one({"datetime": self.start + datetime.timedelta(seconds=second), "is_ok": True,
+                                    "id_value": {cfg.PH_SENSOR: 7 + second / 10, cfg.ORP_SENSOR: 650 + second}})
+
+    def readings(self):
+        return sorted((d["sensor_type"], d["datetime"], d["value"]) for d in self.history.find())
+
+    def test_migration_copies_every_reading_once(self):
+        self.assertEqual(migrate_sensor_data(self.database, batch_size=2), 5)
+        readings = self.readings()
+
+        self.assertEqual(len(readings), 10)
+        self.assertEqual(readings[0], (cfg.ORP_SENSOR, self.start, 650))
+
+        # A new run has nothing to copy
+        self.assertEqual(migrate_sensor_data(self.database, batch_size=2), 0)
+        self.assertEqual(self.readings(), readings)
+
+    def test_migration_resumes_from_the_checkpoint(self):
+        migrate_sensor_data(self.database, batch_size=2)
+        checkpoint = self.database.get_collection(cfg.MIGRATIONS_COLLECTION).find_one(
+            {"_id": cfg.SENSOR_HISTORY_COLLECTION})
+        last = self.legacy.find_one({"datetime": self.start + datetime.timedelta(seconds=4)})
+        self.assertEqual(checkpoint["last_id"], last["_id"])
+
+        self.add_legacy(5, 8)
+
+        self.assertEqual(migrate_sensor_data(self.database, batch_size=2), 3)
+        readings = self.readings()
+        self.assertEqual(len(readings), 16)
+        self.assertEqual(len(set(readings)), 16)
+
+
+if __name__ == '__main__':
+    unittest.main()
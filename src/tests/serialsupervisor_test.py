@@ -0,0 +1,201 @@
+import os
+import threading
+import time
+import unittest
+
+import numpy as np
+import serial
+
+from src.driver.adcframe import AdcFrameDecoder
+from src.driver.serialsupervisor import SerialSupervisor
+from src.exceptions.adcexception import AdcException
+
+START_COMMANDS = {AdcFrameDecoder.PROTOCOL_TEXT: b's', AdcFrameDecoder.PROTOCOL_BINARY: b'b',
+                  AdcFrameDecoder.PROTOCOL_CHECKED: b'c'}
+
+
+class FakeArduino:
+    """ Arduino behind a pseudo-terminal, that sends ADC frames once it's asked to """
+
+    def __init__(self, protocols=(AdcFrameDecoder.PROTOCOL_CHECKED, AdcFrameDecoder.PROTOCOL_TEXT)):
+        self.master, self.slave = os.openpty()
+        # Nobody reads the frames sent while the port is closed, so they are dropped instead of blocking
+        os.set_blocking(self.master, False)
+        self.port_name = os.ttyname(self.slave)
+        self.protocols = protocols
+        self.raw = np.arange(AdcFrameDecoder.CHANNELS * AdcFrameDecoder.SAMPLES).reshape(
+            AdcFrameDecoder.CHANNELS, AdcFrameDecoder.SAMPLES) % 1024
+
+        # Frames that are corrupted or lost, by their sequence number
+        self.corrupted = set()
+        self.lost = set()
+        self.garbage = set()
+
+        self.protocol = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _frame(self, sequence):
+        if self.protocol == AdcFrameDecoder.PROTOCOL_TEXT:
+            return AdcFrameDecoder.encode_text_frame(self.raw)
+
+        frame = bytearray(AdcFrameDecoder.encode_checked_frame(self.raw, sequence))
+        if sequence in self.corrupted:
+            frame[100] ^= 0xFF
+        if sequence in self.garbage:
+            frame = b'\x00\xa5\x13' * 5 + frame
+
+        return bytes(frame)
+
+    def _run(self):
+        sequence = 0
+
+        while not self._stop.is_set():
+            if self.protocol is None:
+                try:
+                    command = os.read(self.master, 1)
+                except BlockingIOError:
+                    time.sleep(0.01)
+                    continue
+                self.protocol = next((protocol for protocol in self.protocols if START_COMMANDS[protocol] == command),
+                                     None)
+                continue
+
+            if sequence not in self.lost:
+                try:
+                    os.write(self.master, self._frame(sequence))
+                except BlockingIOError:
+                    pass
+
+            sequence += 1
+            time.sleep(0.005)
+
+    def open(self):
+        return serial.Serial(self.port_name, timeout=0.2)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(1)
+        os.close(self.master)
+        os.close(self.slave)
+
+
+class SerialSupervisorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = []
+        self.decoder = AdcFrameDecoder(5.2)
+
+    def supervisor(self, open_port):
+        return SerialSupervisor(open_port, self.decoder, lambda volts: self.frames.append(volts.copy()),
+                                START_COMMANDS, min_backoff=0.05, max_backoff=0.2, max_errors=3)
+
+    def wait(self, condition, timeout=3):
+        end = time.monotonic() + timeout
+        while not condition() and time.monotonic() < end:
+            time.sleep(0.01)
+
+        return condition()
+
+    def test_checked_frames(self):
+        arduino = FakeArduino()
+        arduino.corrupted = {3}
+        arduino.lost = {5, 6}
+        arduino.garbage = {8}
+        supervisor = self.supervisor(arduino.open)
+        supervisor.start()
+
+        try:
+            self.assertTrue(self.wait(lambda: supervisor.frames_ok >= 10))
+        finally:
+            supervisor.stop()
+            arduino.close()
+
+        self.assertEqual(supervisor.protocol, AdcFrameDecoder.PROTOCOL_CHECKED)
+        # The corrupted frame and the two lost frames
+        self.assertEqual(supervisor.frames_dropped, 3)
+        self.assertEqual(supervisor.resyncs, 1)
+        self.assertEqual(supervisor.reconnects, 1)
+        np.testing.assert_allclose(self.frames[0][0], arduino.raw[0] * 5.2 / 1023)
+
+    def test_falls_back_to_text_protocol(self):
+        arduino = FakeArduino(protocols=(AdcFrameDecoder.PROTOCOL_TEXT,))
+        supervisor = self.supervisor(lambda: arduino.open())
+        supervisor.start()
+
+        try:
+            # The port is opened again for every protocol, until the arduino gets a command it knows
+            self.assertTrue(self.wait(lambda: supervisor.frames_ok >= 3))
+        finally:
+            supervisor.stop()
+            arduino.close()
+
+        self.assertEqual(supervisor.reconnects, 3)
+
+    def test_backoff_when_the_port_is_missing(self):
+        attempts = []
+
+        def open_port():
+            attempts.append(time.monotonic())
+            raise serial.SerialException("could not open port /dev/ttyS0")
+
+        supervisor = self.supervisor(open_port)
+        supervisor.start()
+        time.sleep(0.6)
+        supervisor.stop()
+
+        # 0.05 + 0.1 + 0.2 + 0.2 seconds between attempts, instead of a tight loop
+        self.assertLessEqual(len(attempts), 5)
+        self.assertGreaterEqual(attempts[-1] - attempts[-2], 0.2)
+        self.assertEqual(supervisor.reconnects, 0)
+
+    def test_reconnects_after_consecutive_errors(self):
+        arduino = FakeArduino()
+        supervisor = self.supervisor(arduino.open)
+        supervisor.start()
+
+        try:
+            self.assertTrue(self.wait(lambda: supervisor.frames_ok >= 2))
+            # The board starts sending corrupted frames, the port is opened again after 3 of them
+            arduino.corrupted = set(range(10 ** 6))
+            self.assertTrue(self.wait(lambda: supervisor.reconnects >= 2))
+        finally:
+            supervisor.stop()
+            arduino.close()
+
+        self.assertEqual(supervisor.protocol, AdcFrameDecoder.PROTOCOL_CHECKED)
+        self.assertGreaterEqual(supervisor.frames_dropped, 3)
+
+    def test_text_frames_with_lost_lines_are_dropped(self):
+        raw = np.ones((AdcFrameDecoder.CHANNELS, AdcFrameDecoder.SAMPLES))
+        lines = AdcFrameDecoder.encode_text_frame(raw).split(b'\r\n')
+        del lines[5]
+
+        class Port:
+            def __init__(self, data):
+                self.lines = data.splitlines(keepends=True)
+
+            def readline(self):
+                return self.lines.pop(0) if self.lines else b''
+
+        port = Port(b'\r\n'.join(lines) + AdcFrameDecoder.encode_text_frame(raw * 2))
+
+        with self.assertRaises(AdcException):
+            self.decoder.read_text_frame(port)
+
+        self.decoder.read_text_frame(port)
+        np.testing.assert_array_equal(self.decoder.raw_data, raw * 2)
+
+        # Samples out of the range of the raw values are corrupted, not a failure of the port
+        for sample in (b'-1', b'70000'):
+            lines = AdcFrameDecoder.encode_text_frame(raw).split(b'\r\n')
+            lines[5] = sample
+            port = Port(b'\r\n'.join(lines))
+
+            with self.assertRaises(AdcException):
+                self.decoder.read_text_frame(port)
+
+
+if __name__ == '__main__':
+    unittest.main()
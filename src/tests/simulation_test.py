@@ -0,0 +1,50 @@
+import datetime
+import unittest
+
+import src.config.configconstants as cfg
+from src.simulation import PoolModel
+
+
+class PoolModelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.start = datetime.datetime(2021, 7, 1)
+
+    def run_day(self, model, actuator=None):
+        if actuator is not None:
+            model.set_actuator(actuator, True)
+
+        for second in range(0, 24 * 60 * 60, 60):
+            model.step(self.start + datetime.timedelta(seconds=second), 60)
+
+    def test_same_seed_gives_same_readings(self):
+        readings = []
+        for _ in range(2):
+            model = PoolModel(seed=3)
+            self.run_day(model)
+            readings.append([model.measure() for _ in range(10)])
+
+        self.assertEqual(readings[0], readings[1])
+
+    def test_chlorine_decays_and_water_evaporates(self):
+        model = PoolModel(chlorine=1, level_mm=35)
+        self.run_day(model)
+
+        self.assertLess(model.chlorine, 1)
+        # A few mm a day
+        self.assertTrue(25 < model.level_mm < 35)
+        self.assertEqual(model.levels(), [True, True, True, False, False, False])
+
+    def test_actuators_act_on_the_water(self):
+        bleach, acid, fill = PoolModel(), PoolModel(), PoolModel(level_mm=0)
+        self.run_day(bleach, cfg.BLEACH_PUMP)
+        self.run_day(acid, cfg.ACID_PUMP)
+        self.run_day(fill, cfg.FILL_VALVE)
+
+        self.assertGreater(bleach.orp, PoolModel().orp)
+        self.assertLess(acid.ph, 7.4)
+        self.assertTrue(all(fill.levels()))
+
+
+if __name__ == '__main__':
+    unittest.main()
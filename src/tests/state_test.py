@@ -0,0 +1,80 @@
+import unittest
+
+from src.models.state import StateStore, thaw
+
+
+class StateStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.builds = {"sensors": 0, "flow": 0}
+        self.values = {"ph": 7.2, "flow": 0}
+        self.store = StateStore(max_age=1, time_function=lambda: self.now)
+        self.store.add_section("sensors", self.build_sensors)
+        self.store.add_section("flow", self.build_flow, polled=True)
+
+    def build_sensors(self):
+        self.builds["sensors"] += 1
+        return {"ph": self.values["ph"], "levels": [True, False]}
+
+    def build_flow(self):
+        self.builds["flow"] += 1
+        return {"flow": self.values["flow"]}
+
+    def test_sections_are_built_only_after_a_change(self):
+        first = self.store.snapshot()
+        second = self.store.snapshot()
+
+        self.assertEqual(self.builds["sensors"], 1)
+        self.assertEqual(first.version, second.version)
+
+        self.values["ph"] = 7.4
+        self.store.invalidate("sensors")
+        third = self.store.snapshot()
+
+        self.assertEqual(self.builds["sensors"], 2)
+        self.assertGreater(third.version, second.version)
+        self.assertEqual(third.sections["sensors"].data["ph"], 7.4)
+        self.assertEqual(first.sections["sensors"].data["ph"], 7.2)
+
+    def test_version_does_not_change_if_data_is_equal(self):
+        version = self.store.snapshot().version
+        self.store.invalidate()
+
+        self.assertEqual(self.store.snapshot().version, version)
+        self.assertEqual(self.builds["sensors"], 2)
+
+    def test_polled_sections_are_built_after_max_age(self):
+        version = self.store.snapshot(["flow"]).version
+        self.values["flow"] = 12
+
+        self.now = 0.5
+        self.assertEqual(self.store.snapshot(["flow"]).version, version)
+
+        self.now = 1
+        self.assertGreater(self.store.snapshot(["flow"]).version, version)
+        self.assertEqual(self.builds["flow"], 2)
+
+    def test_version_of_a_subset_ignores_other_sections(self):
+        version = self.store.snapshot(["sensors"]).version
+        self.values["flow"] = 3
+        self.now = 5
+
+        self.assertGreater(self.store.snapshot().version, version)
+        self.assertEqual(self.store.snapshot(["sensors"]).version, version)
+
+    def test_snapshots_are_immutable(self):
+        data = self.store.snapshot().sections["sensors"].data
+
+        with self.assertRaises(TypeError):
+            data["ph"] = 0
+
+        self.assertEqual(thaw(data), {"ph": 7.2, "levels": [True, False]})
+
+    def test_unknown_section_raises(self):
+        with self.assertRaises(KeyError):
+            self.store.snapshot(["unknown"])
+
+
+if __name__ == '__main__':
+    unittest.main()
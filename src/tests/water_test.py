@@ -0,0 +1,37 @@
+import unittest
+
+import src.config.configconstants as cfg
+from src.models import water
+from src.sensors.sensor import Sensor
+
+
+class WaterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.since = water.since
+        water.since = {}
+        self.sensor = Sensor(cfg.PH_SENSOR)
+
+    def tearDown(self):
+        water.since = self.since
+
+    def test_readings_are_aggregated_once(self):
+        self.sensor.history.add(1000, 7.2, True)
+        self.sensor.history.add(1001, 7.4, True)
+        self.sensor.history.add(1002, 9.9, False)
+
+        self.assertAlmostEqual(water.__aggregate__("ph", self.sensor, 1000), 7.3)
+        self.assertIsNone(water.__aggregate__("ph", self.sensor, 1000))
+
+    def test_reading_added_during_a_refresh_is_aggregated_by_the_next_one(self):
+        self.sensor.history.add(1000, 7.2, True)
+        self.assertAlmostEqual(water.__aggregate__("ph", self.sensor, 1000), 7.2)
+
+        # Stamped before the refresh, but added after it read the readings
+        self.sensor.history.add(1000.5, 7.6, True)
+
+        self.assertAlmostEqual(water.__aggregate__("ph", self.sensor, 1000), 7.6)
+
+
+if __name__ == '__main__':
+    unittest.main()
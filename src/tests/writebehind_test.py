@@ -0,0 +1,118 @@
+import time
+import unittest
+
+from pymongo import errors
+
+from src.database import writebehind
+from src.database.writebehind import WriteBehindQueue
+
+
+class FakeCollection:
+    """ Collection that fails the inserts with the given write errors, once """
+
+    def __init__(self):
+        self.documents = []
+        self.write_errors = None
+
+    def insert_many(self, documents, ordered=True):
+        write_errors, self.write_errors = self.write_errors, None
+
+        if write_errors is None:
+            self.documents.extend(documents)
+            return
+
+        failed = [error["index"] for error in write_errors]
+        self.documents.extend(d for i, d in enumerate(documents) if i not in failed)
+        raise errors.BulkWriteError({"writeErrors": write_errors, "nInserted": len(documents) - len(failed)})
+
+
+class FakeDatabase:
+
+    def __init__(self):
+        self.collection = FakeCollection()
+
+    def get_db(self):
+        return self
+
+    def get_collection(self, name):
+        return self.collection
+
+
+class WriteBehindQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = writebehind.db
+        writebehind.db = FakeDatabase()
+        self.collection = writebehind.db.collection
+        self.queue = WriteBehindQueue("readings", batch_size=100, flush_seconds=3600)
+
+    def tearDown(self):
+        writebehind.db = self.db
+
+    def test_only_failed_documents_are_queued_again(self):
+        for i in range(4):
+            self.queue.put({"value": i})
+        self.collection.write_errors = [{"index": 1, "code": 91, "errmsg": "shutdown"}]
+
+        self.assertFalse(self.queue.flush())
+        self.assertEqual(self.queue.queue_depth(), 1)
+        self.assertEqual(self.queue.inserted, 3)
+
+        self.assertTrue(self.queue.flush())
+        self.assertEqual(sorted(d["value"] for d in self.collection.documents), [0, 1, 2, 3])
+
+    def test_duplicated_documents_are_already_inserted(self):
+        for i in range(3):
+            self.queue.put({"value": i})
+        duplicate = {"index": 0, "code": WriteBehindQueue.DUPLICATE_KEY_ERROR, "errmsg": "E11000"}
+        self.collection.write_errors = [duplicate]
+
+        self.assertTrue(self.queue.flush())
+        self.assertEqual(self.queue.queue_depth(), 0)
+        self.assertEqual(self.queue.inserted, 3)
+        self.assertEqual(self.queue.failed_flushes, 0)
+
+    def test_full_queue_drops_the_oldest_documents(self):
+        queue = WriteBehindQueue("readings", max_size=3, batch_size=100, flush_seconds=3600,
+                                 policy=WriteBehindQueue.DROP_OLDEST)
+        results = [queue.put({"value": i}) for i in range(5)]
+
+        self.assertEqual(results, [True] * 5)
+        self.assertEqual(queue.dropped, 2)
+        self.assertTrue(queue.flush())
+        self.assertEqual([d["value"] for d in self.collection.documents], [2, 3, 4])
+
+    def test_full_queue_drops_the_newest_documents(self):
+        queue = WriteBehindQueue("readings", max_size=3, batch_size=100, flush_seconds=3600,
+                                 policy=WriteBehindQueue.DROP_NEWEST)
+        results = [queue.put({"value": i}) for i in range(5)]
+
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertEqual(queue.dropped, 2)
+        self.assertTrue(queue.flush())
+        self.assertEqual([d["value"] for d in self.collection.documents], [0, 1, 2])
+
+    def test_writer_survives_a_failed_setup(self):
+        calls = []
+
+        def setup(database):
+            calls.append(database)
+            if len(calls) == 1:
+                raise TypeError("unsupported command")
+
+        queue = WriteBehindQueue("readings", batch_size=2, flush_seconds=0.01, setup=setup)
+        queue.put({"value": 0})
+        queue.put({"value": 1})
+
+        deadline = time.monotonic() + 5
+        while queue.inserted < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(queue.failed_flushes, 1)
+        self.assertEqual(sorted(d["value"] for d in self.collection.documents), [0, 1])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,12 @@
+from src.utils.metrics import MetricsRegistry
+
+# Instantiate the metrics registry of the application
+metrics = MetricsRegistry()
+
+import pytz
+
+import src.config.configconstants as cfg
+from src.utils.clock import Clock
+
+# Instantiate the clock of the application
+clock = Clock(pytz.timezone(cfg.TIMEZONE))
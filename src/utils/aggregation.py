@@ -0,0 +1,104 @@
+import numpy as np
+
+import src.config.configconstants as cfg
+
+""" Robust aggregation of the readings of a water parameter between two refreshes of the water data.
+Every function receives a non empty numpy array of values, ordered from the oldest to the newest one, and
+runs in O(n): medians are found with a selection algorithm (np.partition), not by sorting. """
+
+''' Scale factor that makes the MAD an estimate of the standard deviation of normal data '''
+MAD_SCALE = 1.4826
+
+
+def mean(values):
+    """
+    This function returns the plain mean of the values
+    """
+    return float(np.mean(values))
+
+
+def median(values):
+    """
+    This function returns the median of the values
+    """
+    return float(np.median(values))
+
+
+def trimmed_mean(values, proportion=cfg.AGGREGATION_TRIM_PROPORTION):
+    """
+    This function returns the mean of the values without the lowest and highest ones
+
+    Args:
+        values: Numpy array of values
+        proportion: Proportion of values cut from each end
+    """
+    n = len(values)
+    cut = int(n * proportion)
+
+    if cut == 0:
+        return mean(values)
+
+    # Only the cut points must be in place, the rest of the values don't need to be sorted
+    partitioned = np.partition(values, (cut, n - cut - 1))
+    return float(np.mean(partitioned[cut:n - cut]))
+
+
+def hampel_mean(values, threshold=cfg.AGGREGATION_HAMPEL_THRESHOLD):
+    """
+    This function returns the mean of the values after rejecting the outliers with a Hampel filter,
+    which rejects the values that are farther from the median than a number of scaled MADs
+
+    Args:
+        values: Numpy array of values
+        threshold: Number of scaled MADs from the median to reject a value
+    """
+    center = np.median(values)
+    deviations = np.abs(values - center)
+    mad = MAD_SCALE * np.median(deviations)
+
+    if mad == 0:
+        # More than half of the values are equal, the median is the best estimation
+        return float(center)
+
+    return float(np.mean(values[deviations <= threshold * mad]))
+
+
+def ewma(values, alpha=cfg.AGGREGATION_EWMA_ALPHA):
+    """
+    This function returns the exponentially weighted moving average of the values, at the newest one
+
+    Args:
+        values: Numpy array of values, from the oldest to the newest one
+        alpha: Weight of the newest value
+    """
+    n = len(values)
+
+    # Weight of every value in the recursive formula s = alpha * x + (1 - alpha) * s, with s = x[0] at start
+    weights = alpha * np.power(1 - alpha, np.arange(n - 1, -1, -1, dtype=float))
+    weights[0] = (1 - alpha) ** (n - 1)
+
+    return float(np.dot(weights, values))
+
+
+''' Aggregation methods, by the name used in the pool config '''
+METHODS = {"mean": mean,
+           "median": median,
+           "trimmed_mean": trimmed_mean,
+           "hampel": hampel_mean,
+           "ewma": ewma}
+
+
+def aggregate(method, values):
+    """
+    This function aggregates the values with the given method
+
+    Args:
+        method: Name of the method, one of METHODS
+        values: Numpy array of values, from the oldest to the newest one
+
+    Returns: The aggregated value, or None if there isn't any value
+    """
+    if len(values) == 0:
+        return None
+
+    return METHODS[method](np.asarray(values, dtype=float))
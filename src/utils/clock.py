@@ -0,0 +1,188 @@
+import collections
+import datetime
+import threading
+import time
+
+import pytz
+
+import src.config.configconstants as cfg
+
+''' Times of a tick of the clock: monotonic seconds, POSIX timestamp, and local (aware and naive) and UTC datetimes '''
+ClockTick = collections.namedtuple("ClockTick", ["monotonic", "timestamp", "localized", "local", "utc"])
+
+
+class SystemClock:
+    """
+    This class reads the time from the system
+    """
+
+    ''' The time moves by itself '''
+    manual = False
+
+    @staticmethod
+    def time():
+        """
+        This method returns the POSIX timestamp of the current time
+        """
+        return time.time()
+
+    @staticmethod
+    def monotonic():
+        """
+        This method returns the seconds of a clock that never goes back, to measure intervals
+        """
+        return time.monotonic()
+
+
+class ManualClock:
+    """
+    This class implements a clock whose time only moves when it's advanced, so a simulation or a test can run
+    the application faster than real time. Its time never goes back, and its monotonic time is its POSIX
+    timestamp.
+    """
+
+    ''' The time only moves when it's advanced '''
+    manual = True
+
+    def __init__(self, start=None):
+        """
+        Constructor of the class
+
+        Args:
+            start: Date and time of the start of the clock, local time of the pool if it's naive, now by default
+        """
+        if start is None:
+            self._time = time.time()
+        else:
+            if start.tzinfo is None:
+                start = pytz.timezone(cfg.TIMEZONE).localize(start)
+
+            self._time = start.timestamp()
+
+    def time(self):
+        """
+        This method returns the POSIX timestamp of the current time
+        """
+        return self._time
+
+    def monotonic(self):
+        """
+        This method returns the seconds of a clock that never goes back, to measure intervals
+        """
+        return self._time
+
+    def advance_to(self, timestamp):
+        """
+        This method moves the clock to the given timestamp, if it's not in the past
+        """
+        if timestamp > self._time:
+            self._time = timestamp
+
+    def advance(self, seconds):
+        """
+        This method moves the clock forward the given seconds
+        """
+        self.advance_to(self._time + seconds)
+
+
+class Clock:
+    """
+    This class is the clock of the application. It reads the time from a source, the system clock by default,
+    that can be replaced by a ManualClock to run a simulation or a test. The source must be replaced before the
+    models are instantiated, because the scheduler of the timers reads it when it's created.
+
+    Dates are read from a tick: the times of an instant, converted to the timezone of the pool once. Every thread
+    has its own tick, so jobs running at the same time never change the dates read by each other. The scheduler
+    takes a new tick before running every job, so all the dates read by a job are the same, and a tick is reused
+    by later reads of its thread until it's older than the resolution, so sensor writes don't pay for the timezone
+    conversion. With a manual clock, a new tick is taken every time the clock has moved.
+    """
+
+    def __init__(self, timezone, source=None, resolution=cfg.CLOCK_RESOLUTION_SECONDS):
+        """
+        Constructor of the class
+
+        Args:
+            timezone: Timezone of the pool, a pytz timezone
+            source: Clock that gives the time, the system clock by default
+            resolution: Max seconds that a tick is reused
+        """
+        self.timezone = timezone
+        self.source = SystemClock() if source is None else source
+        self.resolution = resolution
+        self._local = threading.local()
+
+    def use(self, source):
+        """
+        This method replaces the source of the time. The ticks of every thread are taken again from it.
+        """
+        self.source = source
+
+    @property
+    def manual(self):
+        """
+        True if the time only moves when the source is advanced
+        """
+        return self.source.manual
+
+    def tick(self):
+        """
+        This method reads the time from the source and converts it to dates, as the tick of the calling thread
+
+        Returns: The new ClockTick
+        """
+        source = self.source
+        monotonic = source.monotonic()
+        timestamp = source.time()
+        localized = datetime.datetime.fromtimestamp(timestamp, tz=self.timezone)
+        utc = datetime.datetime.fromtimestamp(timestamp, tz=datetime.timezone.utc).replace(tzinfo=None)
+
+        tick = ClockTick(monotonic, timestamp, localized, localized.replace(tzinfo=None), utc)
+        self._local.tick = (source, tick)
+        return tick
+
+    def current(self):
+        """
+        This method returns the last tick of the calling thread, or a new one if it's too old
+
+        Returns: ClockTick
+        """
+        source, tick = getattr(self._local, "tick", (None, None))
+        if source is not self.source:
+            return self.tick()
+
+        elapsed = self.source.monotonic() - tick.monotonic
+        if elapsed < 0 or elapsed > (0 if self.source.manual else self.resolution):
+            return self.tick()
+
+        return tick
+
+    def monotonic(self):
+        """
+        This method returns the seconds of a clock that never goes back, to measure intervals. It's never cached.
+        """
+        return self.source.monotonic()
+
+    def time(self):
+        """
+        This method returns the POSIX timestamp of the current time
+        """
+        return self.current().timestamp
+
+    def localized(self):
+        """
+        This method returns the current date and time in the timezone of the pool, with timezone
+        """
+        return self.current().localized
+
+    def now(self):
+        """
+        This method returns the current date and time in the timezone of the pool, without timezone
+        """
+        return self.current().local
+
+    def utcnow(self):
+        """
+        This method returns the current UTC date and time, without timezone
+        """
+        return self.current().utc
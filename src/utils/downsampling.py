@@ -0,0 +1,48 @@
+import numpy as np
+
+
+def lttb(x, y, threshold):
+    """
+    This function downsamples a series with the Largest Triangle Three Buckets algorithm, which keeps the
+    visual shape of the series (peaks and valleys) when it is plotted with fewer points.
+
+    Args:
+        x: X values of the series, in ascending order
+        y: Y values of the series
+        threshold: Number of points to keep
+
+    Returns: Indexes of the selected points, in ascending order
+
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # First and last points are always kept, the rest of them are split in threshold - 2 buckets
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # Average point of the next bucket, the last point for the last bucket
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Select the point of the bucket with the largest triangle with the previous selected point
+        # and the average point of the next bucket
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+
+    return selected
@@ -0,0 +1,88 @@
+import struct
+
+import numpy as np
+
+import src.strings_constants.strings as strings
+
+""" Encoding of ADC frames for clients that plot them, as the calibration UI does. Frames are arrays of shape
+(frames, channels, samples) of volts, sent as little-endian float32 in one of these formats:
+
+    raw:  shape header (frames, channels, samples as little-endian uint32) followed by the samples, C order
+    cbor: map with the shape and the samples as a little-endian float32 typed array (RFC 8746, tag 85)
+"""
+
+''' Formats of the encoded frames, and their content types '''
+FORMAT_RAW = "raw"
+FORMAT_CBOR = "cbor"
+MIMETYPES = {FORMAT_RAW: "application/octet-stream", FORMAT_CBOR: "application/cbor"}
+
+''' Decimation modes: mean of every block of samples, or the first sample of every block '''
+DECIMATION_MEAN = "mean"
+DECIMATION_PICK = "pick"
+DECIMATIONS = (DECIMATION_MEAN, DECIMATION_PICK)
+
+_SHAPE_HEADER = struct.Struct("<3I")
+_CBOR_FLOAT32_LE_TAG = 85
+
+
+def decimate(frames, factor, mode=DECIMATION_MEAN):
+    """
+    This function decimates every channel of the frames, keeping a sample for every block of factor samples.
+    Samples at the end of a channel that don't fill a block are dropped.
+
+    Args:
+        frames: Array of shape (frames, channels, samples)
+        factor: Samples of every block, 1 keeps all of them
+        mode: DECIMATION_MEAN or DECIMATION_PICK
+
+    Returns: Array of shape (frames, channels, samples // factor)
+    """
+    if factor < 1 or factor > frames.shape[2] or mode not in DECIMATIONS:
+        raise ValueError("Invalid decimation %s of %d samples." % (mode, factor))
+
+    if factor == 1:
+        return frames
+
+    blocks = frames.shape[2] // factor
+    if mode == DECIMATION_PICK:
+        return frames[:, :, :blocks * factor:factor]
+
+    return frames[:, :, :blocks * factor].reshape(frames.shape[:2] + (blocks, factor)).mean(axis=3)
+
+
+def encode(frames, output_format=FORMAT_RAW):
+    """
+    This function encodes the frames in the given format. CBOR needs cbor2, which isn't a dependency of the
+    application.
+
+    Args:
+        frames: Array of shape (frames, channels, samples)
+        output_format: FORMAT_RAW or FORMAT_CBOR
+
+    Returns: Encoded frames
+    """
+    data = np.ascontiguousarray(frames, dtype="<f4")
+
+    if output_format == FORMAT_RAW:
+        return _SHAPE_HEADER.pack(*data.shape) + data.tobytes()
+
+    if output_format == FORMAT_CBOR:
+        try:
+            import cbor2
+        except ModuleNotFoundError:
+            raise ValueError(strings.ERR_FRAMES_NO_CBOR)
+
+        return cbor2.dumps({"shape": list(data.shape), "data": cbor2.CBORTag(_CBOR_FLOAT32_LE_TAG, data.tobytes())})
+
+    raise ValueError("Unknown frames format %s." % output_format)
+
+
+def decode(payload):
+    """
+    This function decodes frames encoded in the raw format
+
+    Returns: Array of shape (frames, channels, samples)
+    """
+    shape = _SHAPE_HEADER.unpack_from(payload)
+
+    return np.frombuffer(payload, dtype="<f4", offset=_SHAPE_HEADER.size).reshape(shape)
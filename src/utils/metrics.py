@@ -0,0 +1,238 @@
+import bisect
+import contextlib
+import math
+import threading
+import time
+
+""" Minimal metrics registry with counters, gauges and latency histograms, rendered in the Prometheus
+text exposition format. It has no dependencies, so it can be used from every module of the application. """
+
+''' Default histogram buckets, in seconds '''
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _format_labels(names, values, extra=None):
+    """
+    This function formats the labels of a sample
+    """
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+
+    if not pairs:
+        return ""
+
+    escaped = ('%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+               for name, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value):
+    """
+    This function formats the value of a sample
+    """
+    if value == math.inf:
+        return "+Inf"
+
+    return repr(float(value))
+
+
+class Counter:
+    """
+    This class implements a counter, with a value for every combination of label values
+    """
+
+    type = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """
+        This method increments the counter of the given label values
+        """
+        key = tuple(labels[label] for label in self.labels)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """
+        This method returns the counter of the given label values
+        """
+        return self._values.get(tuple(labels[label] for label in self.labels), 0)
+
+    def samples(self):
+        """
+        This method returns the lines of the samples of the counter
+        """
+        with self._lock:
+            values = list(self._values.items())
+
+        return ["%s%s %s" % (self.name, _format_labels(self.labels, key), _format_value(value))
+                for key, value in values]
+
+
+class Gauge:
+    """
+    This class implements a gauge whose value is read from a function when the metrics are collected.
+    The function returns a number, or a dict from label values tuples to numbers. It can also expose
+    a counter that is kept somewhere else, with type "counter".
+    """
+
+    def __init__(self, name, documentation, function, labels=(), type="gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.function = function
+        self.labels = tuple(labels)
+        self.type = type
+
+    def samples(self):
+        """
+        This method returns the lines of the samples of the gauge
+        """
+        values = self.function()
+
+        if not isinstance(values, dict):
+            values = {(): values}
+
+        return ["%s%s %s" % (self.name, _format_labels(self.labels, key), _format_value(value))
+                for key, value in values.items() if value is not None]
+
+
+class Histogram:
+    """
+    This class implements a histogram of observed values, with a count for every bucket, a total count and
+    the sum of the values, for every combination of label values. Observing a value costs O(log(buckets)).
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """
+        This method adds an observed value
+        """
+        key = tuple(labels[label] for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # Bucket counts, plus the +Inf bucket, count and sum
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0, 0.0]
+
+            counts[index] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels):
+        """
+        This method returns a context manager that observes the seconds spent inside it
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        """
+        This method returns the number of observed values of the given label values
+        """
+        counts = self._values.get(tuple(labels[label] for label in self.labels))
+        return 0 if counts is None else counts[-2]
+
+    def samples(self):
+        """
+        This method returns the lines of the samples of the histogram
+        """
+        with self._lock:
+            values = [(key, list(counts)) for key, counts in self._values.items()]
+
+        lines = []
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.labels, key, ("le", _format_value(bound)))
+                lines.append("%s_bucket%s %s" % (self.name, labels, cumulative))
+            lines.append("%s_count%s %s" % (self.name, _format_labels(self.labels, key), counts[-2]))
+            lines.append("%s_sum%s %s" % (self.name, _format_labels(self.labels, key), _format_value(counts[-1])))
+
+        return lines
+
+
+class MetricsRegistry:
+    """
+    This class holds all the metrics of the application. Metrics are created the first time they are
+    requested, and the same metric is returned for the same name afterwards.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name, factory):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+
+            return metric
+
+    def counter(self, name, documentation, labels=()):
+        """
+        This method returns the counter with the given name
+        """
+        return self._get(name, lambda: Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        """
+        This method returns the histogram with the given name
+        """
+        return self._get(name, lambda: Histogram(name, documentation, labels, buckets))
+
+    def gauge(self, name, documentation, function, labels=(), type="gauge"):
+        """
+        This method registers a gauge, replacing the previous one with the same name
+        """
+        gauge = Gauge(name, documentation, function, labels, type)
+
+        with self._lock:
+            self._metrics[name] = gauge
+
+        return gauge
+
+    def render(self):
+        """
+        This method returns all the metrics in the Prometheus text exposition format
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception:
+                # A failing gauge mustn't break the rest of the metrics
+                continue
+
+            lines.append("# HELP %s %s" % (metric.name, metric.documentation))
+            lines.append("# TYPE %s %s" % (metric.name, metric.type))
+            lines.extend(samples)
+
+        return "\n".join(lines) + "\n"
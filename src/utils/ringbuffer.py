@@ -0,0 +1,115 @@
+import threading
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    This class implements a fixed capacity ring buffer backed by a preallocated numpy array.
+    When the buffer is full, every new item overwrites the oldest one, so memory and the cost
+    of an append stay constant no matter how long the buffer has not been read.
+    """
+
+    def __init__(self, capacity, dtype=np.float64, shape=()):
+        """
+        Constructor of the class
+
+        Args:
+            capacity: Max number of items stored in the buffer
+            dtype: Numpy dtype of every item
+            shape: Shape of every item, empty for scalar items
+        """
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be greater than zero.")
+
+        self.capacity = capacity
+        self.dtype = np.dtype(dtype)
+        self.shape = tuple(shape)
+        self._buffer = np.zeros((capacity,) + self.shape, dtype=self.dtype)
+        self._spare = None
+        self._index = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value):
+        """
+        This method appends a new item to the buffer in O(1)
+        """
+        with self._lock:
+            self._buffer[self._index] = value
+            self._index += 1
+
+            if self._index == self.capacity:
+                self._index = 0
+
+            if self._count < self.capacity:
+                self._count += 1
+
+    def mean(self):
+        """
+        This method returns the mean of the stored items without copying them, or NaN if it is empty
+        """
+        with self._lock:
+            if self._count == 0:
+                return np.nan
+
+            return self._buffer[:self._count].mean(axis=0)
+
+    def values(self):
+        """
+        This method returns a copy of the stored items, from the oldest to the newest one
+        """
+        with self._lock:
+            if self._count < self.capacity:
+                return self._buffer[:self._count].copy()
+
+            return np.concatenate((self._buffer[self._index:], self._buffer[:self._index]))
+
+    def last(self, n):
+        """
+        This method returns a copy of the newest n items, from the oldest to the newest one
+
+        Args:
+            n: Number of items, all the stored items are returned if there are fewer
+
+        Returns: Array of shape (items,) + shape
+        """
+        with self._lock:
+            n = max(0, min(n, self._count))
+            first = self._index - n
+
+            if first >= 0:
+                return self._buffer[first:self._index].copy()
+
+            return np.concatenate((self._buffer[first:], self._buffer[:self._index]))
+
+    def clear(self):
+        """
+        This method deletes all the stored items
+        """
+        with self._lock:
+            self._index = 0
+            self._count = 0
+
+    def swap(self):
+        """
+        This method swaps the internal array with an empty one and returns a view of the stored items.
+
+        The swap is done while holding the lock, so a writer thread can keep appending items to the
+        new array while the returned items are processed without any copy. The returned view is only
+        valid until the next call to this method, and once the buffer has wrapped around, its items
+        are not ordered by age.
+        """
+        with self._lock:
+            if self._spare is None:
+                self._spare = np.zeros_like(self._buffer)
+
+            full, count = self._buffer, self._count
+            self._buffer, self._spare = self._spare, full
+            self._index = 0
+            self._count = 0
+
+        return full[:count]
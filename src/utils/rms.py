@@ -0,0 +1,122 @@
+import numpy as np
+
+
+def rms(data):
+    """
+    This function gets the RMS value of a vector, or of every row of a matrix, in a single pass
+    """
+    data = np.asarray(data, dtype=np.float64)
+
+    if data.shape[-1] == 0:
+        return np.zeros(data.shape[:-1]) if data.ndim > 1 else 0
+
+    if data.ndim == 1:
+        return np.sqrt(np.dot(data, data) / len(data))
+
+    return np.sqrt(np.einsum('ij,ij->i', data, data) / data.shape[-1])
+
+
+class RmsEngine:
+    """
+    This class computes the RMS value of several AC channels, frame after frame.
+
+    It has two modes:
+        - Whole window mode (window is None): the RMS value is computed over every frame on its own.
+        - Sliding window mode: the RMS value is computed over the last `window` samples of every channel,
+          no matter how many frames they were received in. Running sums of squares are kept between frames,
+          so every frame costs O(frame length), not O(window).
+    """
+
+    ''' Number of sliding window updates between exact recomputations of the running sums '''
+    RESYNC_UPDATES = 1000
+
+    def __init__(self, channels, window=None):
+        """
+        Constructor of the class
+
+        Args:
+            channels: Number of AC channels
+            window: Length of the sliding window in samples, None for whole window mode
+        """
+        if window is not None and window <= 0:
+            raise ValueError("RMS window must be greater than zero.")
+
+        self.channels = channels
+        self.window = window
+        self.last_rms = np.zeros(channels)
+
+        if window is not None:
+            self._squares = np.zeros((channels, window))
+            self._sums = np.zeros(channels)
+            self._index = 0
+            self._count = 0
+            self._updates = 0
+
+    def reset(self):
+        """
+        This method deletes the sliding window history
+        """
+        self.last_rms = np.zeros(self.channels)
+
+        if self.window is not None:
+            self._sums[:] = 0
+            self._index = 0
+            self._count = 0
+            self._updates = 0
+
+    def process(self, frame):
+        """
+        This method adds a new frame, with a row of samples for every channel, and returns the current
+        RMS value of every channel.
+        """
+        frame = np.asarray(frame, dtype=np.float64)
+
+        if self.window is None:
+            self.last_rms = rms(frame)
+        else:
+            self._add_squares(frame * frame)
+            self.last_rms = np.sqrt(np.maximum(self._sums, 0) / max(self._count, 1))
+
+        return self.last_rms
+
+    def _add_squares(self, squares):
+        """
+        This method adds the squares of new samples to the sliding window and updates the running sums
+        """
+        window = self.window
+        n = squares.shape[1]
+
+        if n >= window:
+            # The frame fills the whole window, restart the running sums
+            self._squares[:] = squares[:, n - window:]
+            self._sums = self._squares.sum(axis=1)
+            self._index = 0
+            self._count = window
+            return
+
+        # Positions of the new samples, in at most two contiguous slices
+        first = min(n, window - self._index)
+        second = n - first
+        slices = ((slice(self._index, self._index + first), squares[:, :first]),
+                  (slice(0, second), squares[:, first:]))
+
+        for positions, new in slices:
+            if new.shape[1] == 0:
+                continue
+
+            # Samples are stored in order, so the window is either full or the positions are empty
+            if self._count == window:
+                self._sums -= self._squares[:, positions].sum(axis=1)
+
+            self._sums += new.sum(axis=1)
+            self._squares[:, positions] = new
+            self._count = min(self._count + new.shape[1], window)
+
+        self._index = (self._index + n) % window
+
+        # Avoid the drift of the running sums because of floating point rounding
+        self._updates += 1
+        if self._updates >= self.RESYNC_UPDATES:
+            self._sums = self._squares[:, :self._count].sum(axis=1) if self._count < window \
+                else self._squares.sum(axis=1)
+            self._updates = 0